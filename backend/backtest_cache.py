@@ -0,0 +1,272 @@
+"""
+Persistent cache of /api/backtest/sector results (SQLite under data/).
+
+A sector backtest is deterministic given its canonical request (defaults filled
+in, filters and rules sorted, see main._canonical_backtest_request), the day it
+runs on (the rebalance grid is anchored on today) and the versions of its
+inputs: the DefeatBeta dataset version plus the local files it reads. The cache
+key is a SHA-256 over all of those, so a new dataset version or an edited
+sector-metrics.json simply stops matching old rows; the key doubles as the
+response ETag.
+
+Rows hold the response body without its per-request fields (request_id, echoed
+params, timings), which the endpoint fills in on a hit. The database runs in
+WAL mode so several worker processes share it. Inspect and purge entries via
+GET / DELETE /admin/backtest-cache (admin token required).
+
+Lookups are read-only: hit counts are kept in memory and written together with
+the next store (or when the admin endpoints read them). Every store prunes rows
+older than BACKTEST_CACHE_MAX_AGE_DAYS and, past BACKTEST_CACHE_MAX_ENTRIES,
+the least recently used ones, so the file stays bounded even though each
+run date gets its own keys.
+
+Env:
+  BACKTEST_CACHE_PATH          SQLite file (default data/backtest_cache.sqlite3)
+  BACKTEST_CACHE_MAX_AGE_DAYS  drop entries created longer ago than this (default 7)
+  BACKTEST_CACHE_MAX_ENTRIES   keep at most this many entries (default 2000)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_BACKTEST_CACHE_PATH = Path(
+    os.getenv("BACKTEST_CACHE_PATH", str(REPO_ROOT / "data" / "backtest_cache.sqlite3"))
+)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+DEFAULT_MAX_AGE_DAYS = _env_float("BACKTEST_CACHE_MAX_AGE_DAYS", 7)
+DEFAULT_MAX_ENTRIES = int(_env_float("BACKTEST_CACHE_MAX_ENTRIES", 2000))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS backtest_results (
+    cache_key TEXT PRIMARY KEY,
+    data_version TEXT NOT NULL,
+    sector TEXT NOT NULL,
+    request TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    compute_ms INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    last_hit_at REAL
+);
+CREATE INDEX IF NOT EXISTS backtest_results_created_at ON backtest_results (created_at)
+"""
+
+
+def cache_key(canonical_request: Dict[str, Any], input_version: str) -> str:
+    blob = json.dumps({"request": canonical_request, "inputs": input_version}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def etag_for(key: str) -> str:
+    return f'"bt-{key[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 7232 weak comparison of an If-None-Match header against `etag`."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+class BacktestCache:
+    def __init__(
+        self,
+        path: Path | str = DEFAULT_BACKTEST_CACHE_PATH,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age_days = float(max_age_days)
+        self.max_entries = int(max_entries)
+        self._local = threading.local()
+        # cache_key -> (hits, last_hit_at) not yet written to the database.
+        self._hits_lock = threading.Lock()
+        self._pending_hits: Dict[str, Tuple[int, float]] = {}
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        row = conn.execute("SELECT payload FROM backtest_results WHERE cache_key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self._hits_lock:
+            hits, _last = self._pending_hits.get(key, (0, 0.0))
+            self._pending_hits[key] = (hits + 1, time.time())
+        return json.loads(row[0])
+
+    def _flush_hits(self, conn: sqlite3.Connection) -> None:
+        """Write buffered hit counts; call inside a write transaction."""
+        with self._hits_lock:
+            pending, self._pending_hits = self._pending_hits, {}
+        if pending:
+            conn.executemany(
+                "UPDATE backtest_results SET hits = hits + ?, last_hit_at = ? WHERE cache_key = ?",
+                [(hits, last_hit_at, key) for key, (hits, last_hit_at) in pending.items()],
+            )
+
+    def _prune(self, conn: sqlite3.Connection) -> int:
+        """Drop entries past max_age_days, then the least recently used beyond max_entries."""
+        deleted = 0
+        if self.max_age_days > 0:
+            cutoff = time.time() - self.max_age_days * 86400
+            deleted += conn.execute("DELETE FROM backtest_results WHERE created_at < ?", (cutoff,)).rowcount
+        if self.max_entries > 0:
+            deleted += conn.execute(
+                "DELETE FROM backtest_results WHERE cache_key IN ("
+                "SELECT cache_key FROM backtest_results "
+                "ORDER BY coalesce(last_hit_at, created_at) DESC, created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        return int(deleted)
+
+    def flush(self) -> None:
+        with self._connect() as conn:
+            self._flush_hits(conn)
+
+    def put(
+        self,
+        key: str,
+        data_version: str,
+        sector: str,
+        canonical_request: Dict[str, Any],
+        payload: Dict[str, Any],
+        compute_ms: int,
+    ) -> None:
+        with self._connect() as conn:
+            self._flush_hits(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO backtest_results "
+                "(cache_key, data_version, sector, request, payload, created_at, compute_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    data_version,
+                    sector,
+                    json.dumps(canonical_request, sort_keys=True),
+                    json.dumps(payload, default=str),
+                    time.time(),
+                    int(compute_ms),
+                ),
+            )
+            self._prune(conn)
+
+    def entries(self, sector: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recently created entries first, without their payloads."""
+        self.flush()
+        sql = (
+            "SELECT cache_key, data_version, sector, request, created_at, compute_ms, hits, last_hit_at, "
+            "length(payload) FROM backtest_results"
+        )
+        args: List[Any] = []
+        if sector:
+            sql += " WHERE sector = ?"
+            args.append(sector)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        args.append(int(limit))
+        return [
+            {
+                "key": key,
+                "etag": etag_for(key),
+                "data_version": version,
+                "sector": sec,
+                "request": json.loads(request),
+                "created_at": created_at,
+                "compute_ms": compute_ms,
+                "hits": hits,
+                "last_hit_at": last_hit_at,
+                "payload_bytes": size,
+            }
+            for key, version, sec, request, created_at, compute_ms, hits, last_hit_at, size in self._connect()
+            .execute(sql, args)
+            .fetchall()
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        self.flush()
+        count, size, hits = self._connect().execute(
+            "SELECT count(*), coalesce(sum(length(payload)), 0), coalesce(sum(hits), 0) FROM backtest_results"
+        ).fetchone()
+        versions = self._connect().execute(
+            "SELECT data_version, count(*) FROM backtest_results GROUP BY data_version ORDER BY max(created_at) DESC"
+        ).fetchall()
+        return {
+            "path": str(self.path),
+            "entries": int(count),
+            "payload_bytes": int(size),
+            "hits": int(hits),
+            "max_age_days": self.max_age_days,
+            "max_entries": self.max_entries,
+            "versions": [{"data_version": v, "entries": n} for v, n in versions],
+        }
+
+    def purge(
+        self,
+        keys: Optional[List[str]] = None,
+        sector: Optional[str] = None,
+        keep_data_version: Optional[str] = None,
+    ) -> int:
+        """
+        Delete entries; with no arguments, all of them.
+
+        `keys` / `sector` restrict the delete; `keep_data_version` deletes only
+        entries of other dataset versions.
+        """
+        clauses: List[str] = []
+        args: List[Any] = []
+        if keys:
+            clauses.append(f"cache_key IN ({','.join('?' for _ in keys)})")
+            args.extend(keys)
+        if sector:
+            clauses.append("sector = ?")
+            args.append(sector)
+        if keep_data_version:
+            clauses.append("data_version <> ?")
+            args.append(keep_data_version)
+        sql = "DELETE FROM backtest_results"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self._connect() as conn:
+            cur = conn.execute(sql, args)
+        return int(cur.rowcount)
+
+
+_CACHE: Optional[BacktestCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_backtest_cache() -> BacktestCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = BacktestCache()
+    return _CACHE
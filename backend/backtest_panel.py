@@ -0,0 +1,155 @@
+"""
+Point-in-time price / shares / corporate-action panel for one sector backtest.
+
+backtest_sector needs, per rebalance date:
+
+  - the latest close on or before the rebalance date (as_of) and the end date,
+  - the latest shares outstanding on or before the fundamentals cutoff,
+  - split and dividend events over the (as_of, end] holding window.
+
+Instead of a fresh set of queries per rebalance date (and per symbol list),
+`load_backtest_panel()` reads the whole sector once: one ASOF join of a
+(symbol x date) grid against stock_prices for every as_of and end date, one
+against stock_shares_outstanding for every cutoff (each per 400 symbols), and
+the split/dividend events over the full (first as_of, last end] range on first
+use. Each period is then a dict lookup, with the same shapes as
+main._query_latest_prices / _query_latest_shares, and the event lists can be fed
+to the per-window split/dividend arithmetic unchanged (it filters by date).
+"""
+from __future__ import annotations
+
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from data_io import chunked, sql_quote_list
+
+
+EventMap = Dict[str, List[Dict[str, Any]]]
+
+
+def latest_values_sql(url: str, value_column: str, symbols: Sequence[str], dates: Sequence[date]) -> str:
+    """
+    Latest non-null `value_column` with report_date <= d, for every symbol and every d.
+
+    Same row as `arg_max(value, report_date) ... WHERE report_date <= d`, for all
+    dates in one scan. Columns: symbol, as_of, value, report_date.
+    """
+    sym_in = sql_quote_list(symbols)
+    wanted = sorted(set(dates))
+    date_list = ", ".join(f"DATE '{d.isoformat()}'" for d in wanted)
+    return f"""
+    WITH grid AS (
+      SELECT s.symbol, d.as_of
+      FROM (SELECT unnest([{sym_in}]) AS symbol) s
+      CROSS JOIN (SELECT unnest([{date_list}]) AS as_of) d
+    ),
+    src AS (
+      SELECT symbol, CAST(report_date AS DATE) AS report_date, {value_column} AS value
+      FROM '{url}'
+      WHERE symbol IN ({sym_in})
+        AND {value_column} IS NOT NULL
+        AND CAST(report_date AS DATE) <= DATE '{wanted[-1].isoformat()}'
+    )
+    SELECT grid.symbol, grid.as_of, src.value, src.report_date
+    FROM grid
+    ASOF JOIN src ON grid.symbol = src.symbol AND grid.as_of >= src.report_date
+    """
+
+
+def query_latest_values(
+    query: Callable[[str], pd.DataFrame],
+    url: str,
+    value_column: str,
+    symbols: Sequence[str],
+    dates: Sequence[date],
+    value_key: str,
+    date_key: str,
+    batch_size: int = 400,
+) -> Dict[date, Dict[str, Dict[str, Any]]]:
+    """as_of -> SYMBOL -> {value_key: float|None, date_key: "YYYY-MM-DD"} for every requested date."""
+    out: Dict[date, Dict[str, Dict[str, Any]]] = {d: {} for d in dates}
+    if not symbols or not dates:
+        return out
+    for batch in chunked(list(symbols), batch_size):
+        df = query(latest_values_sql(url, value_column, batch, list(dates)))
+        if df is None or df.empty:
+            continue
+        as_of_values = [pd.Timestamp(d).date() for d in df["as_of"]]
+        for sym, as_of, value, report_date in zip(df["symbol"], as_of_values, df["value"], df["report_date"]):
+            try:
+                v = float(value) if value is not None else None
+            except Exception:
+                v = None
+            out.setdefault(as_of, {})[str(sym).upper()] = {
+                value_key: v,
+                date_key: str(report_date)[:10] if report_date is not None else None,
+            }
+    return out
+
+
+class BacktestPanel:
+    """
+    Preloaded point-in-time inputs of one backtest run.
+
+    `prices(d)` / `shares(d)` only answer the dates the panel was loaded for
+    (KeyError otherwise). `events()` runs the loader once, on first call, and is
+    safe to call from several threads.
+    """
+
+    def __init__(
+        self,
+        prices: Dict[date, Dict[str, Dict[str, Any]]],
+        shares: Dict[date, Dict[str, Dict[str, Any]]],
+        events_loader: Optional[Callable[[], Tuple[EventMap, EventMap]]] = None,
+    ):
+        self._prices = prices
+        self._shares = shares
+        self._events_loader = events_loader
+        self._events: Optional[Tuple[EventMap, EventMap]] = None
+        self._lock = threading.Lock()
+
+    def prices(self, as_of: date) -> Dict[str, Dict[str, Any]]:
+        """SYMBOL -> {"close", "price_date"}: latest close on or before `as_of`."""
+        return self._prices[as_of]
+
+    def shares(self, as_of: date) -> Dict[str, Dict[str, Any]]:
+        """SYMBOL -> {"shares", "shares_date"}: latest shares outstanding on or before `as_of`."""
+        return self._shares[as_of]
+
+    def events(self) -> Tuple[EventMap, EventMap]:
+        """(split events, dividend events) per symbol over the panel's full date range."""
+        if self._events is None:
+            with self._lock:
+                if self._events is None:
+                    self._events = self._events_loader() if self._events_loader else ({}, {})
+        return self._events
+
+
+def load_backtest_panel(
+    query: Callable[[str], pd.DataFrame],
+    prices_url: str,
+    shares_url: str,
+    symbols: Sequence[str],
+    price_dates: Sequence[date],
+    share_dates: Sequence[date],
+    events_loader: Optional[Callable[[], Tuple[EventMap, EventMap]]] = None,
+    batch_size: int = 400,
+) -> BacktestPanel:
+    """
+    Closes at every `price_dates` entry and shares at every `share_dates` entry for `symbols`.
+
+    `events_loader` should return (split events, dividend events) covering every
+    holding window the panel will be asked about; it is deferred until
+    `BacktestPanel.events()` is first called.
+    """
+    symbols = sorted(set(symbols))
+    prices = query_latest_values(
+        query, prices_url, "close", symbols, sorted(set(price_dates)), "close", "price_date", batch_size
+    )
+    shares = query_latest_values(
+        query, shares_url, "shares_outstanding", symbols, sorted(set(share_dates)), "shares", "shares_date", batch_size
+    )
+    return BacktestPanel(prices, shares, events_loader)
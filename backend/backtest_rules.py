@@ -0,0 +1,169 @@
+"""
+Read-only index over the precomputed rule search (data/backtest_rule_search.json).
+
+/api/backtest/rules filters the rule-search rows by sector / cap / holding period
+and pages through them sorted by one of RULE_SORT_FIELDS. `BacktestRulesIndex` is
+built once per file version and never modified afterwards:
+
+  rows        tuple of the JSON rows, in file order
+  indexes     field value -> sorted int array of row positions (sector, cap, holding_years)
+  orderings   per sort field and direction, the row positions in sorted order, plus
+              each row's rank in that order
+
+A query intersects the index arrays of its filters and takes the page from the
+precomputed ordering (argpartition on the ranks of the matching rows when it is
+a subset), so no request copies or re-sorts the full list and concurrent
+requests share the same index. Sort order matches the endpoint's original
+list.sort: stable by file order, missing (None / NaN) values last in both
+directions.
+
+`get_backtest_rules_index()` rebuilds the index when the file changes
+(data_io.file_version); a file that fails to parse keeps the previous index.
+"""
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from data_io import VersionedLoader, file_version
+
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent / "data" / "backtest_rule_search.json"
+
+NUMERIC_SORT_FIELDS = (
+    "holding_years",
+    "train_avg_portfolio",
+    "train_avg_benchmark",
+    "train_avg_excess",
+    "train_win_rate",
+    "test_avg_portfolio",
+    "test_avg_benchmark",
+    "test_avg_excess",
+    "test_win_rate",
+)
+TEXT_SORT_FIELDS = ("rule_id", "sector", "cap")
+RULE_SORT_FIELDS = TEXT_SORT_FIELDS + NUMERIC_SORT_FIELDS
+INDEXED_FIELDS = ("sector", "cap", "holding_years")
+
+
+def _numeric(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) else math.nan
+
+
+class BacktestRulesIndex:
+    def __init__(self, rows: Sequence[Dict[str, Any]]):
+        self.rows: Tuple[Dict[str, Any], ...] = tuple(r for r in rows if isinstance(r, dict))
+        n = len(self.rows)
+
+        self.indexes: Dict[str, Dict[Any, np.ndarray]] = {}
+        for field in INDEXED_FIELDS:
+            positions: Dict[Any, List[int]] = {}
+            for i, row in enumerate(self.rows):
+                value = row.get(field)
+                if value is not None and value != "":
+                    positions.setdefault(value, []).append(i)
+            self.indexes[field] = {value: np.asarray(pos, dtype=np.int64) for value, pos in positions.items()}
+
+        self.sectors = sorted(v for v in self.indexes["sector"] if isinstance(v, str))
+        self.caps = sorted(v for v in self.indexes["cap"] if isinstance(v, str))
+        self.holding_years = sorted(v for v in self.indexes["holding_years"] if isinstance(v, int) and v)
+
+        # (field, descending) -> (row positions in sorted order, rank of each row in that order)
+        self.orderings: Dict[Tuple[str, bool], Tuple[np.ndarray, np.ndarray]] = {}
+        tiebreak = np.arange(n)
+        for field in RULE_SORT_FIELDS:
+            for descending in (False, True):
+                if field in NUMERIC_SORT_FIELDS:
+                    values = np.asarray([_numeric(r.get(field)) for r in self.rows], dtype=np.float64)
+                    missing = np.isnan(values)
+                    key = np.where(missing, 0.0, values)
+                    order = np.lexsort((tiebreak, -key if descending else key, missing))
+                else:
+                    present = [i for i, r in enumerate(self.rows) if r.get(field) is not None]
+                    absent = [i for i, r in enumerate(self.rows) if r.get(field) is None]
+                    # sorted(reverse=True) keeps equal keys in file order, like the original list.sort.
+                    ranked = sorted(present, key=lambda i: str(self.rows[i][field]), reverse=descending)
+                    order = np.asarray(ranked + absent, dtype=np.int64)
+                rank = np.empty(n, dtype=np.int64)
+                rank[order] = tiebreak
+                self.orderings[(field, descending)] = (order, rank)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def matching(
+        self,
+        sector: Optional[str] = None,
+        cap: Optional[str] = None,
+        holding_years: Optional[int] = None,
+    ) -> Optional[np.ndarray]:
+        """Sorted positions of the rows matching every given filter; None when nothing filters."""
+        selected: Optional[np.ndarray] = None
+        for field, value in (("sector", sector), ("cap", cap), ("holding_years", holding_years)):
+            if value is None:
+                continue
+            positions = self.indexes[field].get(value, np.empty(0, dtype=np.int64))
+            selected = positions if selected is None else np.intersect1d(selected, positions, assume_unique=True)
+        return selected
+
+    def query(
+        self,
+        sector: Optional[str] = None,
+        cap: Optional[str] = None,
+        holding_years: Optional[int] = None,
+        sort_by: str = "train_avg_excess",
+        descending: bool = True,
+        offset: int = 0,
+        limit: int = 25,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """(rows of the requested page, total matching rows)."""
+        order, rank = self.orderings[(sort_by, descending)]
+        selected = self.matching(sector, cap, holding_years)
+        end = offset + limit
+        if selected is None:
+            return [self.rows[i] for i in order[offset:end].tolist()], len(self.rows)
+
+        total = len(selected)
+        if offset >= total:
+            return [], total
+        ranks = rank[selected]
+        if end < total:
+            # Only the first `end` matches need ordering.
+            head = np.argpartition(ranks, end - 1)[:end]
+            page = head[np.argsort(ranks[head])][offset:]
+        else:
+            page = np.argsort(ranks)[offset:]
+        return [self.rows[i] for i in selected[page].tolist()], total
+
+
+_LOADER = VersionedLoader("backtest/rules")
+
+
+def _load_index(path: Path) -> BacktestRulesIndex:
+    if file_version(path) is None:
+        print(f"[backtest/rules] Warning: {path} not found", flush=True)
+        return BacktestRulesIndex([])
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    index = BacktestRulesIndex(data if isinstance(data, list) else [])
+    print(f"[backtest/rules] Loaded {len(index)} precomputed rules", flush=True)
+    return index
+
+
+def get_backtest_rules_index(path: Path | str = DEFAULT_RULES_PATH) -> BacktestRulesIndex:
+    """
+    Process-wide index of `path`, rebuilt when the file changes (empty if it is missing).
+
+    A file that fails to parse keeps the previous index in service until the file
+    changes again; with no previous index the result is empty.
+    """
+    path = Path(path)
+    try:
+        return _LOADER.get(str(path), [path], lambda: _load_index(path))
+    except Exception as exc:
+        print(f"[backtest/rules] Error loading rules: {exc}", flush=True)
+        return BacktestRulesIndex([])
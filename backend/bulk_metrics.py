@@ -0,0 +1,710 @@
+"""
+Set-based /metrics for many symbols.
+
+`_compute_symbol_metrics` (main.py) derives one symbol's metrics through Ticker
+methods, ~40 DuckDB queries per symbol. For a batch of N symbols this module
+reads every input once, with `symbol IN (...)` queries:
+
+    stock_prices ASOF JOIN stock_tailing_eps  -> last price/EPS rows per symbol
+    stock_shares_outstanding, stock_tailing_eps,
+    stock_statement (metric items),
+    stock_dividend_events                     -> 4 queries
+    company_tickers.json                      -> 1 query (reporting currency)
+    exchange_rate (non-USD currencies)        -> 0-1 query
+    EV items (statement_items.py)             -> 1 query
+
+and derives the metrics from those frames without further remote reads:
+
+  - ROE/ROA/ROIC, quarterly margins, YoY growth and TTM revenue run the Ticker
+    SQL with PARTITION BY symbol on an in-memory DuckDB over the batch frames;
+  - as-of lookups (shares, FX rates, TTM revenue and book value at the last
+    price, EPS growth for PEG) are `pd.merge_asof(..., by=...)` over the batch;
+  - the label-matched financial health and cash flow metrics are formatted from
+    the batch's statement rows (`Ticker.statement_from_rows`) and passed to the
+    main.py helpers unchanged.
+
+Results match `_compute_symbol_metrics` (see tests/test_bulk_metrics.py), which
+stays the per-symbol path and the fallback when a batch fails.
+
+Usage (see `_bulk_symbol_metrics` in main.py):
+
+    batch = MetricsBatch.load(query, HuggingFaceClient(), CompanyMeta(), symbols)
+    metrics = batch.metrics(financial_health, cash_flow)
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from defeatbeta_api.data.statement import Statement
+from defeatbeta_api.data.ticker import Ticker
+from defeatbeta_api.utils.const import (
+    annual,
+    balance_sheet,
+    cash_flow,
+    exchange_rate,
+    income_statement,
+    quarterly,
+    stock_dividend_events,
+    stock_prices,
+    stock_shares_outstanding,
+    stock_statement,
+    stock_tailing_eps,
+)
+
+from data_io import sql_path, sql_quote_list
+from statement_items import enterprise_value, fetch_ev_items
+
+
+# Quarterly items read outside the quarterly income statement / cash flow rows
+# (ROE, ROA, ROIC, book value and TTM revenue don't filter on finance_type).
+QUARTERLY_ITEMS = ("stockholders_equity", "total_assets", "invested_capital", "total_revenue")
+
+MARGINS = (
+    ("grossMargin", "gross_profit"),
+    ("operatingMargin", "operating_income"),
+    ("netMargin", "net_income_common_stockholders"),
+    ("ebitdaMargin", "ebitda"),
+)
+
+GROWTH_ITEMS = (
+    ("revenueGrowthTTM", income_statement, "total_revenue"),
+    ("ebitGrowthTTM", income_statement, "operating_income"),
+    ("fcfGrowthTTM", cash_flow, "free_cash_flow"),
+)
+
+STATEMENT_COLUMNS = ["symbol", "report_date", "item_name", "item_value", "finance_type", "period_type"]
+
+
+def _float(value: Any) -> Optional[float]:
+    """Like main._sanitize_float: None for missing, NaN and +/-Inf."""
+    if value is None:
+        return None
+    try:
+        fval = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(fval) or math.isinf(fval) else fval
+
+
+def _dates(values: pd.Series) -> pd.Series:
+    return pd.to_datetime(values).astype("datetime64[ns]")
+
+
+def _last_rows(frame: pd.DataFrame, by: Sequence[str], order: str) -> pd.DataFrame:
+    """The last row of each `by` group when ordered by `order` (keeps NaN values, unlike groupby().last())."""
+    return frame.sort_values(order, kind="stable").drop_duplicates(list(by), keep="last")
+
+
+# ----------------------------------------------------------------------
+# SQL
+# ----------------------------------------------------------------------
+
+def _latest_prices_sql(prices_url: str, eps_url: str, symbols: Sequence[str]) -> str:
+    """
+    Per symbol: the last price row by date with its as-of tailing EPS (market cap,
+    P/E, P/S, P/B), the last close in file order (dividend yield, as Ticker.price()
+    returns it) and the last row with a P/E (PEG).
+    """
+    in_list = sql_quote_list(symbols)
+    return f"""
+    WITH prices AS (
+      SELECT symbol, CAST(report_date AS DATE) AS report_date, close, file_row_number
+      FROM read_parquet('{sql_path(prices_url)}', file_row_number = true)
+      WHERE symbol IN ({in_list})
+    ),
+    eps AS (
+      SELECT symbol, CAST(report_date AS DATE) AS report_date, tailing_eps
+      FROM '{sql_path(eps_url)}'
+      WHERE symbol IN ({in_list})
+    ),
+    joined AS (
+      SELECT p.*, e.report_date AS eps_report_date, e.tailing_eps
+      FROM prices p
+      ASOF LEFT JOIN eps e ON p.symbol = e.symbol AND p.report_date >= e.report_date
+    ),
+    latest AS (
+      SELECT
+        symbol,
+        arg_max({{'report_date': report_date, 'close': close, 'tailing_eps': tailing_eps}}, report_date) AS last_row,
+        arg_max({{'close': close}}, file_row_number) AS file_row,
+        arg_max({{'close': close, 'tailing_eps': tailing_eps, 'eps_report_date': eps_report_date}}, report_date)
+          FILTER (WHERE close IS NOT NULL AND tailing_eps IS NOT NULL
+                  AND NOT isnan(close::DOUBLE) AND NOT isnan(tailing_eps::DOUBLE)
+                  AND NOT (close = 0 AND tailing_eps = 0)) AS pe_row
+      FROM joined
+      GROUP BY symbol
+    )
+    SELECT
+      symbol,
+      last_row.report_date AS report_date,
+      last_row.close AS close,
+      last_row.tailing_eps AS tailing_eps,
+      file_row.close AS file_close,
+      pe_row.close AS pe_close,
+      pe_row.tailing_eps AS pe_tailing_eps,
+      pe_row.eps_report_date AS pe_eps_report_date
+    FROM latest
+    """
+
+
+def _rows_sql(url: str, columns: str, symbols: Sequence[str], where: str = "") -> str:
+    """Rows of `symbols` in source order (per-symbol code relies on it, e.g. `iloc[-1]`)."""
+    return f"""
+    SELECT {columns}, file_row_number
+    FROM read_parquet('{sql_path(url)}', file_row_number = true)
+    WHERE symbol IN ({sql_quote_list(symbols)}) {where}
+    ORDER BY symbol, file_row_number
+    """
+
+
+def _statement_where() -> str:
+    return f"""
+      AND (
+        (period_type = '{quarterly}'
+         AND (finance_type IN ('{income_statement}', '{cash_flow}') OR item_name IN ({sql_quote_list(QUARTERLY_ITEMS)})))
+        OR (period_type = '{annual}' AND finance_type = '{balance_sheet}')
+      )
+    """
+
+
+def _latest_by_symbol(select: str) -> str:
+    return f"({select} QUALIFY row_number() OVER (PARTITION BY symbol ORDER BY report_date DESC) = 1)"
+
+
+def _margin_sql(metric: str, numerator: str) -> str:
+    """select_margin_for_symbol (quarterly), latest report per symbol."""
+    return _latest_by_symbol(f"""
+      SELECT '{metric}' AS metric, symbol, report_date, round(numerator / total_revenue, 4) AS value
+      FROM (
+        SELECT
+          symbol,
+          report_date,
+          MAX(CASE WHEN item_name = '{numerator}' THEN item_value END) AS numerator,
+          MAX(CASE WHEN item_name = 'total_revenue' THEN item_value END) AS total_revenue
+        FROM statement
+        WHERE finance_type = 'income_statement'
+          AND report_date != 'TTM'
+          AND item_name IN ('{numerator}', 'total_revenue')
+          AND period_type = 'quarterly'
+        GROUP BY symbol, report_date
+      )
+    """)
+
+
+def _average_return_sql(metric: str, items: Sequence[str], columns: Sequence[str], balance: str, value: str, complete: bool) -> str:
+    """
+    select_roe/roa/roic_by_symbol: the symbol's latest run of consecutive quarters,
+    `value` over the average of the beginning and ending `balance`; latest report.
+    """
+    pivot = ",\n".join(f"MAX(CASE WHEN item_name = '{c}' THEN item_value END) AS {c}" for c in columns)
+    where = "WHERE " + " AND ".join(f"{c} IS NOT NULL" for c in columns) if complete else ""
+    return _latest_by_symbol(f"""
+      WITH pivoted AS (
+        SELECT symbol, report_date, {pivot}
+        FROM statement
+        WHERE item_name IN ({sql_quote_list(items)})
+          AND report_date != 'TTM'
+          AND period_type = 'quarterly'
+          AND finance_type IN ('income_statement', 'balance_sheet')
+        GROUP BY symbol, report_date
+      ),
+      base AS (
+        SELECT *, YEAR(report_date::DATE) * 4 + QUARTER(report_date::DATE) AS continuous_id
+        FROM pivoted
+        {where}
+      ),
+      grouped AS (
+        SELECT *, continuous_id - ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY continuous_id) AS group_id
+        FROM base
+      ),
+      latest_run AS (
+        SELECT symbol, arg_max(group_id, continuous_id) AS group_id
+        FROM grouped
+        GROUP BY symbol
+      ),
+      lagged AS (
+        SELECT g.*, LAG(g.{balance}, 1) OVER (PARTITION BY g.symbol ORDER BY g.report_date) AS beginning
+        FROM grouped g
+        JOIN latest_run USING (symbol, group_id)
+      ),
+      averaged AS (
+        SELECT *, (beginning + {balance}) / 2.0 AS average
+        FROM lagged
+        WHERE beginning IS NOT NULL
+      )
+      SELECT '{metric}' AS metric, symbol, report_date, {value} AS value
+      FROM averaged
+    """)
+
+
+def _signed_return(numerator: str) -> str:
+    return (
+        f"ROUND(CASE WHEN {numerator} < 0 OR average < 0 THEN -ABS({numerator} / average) "
+        f"ELSE {numerator} / average END, 4)"
+    )
+
+
+def _latest_ratios_sql() -> str:
+    """Latest quarterly margins, ROE, ROA and ROIC per symbol as (metric, symbol, value) rows."""
+    parts = [_margin_sql(metric, item) for metric, item in MARGINS]
+    parts.append(_average_return_sql(
+        "roe",
+        ("net_income_common_stockholders", "stockholders_equity"),
+        ("net_income_common_stockholders", "stockholders_equity"),
+        "stockholders_equity",
+        _signed_return("net_income_common_stockholders"),
+        complete=True,
+    ))
+    parts.append(_average_return_sql(
+        "roa",
+        ("net_income_common_stockholders", "total_assets"),
+        ("net_income_common_stockholders", "total_assets"),
+        "total_assets",
+        _signed_return("net_income_common_stockholders"),
+        complete=True,
+    ))
+    parts.append(_average_return_sql(
+        "roic",
+        ("ebit", "tax_rate_for_calcs", "net_income_common_stockholders", "invested_capital"),
+        ("ebit", "tax_rate_for_calcs", "invested_capital"),
+        "invested_capital",
+        "round(ebit * (1 - tax_rate_for_calcs) / average, 4)",
+        complete=False,
+    ))
+    return "\nUNION ALL\n".join(parts)
+
+
+def _yoy_sql(metric_data: str, growth: str, where: str = "") -> str:
+    return f"""
+    WITH metric_data AS (
+      {metric_data}
+    ),
+    yoy AS (
+      SELECT e1.metric, e1.symbol, e1.report_date, e1.value, e2.value AS prev_value
+      FROM metric_data e1
+      LEFT JOIN metric_data e2
+        ON e1.metric = e2.metric
+       AND e1.symbol = e2.symbol
+       AND strftime(e2.report_date, '%m-%d') = strftime(e1.report_date, '%m-%d')
+       AND date_diff('year', e2.report_date, e1.report_date) = 1
+    )
+    SELECT metric, symbol, report_date, {growth} AS yoy_growth
+    FROM yoy
+    {where}
+    ORDER BY metric, symbol, report_date
+    """
+
+
+def _statement_growth_sql() -> str:
+    """select_metric_calculate_yoy_growth_by_symbol (quarterly) for GROWTH_ITEMS."""
+    metric_data = "\nUNION ALL\n".join(
+        f"""SELECT '{metric}' AS metric, symbol, CAST(report_date AS DATE) AS report_date, item_value AS value
+        FROM statement
+        WHERE finance_type = '{finance_type}' AND item_name = '{item}'
+          AND period_type = 'quarterly' AND report_date != 'TTM'"""
+        for metric, finance_type, item in GROWTH_ITEMS
+    )
+    growth = (
+        "CASE WHEN prev_value IS NOT NULL AND prev_value != 0 "
+        "THEN ROUND((value - prev_value) / ABS(prev_value), 4) ELSE NULL END"
+    )
+    return _yoy_sql(metric_data, growth, "WHERE value IS NOT NULL")
+
+
+def _eps_growth_sql() -> str:
+    """select_quarterly_eps_yoy_growth_by_symbol for the eps and tailing_eps columns."""
+    metric_data = "\nUNION ALL\n".join(
+        f"SELECT '{column}' AS metric, symbol, CAST(report_date AS DATE) AS report_date, {column} AS value FROM eps"
+        for column in ("eps", "tailing_eps")
+    )
+    growth = """CASE
+        WHEN prev_value IS NOT NULL AND prev_value != 0 THEN ROUND((value - prev_value) / ABS(prev_value), 4)
+        WHEN prev_value IS NOT NULL AND prev_value = 0 AND value > 0 THEN 1.00
+        WHEN prev_value IS NOT NULL AND prev_value = 0 AND value < 0 THEN -1.00
+        ELSE NULL
+      END"""
+    return _yoy_sql(metric_data, growth)
+
+
+TTM_REVENUE_SQL = """
+WITH quarterly_data AS (
+  SELECT symbol, report_date, item_value,
+         YEAR(report_date::DATE) * 4 + QUARTER(report_date::DATE) AS continuous_id
+  FROM statement
+  WHERE item_name = 'total_revenue'
+    AND period_type = 'quarterly'
+    AND item_value IS NOT NULL
+    AND report_date != 'TTM'
+),
+grouped AS (
+  SELECT *, continuous_id - ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY continuous_id) AS group_id
+  FROM quarterly_data
+),
+latest_run AS (
+  SELECT symbol, arg_max(group_id, continuous_id) AS group_id
+  FROM grouped
+  GROUP BY symbol
+),
+windows AS (
+  SELECT symbol, report_date,
+         SUM(item_value) OVER w AS ttm_total_revenue,
+         COUNT(*) OVER w AS quarter_count
+  FROM grouped
+  JOIN latest_run USING (symbol, group_id)
+  WINDOW w AS (PARTITION BY symbol ORDER BY CAST(report_date AS DATE) ROWS BETWEEN 3 PRECEDING AND CURRENT ROW)
+)
+SELECT symbol, report_date, ttm_total_revenue
+FROM windows
+WHERE quarter_count = 4
+"""
+
+BOOK_VALUE_SQL = """
+SELECT symbol, report_date, item_value AS book_value_of_equity
+FROM statement
+WHERE item_name = 'stockholders_equity'
+  AND period_type = 'quarterly'
+  AND item_value IS NOT NULL
+  AND report_date != 'TTM'
+"""
+
+
+# ----------------------------------------------------------------------
+# Batch
+# ----------------------------------------------------------------------
+
+class BatchStatements:
+    """
+    The Ticker methods `_compute_financial_health` and `_compute_cash_flow_health`
+    call, served from one symbol's batch rows (no queries).
+    """
+
+    def __init__(self, rows: pd.DataFrame, ttm_revenue: pd.DataFrame):
+        self._rows = rows
+        self._ttm_revenue = ttm_revenue
+        self._statements: Dict[tuple, Statement] = {}
+
+    def _statement(self, finance_type: str, period_type: str) -> Statement:
+        key = (finance_type, period_type)
+        if key not in self._statements:
+            rows = self._rows[(self._rows["finance_type"] == finance_type) & (self._rows["period_type"] == period_type)]
+            self._statements[key] = Ticker.statement_from_rows(rows[STATEMENT_COLUMNS], finance_type)
+        return self._statements[key]
+
+    def annual_balance_sheet(self) -> Statement:
+        return self._statement(balance_sheet, annual)
+
+    def quarterly_income_statement(self) -> Statement:
+        return self._statement(income_statement, quarterly)
+
+    def quarterly_cash_flow(self) -> Statement:
+        return self._statement(cash_flow, quarterly)
+
+    def ttm_revenue(self) -> pd.DataFrame:
+        return self._ttm_revenue.copy()
+
+
+class MetricsBatch:
+    """Metric inputs for one batch of symbols, read with a fixed number of queries."""
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        latest_prices: pd.DataFrame,
+        shares: pd.DataFrame,
+        eps: pd.DataFrame,
+        statements: pd.DataFrame,
+        dividends: pd.DataFrame,
+        fx: pd.DataFrame,
+        currencies: Dict[str, str],
+        ev_items: Dict[str, Dict[str, Any]],
+    ):
+        self.symbols = list(symbols)
+        self.latest_prices = latest_prices
+        self.shares = shares
+        self.eps = eps
+        self.statements = statements
+        self.dividends = dividends
+        self.fx = fx
+        self.currencies = currencies
+        self.ev_items = ev_items
+
+    @classmethod
+    def load(
+        cls,
+        query: Callable[[str], pd.DataFrame],
+        tables: Any,
+        company_meta: Any,
+        symbols: Sequence[str],
+    ) -> "MetricsBatch":
+        """
+        Read the inputs of `symbols`.
+
+        Args:
+            query: Runs SQL and returns a DataFrame (e.g. the backend's retrying DuckDB helper).
+            tables: Source of table URLs (`get_url_path`), e.g. HuggingFaceClient.
+            company_meta: CompanyMeta used for the reporting-currency lookup.
+            symbols: Tickers of the batch.
+        """
+        symbols = sorted({str(s).strip().upper() for s in symbols if str(s).strip()})
+        url = tables.get_url_path
+
+        latest_prices = query(_latest_prices_sql(url(stock_prices), url(stock_tailing_eps), symbols))
+        shares = query(_rows_sql(url(stock_shares_outstanding), "symbol, report_date, shares_outstanding", symbols))
+        eps = query(_rows_sql(url(stock_tailing_eps), "symbol, report_date, eps, tailing_eps", symbols))
+        statements = query(_rows_sql(url(stock_statement), ", ".join(STATEMENT_COLUMNS), symbols, _statement_where()))
+        dividends = query(_rows_sql(url(stock_dividend_events), "*", symbols))
+
+        # Ticker: company_info["financial_currency"] if present, else USD.
+        wanted = set(symbols)
+        currencies: Dict[str, str] = {}
+        for row in company_meta.get_all_companies_info():
+            symbol = row.get("symbol")
+            if symbol in wanted and symbol not in currencies:
+                currency = row.get("financial_currency")
+                currencies[symbol] = currency if isinstance(currency, str) and currency else "USD"
+        pairs = sorted({f"{c}=X" for c in currencies.values() if c != "USD"})
+        if pairs:
+            fx = query(
+                f"SELECT symbol, CAST(report_date AS DATE) AS report_date, close "
+                f"FROM '{sql_path(url(exchange_rate))}' WHERE symbol IN ({sql_quote_list(pairs)})"
+            )
+        else:
+            fx = pd.DataFrame({"symbol": pd.Series(dtype=object), "report_date": pd.Series(dtype="datetime64[ns]"), "close": pd.Series(dtype=float)})
+
+        ev_items = fetch_ev_items(query, url(stock_statement), symbols, batch_size=max(1, len(symbols)))
+        return cls(symbols, latest_prices, shares, eps, statements, dividends, fx, currencies, ev_items)
+
+    # ------------------------------------------------------------------
+    # Derivations
+    # ------------------------------------------------------------------
+
+    def _to_usd(self, frame: pd.DataFrame, column: str) -> pd.Series:
+        """round(`column` / the USD rate as of each row's report_date, 2); rate 1.0 for USD reporters."""
+        pairs = frame["symbol"].map(lambda s: f"{self.currencies.get(s, 'USD')}=X")
+        rate = pd.Series(1.0, index=frame.index)
+        foreign = pairs != "USD=X"
+        if foreign.any():
+            left = pd.DataFrame({"pair": pairs[foreign], "report_date": frame.loc[foreign, "report_date"]})
+            left = left.sort_values("report_date", kind="stable").reset_index()
+            rates = self.fx.rename(columns={"symbol": "pair", "close": "rate"})
+            rates = rates.assign(report_date=_dates(rates["report_date"])).sort_values("report_date", kind="stable")
+            merged = pd.merge_asof(left, rates, on="report_date", by="pair", direction="backward")
+            rate.loc[merged["index"].to_numpy()] = merged["rate"].to_numpy()
+        return (frame[column] / rate).round(2)
+
+    def _as_of(self, left: pd.DataFrame, right: pd.DataFrame, left_on: str, right_on: str) -> pd.DataFrame:
+        """merge_asof per symbol (backward), like the Ticker merges."""
+        return pd.merge_asof(
+            left.sort_values(left_on, kind="stable"),
+            right.sort_values(right_on, kind="stable"),
+            left_on=left_on,
+            right_on=right_on,
+            by="symbol",
+            direction="backward",
+        )
+
+    def _dividend_yields(self, file_close: pd.Series) -> Dict[str, Optional[float]]:
+        """_compute_dividend_yield: last four dividends by date over the last close (file order)."""
+        dividends = self.dividends.drop(columns=["file_row_number"])
+        if dividends.empty:
+            return {}
+        value_cols = [c for c in dividends.columns if any(t in c.lower() for t in ("dividend", "amount", "payment"))]
+        if not value_cols:
+            value_cols = dividends.select_dtypes(include=[np.number]).columns.tolist()[:1]
+        if not value_cols:
+            return {}
+        date_cols = [c for c in dividends.columns if any(t in c.lower() for t in ("date", "ex_date", "payment_date", "report_date"))]
+        if date_cols:
+            dividends = dividends.sort_values(["symbol", date_cols[0]], ascending=[True, False], kind="stable")
+        recent = dividends[dividends.groupby("symbol", sort=False).cumcount() < 4]
+        ttm = pd.to_numeric(recent[value_cols[0]], errors="coerce").groupby(recent["symbol"]).sum()
+
+        yields: Dict[str, Optional[float]] = {}
+        for symbol, total in ttm.items():
+            price = file_close.get(symbol)
+            if price is None or pd.isna(price) or price <= 0 or not total > 0:
+                continue
+            yields[symbol] = _float(total / float(price))
+        return yields
+
+    def metrics(
+        self,
+        financial_health: Callable[[str, Any], Dict[str, Optional[float]]],
+        cash_flow_health: Callable[[str, Any, Optional[float]], Dict[str, Optional[float]]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        The `_compute_symbol_metrics` dict for every symbol of the batch.
+
+        `financial_health(symbol, statements)` and `cash_flow_health(symbol,
+        statements, market_cap)` are main.py's label-matching helpers; they get a
+        BatchStatements instead of a Ticker.
+        """
+        con = duckdb.connect(":memory:")
+        try:
+            con.register("statement", self.statements)
+            con.register("eps", self.eps)
+            latest = con.execute(_latest_ratios_sql()).df()
+            growth = con.execute(_statement_growth_sql()).df()
+            eps_growth = con.execute(_eps_growth_sql()).df()
+            ttm = con.execute(TTM_REVENUE_SQL).df()
+            book = con.execute(BOOK_VALUE_SQL).df()
+        finally:
+            con.close()
+
+        ratios = latest.pivot(index="symbol", columns="metric", values="value") if not latest.empty else pd.DataFrame()
+
+        growth["report_date"] = _dates(growth["report_date"])
+        eps_growth["report_date"] = _dates(eps_growth["report_date"])
+        latest_growth = pd.concat([growth, eps_growth], ignore_index=True)
+        latest_growth = _last_rows(latest_growth, ["metric", "symbol"], "report_date")
+        latest_growth = latest_growth.set_index(["metric", "symbol"])["yoy_growth"]
+
+        # TTM revenue and book value in USD (Ticker.ttm_revenue / _quarterly_book_value_of_equity).
+        ttm["report_date"] = _dates(ttm["report_date"])
+        ttm["ttm_total_revenue_usd"] = self._to_usd(ttm, "ttm_total_revenue")
+        ttm = ttm.sort_values(["symbol", "report_date"], kind="stable")
+        ttm_by_symbol = dict(tuple(ttm.groupby("symbol", sort=False)))
+        latest_ttm = _last_rows(ttm, ["symbol"], "report_date").set_index("symbol")["ttm_total_revenue_usd"]
+        book["report_date"] = _dates(book["report_date"])
+        book["book_value_of_equity_usd"] = self._to_usd(book, "book_value_of_equity")
+
+        # Market cap, P/E, P/S, P/B at the last price row (Ticker.market_capitalization,
+        # ttm_pe, ps_ratio, pb_ratio).
+        prices = self.latest_prices.copy()
+        for col in ("report_date", "pe_eps_report_date"):
+            prices[col] = _dates(prices[col])
+        shares = self.shares.assign(report_date=_dates(self.shares["report_date"]))
+        last = self._as_of(
+            prices[["symbol", "report_date", "close", "tailing_eps"]],
+            shares[["symbol", "report_date", "shares_outstanding"]].rename(columns={"report_date": "shares_report_date"}),
+            "report_date",
+            "shares_report_date",
+        )
+        last["market_cap"] = (last["close"] * last["shares_outstanding"]).round(2)
+        last["ttm_pe"] = (last["close"] / last["tailing_eps"]).round(2)
+        last = self._as_of(
+            last,
+            ttm[["symbol", "report_date", "ttm_total_revenue_usd"]].rename(columns={"report_date": "ttm_report_date"}),
+            "report_date",
+            "ttm_report_date",
+        )
+        last = self._as_of(
+            last,
+            book[["symbol", "report_date", "book_value_of_equity_usd"]].rename(columns={"report_date": "book_report_date"}),
+            "report_date",
+            "book_report_date",
+        )
+        last["ps_ratio"] = (last["market_cap"] / last["ttm_total_revenue_usd"]).round(2)
+        last["pb_ratio"] = (last["market_cap"] / last["book_value_of_equity_usd"]).round(2)
+        last = last.set_index("symbol")
+
+        # PEG (Ticker.peg_ratio): P/E at the last row that has one, over EPS growth as of
+        # its EPS report and revenue growth as of that growth row.
+        peg = prices.loc[prices["pe_eps_report_date"].notna(), ["symbol", "pe_close", "pe_tailing_eps", "pe_eps_report_date"]]
+        peg = peg.assign(ttm_pe=(peg["pe_close"] / peg["pe_tailing_eps"]).round(2))
+        eps_yoy = eps_growth[eps_growth["metric"] == "eps"][["symbol", "report_date", "yoy_growth"]]
+        peg = self._as_of(
+            peg,
+            eps_yoy.rename(columns={"report_date": "fiscal_quarter", "yoy_growth": "eps_yoy_growth"}),
+            "pe_eps_report_date",
+            "fiscal_quarter",
+        )
+        peg = peg[peg["fiscal_quarter"].notna()]
+        revenue_yoy = growth[growth["metric"] == "revenueGrowthTTM"][["symbol", "report_date", "yoy_growth"]]
+        peg = self._as_of(
+            peg,
+            revenue_yoy.rename(columns={"report_date": "revenue_report_date", "yoy_growth": "revenue_yoy_growth"}),
+            "fiscal_quarter",
+            "revenue_report_date",
+        )
+        for column, growth_col in (("peg_ratio_by_revenue", "revenue_yoy_growth"), ("peg_ratio_by_eps", "eps_yoy_growth")):
+            ratio = peg["ttm_pe"] / (peg[growth_col] * 100)
+            negative = (peg["ttm_pe"] < 0) | (peg[growth_col] < 0)
+            peg[column] = pd.Series(np.where(negative, -np.abs(ratio), np.abs(ratio)), index=peg.index).round(2)
+        peg = peg.set_index("symbol")
+
+        # Shares outstanding: last row in file order (Ticker.shares()).
+        shares_out = _last_rows(self.shares, ["symbol"], "file_row_number").set_index("symbol")["shares_outstanding"]
+        dividend_yields = self._dividend_yields(prices.set_index("symbol")["file_close"])
+
+        statement_rows = dict(tuple(self.statements.groupby("symbol", sort=False)))
+        empty_rows = self.statements.iloc[0:0]
+        empty_ttm = ttm.iloc[0:0]
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for symbol in self.symbols:
+            def ratio(metric: str) -> Optional[float]:
+                if metric in ratios.columns and symbol in ratios.index:
+                    return _float(ratios.at[symbol, metric])
+                return None
+
+            def latest_yoy(metric: str) -> Optional[float]:
+                return _float(latest_growth.get((metric, symbol)))
+
+            row = last.loc[symbol] if symbol in last.index else None
+            market_cap = _float(row["market_cap"]) if row is not None else None
+
+            items = self.ev_items.get(symbol, {})
+            try:
+                ev = enterprise_value(market_cap, items)
+            except Exception:
+                ev = None
+            ebit = items.get("ebit")
+            ebitda = items.get("ebitda")
+            ev_ebit = _float(ev / ebit) if ev is not None and ebit is not None and ebit != 0 else None
+            ev_ebitda = _float(ev / ebitda) if ev is not None and ebitda is not None and ebitda != 0 else None
+            ev_sales = None
+            ttm_revenue = latest_ttm.get(symbol)
+            if ev is not None and ttm_revenue is not None and pd.notna(ttm_revenue) and ttm_revenue != 0:
+                ev_sales = _float(ev / float(ttm_revenue))
+
+            peg_ratio = None
+            if symbol in peg.index:
+                peg_row = peg.loc[symbol]
+                for column in ("peg_ratio_by_revenue", "peg_ratio_by_eps"):
+                    if pd.notna(peg_row[column]):
+                        peg_ratio = _float(peg_row[column])
+                        break
+
+            growth_metrics = {
+                "revenueGrowthTTM": latest_yoy("revenueGrowthTTM"),
+                "ebitGrowthTTM": latest_yoy("ebitGrowthTTM"),
+                "epsGrowthTTM": latest_yoy("tailing_eps"),
+                "fcfGrowthTTM": latest_yoy("fcfGrowthTTM"),
+            }
+            statements = BatchStatements(
+                statement_rows.get(symbol, empty_rows),
+                ttm_by_symbol.get(symbol, empty_ttm)[["ttm_total_revenue_usd"]],
+            )
+            results[symbol] = {
+                "symbol": symbol,
+                "marketCap": market_cap,
+                "sharesOutstanding": _float(shares_out.get(symbol)),
+                "peRatioTTM": _float(row["ttm_pe"]) if row is not None else None,
+                "priceToSalesRatioTTM": _float(row["ps_ratio"]) if row is not None and pd.notna(row["ttm_report_date"]) else None,
+                "priceToBookRatioTTM": _float(row["pb_ratio"]) if row is not None and pd.notna(row["book_report_date"]) else None,
+                "enterpriseValueOverEBITDATTM": ev_ebitda,
+                "enterpriseValueOverEBITTTM": ev_ebit,
+                "enterpriseValueToSalesTTM": ev_sales,
+                "dividendYieldTTM": dividend_yields.get(symbol),
+                "revenueGrowthTTM": growth_metrics["revenueGrowthTTM"],
+                "profitability": {
+                    "grossMargin": ratio("grossMargin"),
+                    "operatingMargin": ratio("operatingMargin"),
+                    "netMargin": ratio("netMargin"),
+                    "ebitdaMargin": ratio("ebitdaMargin"),
+                    "roe": ratio("roe"),
+                    "roa": ratio("roa"),
+                    "roic": ratio("roic"),
+                },
+                "financialHealth": financial_health(symbol, statements),
+                "cashFlow": cash_flow_health(symbol, statements, market_cap),
+                "growth": growth_metrics,
+                "valuationExtras": {"forwardPE": None, "pegRatio": peg_ratio},
+            }
+        return results
@@ -0,0 +1,110 @@
+"""
+Shared helpers for local data files and the DuckDB SQL built over DefeatBeta parquet.
+
+  file_version      (st_mtime_ns, st_size) of a file, None when it is missing; the
+                    one rule every reloading loader uses to decide a file changed
+  file_version_tag  the same as text, for cache keys built from strings
+  VersionedLoader   process-wide values rebuilt when their source files change. A
+                    rebuild that raises keeps the previous value in service (e.g. a
+                    file caught mid-write) until the files change again; the error
+                    only propagates when there is nothing to fall back to
+  sql_quote_list    'A','B' list for IN (...); "''" when empty so the SQL stays valid
+  sql_path          a path as the body of a single-quoted SQL string
+  chunked           fixed-size slices of a sequence
+"""
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+FileVersion = Optional[Tuple[int, int]]
+
+
+def file_version(path: Path | str) -> FileVersion:
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def file_version_tag(path: Path | str) -> str:
+    """file_version as "mtime_ns:size" ("-" when missing)."""
+    version = file_version(path)
+    return "-" if version is None else f"{version[0]}:{version[1]}"
+
+
+def files_version(paths: Iterable[Path | str]) -> Tuple[FileVersion, ...]:
+    return tuple(file_version(p) for p in paths)
+
+
+class VersionedLoader:
+    """
+    Values keyed by name, each tagged with the version of the files it was built from.
+
+    `get(key, paths, load)` returns the cached value while `files_version(paths)` is
+    unchanged and calls `load()` otherwise. Readers never block on a lock when the
+    value is current; a rebuild replaces the entry in one assignment.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[Tuple[FileVersion, ...], Any]] = {}
+        # Versions whose load failed, so a broken file is not re-parsed on every call.
+        self._failed: Dict[Hashable, Tuple[FileVersion, ...]] = {}
+
+    def _current(self, key: Hashable, version: Tuple[FileVersion, ...]) -> Optional[Tuple[Any]]:
+        entry = self._entries.get(key)
+        if entry is not None and (entry[0] == version or self._failed.get(key) == version):
+            return (entry[1],)
+        return None
+
+    def get(self, key: Hashable, paths: Sequence[Path | str], load: Callable[[], T]) -> T:
+        hit = self._current(key, files_version(paths))
+        if hit is not None:
+            return hit[0]
+        with self._lock:
+            version = files_version(paths)
+            hit = self._current(key, version)
+            if hit is not None:
+                return hit[0]
+            previous = self._entries.get(key)
+            try:
+                value = load()
+            except Exception as exc:
+                if previous is None:
+                    raise
+                self._failed[key] = version
+                print(f"[{self.name}] Failed to reload {key} ({exc}); serving the previous version", flush=True)
+                return previous[1]
+            self._entries[key] = (version, value)
+            self._failed.pop(key, None)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._failed.clear()
+
+
+def sql_quote_list(values: Iterable[Any]) -> str:
+    quoted = []
+    for v in values:
+        s = str(v).replace("'", "''")
+        quoted.append(f"'{s}'")
+    return ",".join(quoted) if quoted else "''"
+
+
+def sql_path(path: Path | str) -> str:
+    return str(path).replace("'", "''")
+
+
+def chunked(values: Sequence[T], size: int) -> List[List[T]]:
+    if size <= 0:
+        return [list(values)]
+    return [list(values[i:i + size]) for i in range(0, len(values), size)]
@@ -0,0 +1,95 @@
+"""
+Current DefeatBeta dataset version, used to key caches and coalesced calls.
+
+Remote data: the `update_time` from the HuggingFace dataset's spec.json.
+Local data (DEFEATBETA_LOCAL_DATA): newest parquet mtime in that directory.
+DATA_VERSION pins the version explicitly (e.g. offline runs).
+
+The lookup is cached for DATA_VERSION_TTL_SECONDS (default 300). Only the very
+first lookup (and force_refresh) blocks; once a version is known, an expired entry
+is refreshed on a background thread while callers keep getting the last known
+version, so no request waits on the HuggingFace call. On failure the last known
+version is kept (or "unknown" if none yet) until the next refresh.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+_LOCK = threading.Lock()
+_FETCH_LOCK = threading.RLock()
+_VERSION: Optional[str] = None
+_CHECKED_AT = 0.0
+_REFRESHING = False
+
+
+def _ttl_seconds() -> float:
+    try:
+        return float(os.getenv("DATA_VERSION_TTL_SECONDS", "300"))
+    except ValueError:
+        return 300.0
+
+
+def _fetch_version() -> str:
+    local_path = os.getenv("DEFEATBETA_LOCAL_DATA")
+    if local_path:
+        mtimes = [p.stat().st_mtime for p in Path(local_path).glob("*.parquet")]
+        return f"local:{int(max(mtimes))}" if mtimes else "local:empty"
+
+    from defeatbeta_api.client.hugging_face_client import HuggingFaceClient
+
+    return str(HuggingFaceClient(max_retries=1, timeout=5).get_data_update_time())
+
+
+def _refresh() -> str:
+    """Fetch the version (one fetch at a time) and record it; never holds _LOCK while fetching."""
+    global _VERSION, _CHECKED_AT
+    with _FETCH_LOCK:
+        try:
+            version: Optional[str] = _fetch_version()
+        except Exception as exc:
+            print(f"[data-version] lookup failed: {exc}", flush=True)
+            version = None
+        with _LOCK:
+            if version is None:
+                version = _VERSION or "unknown"
+            elif _VERSION is not None and version != _VERSION:
+                print(f"[data-version] {_VERSION} -> {version}", flush=True)
+            _VERSION = version
+            _CHECKED_AT = time.monotonic()
+            return version
+
+
+def _refresh_in_background() -> None:
+    global _REFRESHING
+    try:
+        _refresh()
+    finally:
+        with _LOCK:
+            _REFRESHING = False
+
+
+def current_data_version(force_refresh: bool = False) -> str:
+    global _REFRESHING
+    pinned = os.getenv("DATA_VERSION")
+    if pinned:
+        return pinned
+
+    if not force_refresh:
+        with _LOCK:
+            version = _VERSION
+            if version is not None:
+                if time.monotonic() - _CHECKED_AT >= _ttl_seconds() and not _REFRESHING:
+                    _REFRESHING = True
+                    threading.Thread(target=_refresh_in_background, name="data-version-refresh", daemon=True).start()
+                return version
+        with _FETCH_LOCK:
+            # Another caller may have fetched the first version while this one waited.
+            if _VERSION is not None:
+                return _VERSION
+            return _refresh()
+    return _refresh()
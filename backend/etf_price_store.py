@@ -0,0 +1,238 @@
+"""
+Columnar, memory-mapped ETF price store for the RRG endpoints.
+
+data/etf-prices.json (symbol -> [{date, adj_close}, ...]) is converted once
+into a date index plus a float matrix:
+
+    <store dir>/dates.npy     int64 days since 1970-01-01, sorted union of all dates
+    <store dir>/close.npy     float64 [n_dates, n_symbols], NaN where a symbol has no bar
+    <store dir>/symbols.json  column order
+
+and loaded with `np.load(mmap_mode="r")`, so alignment across symbols is a
+column pick and a date window is a row slice (binary search on the index).
+
+`get_etf_price_store()` rebuilds the store when etf-prices.json is newer than
+it (written to the store directory when possible, otherwise kept in memory)
+and reloads when either changes (data_io.file_version). Rebuild offline
+with scripts/build_etf_price_store.py.
+"""
+from __future__ import annotations
+
+import json
+import os
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from data_io import VersionedLoader, file_version
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_ETF_PRICES_PATH = REPO_ROOT / "data" / "etf-prices.json"
+DEFAULT_STORE_DIR = REPO_ROOT / "data" / "etf-prices-store"
+
+_STORE_FILES = ("dates.npy", "close.npy", "symbols.json")
+
+
+def _to_days(d: date) -> int:
+    return int(np.datetime64(d, "D").astype(np.int64))
+
+
+class EtfPriceStore:
+    def __init__(self, dates: np.ndarray, symbols: Sequence[str], close: np.ndarray):
+        if close.shape != (len(dates), len(symbols)):
+            raise ValueError(f"close matrix shape {close.shape} does not match {len(dates)} dates x {len(symbols)} symbols")
+        self.dates = dates
+        self.symbols = [str(s) for s in symbols]
+        self.close = close
+        self._columns: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._columns
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    # ------------------------------------------------------------------
+    # Build / persistence
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_json(cls, path: Path | str = DEFAULT_ETF_PRICES_PATH) -> "EtfPriceStore":
+        """Same normalization as main._load_etf_prices: valid dates, finite closes, upper-case symbols."""
+        with Path(path).open("r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if not isinstance(raw, dict):
+            raise ValueError(f"expected dict of symbol -> list in {path}, got {type(raw).__name__}")
+
+        series: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for sym, entries in raw.items():
+            sym_u = str(sym).strip().upper()
+            if not sym_u or not isinstance(entries, list):
+                continue
+            day_list: List[int] = []
+            value_list: List[float] = []
+            for item in entries:
+                if not isinstance(item, dict) or item.get("date") is None or item.get("adj_close") is None:
+                    continue
+                try:
+                    day = np.datetime64(str(item["date"])[:10], "D").astype(np.int64)
+                    value = float(item["adj_close"])
+                except (TypeError, ValueError):
+                    continue
+                if not np.isfinite(value):
+                    continue
+                day_list.append(int(day))
+                value_list.append(value)
+            if day_list:
+                series[sym_u] = (np.asarray(day_list, dtype=np.int64), np.asarray(value_list, dtype=np.float64))
+
+        symbols = sorted(series)
+        if series:
+            dates = np.unique(np.concatenate([d for d, _v in series.values()]))
+        else:
+            dates = np.empty(0, dtype=np.int64)
+        close = np.full((len(dates), len(symbols)), np.nan, dtype=np.float64)
+        for col, sym in enumerate(symbols):
+            days, values = series[sym]
+            # Last value wins for duplicate dates, like the dict-based alignment it replaces.
+            close[np.searchsorted(dates, days), col] = values
+        return cls(dates, symbols, close)
+
+    def save(self, directory: Path | str = DEFAULT_STORE_DIR) -> None:
+        """Write the three store files, each atomically (tmp + os.replace)."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, writer in (
+            ("symbols.json", lambda fh: fh.write(json.dumps(self.symbols).encode("utf-8"))),
+            ("dates.npy", lambda fh: np.save(fh, np.asarray(self.dates, dtype=np.int64))),
+            ("close.npy", lambda fh: np.save(fh, np.asarray(self.close, dtype=np.float64))),
+        ):
+            tmp = directory / f".{name}.tmp"
+            with tmp.open("wb") as fh:
+                writer(fh)
+            os.replace(tmp, directory / name)
+
+    @classmethod
+    def load(cls, directory: Path | str = DEFAULT_STORE_DIR, mmap: bool = True) -> "EtfPriceStore":
+        directory = Path(directory)
+        mode = "r" if mmap else None
+        symbols = json.loads((directory / "symbols.json").read_text(encoding="utf-8"))
+        dates = np.load(directory / "dates.npy", mmap_mode=mode)
+        close = np.load(directory / "close.npy", mmap_mode=mode)
+        return cls(dates, symbols, close)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def row_range(self, start: Optional[date] = None, end: Optional[date] = None) -> slice:
+        """Rows with start <= date <= end (both inclusive, either open)."""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, _to_days(start), side="left"))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, _to_days(end), side="right"))
+        return slice(lo, max(lo, hi))
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        col = self._columns.get(symbol)
+        if col is None:
+            return None
+        valid = np.flatnonzero(np.isfinite(self.close[:, col]))
+        if not len(valid):
+            return None
+        return self.date_values(slice(int(valid[-1]), int(valid[-1]) + 1))[0]
+
+    def date_values(self, rows: slice) -> List[date]:
+        return self.dates[rows].astype("datetime64[D]").astype(object).tolist()
+
+    def matrix(self, symbols: Sequence[str], rows: slice = slice(None)) -> np.ndarray:
+        """[n_rows, len(symbols)] closes; all-NaN column for unknown symbols."""
+        block = self.close[rows]
+        out = np.full((block.shape[0], len(symbols)), np.nan, dtype=np.float64)
+        for i, sym in enumerate(symbols):
+            col = self._columns.get(sym)
+            if col is not None:
+                out[:, i] = block[:, col]
+        return out
+
+    def series(self, symbol: str, rows: slice = slice(None)) -> Tuple[np.ndarray, np.ndarray]:
+        """(day numbers, closes) of the symbol's bars within `rows`, NaNs dropped."""
+        col = self._columns.get(symbol)
+        if col is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        values = self.close[rows, col]
+        mask = np.isfinite(values)
+        return np.asarray(self.dates[rows][mask]), np.asarray(values[mask])
+
+    def asof(self, symbol: str, d: date) -> Optional[float]:
+        """Latest close of `symbol` on or before `d` (None if there is none)."""
+        _days, values = self.series(symbol, self.row_range(None, d))
+        return float(values[-1]) if len(values) else None
+
+    def aligned(
+        self,
+        symbols: Sequence[str],
+        benchmark: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Closes of `symbols` and `benchmark` on the benchmark's dates in [start, end].
+
+        Returns (day numbers, [n, len(symbols)] matrix, benchmark vector); a
+        symbol's NaN rows are the dates it has no bar (mask them per column).
+        """
+        rows = self.row_range(start, end)
+        bench = self.matrix([benchmark], rows)[:, 0]
+        keep = np.isfinite(bench)
+        return np.asarray(self.dates[rows][keep]), self.matrix(symbols, rows)[keep], bench[keep]
+
+
+_LOADER = VersionedLoader("etf-store")
+
+
+def _store_version(directory: Path) -> Optional[int]:
+    """Oldest mtime_ns of the store files; None unless all of them exist."""
+    versions = [file_version(directory / name) for name in _STORE_FILES]
+    return None if any(v is None for v in versions) else min(v[0] for v in versions)  # type: ignore[index]
+
+
+def _load_store(json_path: Path, store_dir: Path) -> Optional[EtfPriceStore]:
+    json_version = file_version(json_path)
+    store_version = _store_version(store_dir)
+
+    store: Optional[EtfPriceStore] = None
+    if store_version is not None and (json_version is None or store_version >= json_version[0]):
+        try:
+            store = EtfPriceStore.load(store_dir)
+        except Exception as exc:
+            print(f"[etf-store] Failed to load {store_dir}: {exc}", flush=True)
+    if store is None and json_version is not None:
+        try:
+            store = EtfPriceStore.from_json(json_path)
+        except Exception as exc:
+            print(f"[etf-store] Failed to build from {json_path}: {exc}", flush=True)
+            store = None
+        if store is not None:
+            try:
+                store.save(store_dir)
+                store = EtfPriceStore.load(store_dir)
+                print(f"[etf-store] Built {len(store)} ETFs x {len(store.dates)} dates in {store_dir}", flush=True)
+            except Exception as exc:
+                print(f"[etf-store] Could not write {store_dir} ({exc}); keeping the store in memory", flush=True)
+    return store
+
+
+def get_etf_price_store(
+    json_path: Path | str = DEFAULT_ETF_PRICES_PATH,
+    store_dir: Path | str = DEFAULT_STORE_DIR,
+) -> Optional[EtfPriceStore]:
+    """
+    Process-wide store, reloaded when etf-prices.json or the store files change.
+
+    Returns None if neither the JSON nor a built store is available.
+    """
+    json_path, store_dir = Path(json_path), Path(store_dir)
+    sources = [json_path, *(store_dir / name for name in _STORE_FILES)]
+    return _LOADER.get((str(json_path), str(store_dir)), sources, lambda: _load_store(json_path, store_dir))
@@ -0,0 +1,459 @@
+"""
+Cross-sectional factor engine.
+
+Vectorized counterpart of `factor_scoring`: scores every (date, symbol) row of a
+long metrics frame against its (date, sector) peer group in one pass. Each
+metric is ranked once with a lexsort over (group, value), so a group of n
+symbols costs O(n log n) instead of the O(n^2) `percentile_rank` rescans.
+`score_valuation` is also the one vectorized valuation scorer for callers that
+rank a universe against external peer arrays (backtests, rule search, screener).
+
+Output is a date x symbol factor panel (long frame + `wide()` pivots) whose
+single-date values match the `calculate_*_factor` functions called with the
+sector's non-missing values as peer lists:
+
+  - NaN means "missing" (the scalar functions' None); missing values are not peers.
+  - Components use the same inclusion rules (truthy vs `is not None`), weights,
+    component counts and `round(score, 1) if score else None` scoring.
+  - Composite is computed from the rounded factor scores, as the API does.
+"""
+from __future__ import annotations
+
+import math
+import os
+import statistics
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from data_io import VersionedLoader, file_version, sql_path
+from rounding import near_rounding_tie
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_FACTOR_PANEL_PATH = Path(
+    os.getenv("FACTOR_PANEL_PATH", str(REPO_ROOT / "data" / "factor_panel.parquet"))
+)
+
+# (column, higher_is_better, require_truthy) in the argument order of the
+# matching calculate_*_factor function.
+VALUATION_METRICS: List[Tuple[str, bool, bool]] = [
+    ("pe", False, True),
+    ("ps", False, True),
+    ("pb", False, True),
+    ("ev_ebit", False, True),
+    ("ev_ebitda", False, True),
+    ("ev_sales", False, True),
+]
+VALUATION_COMPONENTS: Tuple[str, ...] = tuple(name for name, _, _ in VALUATION_METRICS)
+QUALITY_METRICS: List[Tuple[str, bool, bool]] = [
+    ("roe", True, True),
+    ("roa", True, True),
+    ("roic", True, True),
+    ("gross_margin", True, True),
+    ("operating_margin", True, True),
+    ("net_margin", True, True),
+    ("fcf_margin", True, True),
+]
+GROWTH_METRICS: List[Tuple[str, bool, bool]] = [
+    ("revenue_growth", True, False),
+    ("ebit_growth", True, False),
+    ("eps_growth", True, False),
+    ("fcf_growth", True, False),
+]
+MOMENTUM_METRICS: List[Tuple[str, bool, bool]] = [
+    ("return_1m", True, False),
+    ("return_3m", True, False),
+    ("return_6m", True, False),
+]
+RISK_METRICS: List[Tuple[str, bool, bool]] = [
+    ("debt_to_equity", False, False),
+    ("current_ratio", True, True),
+    ("interest_coverage", True, True),
+]
+RISK_COUNT_COLUMNS = ["risk_count_high", "risk_count_medium", "risk_count_low"]
+
+FACTORS = ["valuation", "quality", "growth", "momentum", "sentiment", "risk"]
+DEFAULT_COMPOSITE_WEIGHTS: Dict[str, float] = {
+    "valuation": 0.20,
+    "quality": 0.20,
+    "growth": 0.20,
+    "momentum": 0.10,
+    "sentiment": 0.10,
+    "risk": 0.20,
+}
+
+FACTOR_PANEL_COLUMNS = (
+    ["date", "symbol", "sector"]
+    + [col for f in FACTORS if f != "sentiment" for col in (f, f"{f}_count")]
+    + ["sentiment", "composite"]
+)
+
+
+def _column(frame: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in frame.columns:
+        return np.full(len(frame), np.nan)
+    return pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype="float64")
+
+
+def group_percentile_ranks(values: np.ndarray, groups: np.ndarray, higher_is_better: bool) -> np.ndarray:
+    """
+    `percentile_rank(v, peers)` for every row at once, peers = non-NaN values
+    sharing the row's group id. Rows with NaN values get NaN.
+    """
+    out = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    n = len(valid)
+    if not n:
+        return out
+
+    x = values[valid]
+    g = groups[valid]
+    order = np.lexsort((x, g))
+    sx = x[order]
+    sg = g[order]
+
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = sg[1:] != sg[:-1]
+    new_run = new_group.copy()
+    new_run[1:] |= sx[1:] != sx[:-1]
+
+    group_starts = np.flatnonzero(new_group)
+    group_ends = np.append(group_starts[1:], n)
+    group_id = np.cumsum(new_group) - 1
+    run_starts = np.flatnonzero(new_run)
+    run_ends = np.append(run_starts[1:], n)
+    run_id = np.cumsum(new_run) - 1
+
+    group_start = group_starts[group_id]
+    group_size = group_ends[group_id] - group_start
+    if higher_is_better:
+        worse = run_starts[run_id] - group_start
+    else:
+        worse = group_ends[group_id] - run_ends[run_id]
+
+    ranks = (worse / group_size) * 100
+    out[valid[order]] = np.clip(ranks, 0.0, 100.0)
+    return out
+
+
+def peer_percentile_ranks(values: np.ndarray, peer_values: Sequence[float], higher_is_better: bool) -> np.ndarray:
+    """
+    `percentile_rank(v, peer_values)` for every entry of `values` against one
+    external peer list. NaN peers count towards the total but never compare
+    better or worse, as in the scalar version. NaN values get NaN.
+    """
+    peers = np.asarray(peer_values, dtype=np.float64)
+    ordered = np.sort(peers[~np.isnan(peers)])
+    if higher_is_better:
+        worse = np.searchsorted(ordered, values, side="left")
+    else:
+        worse = len(ordered) - np.searchsorted(ordered, values, side="right")
+    ranks = np.clip((worse / len(peers)) * 100, 0.0, 100.0)
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+
+def _rank_components(
+    columns: Mapping[str, np.ndarray],
+    metrics: Sequence[Tuple[str, bool, bool]],
+    groups: Optional[np.ndarray] = None,
+    peers: Optional[Mapping[str, Sequence[float]]] = None,
+) -> np.ndarray:
+    """
+    rows x metrics matrix of component scores, NaN where a component is not used.
+
+    Values are ranked against their row's group (one group without `groups`), or
+    with `peers` against the external peer values of each metric (no or empty
+    peers = component unused).
+    """
+    cols = []
+    for name, higher_is_better, require_truthy in metrics:
+        values = columns[name]
+        if peers is None:
+            row_groups = np.zeros(len(values), dtype=np.int64) if groups is None else groups
+            ranks = group_percentile_ranks(values, row_groups, higher_is_better)
+        else:
+            peer_values = peers.get(name)
+            if peer_values is None or not len(peer_values):
+                ranks = np.full(len(values), np.nan)
+            else:
+                ranks = peer_percentile_ranks(values, peer_values, higher_is_better)
+        if require_truthy:
+            ranks[values == 0] = np.nan
+        cols.append(ranks)
+    return np.column_stack(cols)
+
+
+def _component_matrix(
+    frame: pd.DataFrame,
+    groups: np.ndarray,
+    metrics: Sequence[Tuple[str, bool, bool]],
+) -> np.ndarray:
+    """rows x metrics matrix of a frame's components, ranked within `groups`."""
+    return _rank_components({name: _column(frame, name) for name, _, _ in metrics}, metrics, groups=groups)
+
+
+def _finalize(raw: np.ndarray, exact_row=None) -> np.ndarray:
+    """
+    Apply `round(score, 1) if score else None` (NaN for None).
+
+    `exact_row(i)` recomputes row i the way the scalar functions do; it is only
+    used for the handful of rows sitting on a rounding boundary.
+    """
+    out = np.round(raw, 1)
+    ties = np.flatnonzero(~np.isnan(raw) & near_rounding_tie(raw, 1))
+    for i in ties:
+        value = exact_row(i) if exact_row is not None else float(raw[i])
+        out[i] = round(value, 1) if value else np.nan
+    out[raw == 0] = np.nan
+    return out
+
+
+def _mean_score(components: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """statistics.mean over the used components of each row -> (score, count)."""
+    used = ~np.isnan(components)
+    count = used.sum(axis=1)
+    total = np.where(used, components, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        raw = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+    def exact_row(i: int) -> float:
+        return statistics.mean([float(v) for v in components[i] if not math.isnan(v)])
+
+    return _finalize(raw, exact_row), count
+
+
+def valuation_raw_scores(
+    ratios: Mapping[str, np.ndarray],
+    weights: Optional[Dict[str, float]] = None,
+    groups: Optional[np.ndarray] = None,
+    peers: Optional[Mapping[str, Sequence[float]]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized `calculate_valuation_factor` for every row at once.
+
+    Args:
+        ratios: multiple -> [n] values (NaN = missing).
+        groups: [n] peer group ids; each multiple is ranked against the row's
+            group (the factor panel). Without groups or peers, all rows are one group.
+        peers: multiple -> one external peer array shared by all rows (the
+            backtest, rule search and screeners). Takes precedence over `groups`.
+
+    Returns:
+        (score, raw, components, weight_sum, w): rounded scores (NaN where the
+        scalar version returns None), the unrounded scores, [n, 6] component
+        scores in VALUATION_COMPONENTS order, each row's active weight sum and
+        the clipped weight of every multiple.
+    """
+    components = _rank_components(ratios, VALUATION_METRICS, groups=groups, peers=peers)
+    raw_weights = {name: 1.0 for name in VALUATION_COMPONENTS}
+    raw_weights.update(weights or {})
+    w = np.array([max(0.0, float(raw_weights.get(name, 0.0))) for name in VALUATION_COMPONENTS])
+
+    used = ~np.isnan(components)
+    n = len(components)
+    weight_sum = np.zeros(n)
+    for j in range(len(w)):
+        weight_sum = weight_sum + np.where(used[:, j], w[j], 0.0)
+
+    # Same accumulation order as the scalar version, so the sums are bit-identical.
+    raw = np.zeros(n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for j in range(len(w)):
+            raw = raw + np.where(used[:, j], components[:, j] * (w[j] / weight_sum), 0.0)
+    has_any = used.any(axis=1)
+    for i in np.flatnonzero(has_any & (weight_sum <= 0)):
+        raw[i] = statistics.mean(components[i][used[i]].tolist())
+    raw[~has_any] = np.nan
+    return _finalize(raw), raw, components, weight_sum, w
+
+
+def score_valuation(
+    ratios: Mapping[str, np.ndarray],
+    weights: Optional[Dict[str, float]] = None,
+    groups: Optional[np.ndarray] = None,
+    peers: Optional[Mapping[str, Sequence[float]]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """`valuation_raw_scores` -> (score, components)."""
+    score, _raw, components, _weight_sum, _w = valuation_raw_scores(ratios, weights, groups=groups, peers=peers)
+    return score, components
+
+
+def score_risk(frame: pd.DataFrame, groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized `calculate_risk_factor` -> (score, component_count)."""
+    components = _component_matrix(frame, groups, RISK_METRICS)
+    beta = _column(frame, "beta")
+    beta_score = np.clip(100 - (beta - 0.5) * 50, 0, 100)
+    high, medium, low = (np.nan_to_num(_column(frame, c), nan=0.0) for c in RISK_COUNT_COLUMNS)
+    risk_score = np.maximum(0.0, 100 - (high * 10 + medium * 5 + low * 2))
+    return _mean_score(np.column_stack([components, beta_score, risk_score]))
+
+
+def score_composite(
+    factor_scores: Dict[str, np.ndarray],
+    weights: Optional[Dict[str, float]] = None,
+) -> np.ndarray:
+    """Vectorized `calculate_composite_score` over (rounded) factor scores."""
+    weights = weights or DEFAULT_COMPOSITE_WEIGHTS
+    n = len(next(iter(factor_scores.values())))
+    weighted_sum = np.zeros(n)
+    weight_sum = np.zeros(n)
+    for factor in FACTORS:
+        score = factor_scores.get(factor, np.full(n, np.nan))
+        used = ~np.isnan(score)
+        weighted_sum = weighted_sum + np.where(used, score * weights[factor], 0.0)
+        weight_sum = weight_sum + np.where(used, weights[factor], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        raw = np.where(weight_sum > 0, weighted_sum / weight_sum, np.nan)
+
+    def exact_row(i: int) -> float:
+        ws_sum = 0
+        w_sum = 0
+        for factor in FACTORS:
+            score = factor_scores.get(factor)
+            if score is not None and not math.isnan(score[i]):
+                ws_sum += float(score[i]) * weights[factor]
+                w_sum += weights[factor]
+        return ws_sum / w_sum
+
+    return _finalize(raw, exact_row)
+
+
+def compute_factor_scores(
+    metrics: pd.DataFrame,
+    valuation_weights: Optional[Dict[str, float]] = None,
+    composite_weights: Optional[Dict[str, float]] = None,
+) -> pd.DataFrame:
+    """
+    Score a long metrics frame.
+
+    Args:
+        metrics: One row per (date, symbol) with a `sector` column and any of the
+            metric columns listed in *_METRICS / RISK_COUNT_COLUMNS, plus
+            optional `beta` and a precomputed 0-100 `sentiment` score. Missing
+            columns are treated as missing data.
+        valuation_weights: Per-multiple weights (see calculate_valuation_factor).
+        composite_weights: Factor weights (see calculate_composite_score).
+
+    Returns:
+        DataFrame with FACTOR_PANEL_COLUMNS; scores are NaN where the scalar
+        functions would return None.
+    """
+    frame = metrics.reset_index(drop=True).copy()
+    if frame.empty:
+        return pd.DataFrame(columns=FACTOR_PANEL_COLUMNS)
+    frame["date"] = pd.to_datetime(frame["date"])
+    frame["symbol"] = frame["symbol"].astype(str).str.upper()
+    if "sector" not in frame.columns:
+        frame["sector"] = ""
+    frame["sector"] = frame["sector"].fillna("").astype(str)
+    groups = pd.MultiIndex.from_frame(frame[["date", "sector"]]).factorize()[0].astype(np.int64)
+
+    out = frame[["date", "symbol", "sector"]].copy()
+    scores: Dict[str, np.ndarray] = {}
+
+    ratios = {name: _column(frame, name) for name in VALUATION_COMPONENTS}
+    scores["valuation"], components = score_valuation(ratios, valuation_weights, groups=groups)
+    out["valuation_count"] = (~np.isnan(components)).sum(axis=1)
+    for factor, spec in (("quality", QUALITY_METRICS), ("growth", GROWTH_METRICS), ("momentum", MOMENTUM_METRICS)):
+        scores[factor], out[f"{factor}_count"] = _mean_score(_component_matrix(frame, groups, spec))
+    scores["risk"], out["risk_count"] = score_risk(frame, groups)
+    scores["sentiment"] = _column(frame, "sentiment")
+
+    for factor in FACTORS:
+        out[factor] = scores[factor]
+    out["composite"] = score_composite(scores, composite_weights)
+    return out.reindex(columns=FACTOR_PANEL_COLUMNS)
+
+
+def write_factor_panel(scores: pd.DataFrame, path: Path | str = DEFAULT_FACTOR_PANEL_PATH) -> None:
+    """Write a scored frame to parquet (atomic replace)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    frame = scores.reindex(columns=FACTOR_PANEL_COLUMNS).sort_values(["date", "symbol"]).reset_index(drop=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    con = duckdb.connect(":memory:")
+    try:
+        con.register("factors", frame)
+        con.execute(f"COPY factors TO '{sql_path(tmp_path)}' (FORMAT PARQUET)")
+    finally:
+        con.close()
+    os.replace(tmp_path, path)
+
+
+class FactorPanel:
+    """
+    Read-only date x symbol factor panel.
+
+    Rows are sorted by (date, symbol) with per-date [start, end) offsets, so a
+    cross-section is one `searchsorted` on the unique dates.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        frame = frame.reindex(columns=FACTOR_PANEL_COLUMNS)
+        frame["date"] = pd.to_datetime(frame["date"])
+        frame["symbol"] = frame["symbol"].astype(str).str.upper()
+        self.frame = frame.sort_values(["date", "symbol"]).reset_index(drop=True)
+        dates = self.frame["date"].to_numpy(dtype="datetime64[ns]")
+        if len(dates):
+            self._dates, self._starts = np.unique(dates, return_index=True)
+        else:
+            self._dates, self._starts = np.array([], dtype="datetime64[ns]"), np.array([], dtype=np.int64)
+        self._ends = np.append(self._starts[1:], len(dates)).astype(np.int64)
+
+    @classmethod
+    def from_parquet(cls, path: Path | str) -> "FactorPanel":
+        con = duckdb.connect(":memory:")
+        try:
+            return cls(con.execute(f"SELECT * FROM read_parquet('{sql_path(path)}')").df())
+        finally:
+            con.close()
+
+    @property
+    def dates(self) -> List[date]:
+        return [pd.Timestamp(d).date() for d in self._dates]
+
+    def cross_section(self, as_of: date, symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Scores from the latest panel date on or before `as_of`."""
+        pos = int(np.searchsorted(self._dates, np.datetime64(pd.Timestamp(as_of)), side="right")) - 1
+        if pos < 0:
+            return pd.DataFrame(columns=FACTOR_PANEL_COLUMNS)
+        rows = self.frame.iloc[self._starts[pos]:self._ends[pos]]
+        if symbols is not None:
+            rows = rows[rows["symbol"].isin({s.upper() for s in symbols})]
+        return rows.reset_index(drop=True)
+
+    def wide(
+        self,
+        factor: str = "composite",
+        symbols: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> pd.DataFrame:
+        """date x symbol matrix for one factor."""
+        lo = 0 if start is None else int(np.searchsorted(self._dates, np.datetime64(pd.Timestamp(start)), side="left"))
+        hi = len(self._dates) if end is None else int(
+            np.searchsorted(self._dates, np.datetime64(pd.Timestamp(end)), side="right")
+        )
+        if hi <= lo:
+            return pd.DataFrame()
+        rows = self.frame.iloc[self._starts[lo]:self._ends[hi - 1]]
+        if symbols is not None:
+            rows = rows[rows["symbol"].isin({s.upper() for s in symbols})]
+        return rows.pivot(index="date", columns="symbol", values=factor).sort_index()
+
+
+_PANEL_LOADER = VersionedLoader("factor-panel")
+
+
+def get_factor_panel(path: Path | str = DEFAULT_FACTOR_PANEL_PATH) -> Optional[FactorPanel]:
+    """Process-wide loader; None if not built, reloads when the file changes."""
+    path = Path(path)
+    if file_version(path) is None:
+        return None
+    return _PANEL_LOADER.get(str(path.resolve()), [path], lambda: FactorPanel.from_parquet(path))
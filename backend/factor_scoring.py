@@ -3,9 +3,14 @@
 Each factor scored 0-100 using percentile ranking vs industry peers.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
+import math
 import statistics
 
+import numpy as np
+
+from factor_engine import VALUATION_COMPONENTS, valuation_raw_scores
+
 
 def percentile_rank(value: float, peer_values: List[float], higher_is_better: bool = True) -> float:
     """
@@ -149,6 +154,46 @@ def calculate_valuation_factor(
     }
 
 
+def valuation_factor_results(
+    ratios: Dict[str, np.ndarray],
+    peers: Dict[str, Sequence[float]],
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    The `calculate_valuation_factor` dict of every row of a universe, scored by
+    `factor_engine.valuation_raw_scores` against the external `peers` arrays.
+    """
+    scores, overall, components, weight_sum, w = valuation_raw_scores(ratios, weights, peers=peers)
+    clipped = dict(zip(VALUATION_COMPONENTS, w.tolist()))
+    results: List[Dict[str, Any]] = []
+    for i, row in enumerate(components.tolist()):
+        component_scores = {k: (None if math.isnan(v) else v) for k, v in zip(VALUATION_COMPONENTS, row)}
+        active = [k for k, v in component_scores.items() if v is not None]
+        if not active:
+            results.append(
+                {
+                    "score": None,
+                    "component_count": 0,
+                    "components": component_scores,
+                    "weights": None,
+                    "interpretation": "insufficient_data",
+                }
+            )
+            continue
+        total = float(weight_sum[i])
+        overall_score = float(overall[i])
+        results.append(
+            {
+                "score": None if math.isnan(scores[i]) else float(scores[i]),
+                "component_count": len(active),
+                "components": component_scores,
+                "weights": {k: clipped[k] / total for k in active} if total > 0 else None,
+                "interpretation": _interpret_score(overall_score) if overall_score else "insufficient_data",
+            }
+        )
+    return results
+
+
 def calculate_quality_factor(
     roe: Optional[float],
     roa: Optional[float],
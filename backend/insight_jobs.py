@@ -26,10 +26,13 @@ except ImportError:
     # python-dotenv not installed, skip loading .env files
     pass
 
+import hashlib
 import json
 import re
+import threading
 import warnings
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pandas as pd
 import requests
@@ -57,13 +60,28 @@ from transcript_insights import (
   QuoteHighlight,
   save_transcript_insights,
 )  # type: ignore
+from defeatbeta_api.client.llm_cache import LLMCache, set_llm_cache  # type: ignore
 from defeatbeta_api.data.ticker import Ticker  # type: ignore
 
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Point this at any OpenAI-compatible server (e.g. a local fake for tests).
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
 INSIGHTS_DEBUG = os.getenv("INSIGHTS_DEBUG") in ("1", "true", "TRUE", "yes", "YES", "on", "ON")
 
+# Max in-flight model calls across all insight jobs in this process.
+INSIGHTS_LLM_CONCURRENCY = max(1, int(os.getenv("INSIGHTS_LLM_CONCURRENCY", "4")))
+# Responses are cached on disk keyed by sha256(template, model, input); set to 0 to disable.
+INSIGHTS_LLM_CACHE = os.getenv("INSIGHTS_LLM_CACHE", "1") not in ("0", "false", "FALSE", "no", "NO", "off", "OFF")
+INSIGHTS_LLM_CACHE_DIR = Path(os.getenv("INSIGHTS_LLM_CACHE_DIR", str(REPO_ROOT / "data" / "llm_cache")))
+
+LLM_SYSTEM_PROMPT = "You are a JSON-only API. You respond ONLY with valid JSON objects. Never include explanatory text."
+LLM_TEMPERATURE = 0.1
+
+_LLM_CACHE: Optional[LLMCache] = None
+_LLM_CACHE_LOCK = threading.Lock()
+
 # Some SEC filings are served as XML; we still strip to plain text, so suppress noisy parser warnings.
 warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
@@ -73,11 +91,44 @@ def _debug(msg: str) -> None:
     print(msg, flush=True)
 
 
-def _call_llm(prompt: str, max_tokens: int = 1200) -> str:
+def _get_llm_cache() -> LLMCache:
   """
-  Call OpenAI API for LLM completion.
+  The LLM cache built from the INSIGHTS_LLM_* settings, created on first use.
+
+  It is installed as the process-wide cache then, so the defeatbeta_api transcript
+  analysis (Transcripts.analyze_*_with_ai) shares its storage and concurrency bound.
+  Importing this module leaves the process-wide cache alone.
   """
-  if not OPENAI_API_KEY:
+  global _LLM_CACHE
+  if _LLM_CACHE is None:
+    with _LLM_CACHE_LOCK:
+      if _LLM_CACHE is None:
+        _LLM_CACHE = set_llm_cache(
+          LLMCache(str(INSIGHTS_LLM_CACHE_DIR), concurrency=INSIGHTS_LLM_CONCURRENCY, enabled=INSIGHTS_LLM_CACHE)
+        )
+  return _LLM_CACHE
+
+
+def get_llm_stats() -> Dict[str, int]:
+  """
+  Snapshot of LLM cache hits/misses and real model calls made by this process.
+  """
+  return _get_llm_cache().stats()
+
+
+def _llm_cache_key(template: str, model: str, prompt: str, max_tokens: int) -> str:
+  return LLMCache.key(
+    hashlib.sha256(template.encode("utf-8")).hexdigest(),
+    model,
+    LLM_SYSTEM_PROMPT,
+    str(LLM_TEMPERATURE),
+    str(max_tokens),
+    prompt,
+  )
+
+
+def _post_chat_completion(prompt: str, max_tokens: int) -> str:
+  if not OPENAI_API_KEY and OPENAI_BASE_URL == "https://api.openai.com/v1":
     raise RuntimeError(
       "OPENAI_API_KEY environment variable is not set. "
       "Please set it to use LLM-based insights generation."
@@ -86,21 +137,21 @@ def _call_llm(prompt: str, max_tokens: int = 1200) -> str:
   body = {
     "model": OPENAI_MODEL,
     "messages": [
-      {"role": "system", "content": "You are a JSON-only API. You respond ONLY with valid JSON objects. Never include explanatory text."},
+      {"role": "system", "content": LLM_SYSTEM_PROMPT},
       {"role": "user", "content": prompt}
     ],
-    "temperature": 0.1,
+    "temperature": LLM_TEMPERATURE,
     "max_tokens": max_tokens,
   }
+  headers = {"Content-Type": "application/json"}
+  if OPENAI_API_KEY:
+    headers["Authorization"] = f"Bearer {OPENAI_API_KEY}"
 
   try:
-    _debug(f"[insights] Calling OpenAI API with model {OPENAI_MODEL}")
+    _debug(f"[insights] Calling {OPENAI_BASE_URL} with model {OPENAI_MODEL}")
     response = requests.post(
-      "https://api.openai.com/v1/chat/completions",
-      headers={
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {OPENAI_API_KEY}",
-      },
+      f"{OPENAI_BASE_URL}/chat/completions",
+      headers=headers,
       json=body,
       timeout=120,
     )
@@ -116,6 +167,78 @@ def _call_llm(prompt: str, max_tokens: int = 1200) -> str:
     raise RuntimeError(f"Failed to call OpenAI API: {exc}") from exc
 
 
+def _call_llm(
+  prompt: str,
+  max_tokens: int = 1200,
+  template: str = "",
+  check: Optional[Callable[[str], Any]] = None,
+) -> str:
+  """
+  Call OpenAI API for LLM completion.
+
+  Responses are served from the on-disk cache when the same template, model
+  and input were seen before, so re-running over unchanged documents makes no
+  model calls. Concurrent callers are bounded by INSIGHTS_LLM_CONCURRENCY.
+  `check(raw)` runs on a fresh response before it is cached; if it raises,
+  nothing is stored.
+  """
+  def call() -> str:
+    raw = _post_chat_completion(prompt, max_tokens)
+    if check is not None:
+      check(raw)
+    return raw
+
+  key = _llm_cache_key(template, OPENAI_MODEL, prompt, max_tokens)
+  return _get_llm_cache().complete(key, OPENAI_MODEL, call)
+
+
+def _call_llm_json(prompt: str, max_tokens: int = 1200, template: str = "") -> Dict[str, Any]:
+  """
+  _call_llm for JSON answers. A truncated or malformed completion raises and is
+  not cached; an older cached entry that fails to parse is dropped so the next
+  run asks the model again.
+  """
+  raw = _call_llm(prompt, max_tokens=max_tokens, template=template, check=_extract_json_from_text)
+  try:
+    return _extract_json_from_text(raw)
+  except ValueError:
+    _get_llm_cache().delete(_llm_cache_key(template, OPENAI_MODEL, prompt, max_tokens))
+    raise
+
+
+def _run_in_waves(
+  candidates: List[Any],
+  worker: Callable[[Any], Optional[str]],
+  limit: int,
+  on_error: Callable[[Any, Exception], None],
+) -> List[str]:
+  """
+  Run `worker` over `candidates` concurrently until `limit` of them produced a
+  result. Each wave only schedules as many candidates as are still needed, so
+  skipped/failed items are backfilled in order like the old sequential loop.
+  """
+  def _safe(item: Any) -> Optional[str]:
+    try:
+      return worker(item)
+    except Exception as exc:
+      on_error(item, exc)
+      return None
+
+  results: List[str] = []
+  pending = list(candidates)
+  while pending and len(results) < limit:
+    wave = pending[: limit - len(results)]
+    pending = pending[len(wave):]
+    workers = min(INSIGHTS_LLM_CONCURRENCY, len(wave))
+    if workers <= 1:
+      outcomes = [_safe(item) for item in wave]
+    else:
+      with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(_safe, wave))
+    results.extend(path for path in outcomes if path)
+  return results
+
+
 def _extract_json_from_text(text: str) -> Dict[str, Any]:
   """
   Robustly extract JSON from LLM output, handling markdown code blocks,
@@ -637,111 +760,107 @@ def generate_filing_insights_for_symbol(
   if not filings:
     return []
 
-  saved_paths: List[str] = []
-  processed = 0
-  for form, accession, filed_at in filings:
-    if processed >= max_filings:
-      break
-    try:
-      path, _ = download_filing(symbol, cik, accession)
-      if not path:
-        continue
-      raw_html = path.read_text(encoding="utf-8", errors="ignore")
-      text = ""
-      if not form.upper().startswith("10-"):
-        text = _load_plain_text(path)
-
-      sec_parser_titles: Dict[str, List[str]] = {}
-      if form.upper().startswith("10-"):
-        sections, sec_parser_titles = _extract_sections_with_sec_parser(raw_html, form)
-        _debug(
-          "[insights] using sec-parser sections: "
-          + ", ".join(sorted(sections.keys())) if sections else "[insights] sec-parser returned no sections"
-        )
-      else:
-        sections = {}
+  def _process(filing: Tuple[str, str, str]) -> Optional[str]:
+    form, accession, filed_at = filing
+    path, _ = download_filing(symbol, cik, accession)
+    if not path:
+      return None
+    raw_html = path.read_text(encoding="utf-8", errors="ignore")
+    text = ""
+    if not form.upper().startswith("10-"):
+      text = _load_plain_text(path)
+
+    sec_parser_titles: Dict[str, List[str]] = {}
+    if form.upper().startswith("10-"):
+      sections, sec_parser_titles = _extract_sections_with_sec_parser(raw_html, form)
+      _debug(
+        "[insights] using sec-parser sections: "
+        + ", ".join(sorted(sections.keys())) if sections else "[insights] sec-parser returned no sections"
+      )
+    else:
+      sections = {}
 
-      if not sections or not any(value.strip() for value in sections.values()):
-        raise RuntimeError("sec-parser returned no sections for this filing.")
+    if not sections or not any(value.strip() for value in sections.values()):
+      raise RuntimeError("sec-parser returned no sections for this filing.")
 
-      business_text = sections.get("business", "")
-      risk_text = sections.get("risk", "")
-      mdna_text = sections.get("mdna", "")
-      liquidity_text = sections.get("liquidity", "")
+    business_text = sections.get("business", "")
+    risk_text = sections.get("risk", "")
+    mdna_text = sections.get("mdna", "")
+    liquidity_text = sections.get("liquidity", "")
 
-      _debug(
-        "[insights] section lengths: "
-        f"business={len(business_text)}, risk={len(risk_text)}, "
-        f"mdna={len(mdna_text)}, liquidity={len(liquidity_text)}"
-      )
+    _debug(
+      "[insights] section lengths: "
+      f"business={len(business_text)}, risk={len(risk_text)}, "
+      f"mdna={len(mdna_text)}, liquidity={len(liquidity_text)}"
+    )
 
 
-      slice_len = 12000
-      prompt = FILING_PROMPT.format(
-        symbol=symbol,
-        form=form,
-        filed_at=filed_at,
-        business=business_text[:slice_len],
-        risk=risk_text[:slice_len],
-        mdna=mdna_text[:slice_len],
-        liquidity=liquidity_text[:slice_len],
+    slice_len = 12000
+    prompt = FILING_PROMPT.format(
+      symbol=symbol,
+      form=form,
+      filed_at=filed_at,
+      business=business_text[:slice_len],
+      risk=risk_text[:slice_len],
+      mdna=mdna_text[:slice_len],
+      liquidity=liquidity_text[:slice_len],
+    )
+    data = _call_llm_json(prompt, max_tokens=8000, template=FILING_PROMPT)
+
+    if not data.get("risk_changes") and risk_text.strip():
+      data["risk_changes"] = _extract_risk_changes(risk_text)
+    if not data.get("forward_guidance") and mdna_text.strip():
+      data["forward_guidance"] = _extract_forward_guidance(mdna_text)
+    if not data.get("other_highlights") and sec_parser_titles:
+      data["other_highlights"] = _extract_other_highlights(
+        sec_parser_titles.get("part1item2", [])
+        + sec_parser_titles.get("part2item1", [])
+        + sec_parser_titles.get("part2item1a", [])
       )
-      raw = _call_llm(prompt, max_tokens=8000)
-      data = _extract_json_from_text(raw)
-
-      if not data.get("risk_changes") and risk_text.strip():
-        data["risk_changes"] = _extract_risk_changes(risk_text)
-      if not data.get("forward_guidance") and mdna_text.strip():
-        data["forward_guidance"] = _extract_forward_guidance(mdna_text)
-      if not data.get("other_highlights") and sec_parser_titles:
-        data["other_highlights"] = _extract_other_highlights(
-          sec_parser_titles.get("part1item2", [])
-          + sec_parser_titles.get("part2item1", [])
-          + sec_parser_titles.get("part2item1a", [])
-        )
-      if not data.get("accounting_flags") and sec_parser_titles:
-        data["accounting_flags"] = _extract_accounting_flags(
-          sec_parser_titles.get("part1item1", [])
-          + sec_parser_titles.get("part1item2", []),
-          mdna_text,
-        )
-      insights = FilingInsights(
-        symbol=symbol,
-        cik=cik,
-        accession=accession,
-        filing_type=form,
-        filed_at=filed_at,
-        business_updates=[
-          BusinessUpdate(**item) for item in data.get("business_updates", [])
-        ],
-        risk_changes=[
-          RiskChange(**item) for item in data.get("risk_changes", [])
-        ],
-        liquidity_and_capital=[
-          LiquidityInsight(**item) for item in data.get("liquidity_and_capital", [])
-        ],
-        accounting_flags=[
-          AccountingFlag(**item) for item in data.get("accounting_flags", [])
-        ],
-        other_highlights=[
-          Highlight(**item) for item in data.get("other_highlights", [])
-        ],
-        product_segments=[
-          ProductSegment(**item) for item in data.get("product_segments", [])
-        ],
-        forward_guidance=[
-          ForwardGuidance(**item) for item in data.get("forward_guidance", [])
-        ],
-        categorized_risks=[
-          CategorizedRisk(**item) for item in data.get("categorized_risks", [])
-        ],
+    if not data.get("accounting_flags") and sec_parser_titles:
+      data["accounting_flags"] = _extract_accounting_flags(
+        sec_parser_titles.get("part1item1", [])
+        + sec_parser_titles.get("part1item2", []),
+        mdna_text,
       )
-      saved = save_filing_insights(insights)
-      saved_paths.append(str(saved))
-      processed += 1
-    except Exception as exc:
-      print(f"[filings] Failed for {symbol} {accession}: {exc}")
-  return saved_paths
+    insights = FilingInsights(
+      symbol=symbol,
+      cik=cik,
+      accession=accession,
+      filing_type=form,
+      filed_at=filed_at,
+      business_updates=[
+        BusinessUpdate(**item) for item in data.get("business_updates", [])
+      ],
+      risk_changes=[
+        RiskChange(**item) for item in data.get("risk_changes", [])
+      ],
+      liquidity_and_capital=[
+        LiquidityInsight(**item) for item in data.get("liquidity_and_capital", [])
+      ],
+      accounting_flags=[
+        AccountingFlag(**item) for item in data.get("accounting_flags", [])
+      ],
+      other_highlights=[
+        Highlight(**item) for item in data.get("other_highlights", [])
+      ],
+      product_segments=[
+        ProductSegment(**item) for item in data.get("product_segments", [])
+      ],
+      forward_guidance=[
+        ForwardGuidance(**item) for item in data.get("forward_guidance", [])
+      ],
+      categorized_risks=[
+        CategorizedRisk(**item) for item in data.get("categorized_risks", [])
+      ],
+    )
+    saved = save_filing_insights(insights)
+    return str(saved)
+
+  def _on_error(filing: Tuple[str, str, str], exc: Exception) -> None:
+    print(f"[filings] Failed for {symbol} {filing[1]}: {exc}")
+
+  return _run_in_waves(filings, _process, max_filings, _on_error)
 
 
 # -----------------------------------------------------------------------------
@@ -847,52 +966,65 @@ def generate_transcript_insights_for_symbol(
   if not quarters:
     return []
 
-  saved_paths: List[str] = []
-  processed = 0
-  for year, quarter, date_str in sorted(quarters, reverse=True):
-    if processed >= limit:
-      break
-    try:
-      paragraphs = _fetch_paragraphs(transcripts_obj, year, quarter)
-      if not paragraphs:
-        continue
-      trimmed = paragraphs[:400]
-      for para in trimmed:
-        para["content"] = para["content"][:1200]
-      prompt = TRANSCRIPT_PROMPT.format(
-        symbol=symbol,
-        year=year,
-        quarter=quarter,
-        paragraphs=json.dumps(trimmed, ensure_ascii=False, indent=2),
-      )
-      print(f"\n[DEBUG] Calling LLM for {symbol} FY{year}Q{quarter}...")
-      print(f"[DEBUG] Prompt length: {len(prompt)} chars")
-      raw = _call_llm(prompt, max_tokens=8000)
-      print(f"[DEBUG] LLM returned {len(raw)} chars")
-      data = _extract_json_from_text(raw)
-      tone_dict = data.get("tone") or {}
-      insights = TranscriptInsights(
-        symbol=symbol,
-        fiscal_year=year,
-        fiscal_quarter=quarter,
-        call_date=date_str,
-        guidance_changes=[
-          GuidanceChange(**item) for item in data.get("guidance_changes", [])
-        ],
-        drivers=[DriverInsight(**item) for item in data.get("drivers", [])],
-        tone=ToneInsight(**tone_dict) if tone_dict else ToneInsight(),
-        execution_flags=[
-          ExecutionFlag(**item) for item in data.get("execution_flags", [])
-        ],
-        key_quotes=[
-          QuoteHighlight(**item) for item in data.get("key_quotes", [])
-        ],
-      )
-      saved = save_transcript_insights(insights)
-      saved_paths.append(str(saved))
-      processed += 1
-    except Exception as exc:
-      print(f"\n[ERROR] Failed for {symbol} FY{year}Q{quarter}: {exc}")
-      import traceback
-      traceback.print_exc()
-  return saved_paths
+  def _process(entry: Tuple[int, int, Optional[str]]) -> Optional[str]:
+    year, quarter, date_str = entry
+    paragraphs = _fetch_paragraphs(transcripts_obj, year, quarter)
+    if not paragraphs:
+      return None
+    trimmed = paragraphs[:400]
+    for para in trimmed:
+      para["content"] = para["content"][:1200]
+    prompt = TRANSCRIPT_PROMPT.format(
+      symbol=symbol,
+      year=year,
+      quarter=quarter,
+      paragraphs=json.dumps(trimmed, ensure_ascii=False, indent=2),
+    )
+    print(f"\n[DEBUG] Calling LLM for {symbol} FY{year}Q{quarter}...")
+    print(f"[DEBUG] Prompt length: {len(prompt)} chars")
+    data = _call_llm_json(prompt, max_tokens=8000, template=TRANSCRIPT_PROMPT)
+    tone_dict = data.get("tone") or {}
+    insights = TranscriptInsights(
+      symbol=symbol,
+      fiscal_year=year,
+      fiscal_quarter=quarter,
+      call_date=date_str,
+      guidance_changes=[
+        GuidanceChange(**item) for item in data.get("guidance_changes", [])
+      ],
+      drivers=[DriverInsight(**item) for item in data.get("drivers", [])],
+      tone=ToneInsight(**tone_dict) if tone_dict else ToneInsight(),
+      execution_flags=[
+        ExecutionFlag(**item) for item in data.get("execution_flags", [])
+      ],
+      key_quotes=[
+        QuoteHighlight(**item) for item in data.get("key_quotes", [])
+      ],
+    )
+    saved = save_transcript_insights(insights)
+    return str(saved)
+
+  def _on_error(entry: Tuple[int, int, Optional[str]], exc: Exception) -> None:
+    print(f"\n[ERROR] Failed for {symbol} FY{entry[0]}Q{entry[1]}: {exc}")
+    import traceback
+    traceback.print_exception(type(exc), exc, exc.__traceback__)
+
+  return _run_in_waves(sorted(quarters, reverse=True), _process, limit, _on_error)
+
+
+def generate_transcript_insights_for_symbols(
+  symbols: List[str],
+  limit: int = 1,
+) -> Dict[str, List[str]]:
+  """
+  Batch variant of generate_transcript_insights_for_symbol. Symbols run
+  concurrently; model calls stay bounded by INSIGHTS_LLM_CONCURRENCY and
+  unchanged transcripts are answered from the LLM response cache.
+  """
+  unique = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+  if not unique:
+    return {}
+  workers = min(INSIGHTS_LLM_CONCURRENCY, len(unique))
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+    results = list(executor.map(lambda sym: generate_transcript_insights_for_symbol(sym, limit=limit), unique))
+  return dict(zip(unique, results))
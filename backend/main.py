@@ -27,10 +27,10 @@ except ImportError:
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import Dict, List, Optional, Any, Tuple, Literal
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Literal
 from datetime import datetime, timedelta, date
+import asyncio
 import math
 import threading
 import platform
@@ -57,9 +57,10 @@ except Exception:
 
 from defeatbeta_api.data.ticker import Ticker
 from defeatbeta_api.client.duckdb_conf import Configuration
-from fastapi import FastAPI, HTTPException, Query, Header, Depends, Cookie, Response
+from fastapi import FastAPI, HTTPException, Query, Header, Depends, Cookie, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from sec_download import download_filing
 from database import init_db, get_db, PortfolioHolding, SavedScreen, IndustryFilterDefault, User, UserSession
@@ -68,20 +69,47 @@ from insight_jobs import (
     generate_filing_insights_for_symbol,
     generate_transcript_insights_for_symbol,
 )
+from work_pool import PoolSaturated, get_data_pool
+from singleflight import get_singleflight_stats, singleflight
+from ttl_cache import clear_caches, get_cache_stats, ttl_cache
+from data_version import current_data_version
+from data_io import chunked, file_version_tag, sql_quote_list
+from metrics_store import get_metrics_store, to_native
+from bulk_metrics import MetricsBatch
+from statement_items import enterprise_value, fetch_ev_items
+from etf_price_store import EtfPriceStore, get_etf_price_store
+from rrg_engine import quadrants, rrg_tails, window_starts
+from rrg_history_store import RrgHistory, load_rrg_history
+from backtest_cache import cache_key, etag_for, etag_matches, get_backtest_cache
+from backtest_rules import RULE_SORT_FIELDS, get_backtest_rules_index
+from backtest_panel import BacktestPanel, load_backtest_panel
+from factor_engine import VALUATION_COMPONENTS, score_valuation
+from factor_scoring import valuation_factor_results
+from screen_masks import (
+    RATIO_METRICS,
+    PeerStats,
+    cap_mask,
+    filters_mask,
+    float_column,
+    fundamental_rules_mask,
+    mean_or_none,
+    median_or_none,
+)
 
 app = FastAPI(title="DefeatBeta Wrapper", version="0.1.1")
 SESSION_COOKIE_NAME = "qd_session"
 SESSION_TTL_DAYS = 30
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
-# Cache for precomputed backtest rules (loaded once at startup)
-_BACKTEST_RULES_CACHE: Dict[str, Any] = {
-    "data": [],
-    "sectors": [],
-    "caps": [],
-    "holding_years": [],
-    "loaded": False,
-}
+# TTL caches for dataset-derived helpers (see ttl_cache.py). Entries expire after the
+# TTL, are served stale for up to another TTL while refreshing in the background, and
+# are dropped whenever the DefeatBeta dataset update_time changes.
+_MB = 1024 * 1024
+
+
+def _symbol_key(symbol: str, *args) -> Tuple[Any, ...]:
+    return (symbol.strip().upper(),) + args
+
 
 def _hash_password(password: str, salt: Optional[str] = None) -> Tuple[str, str]:
     if salt is None:
@@ -141,6 +169,19 @@ def get_user_id(
     return x_user_id or "default"
 
 
+def require_admin(x_admin_token: Optional[str] = Header(None, alias="X-Admin-Token")) -> None:
+    """
+    Guard for destructive /admin endpoints: X-Admin-Token must match ADMIN_API_TOKEN.
+
+    With ADMIN_API_TOKEN unset these endpoints are disabled.
+    """
+    expected = os.getenv("ADMIN_API_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_API_TOKEN not set)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
 def _validate_email(email: str) -> None:
     if not EMAIL_RE.match(email):
         raise HTTPException(status_code=400, detail="Invalid email format")
@@ -164,6 +205,39 @@ app.add_middleware(
 init_db()
 
 
+@app.exception_handler(PoolSaturated)
+def _pool_saturated_handler(request, exc: PoolSaturated):
+    print(f"[data-pool] rejected {exc}", flush=True)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Server busy ({exc.reason}); retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.get("/admin/data-pool")
+def data_pool_stats():
+    """Shared data pool occupancy, rejections and queue-wait percentiles per endpoint."""
+    return get_data_pool().stats()
+
+
+@app.get("/admin/singleflight")
+def singleflight_stats():
+    """Coalescing counters: executions, coalesced waiters, errors and in-flight keys per function."""
+    return get_singleflight_stats()
+
+
+@app.get("/admin/caches")
+def cache_stats():
+    """Per-cache size, TTLs, data version and hit/miss/stale/eviction counters."""
+    return get_cache_stats()
+
+
+@app.delete("/admin/caches", dependencies=[Depends(require_admin)])
+def cache_clear(name: Optional[List[str]] = Query(None, description="Cache names to clear (default: all)")):
+    return {"cleared": clear_caches(name)}
+
+
 class AuthPayload(BaseModel):
     email: str = Field(..., min_length=3)
     password: str = Field(..., min_length=6)
@@ -428,6 +502,16 @@ class PriceRequest(BaseModel):
     days: int = Field(180, description="Number of most recent days")
 
 
+class RatioHistoryRequest(BaseModel):
+    symbols: List[str] = Field(..., description="Symbols to read from the daily ratio panel")
+    start: Optional[str] = Field(None, description="Start date (YYYY-MM-DD), inclusive")
+    end: Optional[str] = Field(None, description="End date (YYYY-MM-DD), inclusive")
+    fields: List[str] = Field(
+        default_factory=lambda: ["market_cap", "pe", "ps", "pb", "ev_ebitda"],
+        description="Panel columns to return",
+    )
+
+
 class IndustriesPayload(BaseModel):
     symbols: List[str] = Field(..., description="Universe of symbols to derive industries/sectors from")
 
@@ -555,9 +639,12 @@ DATA_DIR = _MAIN_DIR / "data" if (_MAIN_DIR / "data").is_dir() else _MAIN_DIR.pa
 STOCKS_JSON_PATH = _MAIN_DIR.parent / "stocks.json"
 SECTOR_METRICS_PATH = DATA_DIR / "sector-metrics.json"
 ETF_PRICES_PATH = DATA_DIR / "etf-prices.json"
+ETF_PRICE_STORE_DIR = Path(os.getenv("ETF_PRICE_STORE_DIR", str(DATA_DIR / "etf-prices-store")))
 
 _SECTOR_METRICS_CACHE: Optional[Dict[str, Any]] = None
 _SYMBOL_TO_SECTOR_METRICS: Optional[Dict[str, Tuple[str, Dict[str, Any]]]] = None
+# _sector_metrics_version() of the file behind the two caches above
+_SECTOR_METRICS_VERSION: Optional[str] = None
 
 # Cached ETF prices structure:
 # {
@@ -621,6 +708,11 @@ def _lookup_cik(symbol: str) -> Optional[str]:
     return _symbol_to_cik_map().get(symbol.upper())
 
 
+def _get_etf_price_store() -> Optional[EtfPriceStore]:
+    """Memory-mapped date x symbol close matrix of etf-prices.json (see etf_price_store.py)."""
+    return get_etf_price_store(ETF_PRICES_PATH, ETF_PRICE_STORE_DIR)
+
+
 def _load_etf_prices() -> Dict[str, List[Dict[str, Any]]]:
     """
     Load precomputed ETF prices from JSON (no DuckDB dependency).
@@ -705,20 +797,21 @@ def _load_sector_metrics() -> Dict[str, Tuple[str, Dict[str, Any]]]:
         symbol -> (sector_name, metrics_dict)
 
     This mirrors the structure used on the Next.js side in src/app/api/sector/[sector]/metrics/route.ts,
-    but keeps it simple for FastAPI usage.
+    but keeps it simple for FastAPI usage. The file is re-read when its version
+    (see _sector_metrics_version) changes.
     """
-    global _SECTOR_METRICS_CACHE, _SYMBOL_TO_SECTOR_METRICS
+    global _SECTOR_METRICS_CACHE, _SYMBOL_TO_SECTOR_METRICS, _SECTOR_METRICS_VERSION
 
-    if _SYMBOL_TO_SECTOR_METRICS is not None:
+    version = _sector_metrics_version()
+    if _SYMBOL_TO_SECTOR_METRICS is not None and version == _SECTOR_METRICS_VERSION:
         return _SYMBOL_TO_SECTOR_METRICS
 
-    if _SECTOR_METRICS_CACHE is None:
-        try:
-            content = SECTOR_METRICS_PATH.read_text(encoding="utf-8")
-            _SECTOR_METRICS_CACHE = json.loads(content)
-        except Exception as exc:
-            print(f"[sector-metrics] Failed to load {SECTOR_METRICS_PATH}: {exc}", flush=True)
-            _SECTOR_METRICS_CACHE = {}
+    try:
+        content = SECTOR_METRICS_PATH.read_text(encoding="utf-8")
+        _SECTOR_METRICS_CACHE = json.loads(content)
+    except Exception as exc:
+        print(f"[sector-metrics] Failed to load {SECTOR_METRICS_PATH}: {exc}", flush=True)
+        _SECTOR_METRICS_CACHE = {}
 
     symbol_map: Dict[str, Tuple[str, Dict[str, Any]]] = {}
 
@@ -737,9 +830,15 @@ def _load_sector_metrics() -> Dict[str, Tuple[str, Dict[str, Any]]]:
             symbol_map[symbol] = (sector_name, m)
 
     _SYMBOL_TO_SECTOR_METRICS = symbol_map
+    _SECTOR_METRICS_VERSION = version
     return _SYMBOL_TO_SECTOR_METRICS
 
 
+def _sector_metrics_version() -> str:
+    """file_version_tag of sector-metrics.json ("-" when it is missing)."""
+    return file_version_tag(SECTOR_METRICS_PATH)
+
+
 @lru_cache(maxsize=1)
 def _min_annual_statement_date() -> Optional[date]:
     """
@@ -777,12 +876,6 @@ def _shift_years(d: date, delta_years: int) -> date:
         return date(d.year + delta_years, d.month, 28)
 
 
-def _chunk(items: List[str], size: int) -> List[List[str]]:
-    if size <= 0:
-        return [items]
-    return [items[i : i + size] for i in range(0, len(items), size)]
-
-
 @lru_cache(maxsize=1)
 def _get_defeatbeta_clients():
     """
@@ -795,10 +888,6 @@ def _get_defeatbeta_clients():
     return get_duckdb_client(), HuggingFaceClient()
 
 
-def _sql_quote_list(values: List[str]) -> str:
-    return ", ".join("'" + v.replace("'", "''") + "'" for v in values)
-
-
 def _duckdb_query_with_retry(sql: str, *, max_attempts: int = 5):
     """
     DefeatBeta queries can hit HuggingFace 429 rate limits when DuckDB reads remote parquet.
@@ -834,8 +923,8 @@ def _query_latest_prices(symbols: List[str], as_of: date) -> Dict[str, Dict[str,
     url = hf.get_url_path(stock_prices)
     out: Dict[str, Dict[str, Any]] = {}
 
-    for batch in _chunk(symbols, 400):
-        sym_in = _sql_quote_list(batch)
+    for batch in chunked(symbols, 400):
+        sym_in = sql_quote_list(batch)
         sql = f"""
         SELECT
           symbol,
@@ -870,8 +959,8 @@ def _query_latest_shares(symbols: List[str], as_of: date) -> Dict[str, Dict[str,
     url = hf.get_url_path(stock_shares_outstanding)
     out: Dict[str, Dict[str, Any]] = {}
 
-    for batch in _chunk(symbols, 400):
-        sym_in = _sql_quote_list(batch)
+    for batch in chunked(symbols, 400):
+        sym_in = sql_quote_list(batch)
         sql = f"""
         SELECT
           symbol,
@@ -906,8 +995,8 @@ def _query_dividends_sum(symbols: List[str], start: date, end: date) -> Dict[str
     url = hf.get_url_path(stock_dividend_events)
     out: Dict[str, float] = {}
 
-    for batch in _chunk(symbols, 400):
-        sym_in = _sql_quote_list(batch)
+    for batch in chunked(symbols, 400):
+        sym_in = sql_quote_list(batch)
         sql = f"""
         SELECT
           symbol,
@@ -971,8 +1060,8 @@ def _query_split_events(symbols: List[str], start: date, end: date) -> Dict[str,
     url = hf.get_url_path(stock_split_events)
     out: Dict[str, List[Dict[str, Any]]] = {s.upper(): [] for s in symbols}
 
-    for batch in _chunk(symbols, 400):
-        sym_in = _sql_quote_list(batch)
+    for batch in chunked(symbols, 400):
+        sym_in = sql_quote_list(batch)
         sql = f"""
         SELECT
           upper(symbol) AS symbol,
@@ -1012,8 +1101,8 @@ def _query_dividend_events(symbols: List[str], start: date, end: date) -> Dict[s
     url = hf.get_url_path(stock_dividend_events)
     out: Dict[str, List[Dict[str, Any]]] = {s.upper(): [] for s in symbols}
 
-    for batch in _chunk(symbols, 400):
-        sym_in = _sql_quote_list(batch)
+    for batch in chunked(symbols, 400):
+        sym_in = sql_quote_list(batch)
         sql = f"""
         SELECT
           upper(symbol) AS symbol,
@@ -1082,6 +1171,91 @@ def _split_adjusted_dividends(
     return total
 
 
+# Max gap between the total-return index's last trading day and a window end before we fall back
+# to live queries (covers weekends/holidays for windows ending "today").
+TOTAL_RETURN_MAX_STALENESS_DAYS = 5
+
+
+def _corporate_action_window(
+    symbols: List[str],
+    start: date,
+    end: date,
+    panel: Optional[BacktestPanel] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    End close, split factor and split-adjusted dividends over (start, end] per symbol.
+
+    Served from the precomputed total-return index (backend/total_return.py, two lookups per
+    symbol) when it covers `end`; symbols it does not cover fall back to `panel` (end closes
+    and events preloaded for the whole backtest) or, without one, to per-window
+    price/split/dividend queries.
+
+    Returns:
+      symbol -> {"end_close": float|None, "split_factor": float, "dividends": float}
+    """
+    if not symbols:
+        return {}
+
+    from total_return import get_total_return_store
+
+    out: Dict[str, Dict[str, Any]] = {}
+    missing = [s.upper() for s in symbols]
+    store = get_total_return_store()
+    if (
+        store is not None
+        and store.max_date is not None
+        and store.max_date >= end - timedelta(days=TOTAL_RETURN_MAX_STALENESS_DAYS)
+    ):
+        out = store.window(missing, start, end)
+        missing = [s for s in missing if s not in out]
+
+    if missing:
+        if panel is not None:
+            end_prices = panel.prices(end)
+            split_events, dividend_events = panel.events()
+        else:
+            end_prices = _query_latest_prices(missing, end)
+            split_events = _query_split_events(missing, start, end)
+            dividend_events = _query_dividend_events(missing, start, end)
+        for sym in missing:
+            sym_splits = split_events.get(sym) or []
+            out[sym] = {
+                "end_close": (end_prices.get(sym) or {}).get("close"),
+                "split_factor": _split_factor_between(sym_splits, start, end),
+                "dividends": _split_adjusted_dividends(dividend_events.get(sym) or [], sym_splits, start, end),
+            }
+    return out
+
+
+def _load_backtest_panel(
+    symbols: List[str],
+    price_dates: List[date],
+    share_dates: List[date],
+    event_start: date,
+    event_end: date,
+) -> BacktestPanel:
+    """
+    Prices at every rebalance/end date and shares at every cutoff for `symbols`, in one
+    ASOF query per table (per 400 symbols); split/dividend events over
+    (event_start, event_end] are fetched on first use (see backtest_panel.py).
+    """
+    from defeatbeta_api.utils.const import stock_prices, stock_shares_outstanding
+
+    _duckdb_client, hf = _get_defeatbeta_clients()
+    return load_backtest_panel(
+        _duckdb_query_with_retry,
+        hf.get_url_path(stock_prices),
+        hf.get_url_path(stock_shares_outstanding),
+        symbols,
+        price_dates,
+        share_dates,
+        events_loader=lambda: (
+            _query_split_events(symbols, event_start, event_end),
+            _query_dividend_events(symbols, event_start, event_end),
+        ),
+    )
+
+
 def _query_latest_annual_items(
     symbols: List[str],
     cutoff: date,
@@ -1102,11 +1276,11 @@ def _query_latest_annual_items(
     _duckdb_client, hf = _get_defeatbeta_clients()
     url = hf.get_url_path(stock_statement)
 
-    items_in = _sql_quote_list(item_names)
+    items_in = sql_quote_list(item_names)
     out: Dict[str, Dict[str, Any]] = {}
 
-    for batch in _chunk(symbols, 200):
-        sym_in = _sql_quote_list(batch)
+    for batch in chunked(symbols, 200):
+        sym_in = sql_quote_list(batch)
         sql = f"""
         WITH base AS (
           SELECT
@@ -1179,13 +1353,13 @@ def _query_latest_annual_items_aligned(
     _duckdb_client, hf = _get_defeatbeta_clients()
     url = hf.get_url_path(stock_statement)
 
-    income_in = _sql_quote_list(income_item_names)
-    balance_in = _sql_quote_list(balance_item_names)
+    income_in = sql_quote_list(income_item_names)
+    balance_in = sql_quote_list(balance_item_names)
 
     out: Dict[str, Dict[str, Any]] = {}
 
-    for batch in _chunk(symbols, 200):
-        sym_in = _sql_quote_list(batch)
+    for batch in chunked(symbols, 200):
+        sym_in = sql_quote_list(batch)
         sql = f"""
         WITH base AS (
           SELECT
@@ -1247,6 +1421,71 @@ def _query_latest_annual_items_aligned(
     return out
 
 
+@ttl_cache("pit_fundamentals", ttl=24 * 3600, max_bytes=512 * _MB)
+def _get_pit_fundamentals(
+    symbols: Tuple[str, ...],
+    income_item_names: Tuple[str, ...],
+    balance_item_names: Tuple[str, ...],
+    lag_days: int,
+):
+    """
+    Build (once per universe/item set/lag and dataset version) the point-in-time annual
+    statement table used by backtests. Each aligned report gets a
+    [report_date + lag, next report + lag) validity interval.
+    """
+    from defeatbeta_api.utils.const import stock_statement, annual, income_statement, balance_sheet
+    from pit_fundamentals import PitFundamentals
+
+    _duckdb_client, hf = _get_defeatbeta_clients()
+    return PitFundamentals.build(
+        _duckdb_query_with_retry,
+        hf.get_url_path(stock_statement),
+        list(symbols),
+        {income_statement: list(income_item_names), balance_sheet: list(balance_item_names)},
+        lag_days=lag_days,
+        period_type=annual,
+        align=True,
+    )
+
+
+def _query_pit_annual_items_aligned(
+    symbols: List[str],
+    as_of_dates: List[date],
+    income_item_names: List[str],
+    balance_item_names: List[str],
+    lag_days: int,
+) -> Dict[date, Dict[str, Dict[str, Any]]]:
+    """
+    Same per-symbol shape as `_query_latest_annual_items_aligned`, for many as_of dates at once.
+    Uses the PIT table (one range join) instead of one CTE scan per date.
+
+    Returns:
+      as_of -> symbol -> {"report_date", "income_items", "balance_items"}
+    """
+    from defeatbeta_api.utils.const import income_statement, balance_sheet
+
+    if not symbols or not as_of_dates:
+        return {d: {} for d in as_of_dates}
+
+    pit = _get_pit_fundamentals(
+        tuple(sorted(symbols)),
+        tuple(income_item_names),
+        tuple(balance_item_names),
+        int(lag_days),
+    )
+    out: Dict[date, Dict[str, Dict[str, Any]]] = {}
+    for as_of, per_symbol in pit.snapshots(symbols, as_of_dates).items():
+        out[as_of] = {
+            sym: {
+                "report_date": snap.get("report_date"),
+                "income_items": snap.get(income_statement) or {},
+                "balance_items": snap.get(balance_sheet) or {},
+            }
+            for sym, snap in per_symbol.items()
+        }
+    return out
+
+
 def _pick_first(items: Dict[str, Optional[float]], candidates: List[str]) -> Optional[float]:
     for c in candidates:
         v = items.get(c)
@@ -1262,27 +1501,6 @@ def _pick_first(items: Dict[str, Optional[float]], candidates: List[str]) -> Opt
     return None
 
 
-def _get_etf_adj_close_asof(symbol: str, as_of: date, etf_prices: Dict[str, List[Dict[str, Any]]]) -> Optional[float]:
-    sym = symbol.strip().upper()
-    series = etf_prices.get(sym) or []
-    best: Optional[float] = None
-    for rec in series:
-        d = rec.get("date")
-        if not isinstance(d, date):
-            continue
-        if d <= as_of:
-            best = rec.get("adj_close")
-        else:
-            break
-    if best is None:
-        return None
-    try:
-        v = float(best)
-    except Exception:
-        return None
-    return v if math.isfinite(v) else None
-
-
 def _get_metric_value_from_dict(metrics: Dict[str, Any], metric_key: str) -> Optional[float]:
     """Mirror client-side metric extraction for custom rules."""
     if metric_key in metrics:
@@ -1307,113 +1525,41 @@ def _get_metric_value_from_dict(metrics: Dict[str, Any], metric_key: str) -> Opt
     return None
 
 
-def _matches_custom_rule(metrics: Dict[str, Any], rule: CustomRulePayload) -> bool:
-    if not rule.enabled:
-        return True
-    value = _get_metric_value_from_dict(metrics, rule.metric)
-    if value is None or not math.isfinite(value):
-        return False
-
-    if rule.operator == "<":
-        return value < float(rule.value)
-    if rule.operator == "<=":
-        return value <= float(rule.value)
-    if rule.operator == ">":
-        return value > float(rule.value)
-    if rule.operator == ">=":
-        return value >= float(rule.value)
-    if rule.operator == "=":
-        return abs(value - float(rule.value)) < 0.01
-    if rule.operator == "!=":
-        return abs(value - float(rule.value)) >= 0.01
-    if rule.operator == "between":
-        try:
-            min_val, max_val = rule.value
-            return value >= float(min_val) and value <= float(max_val)
-        except Exception:
-            return False
-    return True
+# Screener metric keys custom rules can use in backtests -> backtest record field.
+BACKTEST_METRIC_COLUMNS: Dict[str, str] = {
+    "peRatioTTM": "pe",
+    "priceToSalesRatioTTM": "ps",
+    "priceToBookRatioTTM": "pb",
+    "enterpriseValueOverEBITTTM": "ev_ebit",
+    "enterpriseValueOverEBITDATTM": "ev_ebitda",
+    "enterpriseValueToSalesTTM": "ev_sales",
+    "marketCap": "market_cap",
+}
 
 
 def _filter_records_by_cap(records: List[Dict[str, Any]], cap: Optional[str]) -> List[Dict[str, Any]]:
     if not cap or cap == "all":
         return records
-
-    def _bucket(market_cap: Optional[float]) -> Optional[str]:
-        if market_cap is None:
-            return None
-        if market_cap >= 10_000_000_000:
-            return "large"
-        if market_cap >= 2_000_000_000:
-            return "mid"
-        if market_cap >= 300_000_000:
-            return "small"
-        return None
-
-    filtered: List[Dict[str, Any]] = []
-    for rec in records:
-        bucket = _bucket(rec.get("market_cap"))
-        if bucket is None:
-            continue
-        if cap == bucket:
-            filtered.append(rec)
-    return filtered
+    keep = cap_mask(float_column([r.get("market_cap") for r in records]), cap)
+    return [rec for rec, ok in zip(records, keep) if ok]
 
 
 def _apply_filters_to_records(
     records: List[Dict[str, Any]],
     filters: Optional[ScreenerFiltersPayload],
 ) -> List[Dict[str, Any]]:
+    """Records passing `filters` (industry scope, cap, custom rules), evaluated as column masks."""
     if not filters:
         return records
 
-    filtered = records
-
-    # Industry/Sector scope check (defensive)
-    if filters.industry:
-        filtered = [
-            r
-            for r in filtered
-            if r.get("industry") == filters.industry or r.get("sector") == filters.industry
-        ]
-
-    # Market cap
-    filtered = _filter_records_by_cap(filtered, filters.cap)
-
-    # Custom rules
-    rules = filters.customRules or []
-    enabled_rules = [r for r in rules if r.enabled]
-    if enabled_rules:
-        logic = filters.ruleLogic or "AND"
-        filtered_rules: List[CustomRulePayload] = enabled_rules
-
-        def _record_matches(rec: Dict[str, Any]) -> bool:
-            metrics = rec.get("metrics") or {}
-            if logic == "OR":
-                return any(_matches_custom_rule(metrics, rule) for rule in filtered_rules)
-            return all(_matches_custom_rule(metrics, rule) for rule in filtered_rules)
-
-        filtered = [r for r in filtered if _record_matches(r)]
-
-    return filtered
-
-
-def _build_backtest_metrics_dict(rec: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Build a minimal metrics dict compatible with existing custom-rule evaluation.
-
-    The UI uses metric keys like `peRatioTTM`. For the annual backtest, we
-    approximate these using ratios computed from annual fundamentals + as-of price.
-    """
-    return {
-        "peRatioTTM": rec.get("pe"),
-        "priceToSalesRatioTTM": rec.get("ps"),
-        "priceToBookRatioTTM": rec.get("pb"),
-        "enterpriseValueOverEBITTTM": rec.get("ev_ebit"),
-        "enterpriseValueOverEBITDATTM": rec.get("ev_ebitda"),
-        "enterpriseValueToSalesTTM": rec.get("ev_sales"),
-        "marketCap": rec.get("market_cap"),
-    }
+    keep = filters_mask(
+        filters,
+        float_column([r.get("market_cap") for r in records]),
+        lambda metric: float_column([_get_metric_value_from_dict(r.get("metrics") or {}, metric) for r in records]),
+        industries=np.array([r.get("industry") for r in records], dtype=object),
+        sectors=np.array([r.get("sector") for r in records], dtype=object),
+    )
+    return [rec for rec, ok in zip(records, keep) if ok]
 
 
 def _get_default_filters(
@@ -1442,22 +1588,28 @@ def _get_default_filters(
         return None
 
 
+def _ticker_config() -> Optional[Configuration]:
+    # On Windows, always use Windows-compatible config
+    return WindowsCompatibleDuckDBConfig() if platform.system() == "Windows" else None
+
+
 @lru_cache(maxsize=2048)
+def _get_shared_ticker(symbol: str) -> Ticker:
+    return Ticker(symbol.upper(), config=_ticker_config())
+
+
 def _get_ticker(symbol: str) -> Ticker:
     """
     Create (or reuse) a Ticker instance. Cache to avoid repeated construction
     and associated DuckDB/huggingface setup work per request.
     """
-    # On Windows, always use Windows-compatible config
-    config = WindowsCompatibleDuckDBConfig() if platform.system() == "Windows" else None
-    return Ticker(symbol.upper(), config=config)
+    return _get_shared_ticker(symbol.upper())
 
 
-@lru_cache(maxsize=2048)
+@ttl_cache("info", ttl=24 * 3600, max_bytes=16 * _MB, key=_symbol_key)
 def _get_info(symbol: str) -> Dict[str, Any]:
     """
-    Get ticker info. Cached with LRU cache (max 2048 entries).
-    Note: This cache persists across requests, so info() results are cached.
+    Get ticker info. Cached in the "info" TTL cache (24h, refreshed on dataset updates).
     """
     """
     defeatbeta_api Ticker.info() returns a DataFrame; take the first row as dict.
@@ -1500,7 +1652,7 @@ def _compute_market_cap(symbol: str) -> Optional[float]:
     return None
 
 
-@lru_cache(maxsize=2048)
+@ttl_cache("market_cap", ttl=3600, max_bytes=2 * _MB, key=_symbol_key)
 def _get_market_cap(symbol: str) -> Optional[float]:
     return _compute_market_cap(symbol)
 
@@ -1530,20 +1682,13 @@ def _process_symbol_metadata(symbol: str) -> Dict[str, Any]:
 def metadata(payload: SymbolsPayload):
     """
     Fetch metadata for multiple symbols in parallel for better performance.
-    Uses ThreadPoolExecutor to process symbols concurrently.
+    Runs on the shared data pool (see work_pool.py).
     """
     symbols = payload.symbols
     if not symbols:
         return {"symbols": []}
     
-    # Use parallel processing for batches of 10+ symbols, sequential for smaller batches
-    if len(symbols) >= 10:
-        max_workers = min(16, len(symbols))  # Cap at 16 workers
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            results = list(executor.map(_process_symbol_metadata, symbols))
-    else:
-        # Sequential for small batches (overhead not worth it)
-        results = [_process_symbol_metadata(symbol) for symbol in symbols]
+    results = get_data_pool().map("metadata", _process_symbol_metadata, symbols)
     
     return {"symbols": results}
 
@@ -1564,7 +1709,7 @@ def etf_prices_batch(payload: SymbolsPayload, days: int = 180):
     # Cap days at 20 years (7300 days) for safety
     days = min(max(1, days), 7300)
     
-    etf_map = _load_etf_prices()
+    store = _get_etf_price_store()
     symbols = [s.strip().upper() for s in (payload.symbols or []) if s and s.strip()]
 
     if not symbols:
@@ -1573,33 +1718,45 @@ def etf_prices_batch(payload: SymbolsPayload, days: int = 180):
     results: List[Dict[str, Any]] = []
 
     for sym in symbols:
-        series = etf_map.get(sym, [])
-        if not series:
+        _dates, closes = store.series(sym) if store is not None else ((), ())
+        if not len(closes):
             print(f"[etf-prices] No prices found for {sym}", flush=True)
             results.append({"symbol": sym, "closes": []})
             continue
 
-        # Take the last N days (already sorted ascending)
-        tail = series[-days:] if days and days > 0 else series
-        closes = [float(r["adj_close"]) for r in tail if "adj_close" in r and math.isfinite(float(r["adj_close"]))]
-        results.append({"symbol": sym, "closes": closes})
+        # Take the last N bars (already sorted ascending)
+        results.append({"symbol": sym, "closes": closes[-days:].tolist()})
 
     return {"prices": results}
 
 
+def _rrg_snapshot_key(symbols: str, benchmark: str = "SPY", days: int = 180, tail: int = 0, tail_step: int = 5):
+    return (
+        tuple(s.strip().upper() for s in symbols.split(",") if s.strip()),
+        benchmark.strip().upper() or "SPY",
+        min(max(30, days), 7300),
+        tail,
+        tail_step,
+    )
+
+
 @app.get("/rrg")
+@singleflight(key=_rrg_snapshot_key)
 def rrg_snapshot(
     symbols: str = Query(..., description="Comma-separated ETF symbols"),
     benchmark: str = Query("SPY", description="Benchmark symbol (default: SPY)"),
     days: int = Query(180, description="Lookback window in calendar days (30-7300)"),
+    tail: int = Query(0, ge=0, le=104, description="Number of earlier points to return per symbol"),
+    tail_step: int = Query(5, ge=1, le=63, description="Trading days between tail points (5 = weekly)"),
 ):
     """
     Calculate current RRG snapshot for ETFs vs a benchmark using precomputed ETF prices.
 
     This uses the same RS-Ratio / RS-Momentum definition as the historical RRG generator
-    so that snapshot values are consistent with the pre-computed history.
+    so that snapshot values are consistent with the pre-computed history. All symbols
+    (and tail points, each a snapshot over the `days` before it) are computed in one
+    pass by rrg_engine.
     """
-    from rrg_history import calculate_rrg, determine_quadrant
 
     # Clamp days to a reasonable range (30 days to ~20 years)
     days = min(max(30, days), 7300)
@@ -1612,107 +1769,69 @@ def rrg_snapshot(
 
     benchmark = benchmark.strip().upper() or "SPY"
 
-    etf_map = _load_etf_prices()
-    if not etf_map:
+    store = _get_etf_price_store()
+    if store is None or not len(store):
         raise HTTPException(status_code=500, detail="ETF prices data not available")
 
-    # Get benchmark closes
-    bench_series = etf_map.get(benchmark, [])
-    if not bench_series:
+    end_date = store.last_date(benchmark)
+    if end_date is None:
         raise HTTPException(
             status_code=404,
             detail=f"No prices found for benchmark {benchmark}",
         )
 
     # Align snapshot lookback with the historical generator: treat `days` as calendar days,
-    # and align stock/benchmark on shared dates within that window.
-    bench_by_date = {
-        r.get("date"): float(r.get("adj_close"))
-        for r in bench_series
-        if r.get("date") and r.get("adj_close") is not None and math.isfinite(float(r.get("adj_close")))
-    }
-    bench_dates = [r.get("date") for r in bench_series if r.get("date")]
-    bench_dates = [d for d in bench_dates if isinstance(d, str)]
-    bench_dates.sort()
-    end_date_str = bench_dates[-1] if bench_dates else None
-    if not end_date_str:
-        raise HTTPException(status_code=400, detail=f"Insufficient benchmark price history for {benchmark}")
-    end_dt = datetime.strptime(end_date_str, "%Y-%m-%d")
-    start_dt = end_dt - timedelta(days=days)
-    start_date_str = start_dt.strftime("%Y-%m-%d")
-
-    def aligned_closes_for_symbol(symbol: str) -> Tuple[List[float], List[float]]:
-        series = etf_map.get(symbol, [])
-        stock_by_date = {
-            r.get("date"): float(r.get("adj_close"))
-            for r in series
-            if r.get("date") and r.get("adj_close") is not None and math.isfinite(float(r.get("adj_close")))
-        }
-        # Use benchmark date ordering for stable alignment.
-        common_dates = [d for d in bench_dates if start_date_str <= d <= end_date_str and d in stock_by_date and d in bench_by_date]
-        stock_prices = [stock_by_date[d] for d in common_dates]
-        benchmark_prices = [bench_by_date[d] for d in common_dates]
-        return stock_prices, benchmark_prices
+    # and align stock/benchmark on the benchmark's dates within that window. Tails need
+    # the earlier history too.
+    start_date = end_date - timedelta(days=days)
+    dates, closes, bench = store.aligned(requested_symbols, benchmark, None if tail else start_date, end_date)
 
     # Quick sanity: need at least some benchmark points in the window.
-    bench_window = [bench_by_date[d] for d in bench_dates if start_date_str <= d <= end_date_str and d in bench_by_date]
-    if len(bench_window) < 2:
+    if len(bench) - int(window_starts(dates, [len(bench) - 1], days)[0]) < 2:
         raise HTTPException(
             status_code=400,
             detail=f"Insufficient benchmark price history for {benchmark}",
         )
 
+    ends, ratios, momenta, counts = rrg_tails(dates, closes, bench, length=tail + 1, step=tail_step, days=days)
+    quadrant_grid = quadrants(ratios, momenta)
+    end_dates = dates[ends].astype("datetime64[D]").astype(str)
+
     points: List[Dict[str, Any]] = []
 
-    for sym in requested_symbols:
-        series = etf_map.get(sym, [])
-        if not series:
+    for i, sym in enumerate(requested_symbols):
+        rs_ratio, rs_momentum, quadrant = 100.0, 100.0, "LAGGING"
+        if sym not in store:
             if debug_rrg:
                 print(f"[rrg] No prices found for {sym}", flush=True)
-            points.append(
-                {
-                    "symbol": sym,
-                    "rsRatio": 100.0,
-                    "rsMomentum": 100.0,
-                    "quadrant": "LAGGING",
-                }
-            )
-            continue
-
-        stock_prices, benchmark_prices = aligned_closes_for_symbol(sym)
-
-        if len(stock_prices) < 2:
+        elif counts[-1, i] < 2:
             if debug_rrg:
                 print(
-                    f"[rrg] Insufficient aligned history for {sym} (start={start_date_str} end={end_date_str}), defaulting to 100/100",
+                    f"[rrg] Insufficient aligned history for {sym} (start={start_date} end={end_date}), defaulting to 100/100",
                     flush=True,
                 )
-            points.append(
+        else:
+            rs_ratio, rs_momentum = float(ratios[-1, i]), float(momenta[-1, i])
+            quadrant = quadrant_grid[-1, i]
+
+        point: Dict[str, Any] = {
+            "symbol": sym,
+            "rsRatio": rs_ratio,
+            "rsMomentum": rs_momentum,
+            "quadrant": quadrant,
+        }
+        if tail:
+            point["tail"] = [
                 {
-                    "symbol": sym,
-                    "rsRatio": 100.0,
-                    "rsMomentum": 100.0,
-                    "quadrant": "LAGGING",
+                    "date": end_dates[k],
+                    "rsRatio": float(ratios[k, i]),
+                    "rsMomentum": float(momenta[k, i]),
+                    "quadrant": quadrant_grid[k, i],
                 }
-            )
-            continue
-
-        try:
-            rs_ratio, rs_momentum = calculate_rrg(stock_prices, benchmark_prices)
-            quadrant = determine_quadrant(rs_ratio, rs_momentum)
-        except Exception as exc:
-            if debug_rrg:
-                print(f"[rrg] Error calculating RRG for {sym}: {exc}", flush=True)
-            rs_ratio, rs_momentum, quadrant = 100.0, 100.0, "LAGGING"
-
-        points.append(
-            {
-                "symbol": sym,
-                "rsRatio": rs_ratio,
-                "rsMomentum": rs_momentum,
-                "quadrant": quadrant,
-            }
-        )
+                for k in range(len(ends) - 1)
+                if counts[k, i] >= 2
+            ]
+        points.append(point)
 
     return {
         "benchmark": benchmark,
@@ -1720,6 +1839,24 @@ def rrg_snapshot(
     }
 
 
+def _get_rrg_history(lookback_days: int) -> Optional[RrgHistory]:
+    """
+    Indexed RRG history for a lookback (see rrg_history_store.py).
+
+    Prefers backend/data/rrg_history_{N}d.json (scripts/recalculate_rrg_history.py),
+    then the legacy multi-lookback rrg-history.json in backend/data/ or data/.
+    """
+    backend_data = Path(__file__).resolve().parent / "data"
+    for path in (
+        backend_data / f"rrg_history_{lookback_days}d.json",
+        backend_data / "rrg-history.json",
+        backend_data.parent.parent / "data" / "rrg-history.json",
+    ):
+        if path.exists():
+            return load_rrg_history(path)
+    return None
+
+
 @app.get("/rrg/history")
 def rrg_history(
     symbols: Optional[str] = Query(None, description="Comma-separated ETF symbols (default: all sectors)"),
@@ -1734,44 +1871,23 @@ def rrg_history(
     Data is pre-computed by scripts/recalculate_rrg_history.py (preferred) or
     scripts/generate_rrg_history.py (legacy).
     """
-    _backend_dir = Path(__file__).resolve().parent
-    CORRECTED_HISTORY_PATH = _backend_dir / "data" / f"rrg_history_{lookback_days}d.json"
-    # Legacy path: check sibling data/ dir first, then parent (for local dev)
-    LEGACY_HISTORY_PATH = _backend_dir / "data" / "rrg-history.json"
-    LEGACY_HISTORY_PATH_ALT = _backend_dir.parent / "data" / "rrg-history.json"
-
     debug_rrg = os.getenv("RRG_DEBUG") in ("1", "true", "TRUE", "yes", "YES", "on", "ON")
     
     try:
-        if CORRECTED_HISTORY_PATH.exists():
-            with open(CORRECTED_HISTORY_PATH, "r", encoding="utf-8") as f:
-                corrected = json.load(f)
-            meta = corrected.get("metadata", {}) if isinstance(corrected, dict) else {}
-            history_data = {
-                "benchmark": meta.get("benchmark", "SPY"),
-                "interval": "weekly",
-                "symbols": meta.get("symbols", []),
-                "data": corrected.get("data", []) if isinstance(corrected, dict) else [],
-            }
-        elif LEGACY_HISTORY_PATH.exists():
-            with open(LEGACY_HISTORY_PATH, "r", encoding="utf-8") as f:
-                history_data = json.load(f)
-        elif LEGACY_HISTORY_PATH_ALT.exists():
-            with open(LEGACY_HISTORY_PATH_ALT, "r", encoding="utf-8") as f:
-                history_data = json.load(f)
-        else:
-            raise HTTPException(
-                status_code=404,
-                detail="RRG history data not found. Run scripts/recalculate_rrg_history.py first.",
-            )
+        history = _get_rrg_history(lookback_days)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load RRG history: {e}")
+    if history is None:
+        raise HTTPException(
+            status_code=404,
+            detail="RRG history data not found. Run scripts/recalculate_rrg_history.py first.",
+        )
     
     # Parse symbols
     if symbols:
         requested_symbols = [s.strip().upper() for s in symbols.split(",") if s.strip()]
     else:
-        requested_symbols = history_data.get("symbols", [])
+        requested_symbols = history.symbols
     
     # Parse dates
     if end_date:
@@ -1791,8 +1907,7 @@ def rrg_history(
         # Default to 10 years back to get maximum available data
         start_dt = end_dt - timedelta(days=365 * 10)
     
-    # Filter data
-    all_points = history_data.get("data", [])
+    # Filter data (binary search per symbol on the indexed history)
     start_date_str = start_dt.strftime("%Y-%m-%d")
     end_date_str = end_dt.strftime("%Y-%m-%d")
     
@@ -1802,16 +1917,10 @@ def rrg_history(
             f"date_range={start_date_str} to {end_date_str}",
             flush=True,
         )
-        print(f"[rrg-history] Total points in file: {len(all_points)}", flush=True)
+        print(f"[rrg-history] Total points in file: {history.total_points}", flush=True)
     
-    filtered_points = [
-        point for point in all_points
-        if (
-            point.get("symbol") in requested_symbols
-            and point.get("lookback_days") == lookback_days
-            and start_date_str <= point.get("date", "") <= end_date_str
-        )
-    ]
+    # Sorted by symbol, then date
+    filtered_points = history.query(requested_symbols, lookback_days, start_date_str, end_date_str)
     
     if debug_rrg:
         print(f"[rrg-history] Filtered points: {len(filtered_points)}", flush=True)
@@ -1822,13 +1931,10 @@ def rrg_history(
                 flush=True,
             )
     
-    # Sort by symbol, then date
-    filtered_points.sort(key=lambda x: (x.get("symbol", ""), x.get("date", "")))
-    
     return {
-        "benchmark": history_data.get("benchmark", "SPY"),
+        "benchmark": history.benchmark,
         "lookback_days": lookback_days,
-        "interval": history_data.get("interval", "weekly"),
+        "interval": history.interval,
         "start_date": start_date_str,
         "end_date": end_date_str,
         "symbols": requested_symbols,
@@ -1873,38 +1979,17 @@ def rrg_predict(payload: Dict[str, Any]):
     
     if not current_states:
         # Derive current states from precomputed history for the selected lookback.
-        _predict_dir = Path(__file__).resolve().parent
-        corrected_path = _predict_dir / "data" / f"rrg_history_{lookback_days}d.json"
-        legacy_path = _predict_dir / "data" / "rrg-history.json"
-        legacy_path_alt = _predict_dir.parent / "data" / "rrg-history.json"
-        points: List[Dict[str, Any]] = []
-
         try:
-            if corrected_path.exists():
-                corrected = json.loads(corrected_path.read_text(encoding="utf-8"))
-                points = corrected.get("data", []) if isinstance(corrected, dict) else []
-            elif legacy_path.exists():
-                legacy = json.loads(legacy_path.read_text(encoding="utf-8"))
-                points = legacy.get("data", []) if isinstance(legacy, dict) else []
-                points = [p for p in points if p.get("lookback_days") == lookback_days]
-            elif legacy_path_alt.exists():
-                legacy = json.loads(legacy_path_alt.read_text(encoding="utf-8"))
-                points = legacy.get("data", []) if isinstance(legacy, dict) else []
-                points = [p for p in points if p.get("lookback_days") == lookback_days]
+            history = _get_rrg_history(lookback_days)
         except Exception as exc:
             raise HTTPException(status_code=500, detail=f"Failed to load RRG history for predictions: {exc}")
 
         latest_by_symbol: Dict[str, Dict[str, Any]] = {}
-        for point in points:
-            sym = point.get("symbol")
-            if sym not in symbols:
-                continue
-            date_str = point.get("date")
-            if not date_str:
-                continue
-            existing = latest_by_symbol.get(sym)
-            if existing is None or date_str > existing.get("date", ""):
-                latest_by_symbol[sym] = point
+        if history is not None:
+            for sym in symbols:
+                latest = history.latest(sym, lookback_days)
+                if latest is not None:
+                    latest_by_symbol[sym] = latest
 
         current_states = {}
         for symbol in symbols:
@@ -2001,15 +2086,104 @@ def industry_analysis(
     """
     Basic industry-level valuation analysis endpoint.
 
-    - Uses provided symbols as the peer universe.
-    - Filters symbols to those whose metadata industry matches the path param.
-    - Computes valuation factor scores using calculate_valuation_factor with optional weights.
+    The user's default filters are resolved first; the rendered analysis is then cached
+    per industry and request for the current sector-metrics.json version (concurrent
+    misses for the same key are coalesced, see ttl_cache.py).
+    """
+    target_industry = industry.strip()
+    if payload.filters is None and target_industry:
+        default_filters = _get_default_filters(db, "industry", target_industry, user_id)
+        if default_filters is not None:
+            payload = payload.copy(update={"filters": default_filters})
+    key = (
+        _sector_metrics_version(),
+        target_industry,
+        json.dumps(payload.dict(), sort_keys=True, default=str),
+    )
+    body = _cached_industry_analysis(key, industry, payload, user_id, db)
+    return Response(content=body, media_type="application/json")
+
+
+# Rendered JSON bodies, so a hit costs no re-encoding. Results depend only on the request
+# and sector-metrics.json, whose version is part of the key; no stale serving, since a
+# refresh would outlive the request's db session.
+@ttl_cache(
+    "industry_analysis",
+    ttl=24 * 3600,
+    max_bytes=64 * _MB,
+    stale_ttl=0,
+    key=lambda key, *args: key,
+)
+def _cached_industry_analysis(
+    key: Tuple[str, str, str],
+    industry: str,
+    payload: IndustryAnalysisRequest,
+    user_id: str,
+    db: Session,
+) -> bytes:
+    return JSONResponse(content=_compute_industry_analysis(industry, payload, user_id, db)).body
+
+
+# Industry analysis multiple -> sector-metrics.json field
+_INDUSTRY_RATIO_FIELDS = {
+    "pe": "peRatioTTM",
+    "ps": "priceToSalesRatioTTM",
+    "pb": "priceToBookRatioTTM",
+    "ev_ebit": "enterpriseValueOverEBITTTM",
+    "ev_ebitda": "enterpriseValueOverEBITDATTM",
+    "ev_sales": "enterpriseValueToSalesTTM",
+}
+
+
+def _finite_column(values: List[Any]) -> np.ndarray:
+    """float_column with non-finite values as NaN too (the _sanitize_float rule)."""
+    column = float_column(values)
+    column[~np.isfinite(column)] = np.nan
+    return column
 
-    This is intentionally focused and minimal; additional factors (quality, growth,
-    filters, backtests, etc.) will be layered on top in later phases.
+
+def _industry_metric_stats(values: np.ndarray) -> Dict[str, Any]:
+    """count / mean / median / p25 / p75 / min / max of the non-NaN `values`."""
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if not n:
+        return {
+            "count": 0,
+            "mean": None,
+            "median": None,
+            "p25": None,
+            "p75": None,
+            "min": None,
+            "max": None,
+        }
+    ordered = np.sort(values)
+    return {
+        "count": n,
+        "mean": mean_or_none(values),
+        "median": median_or_none(values),
+        "p25": float(ordered[max(0, int(0.25 * (n - 1)))]),
+        "p75": float(ordered[max(0, int(0.75 * (n - 1)))]),
+        "min": float(ordered[0]),
+        "max": float(ordered[-1]),
+    }
+
+
+def _compute_industry_analysis(
+    industry: str,
+    payload: IndustryAnalysisRequest,
+    user_id: str,
+    db: Session,
+):
     """
-    from factor_scoring import calculate_valuation_factor
+    Industry-level valuation analysis.
+
+    - Uses provided symbols as the peer universe.
+    - Keeps the symbols found in sector-metrics.json with P/E, P/S and P/B.
+    - Computes valuation factor scores (calculate_valuation_factor semantics) with optional weights.
 
+    Multiples are float columns over the universe: filters, peer statistics and scores
+    are computed as array operations (screen_masks.py, factor_scoring.valuation_factor_results).
+    """
     target_industry = industry.strip()
     if not target_industry:
         raise HTTPException(status_code=400, detail="Industry path parameter must be non-empty")
@@ -2024,79 +2198,24 @@ def industry_analysis(
     if filters_payload is None:
         filters_payload = _get_default_filters(db, "industry", target_industry, user_id)
 
-    # Step 1: collect basic metadata and valuation multiples for all requested symbols
-    records: List[Dict[str, Any]] = []
-
+    # Step 1: valuation multiples of the requested symbols found in the precomputed metrics
+    # (no live Ticker fallback to avoid slowness)
     symbol_metrics_map = _load_sector_metrics()
-
+    found: List[Tuple[str, str, Dict[str, Any]]] = []
     for symbol in symbols:
         if symbol in excluded_symbols:
             continue
-        try:
-            sector_name: str = "Unknown"
-            metrics: Optional[Dict[str, Any]] = None
-
-            mapped = symbol_metrics_map.get(symbol.upper())
-            if mapped:
-                sector_name, metrics = mapped
-
-            if not metrics:
-                # If symbol not found in precomputed metrics, skip it (no live Ticker fallback to avoid slowness)
-                continue
-
-            pe_ratio = _sanitize_float(metrics.get("peRatioTTM")) if metrics.get("peRatioTTM") is not None else None
-            ps_ratio = (
-                _sanitize_float(metrics.get("priceToSalesRatioTTM"))
-                if metrics.get("priceToSalesRatioTTM") is not None
-                else None
-            )
-            pb_ratio = (
-                _sanitize_float(metrics.get("priceToBookRatioTTM"))
-                if metrics.get("priceToBookRatioTTM") is not None
-                else None
-            )
-
-            ev_ebit = (
-                _sanitize_float(metrics.get("enterpriseValueOverEBITTTM"))
-                if metrics.get("enterpriseValueOverEBITTTM") is not None
-                else None
-            )
-            ev_ebitda = (
-                _sanitize_float(metrics.get("enterpriseValueOverEBITDATTM"))
-                if metrics.get("enterpriseValueOverEBITDATTM") is not None
-                else None
-            )
-
-            ev_sales = (
-                _sanitize_float(metrics.get("enterpriseValueToSalesTTM"))
-                if metrics.get("enterpriseValueToSalesTTM") is not None
-                else None
-            )
-
-            # Skip symbols that are missing core valuation multiples (P/E, P/S, P/B)
-            if any(v is None for v in (pe_ratio, ps_ratio, pb_ratio)):
-                continue
-
-            records.append(
-                {
-                    "symbol": symbol,
-                    "industry": target_industry,
-                    "sector": sector_name,
-                    "market_cap": _sanitize_float(metrics.get("marketCap")),
-                    "pe_ratio": pe_ratio,
-                    "ps_ratio": ps_ratio,
-                    "pb_ratio": pb_ratio,
-                    "ev_ebit": ev_ebit,
-                    "ev_ebitda": ev_ebitda,
-                    "ev_sales": ev_sales,
-                    "metrics": metrics,
-                }
-            )
-        except Exception as exc:
-            print(f"[industry_analysis] failed for {symbol}: {exc}", flush=True)
-            continue
+        sector_name, metrics = symbol_metrics_map.get(symbol, ("Unknown", None))
+        if metrics:
+            found.append((symbol, sector_name, metrics))
 
-    if not records:
+    ratios = {
+        key: _finite_column([metrics.get(field) for _sym, _sec, metrics in found])
+        for key, field in _INDUSTRY_RATIO_FIELDS.items()
+    }
+    # Skip symbols that are missing core valuation multiples (P/E, P/S, P/B)
+    usable = ~(np.isnan(ratios["pe"]) | np.isnan(ratios["ps"]) | np.isnan(ratios["pb"]))
+    if not usable.any():
         return {
             "industry": target_industry,
             "symbols": [],
@@ -2105,136 +2224,53 @@ def industry_analysis(
         }
 
     # Apply cap filter (base universe) then custom filters for "passes" set
-    cap_filtered_records = _filter_records_by_cap(records, filters_payload.cap if filters_payload else "all")
-    filtered_records = _apply_filters_to_records(cap_filtered_records, filters_payload)
-    filtered_symbols = {rec["symbol"] for rec in filtered_records}
+    market_cap = _finite_column([metrics.get("marketCap") for _sym, _sec, metrics in found])
+    in_cap = usable & cap_mask(market_cap, filters_payload.cap if filters_payload else "all")
+    rows = np.flatnonzero(in_cap)
+    universe = [found[i] for i in rows.tolist()]
+    passes = filters_mask(
+        filters_payload,
+        market_cap[rows],
+        lambda metric: float_column([_get_metric_value_from_dict(metrics, metric) for _sym, _sec, metrics in universe]),
+        industries=np.full(len(universe), target_industry, dtype=object),
+        sectors=np.array([sec for _sym, sec, _metrics in universe], dtype=object),
+    )
     note = None
-    if not filtered_records:
+    if not passes.any():
         note = "No symbols matched the applied filters."
 
-    # Step 2: build peer lists for valuation multiples within this universe
-    peer_pe_filtered: List[float] = [r["pe_ratio"] for r in filtered_records if r["pe_ratio"] is not None]
-    peer_ps_filtered: List[float] = [r["ps_ratio"] for r in filtered_records if r["ps_ratio"] is not None]
-    peer_pb_filtered: List[float] = [r["pb_ratio"] for r in filtered_records if r["pb_ratio"] is not None]
-    peer_ev_ebit_filtered: List[float] = [r["ev_ebit"] for r in filtered_records if r["ev_ebit"] is not None]
-    peer_ev_ebitda_filtered: List[float] = [r["ev_ebitda"] for r in filtered_records if r["ev_ebitda"] is not None]
-    peer_ev_sales_filtered: List[float] = [r["ev_sales"] for r in filtered_records if r.get("ev_sales") is not None]
-
-    scoring_records = filtered_records if filtered_records else cap_filtered_records
-    peer_pe: List[float] = [r["pe_ratio"] for r in scoring_records if r["pe_ratio"] is not None]
-    peer_ps: List[float] = [r["ps_ratio"] for r in scoring_records if r["ps_ratio"] is not None]
-    peer_pb: List[float] = [r["pb_ratio"] for r in scoring_records if r["pb_ratio"] is not None]
-    peer_ev_ebit: List[float] = [r["ev_ebit"] for r in scoring_records if r["ev_ebit"] is not None]
-    peer_ev_ebitda: List[float] = [r["ev_ebitda"] for r in scoring_records if r["ev_ebitda"] is not None]
-    peer_ev_sales: List[float] = [r["ev_sales"] for r in scoring_records if r.get("ev_sales") is not None]
-
-    peer_pe_all: List[float] = [r["pe_ratio"] for r in cap_filtered_records if r["pe_ratio"] is not None]
-    peer_ps_all: List[float] = [r["ps_ratio"] for r in cap_filtered_records if r["ps_ratio"] is not None]
-    peer_pb_all: List[float] = [r["pb_ratio"] for r in cap_filtered_records if r["pb_ratio"] is not None]
-    peer_ev_ebit_all: List[float] = [r["ev_ebit"] for r in cap_filtered_records if r["ev_ebit"] is not None]
-    peer_ev_ebitda_all: List[float] = [r["ev_ebitda"] for r in cap_filtered_records if r["ev_ebitda"] is not None]
-    peer_ev_sales_all: List[float] = [r["ev_sales"] for r in cap_filtered_records if r.get("ev_sales") is not None]
-
-    peer_counts = {
-        "pe": len(peer_pe_filtered),
-        "ps": len(peer_ps_filtered),
-        "pb": len(peer_pb_filtered),
-        "ev_ebit": len(peer_ev_ebit_filtered),
-        "ev_ebitda": len(peer_ev_ebitda_filtered),
-        "ev_sales": len(peer_ev_sales_filtered),
-    }
+    # Step 2: peer multiples; scores rank against the filtered universe (the cap universe if empty)
+    columns = {key: column[rows] for key, column in ratios.items()}
+    scoring = passes if passes.any() else np.ones(len(rows), dtype=bool)
+    peers = {key: column[scoring & ~np.isnan(column)] for key, column in columns.items()}
 
-    def _metric_stats(values: List[float]) -> Dict[str, Any]:
-        if not values:
-            return {
-                "count": 0,
-                "mean": None,
-                "median": None,
-                "p25": None,
-                "p75": None,
-                "min": None,
-                "max": None,
-            }
-        sorted_vals = sorted(values)
-        n = len(sorted_vals)
-        mean_val = float(statistics.fmean(sorted_vals)) if n > 0 else None
-        median_val = float(statistics.median(sorted_vals)) if n > 0 else None
-        p25_idx = max(0, int(0.25 * (n - 1)))
-        p75_idx = max(0, int(0.75 * (n - 1)))
-        return {
-            "count": n,
-            "mean": mean_val,
-            "median": median_val,
-            "p25": float(sorted_vals[p25_idx]),
-            "p75": float(sorted_vals[p75_idx]),
-            "min": float(sorted_vals[0]),
-            "max": float(sorted_vals[-1]),
-        }
+    peer_counts = {key: int(np.count_nonzero(passes & ~np.isnan(column))) for key, column in columns.items()}
+    industry_stats = {key: _industry_metric_stats(column[passes]) for key, column in columns.items()}
+    industry_stats_unfiltered = {key: _industry_metric_stats(column) for key, column in columns.items()}
 
-    industry_stats = {
-        "pe": _metric_stats(peer_pe_filtered),
-        "ps": _metric_stats(peer_ps_filtered),
-        "pb": _metric_stats(peer_pb_filtered),
-        "ev_ebit": _metric_stats(peer_ev_ebit_filtered),
-        "ev_ebitda": _metric_stats(peer_ev_ebitda_filtered),
-        "ev_sales": _metric_stats(peer_ev_sales_filtered),
-    }
-    industry_stats_unfiltered = {
-        "pe": _metric_stats(peer_pe_all),
-        "ps": _metric_stats(peer_ps_all),
-        "pb": _metric_stats(peer_pb_all),
-        "ev_ebit": _metric_stats(peer_ev_ebit_all),
-        "ev_ebitda": _metric_stats(peer_ev_ebitda_all),
-        "ev_sales": _metric_stats(peer_ev_sales_all),
-    }
+    # Step 3: valuation factor of every symbol in the cap universe against the shared peers
+    valuations = valuation_factor_results(columns, peers, weights=payload.weights)
+    raw_values = {key: [None if math.isnan(v) else v for v in column.tolist()] for key, column in columns.items()}
 
-    # Step 3: compute valuation factor per symbol using the shared peer lists
-    results: List[Dict[str, Any]] = []
-
-    for rec in cap_filtered_records:
-        valuation = calculate_valuation_factor(
-            rec["pe_ratio"],
-            rec["ps_ratio"],
-            rec["pb_ratio"],
-            rec["ev_ebit"],
-            rec["ev_ebitda"],
-            rec.get("ev_sales"),
-            peer_pe,
-            peer_ps,
-            peer_pb,
-            peer_ev_ebit,
-            peer_ev_ebitda,
-            peer_ev_sales,
-            weights=payload.weights,
-        )
-        valuation["raw_values"] = {
-            "pe": rec.get("pe_ratio"),
-            "ps": rec.get("ps_ratio"),
-            "pb": rec.get("pb_ratio"),
-            "ev_ebit": rec.get("ev_ebit"),
-            "ev_ebitda": rec.get("ev_ebitda"),
-            "ev_sales": rec.get("ev_sales"),
-        }
+    # Sort: passing filters first, then by valuation score desc (unscored as -1), ties in request order
+    score_key = np.array([v["score"] if v["score"] is not None else -1.0 for v in valuations], dtype=np.float64)
+    order = np.lexsort((np.arange(len(rows)), -score_key, ~passes))
 
+    results: List[Dict[str, Any]] = []
+    for i in order.tolist():
+        symbol, sector_name, _metrics = universe[i]
+        valuation = valuations[i]
+        valuation["raw_values"] = {key: values[i] for key, values in raw_values.items()}
         results.append(
             {
-                "symbol": rec["symbol"],
-                "industry": rec["industry"],
-                "sector": rec["sector"],
+                "symbol": symbol,
+                "industry": target_industry,
+                "sector": sector_name,
                 "valuation": valuation,
-                "passes_filters": rec["symbol"] in filtered_symbols,
+                "passes_filters": bool(passes[i]),
             }
         )
 
-    # Sort: passing filters first, then by valuation score desc
-    def _sort_key(row: Dict[str, Any]) -> Tuple[int, float]:
-        passes = 1 if row.get("passes_filters") else 0
-        score = row.get("valuation", {}).get("score")
-        score_val = float(score) if isinstance(score, (int, float)) else -1.0
-        return (passes, score_val)
-
-    results.sort(key=_sort_key, reverse=True)
-
     return {
         "industry": target_industry,
         "peer_counts": peer_counts,
@@ -2246,57 +2282,176 @@ def industry_analysis(
     }
 
 
-@app.post("/api/backtest/sector")
-def backtest_sector(payload: BacktestSectorRequest):
+def _backtest_period_records(
+    sector: str,
+    sector_symbols: List[str],
+    aligned: Dict[str, Dict[str, Any]],
+    panel: BacktestPanel,
+    as_of: date,
+    cutoff: date,
+    request_id: str = "",
+    debug_backtest: bool = False,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]], Optional[str]]:
     """
-    Point-in-time-ish backtest for a sector using annual fundamentals + a lag rule.
+    Universe of one rebalance period: price, shares, market cap and the six multiples
+    (filtered "pe" etc. plus "*_raw") of every sector symbol with enough data at `as_of`.
 
-    Caveat: DefeatBeta statements are stamped by period-end date (e.g. 2020-09-30),
-    not the true filing/publication timestamp. `fundamentals_lag_days` is a conservative
-    approximation to avoid lookahead bias.
+    Returns (records in sector_symbols order, the as_of price map, note). `note` says why
+    the universe is empty, and is None otherwise.
     """
-    request_id = uuid.uuid4().hex[:10]
-    t0 = time.perf_counter()
-    timing: Dict[str, float] = {}
-
-    def mark(name: str) -> None:
-        timing[name] = time.perf_counter() - t0
-
-    debug_backtest = os.getenv("BACKTEST_DEBUG") in ("1", "true", "TRUE", "yes", "YES", "on", "ON")
-
+    eligible_symbols: List[str] = []
+    for sym in sector_symbols:
+        row = aligned.get(sym) or {}
+        inc_items = row.get("income_items") or {}
+        if not isinstance(inc_items, dict) or not inc_items:
+            continue
+        # Need revenue plus either EPS or net income to compute P/E/P/S reasonably.
+        has_revenue = _pick_first(inc_items, ["total_revenue", "Total Revenue", "operating_revenue", "Operating Revenue"]) is not None
+        has_eps_or_ni = _pick_first(
+            inc_items,
+            [
+                "diluted_eps",
+                "Diluted EPS",
+                "net_income_common_stockholders",
+                "Net Income Common Stockholders",
+                "net_income",
+                "Net Income",
+            ],
+        ) is not None
+        if has_revenue and has_eps_or_ni:
+            eligible_symbols.append(sym)
+
+    if not eligible_symbols:
+        return [], {}, "No symbols with annual fundamentals available at this date (after lag cutoff)"
+
+    eligible_set = set(eligible_symbols)
+    price_map = {sym: v for sym, v in panel.prices(as_of).items() if sym in eligible_set}
+    # Lag shares outstanding to the same cutoff to avoid lookahead bias.
+    shares_map = {sym: v for sym, v in panel.shares(cutoff).items() if sym in eligible_set}
     if debug_backtest:
         print(
-            f"[backtest:{request_id}] start sector={payload.sector} years={payload.years} hold={payload.holding_years} "
-            f"top_n={payload.top_n} lag_days={payload.fundamentals_lag_days} has_filters={payload.filters is not None}",
+            f"[backtest:{request_id}] as_of={as_of.isoformat()} prices={len(price_map)} shares={len(shares_map)} eligible={len(eligible_symbols)}",
             flush=True,
         )
 
-    from factor_scoring import calculate_valuation_factor
+    records: List[Dict[str, Any]] = []
+    for sym in eligible_symbols:
+        p = price_map.get(sym, {}).get("close")
+        sh = shares_map.get(sym, {}).get("shares")
+        if p is None or sh is None or p <= 0 or sh <= 0:
+            continue
 
-    sector = (payload.sector or "").strip()
+        row = aligned.get(sym) or {}
+        inc_items = row.get("income_items") or {}
+        bal_items = row.get("balance_items") or {}
+
+        diluted_eps = _pick_first(inc_items, ["diluted_eps", "Diluted EPS", "basic_eps", "Basic EPS"])
+        net_income = _pick_first(inc_items, ["net_income_common_stockholders", "Net Income Common Stockholders", "net_income", "Net Income"])
+        revenue = _pick_first(inc_items, ["total_revenue", "Total Revenue", "operating_revenue", "Operating Revenue"])
+        ebit = _pick_first(inc_items, ["ebit", "EBIT"])
+        ebitda = _pick_first(inc_items, ["ebitda", "EBITDA"])
+
+        equity = _pick_first(
+            bal_items,
+            [
+                "stockholders_equity",
+                "Stockholders Equity",
+                "common_stock_equity",
+                "Common Stock Equity",
+                "total_equity_gross_minority_interest",
+                "Total Equity Gross Minority Interest",
+            ],
+        )
+        cash = _pick_first(
+            bal_items,
+            [
+                "cash_cash_equivalents_and_short_term_investments",
+                "Cash, Cash Equivalents & Short Term Investments",
+                "cash_and_cash_equivalents",
+                "Cash And Cash Equivalents",
+            ],
+        )
+        debt = _pick_first(
+            bal_items,
+            [
+                "total_debt",
+                "Total Debt",
+                "long_term_debt_and_capital_lease_obligation",
+                "current_debt_and_capital_lease_obligation",
+                "Total Debt & Capital Lease Obligation",
+            ],
+        )
+
+        market_cap = p * sh
+
+        # Use reported EPS only to avoid mismatching statement periods with share counts.
+        eps = diluted_eps
+        pe_raw = (p / eps) if (eps is not None and eps > 0) else None
+        pe = pe_raw if (pe_raw is not None and pe_raw > 0) else None
+        ps_raw = (market_cap / revenue) if (revenue is not None and revenue > 0) else None
+        ps = ps_raw if (ps_raw is not None and ps_raw > 0) else None
+        pb_raw = (market_cap / equity) if (equity is not None and equity > 0) else None
+        pb = pb_raw if (pb_raw is not None and pb_raw > 0) else None
+
+        ev = None
+        if debt is not None or cash is not None:
+            ev = market_cap + (debt or 0.0) - (cash or 0.0)
+
+        ev_ebit_raw = (ev / ebit) if (ev is not None and ebit is not None and ebit > 0) else None
+        ev_ebit = ev_ebit_raw if (ev_ebit_raw is not None and ev_ebit_raw > 0) else None
+        ev_ebitda_raw = (ev / ebitda) if (ev is not None and ebitda is not None and ebitda > 0) else None
+        ev_ebitda = ev_ebitda_raw if (ev_ebitda_raw is not None and ev_ebitda_raw > 0) else None
+        ev_sales_raw = (ev / revenue) if (ev is not None and revenue is not None and revenue > 0) else None
+        ev_sales = ev_sales_raw if (ev_sales_raw is not None and ev_sales_raw > 0) else None
+
+        records.append(
+            {
+                "symbol": sym,
+                "industry": sector,
+                "sector": sector,
+                "price": p,
+                "shares": sh,
+                "market_cap": market_cap,
+                "pe": pe,
+                "pe_raw": pe_raw,
+                "ps": ps,
+                "ps_raw": ps_raw,
+                "pb": pb,
+                "pb_raw": pb_raw,
+                "ev_ebit": ev_ebit,
+                "ev_ebit_raw": ev_ebit_raw,
+                "ev_ebitda": ev_ebitda,
+                "ev_ebitda_raw": ev_ebitda_raw,
+                "ev_sales": ev_sales,
+                "ev_sales_raw": ev_sales_raw,
+                }
+        )
+
+    if not records:
+        return [], price_map, "No symbols with sufficient price/shares/fundamentals at this date"
+    return records, price_map, None
+
+
+
+def _backtest_sector_symbols(sector: str) -> List[str]:
+    """Sorted symbols of `sector` in sector-metrics.json (400 for an empty name, 404 for an unknown one)."""
     if not sector:
         raise HTTPException(status_code=400, detail="sector must be non-empty")
-
     symbol_map = _load_sector_metrics()
     sector_symbols = sorted([sym for sym, (sec, _m) in symbol_map.items() if sec == sector])
     if not sector_symbols:
         raise HTTPException(status_code=404, detail=f"No symbols found for sector: {sector}")
-    mark("loaded_sector_symbols")
+    return sector_symbols
 
-    etf_prices = _load_etf_prices()
-    benchmark = (payload.benchmark or "SPY").strip().upper()
-    if benchmark not in etf_prices:
-        raise HTTPException(status_code=400, detail=f"Benchmark {benchmark} not found in ETF price file")
-    mark("loaded_benchmark_prices")
 
-    today = datetime.utcnow().date()
-    holding_years = int(payload.holding_years)
-    years = int(payload.years)
-    lag_days = int(payload.fundamentals_lag_days)
+def _backtest_periods(today: date, years: int, holding_years: int, lag_days: int) -> List[Tuple[date, date, date]]:
+    """
+    (as_of, end_date, fundamentals cutoff) of every annual rebalance, oldest first.
 
+    Rebalances are anchored on `today`; a period is kept only when its holding window has
+    ended and its cutoff is not before the dataset's first annual statement.
+    """
     min_stmt = _min_annual_statement_date()
-    if debug_backtest and min_stmt:
-        print(f"[backtest:{request_id}] dataset_min_annual_statement_date={min_stmt.isoformat()}", flush=True)
 
     # Only include start dates where we can also measure the full holding period.
     as_of_dates: List[date] = []
@@ -2308,7 +2463,19 @@ def backtest_sector(payload: BacktestSectorRequest):
                 continue
         as_of_dates.append(candidate)
     as_of_dates.sort()
+    return [
+        (as_of, _shift_years(as_of, holding_years), as_of - timedelta(days=lag_days))
+        for as_of in as_of_dates
+        if _shift_years(as_of, holding_years) <= today
+    ]
+
 
+def _load_backtest_fundamentals(
+    sector_symbols: List[str],
+    as_of_dates: List[date],
+    lag_days: int,
+) -> Dict[date, Dict[str, Dict[str, Any]]]:
+    """as_of -> SYMBOL -> aligned annual income/balance items known `lag_days` before as_of."""
     # Note: raw `stock_statement` item_name values are snake_case, not the
     # "pretty" labels shown in Statement.df(). Keep both where practical.
     income_items = [
@@ -2347,518 +2514,420 @@ def backtest_sector(payload: BacktestSectorRequest):
         "Total Equity Gross Minority Interest",
     ]
 
-    points: List[Dict[str, Any]] = []
-    win_count = 0
-    valid_point_count = 0
-
-    for as_of in as_of_dates:
-        iter_t0 = time.perf_counter()
-        end_date = _shift_years(as_of, holding_years)
-        if end_date > today:
-            continue
+    # Aligned annual fundamentals (income + balance share the same report_date) for every
+    # as_of date in one range join over the point-in-time table (valid_from = report_date + lag).
+    return _query_pit_annual_items_aligned(
+        sector_symbols,
+        as_of_dates,
+        income_item_names=income_items,
+        balance_item_names=balance_items,
+        lag_days=lag_days,
+    )
 
-        cutoff = as_of - timedelta(days=lag_days)
 
-        # Query aligned annual fundamentals first (income + balance share the same report_date),
-        # then fetch prices only for symbols that have enough data to compute ratios.
-        aligned = _query_latest_annual_items_aligned(
+def _load_backtest_prices(
+    sector_symbols: List[str],
+    periods: List[Tuple[date, date, date]],
+    today: date,
+) -> BacktestPanel:
+    """
+    Prices at every rebalance and end date, shares at every cutoff, and (on first use) split and
+    dividend events for the whole range, loaded once for the sector; each period slices it.
+    """
+    try:
+        return _load_backtest_panel(
             sector_symbols,
-            cutoff=cutoff,
-            income_item_names=income_items,
-            balance_item_names=balance_items,
+            price_dates=[d for as_of, end_date, _cutoff in periods for d in (as_of, end_date)],
+            share_dates=[cutoff for _as_of, _end_date, cutoff in periods],
+            event_start=min((p[0] for p in periods), default=today),
+            event_end=max((p[1] for p in periods), default=today),
         )
+    except Exception as exc:
+        msg = str(exc)
+        if "HTTP 429" in msg or "Too Many Requests" in msg:
+            raise HTTPException(
+                status_code=429,
+                detail=(
+                    "Rate-limited by the DefeatBeta/HuggingFace dataset while reading price data. "
+                    "Try again later, or reduce years/top_n, or run the FastAPI service with a warm cache."
+                ),
+            )
+        raise
+
+
+def _window_total_return(
+    start_close: Optional[float],
+    window: Optional[Dict[str, Any]],
+) -> Tuple[Optional[float], float, float]:
+    """
+    (total return, dividends, split factor) of one holding from its start close and its
+    `_corporate_action_window` entry; the return is None without both prices.
+    """
+    window = window or {}
+    ep = window.get("end_close")
+    split_factor = window.get("split_factor") or 1.0
+    # Convert end price to the same basis as start price (pre-split share basis).
+    ep_adj = (ep * split_factor) if (ep is not None and split_factor and split_factor > 0) else ep
+    # Dividends are assumed per share; scale by share count changes due to splits.
+    div = window.get("dividends") or 0.0
+    if start_close is None or ep_adj is None or start_close <= 0:
+        return None, div, split_factor
+    return (ep_adj + div) / start_close - 1.0, div, split_factor
+
+
+def _evaluate_backtest_period(
+    payload: BacktestSectorRequest,
+    sector: str,
+    sector_symbols: List[str],
+    aligned: Dict[str, Dict[str, Any]],
+    panel: BacktestPanel,
+    etf_store: EtfPriceStore,
+    benchmark: str,
+    as_of: date,
+    end_date: date,
+    cutoff: date,
+    request_id: str = "",
+    debug_backtest: bool = False,
+) -> Dict[str, Any]:
+    """
+    One rebalance period of backtest_sector: ratios, filters, fundamental rules, scoring and
+    forward returns for the portfolio picked at `as_of` and held until `end_date`.
+
+    Reads only its arguments (the preloaded panel/stores are shared read-only), so periods can be
+    evaluated in any order or concurrently. Returns the period's entry of the response "data" list.
+    """
+    iter_t0 = time.perf_counter()
+    if debug_backtest:
+        print(
+            f"[backtest:{request_id}] as_of={as_of.isoformat()} cutoff={cutoff.isoformat()} aligned_fundamentals={len(aligned)}",
+            flush=True,
+        )
+
+    records, price_map, note = _backtest_period_records(
+        sector, sector_symbols, aligned, panel, as_of, cutoff, request_id=request_id, debug_backtest=debug_backtest
+    )
+    if not records:
+        return {
+            "as_of": as_of.isoformat(),
+            "end_date": end_date.isoformat(),
+            "universe_size": 0,
+            "selected": [],
+            "note": note,
+        }
+
+    # Columnar view of the universe: filters, rules and scoring below are array operations on it.
+    columns = {field: float_column([r.get(field) for r in records]) for field in (*RATIO_METRICS, "market_cap")}
+
+    # Apply screener-style filters (cap + custom rules) if provided.
+    unsupported_metrics: List[str] = []
+    filters_for_backtest = payload.filters
+    if payload.filters and payload.filters.customRules:
+        filtered_rules = []
+        for r in payload.filters.customRules:
+            if r.metric in BACKTEST_METRIC_COLUMNS:
+                filtered_rules.append(r)
+            else:
+                unsupported_metrics.append(r.metric)
+        if unsupported_metrics:
+            filters_for_backtest = payload.filters.copy(deep=True)
+            filters_for_backtest.customRules = filtered_rules
+
+    in_filters = filters_mask(
+        filters_for_backtest,
+        columns["market_cap"],
+        lambda metric: columns[BACKTEST_METRIC_COLUMNS[metric]],
+        industries=np.array([r.get("industry") for r in records], dtype=object),
+        sectors=np.array([r.get("sector") for r in records], dtype=object),
+    )
+    in_cap = cap_mask(columns["market_cap"], filters_for_backtest.cap if filters_for_backtest else None)
+    filtered_by_filters = [rec for rec, keep in zip(records, in_filters) if keep]
+
+    # Peer multiples (and their mean/median) come from the cap-filtered universe, once per period.
+    peers = {metric: columns[metric][in_cap & ~np.isnan(columns[metric])] for metric in RATIO_METRICS}
+    mean_pe = mean_or_none(peers["pe"])
+    fundamental_rules = payload.rules.fundamental_rules or []
+
+    # Then apply the backtest's built-in P/E rules (these are redundant with custom rules,
+    # but kept for now since the UI exposes them directly).
+    passes = in_filters.copy()
+    if payload.rules.pe_positive:
+        passes &= columns["pe"] > 0
+    if payload.rules.pe_below_universe_mean and mean_pe is not None:
+        passes &= columns["pe"] < mean_pe
+    if fundamental_rules:
+        passes &= fundamental_rules_mask(columns, fundamental_rules, PeerStats(columns, in_cap))
+    rows = np.flatnonzero(passes)
+    filtered_size = len(rows)
+
+    scores, components = score_valuation(
+        {metric: columns[metric][rows] for metric in RATIO_METRICS},
+        weights=payload.weights,
+        peers=peers,
+    )
+    # Best score first, unscored last, ties in universe order (a stable descending sort).
+    has_score = ~np.isnan(scores)
+    order = np.lexsort((np.arange(len(rows)), -np.nan_to_num(scores, nan=0.0), ~has_score))
+
+    selected: List[Dict[str, Any]] = []
+    for pos in order[: int(payload.top_n)]:
+        rec = records[rows[pos]]
+        selected.append(
+            {
+                "symbol": rec["symbol"],
+                "valuation_score": float(scores[pos]) if has_score[pos] else None,
+                "valuation_components": {
+                    key: (None if np.isnan(components[pos, j]) else float(components[pos, j]))
+                    for j, key in enumerate(VALUATION_COMPONENTS)
+                },
+                "ratios": {
+                    "pe": rec.get("pe_raw"),
+                    "ps": rec.get("ps_raw"),
+                    "pb": rec.get("pb_raw"),
+                    "ev_ebit": rec.get("ev_ebit_raw"),
+                    "ev_ebitda": rec.get("ev_ebitda_raw"),
+                    "ev_sales": rec.get("ev_sales_raw"),
+                },
+            }
+        )
+
+    # Start prices come from the panel's as_of price map; end prices, split factors and dividends
+    # come from the precomputed total-return index (or the panel as fallback). One window for the
+    # whole universe serves both the selected names and the industry average below.
+    window_t0 = time.perf_counter()
+    universe_window = _corporate_action_window([r["symbol"] for r in records], as_of, end_date, panel)
+    window_t1 = time.perf_counter()
+    selected_window = universe_window
+
+    per_stock_returns: List[float] = []
+    selected_with_returns: List[Dict[str, Any]] = []
+    for row in selected:
+        sym = row["symbol"]
+        tr, div, split_factor = _window_total_return((price_map.get(sym) or {}).get("close"), selected_window.get(sym))
+        if tr is not None and math.isfinite(tr):
+            per_stock_returns.append(tr)
+        selected_with_returns.append(
+            {
+                **row,
+                "total_return": tr,
+                "dividends": div,
+                "split_factor": split_factor if split_factor != 1.0 else None,
+            }
+        )
+
+    portfolio_return = statistics.fmean(per_stock_returns) if per_stock_returns else None
+
+    b_start = etf_store.asof(benchmark, as_of)
+    b_end = etf_store.asof(benchmark, end_date)
+    benchmark_return = None
+    if b_start is not None and b_end is not None and b_start > 0:
+        benchmark_return = b_end / b_start - 1.0
+
+    # Calculate industry average return for both raw and filtered universes.
+    industry_avg_return = None
+    industry_avg_return_raw = None
+    cap_filtered_records = filtered_by_filters if payload.filters else records
+    
+    if debug_backtest:
+        print(
+            f"[backtest:{request_id}] industry_avg: as_of={as_of.isoformat()} "
+            f"cap_filtered_count={len(cap_filtered_records)}",
+            flush=True,
+        )
+    
+    if records:
+        industry_symbols = [r["symbol"] for r in records]
+        filtered_symbols = [r["symbol"] for r in cap_filtered_records]
+        industry_start_prices = {sym: (price_map.get(sym) or {}).get("close") for sym in industry_symbols}
+        
+        industry_window = universe_window
         if debug_backtest:
             print(
-                f"[backtest:{request_id}] as_of={as_of.isoformat()} cutoff={cutoff.isoformat()} aligned_fundamentals={len(aligned)}",
+                f"[backtest:{request_id}] industry_avg: end prices + corporate actions for {len(industry_symbols)} symbols "
+                f"(as_of={as_of.isoformat()} to end_date={end_date.isoformat()}) in "
+                f"{(window_t1 - window_t0) * 1000:.0f}ms",
                 flush=True,
             )
 
-        eligible_symbols: List[str] = []
-        for sym in sector_symbols:
-            row = aligned.get(sym) or {}
-            inc_items = row.get("income_items") or {}
-            if not isinstance(inc_items, dict) or not inc_items:
-                continue
-            # Need revenue plus either EPS or net income to compute P/E/P/S reasonably.
-            has_revenue = _pick_first(inc_items, ["total_revenue", "Total Revenue", "operating_revenue", "Operating Revenue"]) is not None
-            has_eps_or_ni = _pick_first(
-                inc_items,
-                [
-                    "diluted_eps",
-                    "Diluted EPS",
-                    "net_income_common_stockholders",
-                    "Net Income Common Stockholders",
-                    "net_income",
-                    "Net Income",
-                ],
-            ) is not None
-            if has_revenue and has_eps_or_ni:
-                eligible_symbols.append(sym)
-
-        if not eligible_symbols:
-            points.append(
-                {
-                    "as_of": as_of.isoformat(),
-                    "end_date": end_date.isoformat(),
-                    "universe_size": 0,
-                    "selected": [],
-                    "note": "No symbols with annual fundamentals available at this date (after lag cutoff)",
-                }
-            )
-            continue
-
-        try:
-            price_map = _query_latest_prices(eligible_symbols, as_of)
-            # Lag shares outstanding to the same cutoff to avoid lookahead bias.
-            shares_map = _query_latest_shares(eligible_symbols, cutoff)
-        except Exception as exc:
-            msg = str(exc)
-            if "HTTP 429" in msg or "Too Many Requests" in msg:
-                raise HTTPException(
-                    status_code=429,
-                    detail=(
-                        "Rate-limited by the DefeatBeta/HuggingFace dataset while reading price data. "
-                        "Try again later, or reduce years/top_n, or run the FastAPI service with a warm cache."
-                    ),
-                )
-            raise
         if debug_backtest:
             print(
-                f"[backtest:{request_id}] as_of={as_of.isoformat()} prices={len(price_map)} shares={len(shares_map)} eligible={len(eligible_symbols)}",
+                f"[backtest:{request_id}] industry_avg: calculating returns for raw={len(industry_symbols)} filtered={len(filtered_symbols)} symbols",
                 flush=True,
             )
-
-        records: List[Dict[str, Any]] = []
-        for sym in eligible_symbols:
-            p = price_map.get(sym, {}).get("close")
-            sh = shares_map.get(sym, {}).get("shares")
-            if p is None or sh is None or p <= 0 or sh <= 0:
+        industry_calc_t0 = time.perf_counter()
+        industry_returns: List[float] = []
+        filtered_returns: List[float] = []
+        skipped_count = 0
+        filtered_skipped = 0
+        filtered_set = set(filtered_symbols)
+        for sym in industry_symbols:
+            tr, _div, _split = _window_total_return(industry_start_prices.get(sym), industry_window.get(sym))
+            if tr is None:
+                skipped_count += 1
+                if sym in filtered_set:
+                    filtered_skipped += 1
                 continue
-
-            row = aligned.get(sym) or {}
-            inc_items = row.get("income_items") or {}
-            bal_items = row.get("balance_items") or {}
-
-            diluted_eps = _pick_first(inc_items, ["diluted_eps", "Diluted EPS", "basic_eps", "Basic EPS"])
-            net_income = _pick_first(inc_items, ["net_income_common_stockholders", "Net Income Common Stockholders", "net_income", "Net Income"])
-            revenue = _pick_first(inc_items, ["total_revenue", "Total Revenue", "operating_revenue", "Operating Revenue"])
-            ebit = _pick_first(inc_items, ["ebit", "EBIT"])
-            ebitda = _pick_first(inc_items, ["ebitda", "EBITDA"])
-
-            equity = _pick_first(
-                bal_items,
-                [
-                    "stockholders_equity",
-                    "Stockholders Equity",
-                    "common_stock_equity",
-                    "Common Stock Equity",
-                    "total_equity_gross_minority_interest",
-                    "Total Equity Gross Minority Interest",
-                ],
-            )
-            cash = _pick_first(
-                bal_items,
-                [
-                    "cash_cash_equivalents_and_short_term_investments",
-                    "Cash, Cash Equivalents & Short Term Investments",
-                    "cash_and_cash_equivalents",
-                    "Cash And Cash Equivalents",
-                ],
+            if math.isfinite(tr):
+                industry_returns.append(tr)
+                if sym in filtered_set:
+                    filtered_returns.append(tr)
+        industry_calc_t1 = time.perf_counter()
+
+        industry_avg_return_raw = statistics.fmean(industry_returns) if industry_returns else None
+        industry_avg_return = statistics.fmean(filtered_returns) if filtered_returns else None
+        if debug_backtest:
+            avg_return_str = f"{industry_avg_return * 100:.2f}%" if industry_avg_return is not None else "None"
+            avg_return_raw_str = f"{industry_avg_return_raw * 100:.2f}%" if industry_avg_return_raw is not None else "None"
+            print(
+                f"[backtest:{request_id}] industry_avg: return calculation done in {(industry_calc_t1 - industry_calc_t0) * 1000:.0f}ms "
+                f"(raw={len(industry_returns)} returns, skipped {skipped_count} symbols, "
+                f"filtered={len(filtered_returns)} returns, skipped_filtered={filtered_skipped}, "
+                f"avg_return={avg_return_str}, avg_return_raw={avg_return_raw_str})",
+                flush=True,
             )
-            debt = _pick_first(
-                bal_items,
-                [
-                    "total_debt",
-                    "Total Debt",
-                    "long_term_debt_and_capital_lease_obligation",
-                    "current_debt_and_capital_lease_obligation",
-                    "Total Debt & Capital Lease Obligation",
-                ],
+    else:
+        if debug_backtest:
+            print(
+                f"[backtest:{request_id}] industry_avg: no cap_filtered_records, skipping industry average calculation",
+                flush=True,
             )
 
-            market_cap = p * sh
-
-            # Use reported EPS only to avoid mismatching statement periods with share counts.
-            eps = diluted_eps
-            pe_raw = (p / eps) if (eps is not None and eps > 0) else None
-            pe = pe_raw if (pe_raw is not None and pe_raw > 0) else None
-            ps_raw = (market_cap / revenue) if (revenue is not None and revenue > 0) else None
-            ps = ps_raw if (ps_raw is not None and ps_raw > 0) else None
-            pb_raw = (market_cap / equity) if (equity is not None and equity > 0) else None
-            pb = pb_raw if (pb_raw is not None and pb_raw > 0) else None
-
-            ev = None
-            if debt is not None or cash is not None:
-                ev = market_cap + (debt or 0.0) - (cash or 0.0)
-
-            ev_ebit_raw = (ev / ebit) if (ev is not None and ebit is not None and ebit > 0) else None
-            ev_ebit = ev_ebit_raw if (ev_ebit_raw is not None and ev_ebit_raw > 0) else None
-            ev_ebitda_raw = (ev / ebitda) if (ev is not None and ebitda is not None and ebitda > 0) else None
-            ev_ebitda = ev_ebitda_raw if (ev_ebitda_raw is not None and ev_ebitda_raw > 0) else None
-            ev_sales_raw = (ev / revenue) if (ev is not None and revenue is not None and revenue > 0) else None
-            ev_sales = ev_sales_raw if (ev_sales_raw is not None and ev_sales_raw > 0) else None
-
-            records.append(
-                {
-                    "symbol": sym,
-                    "industry": sector,
-                    "sector": sector,
-                    "price": p,
-                    "shares": sh,
-                    "market_cap": market_cap,
-                    "pe": pe,
-                    "pe_raw": pe_raw,
-                    "ps": ps,
-                    "ps_raw": ps_raw,
-                    "pb": pb,
-                    "pb_raw": pb_raw,
-                    "ev_ebit": ev_ebit,
-                    "ev_ebit_raw": ev_ebit_raw,
-                    "ev_ebitda": ev_ebitda,
-                    "ev_ebitda_raw": ev_ebitda_raw,
-                    "ev_sales": ev_sales,
-                    "ev_sales_raw": ev_sales_raw,
-                    "metrics": None,  # filled below for custom rules
-                }
-            )
+    point = {
+        "as_of": as_of.isoformat(),
+        "end_date": end_date.isoformat(),
+        "universe_size": len(records),
+        "filtered_by_filters_size": len(filtered_by_filters),
+        "filtered_size": filtered_size,
+        "mean_pe": mean_pe,
+        "selected": selected_with_returns,
+        "portfolio_total_return": portfolio_return,
+        "benchmark_total_return": benchmark_return,
+        "industry_avg_return": industry_avg_return,
+        "industry_avg_return_raw": industry_avg_return_raw,
+        "industry_avg_return_filtered": industry_avg_return,
+        "timing_ms": int((time.perf_counter() - iter_t0) * 1000),
+        "unsupported_filter_metrics": sorted(set(unsupported_metrics)) if unsupported_metrics else [],
+    }
+    if debug_backtest:
+        print(
+            f"[backtest:{request_id}] as_of={as_of.isoformat()} done universe={len(records)} filtered={filtered_size} selected={len(selected)}",
+            flush=True,
+        )
+    return point
 
-        if not records:
-            points.append(
-                {
-                    "as_of": as_of.isoformat(),
-                    "end_date": end_date.isoformat(),
-                    "universe_size": 0,
-                    "selected": [],
-                    "note": "No symbols with sufficient price/shares/fundamentals at this date",
-                }
-            )
-            continue
 
-        # Attach a metrics dict so existing custom rules can run.
-        for rec in records:
-            rec["metrics"] = _build_backtest_metrics_dict(rec)
-
-        # Apply screener-style filters (cap + custom rules) if provided.
-        unsupported_metrics: List[str] = []
-        filters_for_backtest = payload.filters
-        if payload.filters and payload.filters.customRules:
-            supported = {
-                "peRatioTTM",
-                "priceToSalesRatioTTM",
-                "priceToBookRatioTTM",
-                "enterpriseValueOverEBITTTM",
-                "enterpriseValueOverEBITDATTM",
-                "enterpriseValueToSalesTTM",
-                "marketCap",
-            }
-            filtered_rules = []
-            for r in payload.filters.customRules:
-                if r.metric in supported:
-                    filtered_rules.append(r)
-                else:
-                    unsupported_metrics.append(r.metric)
-            if unsupported_metrics:
-                filters_for_backtest = payload.filters.copy(deep=True)
-                filters_for_backtest.customRules = filtered_rules
-
-        filtered_by_filters = _apply_filters_to_records(records, filters_for_backtest)
-        cap_filtered_records = _filter_records_by_cap(
-            records,
-            filters_for_backtest.cap if filters_for_backtest else None,
-        )
+def _iter_backtest_sector(
+    payload: BacktestSectorRequest,
+    today: Optional[date] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Point-in-time-ish backtest for a sector using annual fundamentals + a lag rule, as events.
 
-        # Then apply the backtest's built-in P/E rules (these are redundant with custom rules,
-        # but kept for now since the UI exposes them directly).
-        records_for_rules = filtered_by_filters
-
-        peer_pe = [r["pe"] for r in cap_filtered_records if r.get("pe") is not None]
-        peer_ps = [r["ps"] for r in cap_filtered_records if r.get("ps") is not None]
-        peer_pb = [r["pb"] for r in cap_filtered_records if r.get("pb") is not None]
-        peer_ev_ebit = [r["ev_ebit"] for r in cap_filtered_records if r.get("ev_ebit") is not None]
-        peer_ev_ebitda = [r["ev_ebitda"] for r in cap_filtered_records if r.get("ev_ebitda") is not None]
-        peer_ev_sales = [r["ev_sales"] for r in cap_filtered_records if r.get("ev_sales") is not None]
-
-        mean_pe = statistics.fmean(peer_pe) if peer_pe else None
-        fundamental_rules = payload.rules.fundamental_rules or []
-        metric_means: Dict[str, Optional[float]] = {}
-        metric_medians: Dict[str, Optional[float]] = {}
-
-        if fundamental_rules:
-            metrics = ["pe", "ps", "pb", "ev_ebit", "ev_ebitda", "ev_sales"]
-            for metric in metrics:
-                values = [
-                    r.get(metric)
-                    for r in cap_filtered_records
-                    if isinstance(r.get(metric), (int, float)) and math.isfinite(r.get(metric))
-                ]
-                metric_means[metric] = statistics.fmean(values) if values else None
-                metric_medians[metric] = statistics.median(values) if values else None
-
-        def _passes_fundamental_rules(rec: Dict[str, Any]) -> bool:
-            if not fundamental_rules:
-                return True
-            for rule in fundamental_rules:
-                metric = rule.metric
-                operator = rule.operator
-                val = rec.get(metric)
-                if not isinstance(val, (int, float)) or not math.isfinite(val):
-                    return False
-                if operator == "gt_zero":
-                    if val <= 0:
-                        return False
-                elif operator == "lt_mean":
-                    mean_val = metric_means.get(metric)
-                    if mean_val is None or val >= mean_val:
-                        return False
-                elif operator == "lt_median":
-                    median_val = metric_medians.get(metric)
-                    if median_val is None or val >= median_val:
-                        return False
-            return True
-
-        filtered: List[Dict[str, Any]] = []
-        for rec in records_for_rules:
-            pe_val = rec.get("pe")
-            if payload.rules.pe_positive and (pe_val is None or pe_val <= 0):
-                continue
-            if payload.rules.pe_below_universe_mean:
-                if mean_pe is not None and (pe_val is None or pe_val >= mean_pe):
-                    continue
-            if not _passes_fundamental_rules(rec):
-                continue
-            filtered.append(rec)
-
-        scored: List[Dict[str, Any]] = []
-        for rec in filtered:
-            valuation = calculate_valuation_factor(
-                rec.get("pe"),
-                rec.get("ps"),
-                rec.get("pb"),
-                rec.get("ev_ebit"),
-                rec.get("ev_ebitda"),
-                rec.get("ev_sales"),
-                peer_pe,
-                peer_ps,
-                peer_pb,
-                peer_ev_ebit,
-                peer_ev_ebitda,
-                peer_ev_sales,
-                weights=payload.weights,
-            )
-            scored.append(
-                {
-                    "symbol": rec["symbol"],
-                    "valuation_score": valuation.get("score"),
-                    "valuation_components": valuation.get("components"),
-                    "ratios": {
-                        "pe": rec.get("pe_raw"),
-                        "ps": rec.get("ps_raw"),
-                        "pb": rec.get("pb_raw"),
-                        "ev_ebit": rec.get("ev_ebit_raw"),
-                        "ev_ebitda": rec.get("ev_ebitda_raw"),
-                        "ev_sales": rec.get("ev_sales_raw"),
-                    },
-                }
-            )
+    Yields ("start", plan) once the request is validated and before any data is loaded,
+    ("period", {"index", "point"}) for each rebalance period as it finishes (in completion
+    order), then ("result", body) with the full response body (points in as_of order).
+    Validation errors are raised before the first event. Setting `cancel` stops the run
+    between phases and drops periods that have not started; no "result" follows.
 
-        scored.sort(
-            key=lambda r: (r.get("valuation_score") is not None, r.get("valuation_score") or 0.0),
-            reverse=True,
-        )
-        selected = scored[: int(payload.top_n)]
-        selected_symbols = [s["symbol"] for s in selected]
+    Caveat: DefeatBeta statements are stamped by period-end date (e.g. 2020-09-30),
+    not the true filing/publication timestamp. `fundamentals_lag_days` is a conservative
+    approximation to avoid lookahead bias.
+    """
 
-        # Start prices come from the already-fetched as_of price map.
-        end_prices = _query_latest_prices(selected_symbols, end_date)
-        split_events = _query_split_events(selected_symbols, as_of, end_date)
-        dividend_events = _query_dividend_events(selected_symbols, as_of, end_date)
+    def cancelled() -> bool:
+        return cancel is not None and cancel.is_set()
 
-        per_stock_returns: List[float] = []
-        selected_with_returns: List[Dict[str, Any]] = []
-        for row in selected:
-            sym = row["symbol"]
-            sp = (price_map.get(sym) or {}).get("close")
-            ep = (end_prices.get(sym) or {}).get("close")
+    request_id = uuid.uuid4().hex[:10]
+    t0 = time.perf_counter()
+    timing: Dict[str, float] = {}
 
-            sym_splits = split_events.get(sym) or []
-            split_factor = _split_factor_between(sym_splits, as_of, end_date)
+    def mark(name: str) -> None:
+        timing[name] = time.perf_counter() - t0
 
-            # Convert end price to the same basis as start price (pre-split share basis).
-            ep_adj = (ep * split_factor) if (ep is not None and split_factor and split_factor > 0) else ep
+    debug_backtest = os.getenv("BACKTEST_DEBUG") in ("1", "true", "TRUE", "yes", "YES", "on", "ON")
 
-            # Dividends are assumed per share; scale by share count changes due to splits.
-            div = _split_adjusted_dividends(dividend_events.get(sym) or [], sym_splits, as_of, end_date)
+    if debug_backtest:
+        print(
+            f"[backtest:{request_id}] start sector={payload.sector} years={payload.years} hold={payload.holding_years} "
+            f"top_n={payload.top_n} lag_days={payload.fundamentals_lag_days} has_filters={payload.filters is not None}",
+            flush=True,
+        )
 
-            tr: Optional[float] = None
-            if sp is not None and ep_adj is not None and sp > 0:
-                tr = (ep_adj + div) / sp - 1.0
-                if math.isfinite(tr):
-                    per_stock_returns.append(tr)
-            selected_with_returns.append(
-                {
-                    **row,
-                    "total_return": tr,
-                    "dividends": div,
-                    "split_factor": split_factor if split_factor != 1.0 else None,
-                }
-            )
+    sector = (payload.sector or "").strip()
+    sector_symbols = _backtest_sector_symbols(sector)
+    mark("loaded_sector_symbols")
 
-        portfolio_return = statistics.fmean(per_stock_returns) if per_stock_returns else None
+    etf_store = _get_etf_price_store()
+    benchmark = (payload.benchmark or "SPY").strip().upper()
+    if etf_store is None or benchmark not in etf_store:
+        raise HTTPException(status_code=400, detail=f"Benchmark {benchmark} not found in ETF price file")
+    mark("loaded_benchmark_prices")
 
-        b_start = _get_etf_adj_close_asof(benchmark, as_of, etf_prices)
-        b_end = _get_etf_adj_close_asof(benchmark, end_date, etf_prices)
-        benchmark_return = None
-        if b_start is not None and b_end is not None and b_start > 0:
-            benchmark_return = b_end / b_start - 1.0
+    today = today or datetime.utcnow().date()
+    lag_days = int(payload.fundamentals_lag_days)
+    periods = _backtest_periods(today, int(payload.years), int(payload.holding_years), lag_days)
+    if debug_backtest:
+        min_stmt = _min_annual_statement_date()
+        if min_stmt:
+            print(f"[backtest:{request_id}] dataset_min_annual_statement_date={min_stmt.isoformat()}", flush=True)
+    yield "start", {
+        "sector": sector,
+        "benchmark": benchmark,
+        "request_id": request_id,
+        "periods": [
+            {"index": i, "as_of": as_of.isoformat(), "end_date": end_date.isoformat()}
+            for i, (as_of, end_date, _cutoff) in enumerate(periods)
+        ],
+    }
 
-        # Calculate industry average return for both raw and filtered universes.
-        industry_avg_return = None
-        industry_avg_return_raw = None
-        cap_filtered_records = filtered_by_filters if payload.filters else records
-        
-        if debug_backtest:
-            print(
-                f"[backtest:{request_id}] industry_avg: as_of={as_of.isoformat()} "
-                f"cap_filtered_count={len(cap_filtered_records)}",
-                flush=True,
-            )
-        
-        if records:
-            industry_symbols = [r["symbol"] for r in records]
-            filtered_symbols = [r["symbol"] for r in cap_filtered_records]
-            industry_start_prices = {sym: (price_map.get(sym) or {}).get("close") for sym in industry_symbols}
-            
-            if debug_backtest:
-                print(
-                    f"[backtest:{request_id}] industry_avg: querying end_date prices for {len(industry_symbols)} symbols "
-                    f"(end_date={end_date.isoformat()})",
-                    flush=True,
-                )
-            industry_avg_query_t0 = time.perf_counter()
-            industry_end_prices_map = _query_latest_prices(industry_symbols, end_date)
-            industry_avg_query_t1 = time.perf_counter()
-            if debug_backtest:
-                print(
-                    f"[backtest:{request_id}] industry_avg: end_date prices query done in {(industry_avg_query_t1 - industry_avg_query_t0) * 1000:.0f}ms "
-                    f"(got prices for {len(industry_end_prices_map)} symbols)",
-                    flush=True,
-                )
-            
-            if debug_backtest:
-                print(
-                    f"[backtest:{request_id}] industry_avg: querying split events for {len(industry_symbols)} symbols "
-                    f"(as_of={as_of.isoformat()} to end_date={end_date.isoformat()})",
-                    flush=True,
-                )
-            industry_avg_query_t0 = time.perf_counter()
-            industry_splits_map = _query_split_events(industry_symbols, as_of, end_date)
-            industry_avg_query_t1 = time.perf_counter()
-            splits_count = sum(len(events) for events in industry_splits_map.values())
-            if debug_backtest:
-                print(
-                    f"[backtest:{request_id}] industry_avg: split events query done in {(industry_avg_query_t1 - industry_avg_query_t0) * 1000:.0f}ms "
-                    f"(found {splits_count} total split events across {len([s for s in industry_splits_map.values() if s])} symbols)",
-                    flush=True,
-                )
-            
-            if debug_backtest:
-                print(
-                    f"[backtest:{request_id}] industry_avg: querying dividend events for {len(industry_symbols)} symbols "
-                    f"(as_of={as_of.isoformat()} to end_date={end_date.isoformat()})",
-                    flush=True,
-                )
-            industry_avg_query_t0 = time.perf_counter()
-            industry_dividends_map = _query_dividend_events(industry_symbols, as_of, end_date)
-            industry_avg_query_t1 = time.perf_counter()
-            dividends_count = sum(len(events) for events in industry_dividends_map.values())
-            if debug_backtest:
-                print(
-                    f"[backtest:{request_id}] industry_avg: dividend events query done in {(industry_avg_query_t1 - industry_avg_query_t0) * 1000:.0f}ms "
-                    f"(found {dividends_count} total dividend events across {len([d for d in industry_dividends_map.values() if d])} symbols)",
-                    flush=True,
-                )
-            
-            if debug_backtest:
-                print(
-                    f"[backtest:{request_id}] industry_avg: calculating returns for raw={len(industry_symbols)} filtered={len(filtered_symbols)} symbols",
-                    flush=True,
-                )
-            industry_calc_t0 = time.perf_counter()
-            industry_returns: List[float] = []
-            filtered_returns: List[float] = []
-            skipped_count = 0
-            filtered_skipped = 0
-            filtered_set = set(filtered_symbols)
-            for sym in industry_symbols:
-                sp = industry_start_prices.get(sym)
-                ep = (industry_end_prices_map.get(sym) or {}).get("close")
-                
-                if sp is None or ep is None or sp <= 0:
-                    skipped_count += 1
-                    if sym in filtered_set:
-                        filtered_skipped += 1
-                    continue
-                
-                sym_splits = industry_splits_map.get(sym) or []
-                split_factor = _split_factor_between(sym_splits, as_of, end_date)
-                ep_adj = (ep * split_factor) if (ep is not None and split_factor and split_factor > 0) else ep
-                
-                div = _split_adjusted_dividends(industry_dividends_map.get(sym) or [], sym_splits, as_of, end_date)
-                
-                tr = (ep_adj + div) / sp - 1.0 if (ep_adj is not None and sp > 0) else None
-                if tr is not None and math.isfinite(tr):
-                    industry_returns.append(tr)
-                    if sym in filtered_set:
-                        filtered_returns.append(tr)
-            industry_calc_t1 = time.perf_counter()
-
-            industry_avg_return_raw = statistics.fmean(industry_returns) if industry_returns else None
-            industry_avg_return = statistics.fmean(filtered_returns) if filtered_returns else None
-            if debug_backtest:
-                avg_return_str = f"{industry_avg_return * 100:.2f}%" if industry_avg_return is not None else "None"
-                avg_return_raw_str = f"{industry_avg_return_raw * 100:.2f}%" if industry_avg_return_raw is not None else "None"
-                print(
-                    f"[backtest:{request_id}] industry_avg: return calculation done in {(industry_calc_t1 - industry_calc_t0) * 1000:.0f}ms "
-                    f"(raw={len(industry_returns)} returns, skipped {skipped_count} symbols, "
-                    f"filtered={len(filtered_returns)} returns, skipped_filtered={filtered_skipped}, "
-                    f"avg_return={avg_return_str}, avg_return_raw={avg_return_raw_str})",
-                    flush=True,
-                )
-        else:
-            if debug_backtest:
-                print(
-                    f"[backtest:{request_id}] industry_avg: no cap_filtered_records, skipping industry average calculation",
-                    flush=True,
-                )
+    aligned_by_date = _load_backtest_fundamentals(sector_symbols, [as_of for as_of, _end, _cutoff in periods], lag_days)
+    mark("loaded_pit_fundamentals")
+    if cancelled():
+        return
 
-        if portfolio_return is not None and benchmark_return is not None:
-            valid_point_count += 1
-            if portfolio_return > benchmark_return:
-                win_count += 1
+    panel = _load_backtest_prices(sector_symbols, periods, today)
+    mark("loaded_price_panel")
+    if cancelled():
+        return
 
-        points.append(
-            {
-                "as_of": as_of.isoformat(),
-                "end_date": end_date.isoformat(),
-                "universe_size": len(records),
-                "filtered_by_filters_size": len(filtered_by_filters),
-                "filtered_size": len(filtered),
-                "mean_pe": mean_pe,
-                "selected": selected_with_returns,
-                "portfolio_total_return": portfolio_return,
-                "benchmark_total_return": benchmark_return,
-                "industry_avg_return": industry_avg_return,
-                "industry_avg_return_raw": industry_avg_return_raw,
-                "industry_avg_return_filtered": industry_avg_return,
-                "timing_ms": int((time.perf_counter() - iter_t0) * 1000),
-                "unsupported_filter_metrics": sorted(set(unsupported_metrics)) if unsupported_metrics else [],
-            }
+    def evaluate(period: Tuple[date, date, date]) -> Dict[str, Any]:
+        as_of, end_date, cutoff = period
+        return _evaluate_backtest_period(
+            payload,
+            sector,
+            sector_symbols,
+            aligned_by_date.get(as_of) or {},
+            panel,
+            etf_store,
+            benchmark,
+            as_of,
+            end_date,
+            cutoff,
+            request_id=request_id,
+            debug_backtest=debug_backtest,
         )
-        if debug_backtest:
-            print(
-                f"[backtest:{request_id}] as_of={as_of.isoformat()} done universe={len(records)} filtered={len(filtered)} selected={len(selected)}",
-                flush=True,
-            )
+
+    # Periods are independent once the panel is loaded; they are reported as they finish and
+    # put back in as_of order for the summary.
+    if len(periods) > 1 and os.getenv("BACKTEST_PARALLEL_PERIODS", "1") in ("1", "true", "TRUE", "yes", "YES", "on", "ON"):
+        finished = get_data_pool().imap_unordered("backtest", evaluate, periods, cancel=cancel)
+    else:
+        finished = ((i, evaluate(period)) for i, period in enumerate(periods) if not cancelled())
+    points_by_index: Dict[int, Dict[str, Any]] = {}
+    for index, point in finished:
+        points_by_index[index] = point
+        yield "period", {"index": index, "point": point}
+    if cancelled():
+        return
+    points = [points_by_index[i] for i in range(len(periods))]
+    mark("evaluated_periods")
+
+    with_returns = [
+        p for p in points
+        if p.get("portfolio_total_return") is not None and p.get("benchmark_total_return") is not None
+    ]
+    valid_point_count = len(with_returns)
+    win_count = sum(1 for p in with_returns if p["portfolio_total_return"] > p["benchmark_total_return"])
 
     portfolio_returns = [p.get("portfolio_total_return") for p in points if p.get("portfolio_total_return") is not None]
     benchmark_returns = [p.get("benchmark_total_return") for p in points if p.get("benchmark_total_return") is not None]
@@ -2874,56 +2943,287 @@ def backtest_sector(payload: BacktestSectorRequest):
         "avg_industry_return_raw": statistics.fmean(industry_avg_returns_raw) if industry_avg_returns_raw else None,
     }
 
-    mark("done")
-    timing_ms = {k: int(v * 1000) for k, v in timing.items()}
-    if debug_backtest:
-        print(f"[backtest:{request_id}] done timing_ms={timing_ms} points={len(points)}", flush=True)
+    mark("done")
+    timing_ms = {k: int(v * 1000) for k, v in timing.items()}
+    if debug_backtest:
+        print(f"[backtest:{request_id}] done timing_ms={timing_ms} points={len(points)}", flush=True)
+
+    yield "result", {
+        "sector": sector,
+        "benchmark": benchmark,
+        "request_id": request_id,
+        "server_timing_ms": timing_ms,
+        "params": payload.dict(),
+        "applied_filters": payload.filters.dict() if payload.filters else None,
+        "note": "Annual fundamentals are period-end dated; point-in-time is approximated via fundamentals_lag_days.",
+        "data": points,
+        "summary": summary,
+    }
+
+
+def _run_backtest_sector(payload: BacktestSectorRequest, today: Optional[date] = None) -> Dict[str, Any]:
+    """Sector backtest response body (see `_iter_backtest_sector`)."""
+    body: Dict[str, Any] = {}
+    for event, data in _iter_backtest_sector(payload, today=today):
+        if event == "result":
+            body = data
+    return body
+
+
+# Response fields that describe one request rather than the backtest result; not cached.
+_BACKTEST_REQUEST_FIELDS = ("request_id", "server_timing_ms", "params", "applied_filters")
+
+
+def _canonical_backtest_request(payload: BacktestSectorRequest) -> Dict[str, Any]:
+    """
+    Result-determining fields of a backtest request, with defaults filled in and order removed.
+
+    Equivalent requests (rules listed in another order, weights spelled out vs. defaulted,
+    filters that filter nothing vs. no filters) map to the same dict.
+    """
+    weights = {**{k: 1.0 for k in VALUATION_COMPONENTS}, **(payload.weights or {})}
+    filters = payload.filters
+    canonical_filters: Optional[Dict[str, Any]] = None
+    if filters is not None:
+        custom_rules = sorted(
+            {
+                (r.metric, r.operator, json.dumps(r.value, sort_keys=True, default=str), bool(r.enabled))
+                for r in filters.customRules or []
+            }
+        )
+        cap = filters.cap or "all"
+        if filters.industry or cap != "all" or custom_rules:
+            canonical_filters = {
+                "industry": filters.industry or None,
+                "cap": cap,
+                "custom_rules": [list(rule) for rule in custom_rules],
+                "rule_logic": "OR" if filters.ruleLogic == "OR" else "AND",
+            }
+    return {
+        "sector": (payload.sector or "").strip(),
+        "benchmark": (payload.benchmark or "SPY").strip().upper(),
+        "years": int(payload.years),
+        "holding_years": int(payload.holding_years),
+        "rebalance": payload.rebalance,
+        "top_n": int(payload.top_n),
+        "fundamentals_lag_days": int(payload.fundamentals_lag_days),
+        "rules": {
+            "pe_positive": bool(payload.rules.pe_positive),
+            "pe_below_universe_mean": bool(payload.rules.pe_below_universe_mean),
+            "fundamental_rules": sorted({(r.metric, r.operator) for r in payload.rules.fundamental_rules or []}),
+        },
+        "weights": {k: max(0.0, float(weights[k])) for k in VALUATION_COMPONENTS},
+        "filters": canonical_filters,
+    }
+
 
+def _backtest_input_version() -> str:
+    """
+    Dataset version plus the local files a backtest reads (sector membership, ETF
+    prices, total-return index and its events).
+    """
+    from total_return import DEFAULT_INDEX_PATH, events_path_for
+
+    parts = [current_data_version()]
+    for path in (SECTOR_METRICS_PATH, ETF_PRICES_PATH, Path(DEFAULT_INDEX_PATH), events_path_for(DEFAULT_INDEX_PATH)):
+        parts.append(f"{path.name}:{file_version_tag(path)}")
+    return "|".join(parts)
+
+
+def _backtest_cache_lookup(payload: BacktestSectorRequest, today: date) -> Dict[str, Any]:
+    """Cache key, ETag and (when caching is on and the entry exists) the cached result of a backtest request."""
+    canonical = _canonical_backtest_request(payload)
+    data_version = current_data_version()
+    key = cache_key({**canonical, "run_date": today.isoformat()}, _backtest_input_version())
+    # Never reuse results computed while the dataset version could not be determined.
+    versioned = data_version != "unknown"
+    use_cache = versioned and os.getenv("BACKTEST_CACHE", "1") in ("1", "true", "TRUE", "yes", "YES", "on", "ON")
     return {
-        "sector": sector,
-        "benchmark": benchmark,
-        "request_id": request_id,
-        "server_timing_ms": timing_ms,
+        "key": key,
+        "etag": etag_for(key) if versioned else None,
+        "canonical": canonical,
+        "data_version": data_version,
+        "use_cache": use_cache,
+        "cached": get_backtest_cache().get(key) if use_cache else None,
+    }
+
+
+def _cached_backtest_body(lookup: Dict[str, Any], payload: BacktestSectorRequest, t0: float) -> Dict[str, Any]:
+    """Cached result with this request's fields filled in."""
+    return {
+        **lookup["cached"],
+        "request_id": uuid.uuid4().hex[:10],
+        "server_timing_ms": {"cache_hit": int((time.perf_counter() - t0) * 1000)},
         "params": payload.dict(),
         "applied_filters": payload.filters.dict() if payload.filters else None,
-        "note": "Annual fundamentals are period-end dated; point-in-time is approximated via fundamentals_lag_days.",
-        "data": points,
-        "summary": summary,
     }
 
 
-def _load_backtest_rules_cache() -> None:
-    """Load precomputed backtest rules from JSON file into memory."""
-    global _BACKTEST_RULES_CACHE
-    if _BACKTEST_RULES_CACHE["loaded"]:
+def _store_backtest_body(lookup: Dict[str, Any], body: Dict[str, Any], t0: float) -> None:
+    if not lookup["use_cache"]:
         return
-
-    data_path = Path(__file__).parent / "data" / "backtest_rule_search.json"
-    if not data_path.exists():
-        print(f"[backtest/rules] Warning: {data_path} not found", flush=True)
-        _BACKTEST_RULES_CACHE["loaded"] = True
-        return
-
+    result = {k: v for k, v in body.items() if k not in _BACKTEST_REQUEST_FIELDS}
     try:
-        with open(data_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if not isinstance(data, list):
-            data = []
-
-        # Extract unique values for filters
-        sectors = sorted(set(r.get("sector", "") for r in data if r.get("sector")))
-        caps = sorted(set(r.get("cap", "") for r in data if r.get("cap")))
-        holding_years = sorted(set(r.get("holding_years", 0) for r in data if r.get("holding_years")))
-
-        _BACKTEST_RULES_CACHE["data"] = data
-        _BACKTEST_RULES_CACHE["sectors"] = sectors
-        _BACKTEST_RULES_CACHE["caps"] = caps
-        _BACKTEST_RULES_CACHE["holding_years"] = holding_years
-        _BACKTEST_RULES_CACHE["loaded"] = True
-        print(f"[backtest/rules] Loaded {len(data)} precomputed rules", flush=True)
+        get_backtest_cache().put(
+            lookup["key"],
+            lookup["data_version"],
+            lookup["canonical"]["sector"],
+            lookup["canonical"],
+            result,
+            compute_ms=int((time.perf_counter() - t0) * 1000),
+        )
     except Exception as exc:
-        print(f"[backtest/rules] Error loading rules: {exc}", flush=True)
-        _BACKTEST_RULES_CACHE["loaded"] = True
+        print(f"[backtest-cache] Failed to store {lookup['key'][:12]}: {exc}", flush=True)
+
+
+@app.post("/api/backtest/sector")
+def backtest_sector(
+    payload: BacktestSectorRequest,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Point-in-time-ish sector backtest (see `_iter_backtest_sector`), cached per canonical request.
+
+    Results are stored in the backtest cache (backtest_cache.py) keyed by the canonical request,
+    today's date and the input versions; a repeat is served without touching DuckDB. The key is
+    also the ETag, so a client revalidating with If-None-Match gets a 304. X-Backtest-Cache tells
+    hit from miss. BACKTEST_CACHE=0 disables the disk cache (ETags are still sent).
+    For per-period progress use /api/backtest/sector/stream.
+    """
+    t0 = time.perf_counter()
+    today = datetime.utcnow().date()
+    lookup = _backtest_cache_lookup(payload, today)
+    etag = lookup["etag"]
+    if etag and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "X-Backtest-Cache": "hit"})
+
+    if lookup["cached"] is not None:
+        body = _cached_backtest_body(lookup, payload, t0)
+    else:
+        body = _run_backtest_sector(payload, today=today)
+        _store_backtest_body(lookup, body, t0)
+
+    if etag:
+        response.headers["ETag"] = etag
+    response.headers["X-Backtest-Cache"] = "hit" if lookup["cached"] is not None else "miss"
+    return body
+
+
+def _replay_backtest_events(body: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """The events `_iter_backtest_sector` would have produced for a finished (cached) body."""
+    points = body.get("data") or []
+    yield "start", {
+        "sector": body.get("sector"),
+        "benchmark": body.get("benchmark"),
+        "request_id": body.get("request_id"),
+        "periods": [
+            {"index": i, "as_of": p.get("as_of"), "end_date": p.get("end_date")} for i, p in enumerate(points)
+        ],
+    }
+    for i, point in enumerate(points):
+        yield "period", {"index": i, "point": point}
+    yield "result", body
+
+
+def _format_stream_event(event: str, data: Dict[str, Any], sse: bool) -> bytes:
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")
+    return (json.dumps({"event": event, **data}, default=str) + "\n").encode("utf-8")
+
+
+@app.post("/api/backtest/sector/stream")
+async def backtest_sector_stream(
+    payload: BacktestSectorRequest,
+    request: Request,
+    accept: Optional[str] = Header(None),
+):
+    """
+    /api/backtest/sector, streamed: each rebalance period is sent as soon as it is computed.
+
+    NDJSON by default ({"event": ..., ...fields} per line); Server-Sent Events when Accept
+    includes text/event-stream. Events, in order:
+      start    {sector, benchmark, request_id, periods: [{index, as_of, end_date}]}
+               sent before any data is loaded
+      period   {index, point}  one per period, in completion order; `point` is a data[] entry
+      summary  the blocking endpoint's body without `data`
+      error    {status, detail}  the run failed after the stream started
+    Request validation errors are plain HTTP errors. Cached results (see backtest_sector) are
+    replayed at once and completed runs are cached. When the client disconnects the run is
+    cancelled and periods that have not started are dropped.
+    """
+    t0 = time.perf_counter()
+    today = datetime.utcnow().date()
+    sse = "text/event-stream" in (accept or "")
+    lookup = await run_in_threadpool(_backtest_cache_lookup, payload, today)
+    cancel = threading.Event()
+    if lookup["cached"] is not None:
+        events = _replay_backtest_events(_cached_backtest_body(lookup, payload, t0))
+    else:
+        events = _iter_backtest_sector(payload, today=today, cancel=cancel)
+    # Run up to the "start" event here so bad requests still get a 4xx status.
+    first = await run_in_threadpool(next, events, None)
+
+    async def stream():
+        pending = first
+        try:
+            while pending is not None:
+                event, data = pending
+                if event == "result":
+                    if lookup["cached"] is None:
+                        await run_in_threadpool(_store_backtest_body, lookup, data, t0)
+                    event, data = "summary", {k: v for k, v in data.items() if k != "data"}
+                yield _format_stream_event(event, data, sse)
+                step = asyncio.ensure_future(run_in_threadpool(next, events, None))
+                while not step.done():
+                    await asyncio.wait({step}, timeout=0.5)
+                    if not step.done() and await request.is_disconnected():
+                        cancel.set()
+                if cancel.is_set():
+                    print(f"[backtest] client disconnected; cancelled {payload.sector} run", flush=True)
+                    return
+                pending = step.result()
+        except HTTPException as exc:
+            yield _format_stream_event("error", {"status": exc.status_code, "detail": exc.detail}, sse)
+        except PoolSaturated as exc:
+            yield _format_stream_event("error", {"status": 503, "detail": exc.reason}, sse)
+        except Exception as exc:
+            print(f"[backtest] stream failed: {exc}", flush=True)
+            yield _format_stream_event("error", {"status": 500, "detail": str(exc)}, sse)
+        finally:
+            cancel.set()
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if lookup["etag"]:
+        headers["ETag"] = lookup["etag"]
+    headers["X-Backtest-Cache"] = "hit" if lookup["cached"] is not None else "miss"
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type, headers=headers)
+
+
+@app.get("/admin/backtest-cache", dependencies=[Depends(require_admin)])
+def backtest_cache_entries(
+    sector: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Backtest cache size per dataset version and its most recent entries (without payloads)."""
+    cache = get_backtest_cache()
+    return {"stats": cache.stats(), "entries": cache.entries(sector=sector, limit=limit)}
+
+
+@app.delete("/admin/backtest-cache", dependencies=[Depends(require_admin)])
+def backtest_cache_purge(
+    key: Optional[List[str]] = Query(None, description="Cache keys to delete"),
+    sector: Optional[str] = None,
+    stale_only: bool = Query(False, description="Only delete entries of other dataset versions"),
+):
+    """Delete backtest cache entries (default: all)."""
+    deleted = get_backtest_cache().purge(
+        keys=key,
+        sector=sector,
+        keep_data_version=current_data_version() if stale_only else None,
+    )
+    return {"deleted": deleted}
 
 
 @app.get("/api/backtest/rules")
@@ -2938,56 +3238,33 @@ def get_backtest_rules(
 ):
     """
     Query precomputed backtest rule results with filtering, sorting, and pagination.
+
+    Served from the read-only rules index (backtest_rules.py): filters use per-field
+    indexes and the page comes from a pre-sorted ordering, so requests never copy or
+    re-sort the full result list. The index reloads when backtest_rule_search.json changes.
     """
-    _load_backtest_rules_cache()
-
-    data = _BACKTEST_RULES_CACHE["data"]
-    sectors = _BACKTEST_RULES_CACHE["sectors"]
-    caps = _BACKTEST_RULES_CACHE["caps"]
-    holding_years_options = _BACKTEST_RULES_CACHE["holding_years"]
-
-    # Filter
-    filtered = data
-    if sector:
-        filtered = [r for r in filtered if r.get("sector") == sector]
-    if cap and cap != "all":
-        filtered = [r for r in filtered if r.get("cap") == cap]
-    if holding_years:
-        filtered = [r for r in filtered if r.get("holding_years") == holding_years]
-
-    # Sort
-    valid_sort_fields = [
-        "rule_id", "sector", "cap", "holding_years",
-        "train_avg_portfolio", "train_avg_benchmark", "train_avg_excess", "train_win_rate",
-        "test_avg_portfolio", "test_avg_benchmark", "test_avg_excess", "test_win_rate",
-    ]
-    if sort_by not in valid_sort_fields:
+    index = get_backtest_rules_index()
+    if sort_by not in RULE_SORT_FIELDS:
         sort_by = "train_avg_excess"
 
-    reverse = sort_dir.lower() == "desc"
-
-    def sort_key(r: Dict[str, Any]) -> Any:
-        val = r.get(sort_by)
-        if val is None:
-            return float("-inf") if reverse else float("inf")
-        return val
-
-    filtered.sort(key=sort_key, reverse=reverse)
-
-    # Paginate
-    total = len(filtered)
-    start = (page - 1) * page_size
-    end = start + page_size
-    results = filtered[start:end]
+    results, total = index.query(
+        sector=sector or None,
+        cap=cap if cap and cap != "all" else None,
+        holding_years=holding_years or None,
+        sort_by=sort_by,
+        descending=sort_dir.lower() == "desc",
+        offset=(page - 1) * page_size,
+        limit=page_size,
+    )
 
     return {
         "results": results,
         "total": total,
         "page": page,
         "page_size": page_size,
-        "sectors": sectors,
-        "caps": caps,
-        "holding_years_options": holding_years_options,
+        "sectors": index.sectors,
+        "caps": index.caps,
+        "holding_years_options": index.holding_years,
     }
 
 
@@ -3065,7 +3342,7 @@ def upsert_filter_default(
     return record.to_dict()
 
 
-@lru_cache(maxsize=512)
+@ttl_cache("news", ttl=1800, max_bytes=128 * _MB, key=_symbol_key)
 def _get_defeatbeta_news_df(symbol: str) -> Optional[pd.DataFrame]:
     """
     Fetch news DataFrame from defeatbeta_api with caching.
@@ -3400,78 +3677,31 @@ def _compute_growth_metrics(symbol: str, t: Ticker) -> Dict[str, Optional[float]
     return result
 
 
+@ttl_cache("ev_items", ttl=12 * 3600, max_bytes=4 * _MB, key=_symbol_key)
+def _get_ev_items(symbol: str) -> Dict[str, Any]:
+    """
+    Debt, cash, EBIT, D&A and EBITDA for one symbol from stock_statement item codes
+    (see statement_items.py for the fallback chains).
+    """
+    symbol = symbol.upper()
+    statement_url = _get_ticker(symbol).huggingface_client.get_url_path("stock_statement")
+    return fetch_ev_items(_duckdb_query_with_retry, statement_url, [symbol]).get(symbol, {})
+
+
 def _compute_enterprise_value(symbol: str, market_cap: Optional[float]) -> Optional[float]:
     """
     Calculate Enterprise Value (EV) = Market Cap + Total Debt - Cash and Cash Equivalents.
-    Returns None if any component is missing.
+    Market cap + debt if cash is missing; None if market cap or debt is missing.
     """
-    symbol = symbol.upper()
     if market_cap is None:
         return None
-    
-    t = _get_ticker(symbol)
-    
     try:
-        # Get balance sheet (returns Statement object, need to call .df())
-        balance_sheet_stmt = t.annual_balance_sheet()
-        if balance_sheet_stmt is None:
-            return None
-        
-        balance_sheet = balance_sheet_stmt.df()
-        if balance_sheet is None or balance_sheet.empty:
-            return None
-        
-        # Find the latest date column (prefer TTM, then most recent date)
-        date_cols = [col for col in balance_sheet.columns if col != 'Breakdown']
-        if not date_cols:
-            return None
-        
-        # Prefer TTM, otherwise use the first (most recent) date column
-        latest_date_col = 'TTM' if 'TTM' in date_cols else date_cols[0]
-        
-        # Find total debt row
-        total_debt = None
-        debt_keywords = ['total debt', 'debt', 'total liabilities']
-        for idx, row in balance_sheet.iterrows():
-            breakdown = str(row['Breakdown']).lower()
-            if any(keyword in breakdown for keyword in debt_keywords) and 'total' in breakdown:
-                val = row[latest_date_col]
-                if pd.notna(val) and val != '*':
-                    try:
-                        total_debt = float(val)
-                        break
-                    except (ValueError, TypeError):
-                        continue
-        
-        # Find cash and cash equivalents row
-        cash = None
-        cash_keywords = ['cash and cash equivalents', 'cash, cash equivalents', 'cash & cash equivalents']
-        for idx, row in balance_sheet.iterrows():
-            breakdown = str(row['Breakdown']).lower()
-            if any(keyword in breakdown for keyword in cash_keywords):
-                val = row[latest_date_col]
-                if pd.notna(val) and val != '*':
-                    try:
-                        cash = float(val)
-                        break
-                    except (ValueError, TypeError):
-                        continue
-        
-        # Calculate EV
-        if total_debt is not None and cash is not None:
-            ev = market_cap + total_debt - cash
-            return ev
-        elif total_debt is not None:
-            # If cash is missing, use market cap + debt (conservative estimate)
-            ev = market_cap + total_debt
-            return ev
-        
-        return None
+        return enterprise_value(market_cap, _get_ev_items(symbol))
     except Exception:
         return None
 
 
-@lru_cache(maxsize=2048)
+@ttl_cache("enterprise_value", ttl=3600, max_bytes=2 * _MB, key=_symbol_key)
 def _get_enterprise_value(symbol: str, market_cap: Optional[float]) -> Optional[float]:
     """
     Cached wrapper around EV calculation. Market cap is included in the cache key
@@ -3482,183 +3712,31 @@ def _get_enterprise_value(symbol: str, market_cap: Optional[float]) -> Optional[
 
 def _compute_ebit(symbol: str) -> Optional[float]:
     """
-    Get EBIT (Earnings Before Interest and Taxes) from income statement.
-    Returns the latest TTM or annual EBIT value.
+    Get EBIT (Earnings Before Interest and Taxes): TTM, else the latest annual value.
     """
-    symbol = symbol.upper()
-    t = _get_ticker(symbol)
-    
     try:
-        # Try quarterly income statement first (has TTM)
-        income_stmt_stmt = t.quarterly_income_statement()
-        if income_stmt_stmt is not None:
-            income_stmt = income_stmt_stmt.df()
-            if income_stmt is not None and not income_stmt.empty:
-                # Find the latest date column (prefer TTM)
-                date_cols = [col for col in income_stmt.columns if col != 'Breakdown']
-                if date_cols:
-                    latest_date_col = 'TTM' if 'TTM' in date_cols else date_cols[0]
-                    
-                    # Look for EBIT/Operating Income row
-                    ebit_keywords = ['operating income', 'ebit', 'operating earnings', 'income from operations']
-                    for idx, row in income_stmt.iterrows():
-                        breakdown = str(row['Breakdown']).lower()
-                        if any(keyword in breakdown for keyword in ebit_keywords):
-                            val = row[latest_date_col]
-                            if pd.notna(val) and val != '*':
-                                try:
-                                    ebit = float(val)
-                                    return ebit
-                                except (ValueError, TypeError):
-                                    continue
-        
-        # Fallback to annual income statement
-        income_stmt_stmt = t.annual_income_statement()
-        if income_stmt_stmt is not None:
-            income_stmt = income_stmt_stmt.df()
-            if income_stmt is not None and not income_stmt.empty:
-                date_cols = [col for col in income_stmt.columns if col != 'Breakdown']
-                if date_cols:
-                    latest_date_col = date_cols[0]  # Most recent annual
-                    ebit_keywords = ['operating income', 'ebit', 'operating earnings', 'income from operations']
-                    for idx, row in income_stmt.iterrows():
-                        breakdown = str(row['Breakdown']).lower()
-                        if any(keyword in breakdown for keyword in ebit_keywords):
-                            val = row[latest_date_col]
-                            if pd.notna(val) and val != '*':
-                                try:
-                                    ebit = float(val)
-                                    return ebit
-                                except (ValueError, TypeError):
-                                    continue
-        
-        return None
+        return _get_ev_items(symbol).get("ebit")
     except Exception:
         return None
 
 
-@lru_cache(maxsize=2048)
+@ttl_cache("ebit", ttl=12 * 3600, max_bytes=2 * _MB, key=_symbol_key)
 def _get_ebit(symbol: str) -> Optional[float]:
     return _compute_ebit(symbol)
 
 
 def _compute_ebitda(symbol: str) -> Optional[float]:
     """
-    Get EBITDA (Earnings Before Interest, Taxes, Depreciation, and Amortization).
-    Tries to get directly, or calculates from EBIT + Depreciation + Amortization.
+    Get EBITDA (Earnings Before Interest, Taxes, Depreciation, and Amortization):
+    reported EBITDA, else EBIT + D&A; TTM, else the latest annual value.
     """
-    symbol = symbol.upper()
-    t = _get_ticker(symbol)
-    
     try:
-        # Try quarterly income statement first (has TTM)
-        income_stmt_stmt = t.quarterly_income_statement()
-        if income_stmt_stmt is not None:
-            income_stmt = income_stmt_stmt.df()
-            if income_stmt is not None and not income_stmt.empty:
-                date_cols = [col for col in income_stmt.columns if col != 'Breakdown']
-                if date_cols:
-                    latest_date_col = 'TTM' if 'TTM' in date_cols else date_cols[0]
-                    
-                    # Look for EBITDA directly
-                    for idx, row in income_stmt.iterrows():
-                        breakdown = str(row['Breakdown']).lower()
-                        if 'ebitda' in breakdown:
-                            val = row[latest_date_col]
-                            if pd.notna(val) and val != '*':
-                                try:
-                                    ebitda = float(val)
-                                    return ebitda
-                                except (ValueError, TypeError):
-                                    pass
-                    
-                    # Calculate EBITDA = EBIT + Depreciation + Amortization
-                    ebit = None
-                    depreciation = None
-                    amortization = None
-                    
-                    # Get EBIT
-                    ebit_keywords = ['operating income', 'ebit', 'operating earnings', 'income from operations']
-                    for idx, row in income_stmt.iterrows():
-                        breakdown = str(row['Breakdown']).lower()
-                        if any(keyword in breakdown for keyword in ebit_keywords):
-                            val = row[latest_date_col]
-                            if pd.notna(val) and val != '*':
-                                try:
-                                    ebit = float(val)
-                                    break
-                                except (ValueError, TypeError):
-                                    continue
-                    
-                    # Get Depreciation and Amortization
-                    da_keywords = ['depreciation and amortization', 'depreciation & amortization', 'd&a']
-                    for idx, row in income_stmt.iterrows():
-                        breakdown = str(row['Breakdown']).lower()
-                        if any(keyword in breakdown for keyword in da_keywords):
-                            val = row[latest_date_col]
-                            if pd.notna(val) and val != '*':
-                                try:
-                                    depreciation = float(val)
-                                    break
-                                except (ValueError, TypeError):
-                                    continue
-                    
-                    # If separate, get depreciation
-                    if depreciation is None:
-                        for idx, row in income_stmt.iterrows():
-                            breakdown = str(row['Breakdown']).lower()
-                            if 'depreciation' in breakdown and 'amortization' not in breakdown:
-                                val = row[latest_date_col]
-                                if pd.notna(val) and val != '*':
-                                    try:
-                                        depreciation = float(val)
-                                        break
-                                    except (ValueError, TypeError):
-                                        continue
-                    
-                    # If separate, get amortization
-                    for idx, row in income_stmt.iterrows():
-                        breakdown = str(row['Breakdown']).lower()
-                        if 'amortization' in breakdown and 'depreciation' not in breakdown:
-                            val = row[latest_date_col]
-                            if pd.notna(val) and val != '*':
-                                try:
-                                    amortization = float(val)
-                                    break
-                                except (ValueError, TypeError):
-                                    continue
-                    
-                    # Calculate EBITDA
-                    if ebit is not None:
-                        da = (depreciation or 0) + (amortization or 0)
-                        ebitda = ebit + da
-                        return ebitda
-        
-        # Fallback to annual income statement
-        income_stmt_stmt = t.annual_income_statement()
-        if income_stmt_stmt is not None:
-            income_stmt = income_stmt_stmt.df()
-            if income_stmt is not None and not income_stmt.empty:
-                date_cols = [col for col in income_stmt.columns if col != 'Breakdown']
-                if date_cols:
-                    latest_date_col = date_cols[0]
-                    for idx, row in income_stmt.iterrows():
-                        breakdown = str(row['Breakdown']).lower()
-                        if 'ebitda' in breakdown:
-                            val = row[latest_date_col]
-                            if pd.notna(val) and val != '*':
-                                try:
-                                    ebitda = float(val)
-                                    return ebitda
-                                except (ValueError, TypeError):
-                                    pass
-        
-        return None
+        return _get_ev_items(symbol).get("ebitda")
     except Exception:
         return None
 
 
-@lru_cache(maxsize=2048)
+@ttl_cache("ebitda", ttl=12 * 3600, max_bytes=2 * _MB, key=_symbol_key)
 def _get_ebitda(symbol: str) -> Optional[float]:
     return _compute_ebitda(symbol)
 
@@ -4146,11 +4224,73 @@ def _compute_valuation_extras(symbol: str, t: Ticker) -> Dict[str, Optional[floa
     return result
 
 
-@lru_cache(maxsize=1024)
+def _metrics_store_version() -> Optional[str]:
+    """
+    Dataset version the metrics store is read and written under; None while the
+    version is unknown (rows stored then would be served later regardless of age).
+    """
+    version = current_data_version()
+    return None if version == "unknown" else version
+
+
+def _store_symbol_metrics(symbol: str, version: Optional[str], result: Dict[str, Any]) -> Dict[str, Any]:
+    """`result` as JSON-native types, written through the metrics store for `version`."""
+    try:
+        native = to_native(result)
+    except TypeError as exc:
+        print(f"[metrics-store] not storing {symbol}: {exc}", flush=True)
+        return result
+    if version is not None:
+        try:
+            get_metrics_store().put(symbol, version, native)
+        except Exception as exc:
+            print(f"[metrics-store] write failed for {symbol}: {exc}", flush=True)
+    return native
+
+
+@ttl_cache("symbol_metrics", ttl=3600, max_bytes=64 * _MB, key=_symbol_key)
 def _calculate_symbol_metrics(symbol: str) -> Dict[str, Optional[float]]:
     """
-    Compute valuation metrics for a single symbol and cache the result.
-    This avoids recomputing expensive DuckDB queries across requests.
+    Valuation metrics for a single symbol.
+
+    Read from the persistent metrics store (shared by workers and restarts) for the
+    current dataset version; computed and written through on a miss. The store is
+    bypassed while the dataset version is unknown.
+    """
+    symbol = symbol.upper()
+    version = _metrics_store_version()
+    if version is not None:
+        try:
+            stored = get_metrics_store().get(symbol, version)
+        except Exception as exc:
+            print(f"[metrics-store] read failed for {symbol}: {exc}", flush=True)
+            stored = None
+        if stored is not None:
+            return stored
+
+    return _store_symbol_metrics(symbol, version, _compute_symbol_metrics(symbol))
+
+
+def _preload_metrics_store() -> None:
+    """Prime the symbol_metrics cache with every stored row for the current dataset version."""
+    try:
+        version = _metrics_store_version()
+        if version is None:
+            print("[metrics-store] data version unknown, skipping preload", flush=True)
+            return
+        stored = get_metrics_store().load_version(version)
+    except Exception as exc:
+        print(f"[metrics-store] preload failed: {exc}", flush=True)
+        return
+    cache = _calculate_symbol_metrics.cache
+    for symbol, payload in stored.items():
+        cache.prime(_symbol_key(symbol), payload)
+    print(f"[metrics-store] preloaded {len(stored)} symbols for data version {version}", flush=True)
+
+
+def _compute_symbol_metrics(symbol: str) -> Dict[str, Optional[float]]:
+    """
+    Compute valuation metrics for a single symbol (uncached; see _calculate_symbol_metrics).
     """
     symbol = symbol.upper()
     t = _get_ticker(symbol)
@@ -4216,16 +4356,70 @@ def _calculate_symbol_metrics(symbol: str) -> Dict[str, Optional[float]]:
     }
 
 
+BULK_METRICS_MIN_SYMBOLS = int(os.getenv("BULK_METRICS_MIN_SYMBOLS", "5"))
+BULK_METRICS_BATCH = int(os.getenv("BULK_METRICS_BATCH", "500"))
+
+
+def _bulk_symbol_metrics(symbols: List[str]) -> None:
+    """
+    Compute the symbols of a /metrics request that are neither cached nor in the
+    metrics store set-based (bulk_metrics.py): a fixed number of queries per
+    BULK_METRICS_BATCH symbols instead of ~40 per symbol. Results are written
+    through the metrics store (see _store_symbol_metrics) and primed into the
+    symbol_metrics cache.
+
+    Below BULK_METRICS_MIN_SYMBOLS misses, or for symbols of a failed batch, nothing
+    is primed and _calculate_symbol_metrics computes them per symbol.
+    """
+    cache = _calculate_symbol_metrics.cache
+    pending = [s for s in dict.fromkeys(sym.upper() for sym in symbols) if not cache.contains(_symbol_key(s))]
+    if len(pending) < BULK_METRICS_MIN_SYMBOLS:
+        return
+    version = _metrics_store_version()
+    stored: Dict[str, Dict[str, Any]] = {}
+    if version is not None:
+        try:
+            stored = get_metrics_store().get_many(pending, version)
+        except Exception as exc:
+            print(f"[metrics-store] bulk read failed: {exc}", flush=True)
+    pending = [s for s in pending if s not in stored]
+    if len(pending) < BULK_METRICS_MIN_SYMBOLS:
+        return
+
+    from defeatbeta_api.data.company_meta import CompanyMeta
+
+    start = time.time()
+    computed = 0
+    for chunk in chunked(pending, BULK_METRICS_BATCH):
+        try:
+            _duckdb_client, hf = _get_defeatbeta_clients()
+            batch = MetricsBatch.load(_duckdb_query_with_retry, hf, CompanyMeta(config=_ticker_config()), chunk)
+            for symbol, items in batch.ev_items.items():
+                _get_ev_items.cache.prime(_symbol_key(symbol), items)
+            results = batch.metrics(_compute_financial_health, _compute_cash_flow_health)
+        except Exception as exc:
+            print(f"[metrics] bulk batch of {len(chunk)} failed, using per-symbol queries: {exc}", flush=True)
+            continue
+        for symbol, result in results.items():
+            cache.prime(_symbol_key(symbol), _store_symbol_metrics(symbol, version, result))
+            computed += 1
+    print(f"[metrics] bulk computed {computed}/{len(pending)} symbols in {time.time() - start:.1f}s", flush=True)
+
+
 @app.post("/metrics")
 def metrics(payload: SymbolsPayload):
     """
     Fetch metrics for multiple symbols in parallel for better performance.
-    Uses ThreadPoolExecutor to process symbols concurrently (I/O-bound DuckDB queries).
+    Runs on the shared data pool (see work_pool.py) to bound DuckDB concurrency.
+    Uncached symbols are computed set-based when there are enough of them (see
+    _bulk_symbol_metrics); per-symbol queries remain the fallback.
     """
     symbols = payload.symbols
     if not symbols:
         return {"metrics": []}
-    
+
+    _bulk_symbol_metrics(symbols)
+
     def process_symbol_metrics(symbol: str) -> Dict[str, Any]:
         """Process a single symbol's metrics (used for parallel processing)."""
         import time as _time
@@ -4261,16 +4455,7 @@ def metrics(payload: SymbolsPayload):
                 "valuationExtras": {},
             }
     
-    # Use parallel processing for batches of 5+ symbols, sequential for smaller batches
-    # Reduced to 8 workers to avoid DuckDB contention with local parquet files
-    if len(symbols) >= 5:
-        max_workers = min(len(symbols), 8)
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            data = list(executor.map(process_symbol_metrics, symbols))
-    else:
-        # Sequential for small batches (overhead not worth it)
-        data = [process_symbol_metrics(symbol) for symbol in symbols]
-    
+    data = get_data_pool().map("metrics", process_symbol_metrics, symbols)
     return {"metrics": data}
 
 
@@ -4287,65 +4472,130 @@ def prices(req: PriceRequest):
         raise HTTPException(status_code=500, detail=f"Failed to fetch prices: {exc}")
 
 
+PRICES_BATCH_CHUNK = int(os.getenv("PRICES_BATCH_CHUNK", "400"))
+
+
 @app.post("/prices/batch")
-def prices_batch(payload: SymbolsPayload, days: int = 180):
+def prices_batch(
+    payload: SymbolsPayload,
+    days: int = 180,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    response_format: Literal["list", "columnar"] = Query("list", alias="format"),
+    max_points: Optional[int] = Query(None, ge=2, description="Downsample each series to at most this many bars"),
+    accept: Optional[str] = Header(None),
+):
     """
-    Batch endpoint to fetch prices for multiple symbols at once.
-    Uses multithreading to fetch prices in parallel for better performance.
+    Batch endpoint to fetch close prices for multiple symbols at once.
+
+    One DuckDB query per chunk of PRICES_BATCH_CHUNK symbols (last `days` bars each,
+    optionally within start/end), run on the shared data pool (see work_pool.py and
+    price_batch.py). A failed chunk is retried once on its own; if it still fails the
+    request answers 502 rather than returning empty series for those symbols.
+
+    Response by Accept header:
+      application/vnd.apache.arrow.stream  Arrow IPC stream (symbol, date, close); needs pyarrow
+      application/vnd.apache.parquet       parquet file (symbol, date, close)
+      otherwise JSON; format=list (default) { "prices": [ { "symbol", "closes" }, ... ] }
+                      format=columnar       { "prices": { SYM: { "dates": [..], "close": [..] } } }
     """
-    def fetch_single_price(symbol: str) -> Dict[str, Any]:
-        symbol_upper = symbol.upper()
-        print(f"[prices/batch] Fetching {symbol_upper} (days={days})", flush=True)
+    from defeatbeta_api.utils.const import stock_prices
+    from price_batch import (
+        downsample,
+        negotiate,
+        query_price_history,
+        to_arrow_bytes,
+        to_columnar_payload,
+        to_list_payload,
+        to_parquet_bytes,
+    )
+
+    symbols = [s.strip().upper() for s in (payload.symbols or []) if s and s.strip()]
+    try:
+        start_date = date.fromisoformat(start) if start else None
+        end_date = date.fromisoformat(end) if end else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {exc}")
+    body_type = negotiate(accept)
+
+    def fetch(batch: List[str]) -> Optional[pd.DataFrame]:
+        _duckdb_client, hf = _get_defeatbeta_clients()
+        url = hf.get_url_path(stock_prices)
+        for attempt in (1, 2):
+            try:
+                return query_price_history(_duckdb_query_with_retry, url, batch, days, start_date, end_date)
+            except Exception as exc:
+                print(f"[prices/batch] query failed for {len(batch)} symbols (attempt {attempt}): {exc}", flush=True)
+        return None
+
+    df = pd.DataFrame(columns=["symbol", "date", "close"])
+    if symbols:
+        chunks = list(chunked(sorted(set(symbols)), PRICES_BATCH_CHUNK))
+        frames = get_data_pool().map("prices_batch", fetch, chunks)
+        failed = sum(len(chunk) for chunk, frame in zip(chunks, frames) if frame is None)
+        if failed:
+            raise HTTPException(status_code=502, detail=f"Price query failed for {failed} of {len(symbols)} symbols")
+        frames = [frame for frame in frames if not frame.empty]
+        if frames:
+            df = pd.concat(frames, ignore_index=True)
+    df = downsample(df, max_points)
+
+    if body_type == "arrow":
         try:
-            t = _get_ticker(symbol_upper)
-            print(f"[prices/batch] Ticker created for {symbol_upper}", flush=True)
-            df = t.price()
-            print(f"[prices/batch] {symbol_upper}: price() returned df type={type(df)}, empty={df.empty if hasattr(df, 'empty') else 'N/A'}, shape={df.shape if hasattr(df, 'shape') else 'N/A'}", flush=True)
-            
-            if df is None:
-                print(f"[prices/batch] {symbol_upper}: price() returned None", flush=True)
-                return {"symbol": symbol_upper, "closes": []}
-            
-            if not hasattr(df, 'empty') or df.empty:
-                print(f"[prices/batch] {symbol_upper}: DataFrame is empty or has no empty attr", flush=True)
-                return {"symbol": symbol_upper, "closes": []}
-            
-            if "close" not in df.columns:
-                print(f"[prices/batch] {symbol_upper}: No 'close' column. Available columns: {list(df.columns)[:10]}", flush=True)
-                return {"symbol": symbol_upper, "closes": []}
-            
-            if days and days > 0:
-                df = df.tail(days)
-                print(f"[prices/batch] {symbol_upper}: After tail({days}), shape={df.shape}", flush=True)
-            
-            closes = df["close"].tolist()
-            closes_count = len(closes)
-            closes_non_null = sum(1 for c in closes if c is not None and not (isinstance(c, float) and (pd.isna(c) or pd.isnull(c))))
-            print(f"[prices/batch] {symbol_upper}: Success! closes count={closes_count}, non-null={closes_non_null}, first={closes[0] if closes else 'N/A'}, last={closes[-1] if closes else 'N/A'}", flush=True)
-            return {"symbol": symbol_upper, "closes": closes}
-        except Exception as exc:
-            print(f"[prices/batch] Exception for {symbol_upper}: {type(exc).__name__}: {exc}", flush=True)
-            import traceback
-            traceback.print_exc()
-            return {"symbol": symbol_upper, "closes": []}
-    
-    # Use ThreadPoolExecutor to fetch prices in parallel
-    symbols = payload.symbols
-    print(f"[prices/batch] Starting batch fetch for {len(symbols)} symbols: {symbols[:5]}{'...' if len(symbols) > 5 else ''}", flush=True)
-    max_workers = min(len(symbols), 20)  # Cap at 20 workers to avoid overwhelming the system
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        results = list(executor.map(fetch_single_price, symbols))
-    
-    print(f"[prices/batch] Batch complete. Results: {[(r['symbol'], len(r.get('closes', []))) for r in results]}", flush=True)
-    return {"prices": results}
+            return Response(content=to_arrow_bytes(df), media_type="application/vnd.apache.arrow.stream")
+        except ImportError:
+            raise HTTPException(status_code=406, detail="Arrow responses need pyarrow; request parquet or JSON")
+    if body_type == "parquet":
+        return Response(content=to_parquet_bytes(df), media_type="application/vnd.apache.parquet")
+    if response_format == "columnar":
+        return to_columnar_payload(df, symbols)
+    return to_list_payload(df, symbols)
+
+
+@app.post("/ratios/history")
+def ratios_history(req: RatioHistoryRequest):
+    """
+    Daily valuation ratio history served from the precomputed ratio panel
+    (see scripts/build_ratio_panel.py). No DuckDB queries at request time.
+    """
+    from ratio_panel import PANEL_COLUMNS, get_ratio_panel
+
+    panel = get_ratio_panel()
+    if panel is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Ratio panel not built. Run scripts/build_ratio_panel.py first.",
+        )
+
+    fields = [f for f in req.fields if f in PANEL_COLUMNS and f not in ("symbol", "date")]
+    if not fields:
+        raise HTTPException(status_code=400, detail=f"fields must be a subset of {PANEL_COLUMNS[2:]}")
+    try:
+        start = date.fromisoformat(req.start) if req.start else None
+        end = date.fromisoformat(req.end) if req.end else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {exc}")
+
+    symbols = [s.strip().upper() for s in req.symbols if s and s.strip()]
+    rows = panel.slice(symbols, start, end, fields)
+    out: List[Dict[str, Any]] = []
+    for sym in symbols:
+        sym_rows = rows[rows["symbol"] == sym]
+        entry: Dict[str, Any] = {
+            "symbol": sym,
+            "dates": [d.strftime("%Y-%m-%d") for d in sym_rows["date"]],
+        }
+        for f in fields:
+            entry[f] = [_sanitize_float(v) for v in sym_rows[f].tolist()]
+        out.append(entry)
+    return {"fields": fields, "ratios": out}
 
 
 def _warm_caches():
     """
     Fire-and-forget cache warmup to reduce first-request latency.
     Pulls a small set of symbols to trigger DuckDB/httpfs, NLTK download, and
-    the lru_cache entries for key helpers.
+    the TTL cache entries for key helpers.
     """
     sample_symbols = ["AAPL", "MSFT", "SPY"]
     for symbol in sample_symbols:
@@ -5738,5 +5988,10 @@ def comprehensive_analysis(payload: SymbolsPayload):
 
 @app.on_event("startup")
 def _on_startup():
-    # Warm caches asynchronously so startup isn't blocked.
-    threading.Thread(target=_warm_caches, daemon=True).start()
+    # Prime metrics from the persistent store, then warm caches, asynchronously so
+    # startup isn't blocked (misses read the store directly in the meantime).
+    def _startup_tasks():
+        _preload_metrics_store()
+        _warm_caches()
+
+    threading.Thread(target=_startup_tasks, daemon=True).start()
@@ -0,0 +1,163 @@
+"""
+Persistent per-symbol metrics store (SQLite under data/).
+
+`_calculate_symbol_metrics` results are written through to this store keyed by
+(symbol, dataset version), so every uvicorn worker and every restart can reuse
+them instead of re-running the per-symbol DuckDB queries. Within one dataset
+version the metrics are deterministic; rows from older versions are simply not
+read and are removed by `compact()` (scripts/compact_metrics_store.py).
+
+The database runs in WAL mode so several worker processes can read while one
+writes. Connections are per thread.
+
+Payloads are stored as plain JSON: `to_native` turns numpy scalars and arrays into
+Python numbers and lists and dates into ISO strings (what FastAPI sends for a fresh
+response), so a stored row reads back equal to the fresh result. Any other type is
+an error rather than being stringified.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_METRICS_STORE_PATH = Path(
+    os.getenv("METRICS_STORE_PATH", str(REPO_ROOT / "data" / "metrics_cache.sqlite3"))
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS symbol_metrics (
+    symbol TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    computed_at REAL NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (symbol, data_version)
+)
+"""
+
+
+def to_native(value: Any) -> Any:
+    """`value` with numpy/pandas scalars, arrays and dates converted to JSON-native Python types."""
+    if value is None or type(value) in (bool, int, float, str):
+        return value
+    if isinstance(value, dict):
+        return {str(k): to_native(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray, pd.Series)):
+        return [to_native(v) for v in list(value)]
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return float(value)
+    if isinstance(value, str):
+        return str(value)
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.datetime64):
+        return None if np.isnat(value) else pd.Timestamp(value).isoformat()
+    raise TypeError(f"metrics payload value of type {type(value).__name__} is not JSON-native")
+
+
+class MetricsStore:
+    def __init__(self, path: Path | str = DEFAULT_METRICS_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, symbol: str, data_version: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT payload FROM symbol_metrics WHERE symbol = ? AND data_version = ?",
+            (symbol.upper(), data_version),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, symbols: List[str], data_version: str) -> Dict[str, Dict[str, Any]]:
+        wanted = sorted({s.upper() for s in symbols})
+        found: Dict[str, Dict[str, Any]] = {}
+        conn = self._connect()
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i:i + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"SELECT symbol, payload FROM symbol_metrics WHERE data_version = ? AND symbol IN ({placeholders})",
+                (data_version, *chunk),
+            ).fetchall()
+            found.update({symbol: json.loads(payload) for symbol, payload in rows})
+        return found
+
+    def put(self, symbol: str, data_version: str, payload: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO symbol_metrics (symbol, data_version, computed_at, payload) "
+                "VALUES (?, ?, ?, ?)",
+                (symbol.upper(), data_version, time.time(), json.dumps(to_native(payload))),
+            )
+
+    def load_version(self, data_version: str) -> Dict[str, Dict[str, Any]]:
+        """All stored metrics for one dataset version (used to prime caches at startup)."""
+        rows = self._connect().execute(
+            "SELECT symbol, payload FROM symbol_metrics WHERE data_version = ?",
+            (data_version,),
+        ).fetchall()
+        return {symbol: json.loads(payload) for symbol, payload in rows}
+
+    def versions(self) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            "SELECT data_version, count(*), max(computed_at) FROM symbol_metrics "
+            "GROUP BY data_version ORDER BY max(computed_at) DESC"
+        ).fetchall()
+        return [{"data_version": v, "symbols": n, "last_computed_at": ts} for v, n, ts in rows]
+
+    def compact(self, keep_versions: int = 1) -> Dict[str, int]:
+        """Delete rows of all but the `keep_versions` most recently written versions, then VACUUM."""
+        keep = [v["data_version"] for v in self.versions()[: max(0, keep_versions)]]
+        conn = self._connect()
+        with conn:
+            if keep:
+                placeholders = ",".join("?" for _ in keep)
+                cur = conn.execute(
+                    f"DELETE FROM symbol_metrics WHERE data_version NOT IN ({placeholders})", keep
+                )
+            else:
+                cur = conn.execute("DELETE FROM symbol_metrics")
+        deleted = cur.rowcount
+        conn.execute("VACUUM")
+        remaining = conn.execute("SELECT count(*) FROM symbol_metrics").fetchone()[0]
+        return {"deleted": int(deleted), "remaining": int(remaining), "versions_kept": len(keep)}
+
+
+_STORE: Optional[MetricsStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_metrics_store() -> MetricsStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = MetricsStore()
+    return _STORE
@@ -0,0 +1,262 @@
+"""
+Point-in-time (PIT) fundamentals table.
+
+DefeatBeta statements are stamped with the fiscal period-end date, not the date
+the numbers became public. This module materializes statement items once with an
+explicit availability interval per report:
+
+    valid_from = report_date + lag_days
+    valid_to   = valid_from of the symbol's next (aligned) report, or NULL if open
+
+so that "what did we know on date D" is a single range join
+(valid_from <= D < valid_to) instead of a `max(report_date) <= D - lag` CTE
+scan per date.
+"""
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import duckdb
+import pandas as pd
+
+from data_io import chunked, sql_path, sql_quote_list
+
+
+PIT_COLUMNS = [
+    "symbol",
+    "report_date",
+    "finance_type",
+    "item_name",
+    "item_value",
+    "valid_from",
+    "valid_to",
+]
+
+
+class PitFundamentals:
+    """
+    In-memory PIT statement table.
+
+    Rows carry [symbol, report_date, finance_type, item_name, item_value,
+    valid_from, valid_to]. When built with `align=True` only report dates where
+    every requested finance type has at least one requested item are kept, and
+    intervals chain across those aligned reports (matches the semantics of
+    `_query_latest_annual_items_aligned` in backend/main.py).
+    """
+
+    def __init__(self, frame: pd.DataFrame, lag_days: int, period_type: str = "annual"):
+        frame = frame.reindex(columns=PIT_COLUMNS)
+        frame["symbol"] = frame["symbol"].astype(str).str.upper()
+        for col in ("report_date", "valid_from", "valid_to"):
+            frame[col] = pd.to_datetime(frame[col], errors="coerce")
+        frame["item_value"] = pd.to_numeric(frame["item_value"], errors="coerce")
+        self.frame = frame.sort_values(["symbol", "valid_from", "finance_type", "item_name"]).reset_index(drop=True)
+        self.lag_days = int(lag_days)
+        self.period_type = period_type
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def __sizeof__(self) -> int:
+        # Lets ttl_cache's memory budget see the table, not just the wrapper object.
+        return object.__sizeof__(self) + int(self.frame.memory_usage(index=True, deep=True).sum())
+
+    # ------------------------------------------------------------------
+    # Build / persistence
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(
+        cls,
+        query: Callable[[str], pd.DataFrame],
+        statement_url: str,
+        symbols: Sequence[str],
+        items_by_finance_type: Dict[str, Sequence[str]],
+        lag_days: int,
+        period_type: str = "annual",
+        align: bool = True,
+        batch_size: int = 400,
+    ) -> "PitFundamentals":
+        """
+        Materialize the PIT table from the `stock_statement` parquet.
+
+        Args:
+            query: Callable running SQL and returning a DataFrame (e.g. the
+                backend's retrying DuckDB helper).
+            statement_url: Parquet URL/path of the stock_statement table.
+            symbols: Universe to materialize.
+            items_by_finance_type: finance_type -> item_name list to keep.
+            lag_days: Assumed publication lag after period end.
+            period_type: 'annual' or 'quarterly'.
+            align: Keep only reports where all finance types are present.
+        """
+        lag_days = int(lag_days)
+        symbols = sorted({str(s).strip().upper() for s in symbols if str(s).strip()})
+        finance_types = [ft for ft, items in items_by_finance_type.items() if items]
+        if not symbols or not finance_types:
+            return cls(pd.DataFrame(columns=PIT_COLUMNS), lag_days, period_type)
+
+        item_filter = " OR ".join(
+            f"(finance_type = '{ft}' AND item_name IN ({sql_quote_list(items_by_finance_type[ft])}))"
+            for ft in finance_types
+        )
+        aligned_having = f"HAVING count(DISTINCT finance_type) = {len(finance_types)}" if align else ""
+
+        frames: List[pd.DataFrame] = []
+        for batch in chunked(symbols, batch_size):
+            sql = f"""
+            WITH base AS (
+              SELECT
+                upper(symbol) AS symbol,
+                CAST(report_date AS DATE) AS report_date,
+                finance_type,
+                item_name,
+                item_value
+              FROM '{statement_url}'
+              WHERE upper(symbol) IN ({sql_quote_list(batch)})
+                AND period_type = '{period_type}'
+                AND report_date <> 'TTM'
+                AND ({item_filter})
+            ),
+            reports AS (
+              SELECT symbol, report_date
+              FROM base
+              GROUP BY symbol, report_date
+              {aligned_having}
+            ),
+            intervals AS (
+              SELECT
+                symbol,
+                report_date,
+                report_date + INTERVAL {lag_days} DAY AS valid_from,
+                lead(report_date + INTERVAL {lag_days} DAY)
+                  OVER (PARTITION BY symbol ORDER BY report_date) AS valid_to
+              FROM reports
+            )
+            SELECT b.symbol, b.report_date, b.finance_type, b.item_name, b.item_value,
+                   CAST(i.valid_from AS DATE) AS valid_from,
+                   CAST(i.valid_to AS DATE) AS valid_to
+            FROM base b
+            JOIN intervals i
+              ON b.symbol = i.symbol AND b.report_date = i.report_date
+            """
+            df = query(sql)
+            if df is not None and not df.empty:
+                frames.append(df)
+
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=PIT_COLUMNS)
+        return cls(frame, lag_days, period_type)
+
+    def to_parquet(self, path: str) -> None:
+        out = self.frame.copy()
+        out["lag_days"] = self.lag_days
+        out["period_type"] = self.period_type
+        con = duckdb.connect(":memory:")
+        try:
+            con.register("pit", out)
+            con.execute(f"COPY pit TO '{sql_path(path)}' (FORMAT PARQUET)")
+        finally:
+            con.close()
+
+    @classmethod
+    def from_parquet(cls, path: str) -> "PitFundamentals":
+        con = duckdb.connect(":memory:")
+        try:
+            frame = con.execute(f"SELECT * FROM read_parquet('{sql_path(path)}')").df()
+        finally:
+            con.close()
+        lag_days = int(frame["lag_days"].iloc[0]) if "lag_days" in frame.columns and len(frame) else 0
+        period_type = str(frame["period_type"].iloc[0]) if "period_type" in frame.columns and len(frame) else "annual"
+        return cls(frame, lag_days, period_type)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def as_of_many(
+        self,
+        symbols: Optional[Sequence[str]],
+        items: Optional[Sequence[str]],
+        dates: Sequence[date],
+    ) -> pd.DataFrame:
+        """
+        Known statement rows for every (symbol, date) pair via one range join.
+
+        Returns a DataFrame with an extra `as_of` column (datetime64). Rows are
+        those with valid_from <= as_of < valid_to (valid_to NULL = still current).
+        """
+        if not len(dates) or self.frame.empty:
+            return pd.DataFrame(columns=["as_of"] + PIT_COLUMNS)
+
+        pit = self.frame
+        if symbols is not None:
+            wanted = {str(s).strip().upper() for s in symbols}
+            pit = pit[pit["symbol"].isin(wanted)]
+        if items is not None:
+            pit = pit[pit["item_name"].isin(set(items))]
+        if pit.empty:
+            return pd.DataFrame(columns=["as_of"] + PIT_COLUMNS)
+
+        dates_df = pd.DataFrame({"as_of": pd.to_datetime(sorted(set(dates)))})
+        con = duckdb.connect(":memory:")
+        try:
+            con.register("pit", pit)
+            con.register("dates", dates_df)
+            result = con.execute(
+                """
+                SELECT d.as_of, p.*
+                FROM dates d
+                JOIN pit p
+                  ON p.valid_from <= d.as_of
+                 AND (p.valid_to IS NULL OR d.as_of < p.valid_to)
+                ORDER BY d.as_of, p.symbol, p.finance_type, p.item_name
+                """
+            ).df()
+        finally:
+            con.close()
+        return result
+
+    def as_of(
+        self,
+        symbols: Optional[Sequence[str]],
+        items: Optional[Sequence[str]],
+        as_of_date: date,
+    ) -> pd.DataFrame:
+        """Statement rows known on `as_of_date` (see `as_of_many`)."""
+        out = self.as_of_many(symbols, items, [as_of_date])
+        return out.drop(columns=["as_of"])
+
+    def snapshots(
+        self,
+        symbols: Optional[Sequence[str]],
+        dates: Sequence[date],
+    ) -> Dict[date, Dict[str, Dict[str, Any]]]:
+        """
+        Per-date nested snapshots in the shape returned by
+        `_query_latest_annual_items_aligned`:
+
+          as_of -> symbol -> {"report_date": "YYYY-MM-DD", "<finance_type>": {item: value}}
+        """
+        out: Dict[date, Dict[str, Dict[str, Any]]] = {d: {} for d in dates}
+        rows = self.as_of_many(symbols, None, dates)
+        if rows.empty:
+            return out
+
+        values = rows["item_value"].astype(object).where(rows["item_value"].notna(), None)
+        for as_of_ts, sym, report_ts, ftype, item, val in zip(
+            rows["as_of"],
+            rows["symbol"],
+            rows["report_date"],
+            rows["finance_type"],
+            rows["item_name"],
+            values,
+        ):
+            as_of_key = pd.Timestamp(as_of_ts).date()
+            per_date = out.setdefault(as_of_key, {})
+            slot = per_date.get(sym)
+            if slot is None:
+                slot = {"report_date": pd.Timestamp(report_ts).date().isoformat()}
+                per_date[sym] = slot
+            slot.setdefault(str(ftype), {})[str(item)] = val
+        return out
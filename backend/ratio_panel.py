@@ -0,0 +1,410 @@
+"""
+Daily historical valuation ratio panel.
+
+Materializes close, shares outstanding, market cap, TTM EPS/revenue/EBITDA, book
+value and the derived P/E, P/S, P/B and EV/EBITDA for every (trading day, symbol)
+in one DuckDB pass (ASOF joins of prices against shares and quarterly
+fundamentals), instead of calling the per-symbol `Ticker` ratio methods.
+
+The panel is stored as parquet (long format, one row per symbol/date) and can
+be updated incrementally: each symbol's rows from a trailing window before its
+own last date onwards are recomputed, which picks up new trading days, symbols
+that lagged the rest of the panel, and recently restated quarters. `get_ratio_panel()` returns an
+in-memory, symbol-indexed view that reloads when the parquet file changes.
+
+Notes:
+  - Fundamentals are matched by fiscal period-end date (same as `Ticker.ps_ratio`
+    etc.). Pass `lag_days` to shift availability and avoid lookahead in backtests.
+  - No FX conversion is applied; values are in the reporting currency.
+"""
+from __future__ import annotations
+
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from data_io import VersionedLoader, chunked, file_version, sql_path, sql_quote_list
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_PANEL_PATH = Path(os.getenv("RATIO_PANEL_PATH", str(REPO_ROOT / "data" / "ratio_panel.parquet")))
+
+PANEL_COLUMNS = [
+    "symbol",
+    "date",
+    "close",
+    "shares_outstanding",
+    "market_cap",
+    "ttm_eps",
+    "ttm_revenue",
+    "ttm_ebitda",
+    "book_value",
+    "total_debt",
+    "cash",
+    "enterprise_value",
+    "pe",
+    "ps",
+    "pb",
+    "ev_ebitda",
+]
+
+RATIO_FIELDS = ["market_cap", "pe", "ps", "pb", "ev_ebitda"]
+
+# Days before each symbol's last panel date that an incremental update recomputes,
+# so quarters restated (or filed late) within that window reach the stored ratios.
+DEFAULT_RECOMPUTE_DAYS = 180
+
+# One date for every symbol, or SYMBOL -> date (symbols not in the map get full history).
+StartAfter = Union[date, Mapping[str, date], None]
+
+
+def build_panel_sql(
+    urls: Dict[str, str],
+    symbols: Sequence[str],
+    start_after: StartAfter = None,
+    lag_days: int = 0,
+) -> str:
+    """
+    SQL producing PANEL_COLUMNS for `symbols`.
+
+    Args:
+        urls: table name -> parquet URL/path for stock_prices, stock_shares_outstanding,
+            stock_tailing_eps and stock_statement.
+        start_after: Only emit price rows strictly after this date (incremental update),
+            either one date for all symbols or a per-symbol map.
+        lag_days: Days after period end before a quarterly statement is considered known.
+    """
+    sym_in = sql_quote_list(symbols)
+    starts_cte = ""
+    starts_join = ""
+    price_filter = ""
+    if isinstance(start_after, Mapping):
+        batch = set(symbols)
+        starts = [(s, d) for s, d in start_after.items() if s in batch]
+        if starts:
+            values = ", ".join(f"({sql_quote_list([s])}, DATE '{d.isoformat()}')" for s, d in starts)
+            starts_cte = f"starts AS (SELECT * FROM (VALUES {values}) AS t(symbol, start_after)),"
+            starts_join = "LEFT JOIN starts ON upper(p.symbol) = starts.symbol"
+            price_filter = "AND (starts.start_after IS NULL OR CAST(p.report_date AS DATE) > starts.start_after)"
+    elif start_after:
+        price_filter = f"AND CAST(p.report_date AS DATE) > DATE '{start_after.isoformat()}'"
+    lag = int(lag_days)
+    return f"""
+    WITH {starts_cte}
+    px AS (
+      SELECT upper(p.symbol) AS symbol, CAST(p.report_date AS DATE) AS date, p.close
+      FROM '{urls["stock_prices"]}' p
+      {starts_join}
+      WHERE upper(p.symbol) IN ({sym_in}) AND p.close IS NOT NULL {price_filter}
+    ),
+    sh AS (
+      SELECT upper(symbol) AS symbol, CAST(report_date AS DATE) AS d, shares_outstanding
+      FROM '{urls["stock_shares_outstanding"]}'
+      WHERE upper(symbol) IN ({sym_in}) AND shares_outstanding IS NOT NULL
+    ),
+    eps AS (
+      SELECT upper(symbol) AS symbol, CAST(report_date AS DATE) AS d, tailing_eps
+      FROM '{urls["stock_tailing_eps"]}'
+      WHERE upper(symbol) IN ({sym_in}) AND tailing_eps IS NOT NULL
+    ),
+    q AS (
+      SELECT
+        upper(symbol) AS symbol,
+        CAST(report_date AS DATE) AS period_end,
+        CAST(report_date AS DATE) + INTERVAL {lag} DAY AS d,
+        item_name,
+        item_value
+      FROM '{urls["stock_statement"]}'
+      WHERE upper(symbol) IN ({sym_in})
+        AND period_type = 'quarterly'
+        AND report_date <> 'TTM'
+        AND item_value IS NOT NULL
+        AND item_name IN ('total_revenue', 'ebitda', 'stockholders_equity', 'total_debt', 'cash_and_cash_equivalents')
+    ),
+    flow AS (
+      SELECT
+        symbol,
+        d,
+        item_name,
+        SUM(item_value) OVER w AS ttm_value,
+        COUNT(*) OVER w AS quarter_count,
+        MIN(period_end) OVER w AS first_period_end,
+        period_end
+      FROM q
+      WHERE item_name IN ('total_revenue', 'ebitda')
+      WINDOW w AS (PARTITION BY symbol, item_name ORDER BY period_end ROWS BETWEEN 3 PRECEDING AND CURRENT ROW)
+    ),
+    ttm AS (
+      -- 4 consecutive quarters (first period end no more than ~3 quarters back).
+      SELECT symbol, d,
+             max(CASE WHEN item_name = 'total_revenue' THEN ttm_value END) AS ttm_revenue,
+             max(CASE WHEN item_name = 'ebitda' THEN ttm_value END) AS ttm_ebitda
+      FROM flow
+      WHERE quarter_count = 4 AND period_end - first_period_end <= 300
+      GROUP BY symbol, d
+    ),
+    rev AS (SELECT symbol, d, ttm_revenue FROM ttm WHERE ttm_revenue IS NOT NULL),
+    ebd AS (SELECT symbol, d, ttm_ebitda FROM ttm WHERE ttm_ebitda IS NOT NULL),
+    bal AS (
+      SELECT symbol, d,
+             max(CASE WHEN item_name = 'stockholders_equity' THEN item_value END) AS book_value,
+             max(CASE WHEN item_name = 'total_debt' THEN item_value END) AS total_debt,
+             max(CASE WHEN item_name = 'cash_and_cash_equivalents' THEN item_value END) AS cash
+      FROM q
+      WHERE item_name IN ('stockholders_equity', 'total_debt', 'cash_and_cash_equivalents')
+      GROUP BY symbol, d
+    ),
+    joined AS (
+      SELECT
+        px.symbol,
+        px.date,
+        CAST(px.close AS DOUBLE) AS close,
+        CAST(sh.shares_outstanding AS DOUBLE) AS shares_outstanding,
+        CAST(eps.tailing_eps AS DOUBLE) AS ttm_eps,
+        CAST(rev.ttm_revenue AS DOUBLE) AS ttm_revenue,
+        CAST(ebd.ttm_ebitda AS DOUBLE) AS ttm_ebitda,
+        CAST(bal.book_value AS DOUBLE) AS book_value,
+        CAST(bal.total_debt AS DOUBLE) AS total_debt,
+        CAST(bal.cash AS DOUBLE) AS cash
+      FROM px
+      ASOF LEFT JOIN sh ON px.symbol = sh.symbol AND px.date >= sh.d
+      ASOF LEFT JOIN eps ON px.symbol = eps.symbol AND px.date >= eps.d
+      ASOF LEFT JOIN rev ON px.symbol = rev.symbol AND px.date >= rev.d
+      ASOF LEFT JOIN ebd ON px.symbol = ebd.symbol AND px.date >= ebd.d
+      ASOF LEFT JOIN bal ON px.symbol = bal.symbol AND px.date >= bal.d
+    ),
+    valued AS (
+      SELECT *, close * shares_outstanding AS market_cap
+      FROM joined
+    ),
+    with_ev AS (
+      SELECT *, market_cap + coalesce(total_debt, 0) - coalesce(cash, 0) AS enterprise_value
+      FROM valued
+    )
+    SELECT
+      symbol,
+      date,
+      close,
+      shares_outstanding,
+      market_cap,
+      ttm_eps,
+      ttm_revenue,
+      ttm_ebitda,
+      book_value,
+      total_debt,
+      cash,
+      enterprise_value,
+      close / NULLIF(ttm_eps, 0) AS pe,
+      market_cap / NULLIF(ttm_revenue, 0) AS ps,
+      market_cap / NULLIF(book_value, 0) AS pb,
+      enterprise_value / NULLIF(ttm_ebitda, 0) AS ev_ebitda
+    FROM with_ev
+    ORDER BY symbol, date
+    """
+
+
+def build_ratio_panel(
+    query: Callable[[str], pd.DataFrame],
+    urls: Dict[str, str],
+    symbols: Sequence[str],
+    start_after: StartAfter = None,
+    lag_days: int = 0,
+    batch_size: int = 200,
+) -> pd.DataFrame:
+    """Compute panel rows for `symbols` (batched to keep remote parquet scans bounded)."""
+    symbols = sorted({str(s).strip().upper() for s in symbols if str(s).strip()})
+    frames: List[pd.DataFrame] = []
+    for batch in chunked(symbols, batch_size):
+        df = query(build_panel_sql(urls, batch, start_after=start_after, lag_days=lag_days))
+        if df is not None and not df.empty:
+            frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=PANEL_COLUMNS)
+    return pd.concat(frames, ignore_index=True).reindex(columns=PANEL_COLUMNS)
+
+
+def _read_parquet(path: Path | str) -> pd.DataFrame:
+    con = duckdb.connect(":memory:")
+    try:
+        return con.execute(f"SELECT * FROM read_parquet('{sql_path(path)}')").df()
+    finally:
+        con.close()
+
+
+def update_ratio_panel(
+    query: Callable[[str], pd.DataFrame],
+    urls: Dict[str, str],
+    symbols: Sequence[str],
+    path: Path | str = DEFAULT_PANEL_PATH,
+    lag_days: int = 0,
+    full: bool = False,
+    recompute_days: int = DEFAULT_RECOMPUTE_DAYS,
+) -> Dict[str, int]:
+    """
+    Create or incrementally update the parquet panel at `path`.
+
+    Each existing symbol is recomputed from `recompute_days` before its own last
+    date (so a symbol that lagged the rest of the panel is not left with a gap, and
+    restatements inside the window are picked up); those rows replace the stored
+    ones. Symbols not yet in the panel get their full history. The file is
+    replaced atomically.
+    """
+    path = Path(path)
+    symbols = sorted({str(s).strip().upper() for s in symbols if str(s).strip()})
+    existing: Optional[pd.DataFrame] = None
+    if path.exists() and not full:
+        existing = _read_parquet(path)
+
+    replaced = 0
+    if existing is None or existing.empty:
+        new_rows = build_ratio_panel(query, urls, symbols, lag_days=lag_days)
+        combined = new_rows
+    else:
+        existing = existing.reindex(columns=PANEL_COLUMNS)
+        existing["date"] = pd.to_datetime(existing["date"])
+        wanted = set(symbols)
+        last_dates = existing.groupby("symbol")["date"].max()
+        start_after = {
+            str(sym): pd.Timestamp(last).date() - timedelta(days=max(0, int(recompute_days)))
+            for sym, last in last_dates.items()
+            if sym in wanted
+        }
+        new_rows = build_ratio_panel(query, urls, symbols, start_after=start_after, lag_days=lag_days)
+        cutoffs = pd.to_datetime(existing["symbol"].map(start_after))
+        stale = cutoffs.notna() & (existing["date"] > cutoffs)
+        replaced = int(stale.sum())
+        combined = pd.concat([existing.loc[~stale], new_rows], ignore_index=True)
+
+    combined = combined.sort_values(["symbol", "date"]).reset_index(drop=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    con = duckdb.connect(":memory:")
+    try:
+        con.register("panel", combined)
+        con.execute(f"COPY panel TO '{sql_path(tmp_path)}' (FORMAT PARQUET)")
+    finally:
+        con.close()
+    os.replace(tmp_path, path)
+    return {
+        "rows_added": int(len(new_rows)) - replaced,
+        "rows_recomputed": replaced,
+        "rows_total": int(len(combined)),
+    }
+
+
+class RatioPanel:
+    """
+    Read-only in-memory panel indexed by symbol.
+
+    Rows are stored sorted by (symbol, date) with per-symbol [start, end) offsets,
+    so slices are `searchsorted` lookups inside each symbol block.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        frame = frame.reindex(columns=PANEL_COLUMNS)
+        frame["symbol"] = frame["symbol"].astype(str).str.upper()
+        frame["date"] = pd.to_datetime(frame["date"])
+        self.frame = frame.sort_values(["symbol", "date"]).reset_index(drop=True)
+        self._dates = self.frame["date"].to_numpy(dtype="datetime64[ns]")
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        symbols = self.frame["symbol"].to_numpy()
+        if len(symbols):
+            boundaries = np.flatnonzero(symbols[1:] != symbols[:-1]) + 1
+            starts = np.concatenate(([0], boundaries))
+            ends = np.concatenate((boundaries, [len(symbols)]))
+            for s, e in zip(starts, ends):
+                self._offsets[str(symbols[s])] = (int(s), int(e))
+
+    @classmethod
+    def from_parquet(cls, path: Path | str) -> "RatioPanel":
+        return cls(_read_parquet(path))
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._offsets.keys())
+
+    def _row_range(self, symbol: str, start: Optional[date], end: Optional[date]) -> Tuple[int, int]:
+        lo, hi = self._offsets.get(symbol.upper(), (0, 0))
+        if lo == hi:
+            return lo, hi
+        block = self._dates[lo:hi]
+        if start is not None:
+            lo = lo + int(np.searchsorted(block, np.datetime64(pd.Timestamp(start)), side="left"))
+        if end is not None:
+            hi = self._offsets[symbol.upper()][0] + int(
+                np.searchsorted(block, np.datetime64(pd.Timestamp(end)), side="right")
+            )
+        return lo, max(lo, hi)
+
+    def slice(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Long-format rows for `symbols` within [start, end]."""
+        wanted = [s.upper() for s in symbols] if symbols is not None else self.symbols
+        idx: List[np.ndarray] = []
+        for sym in wanted:
+            lo, hi = self._row_range(sym, start, end)
+            if hi > lo:
+                idx.append(np.arange(lo, hi))
+        cols = ["symbol", "date"] + [c for c in (columns or PANEL_COLUMNS) if c not in ("symbol", "date")]
+        if not idx:
+            return pd.DataFrame(columns=cols)
+        return self.frame.iloc[np.concatenate(idx)][cols].reset_index(drop=True)
+
+    def wide(
+        self,
+        field: str,
+        symbols: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> pd.DataFrame:
+        """date x symbol matrix for one field."""
+        rows = self.slice(symbols, start, end, [field])
+        if rows.empty:
+            return pd.DataFrame()
+        return rows.pivot(index="date", columns="symbol", values=field).sort_index()
+
+    def cross_section(
+        self,
+        as_of: date,
+        symbols: Optional[Sequence[str]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Latest row on or before `as_of` for each symbol."""
+        target = np.datetime64(pd.Timestamp(as_of))
+        wanted = [s.upper() for s in symbols] if symbols is not None else self.symbols
+        picks: List[int] = []
+        for sym in wanted:
+            lo, hi = self._offsets.get(sym, (0, 0))
+            if lo == hi:
+                continue
+            pos = int(np.searchsorted(self._dates[lo:hi], target, side="right")) - 1
+            if pos >= 0:
+                picks.append(lo + pos)
+        cols = ["symbol", "date"] + [c for c in (columns or PANEL_COLUMNS) if c not in ("symbol", "date")]
+        if not picks:
+            return pd.DataFrame(columns=cols)
+        return self.frame.iloc[picks][cols].reset_index(drop=True)
+
+
+_PANEL_LOADER = VersionedLoader("ratio-panel")
+
+
+def get_ratio_panel(path: Path | str = DEFAULT_PANEL_PATH) -> Optional[RatioPanel]:
+    """
+    Process-wide panel loader. Returns None if the parquet file does not exist;
+    reloads transparently when the file changes (e.g. after an append).
+    """
+    path = Path(path)
+    if file_version(path) is None:
+        return None
+    return _PANEL_LOADER.get(str(path.resolve()), [path], lambda: RatioPanel.from_parquet(path))
@@ -0,0 +1,18 @@
+"""
+Python-compatible rounding checks for vectorized scores.
+
+Array code rounds with np.round, which scales by 10**decimals first, and sums in
+a different order than the list-based functions it replaces. Both only matter
+for values sitting on a rounding boundary; `near_rounding_tie` flags those so
+callers can redo them with Python's correctly rounded `round()`.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+
+def near_rounding_tie(values: np.ndarray, decimals: int) -> np.ndarray:
+    """Entries where float noise could change `round(x, decimals)`."""
+    scaled = np.asarray(values, dtype=np.float64) * (10 ** decimals)
+    with np.errstate(invalid="ignore"):
+        return np.abs((scaled - np.floor(scaled)) - 0.5) < 1e-6
@@ -0,0 +1,265 @@
+"""
+Vectorized RRG (Relative Rotation Graph) engine.
+
+Computes RS-Ratio, RS-Momentum and quadrant for every symbol of a date x symbol
+close matrix against one benchmark in one pass, with the definitions of
+`rrg_history`:
+
+  legacy     (calculate_rrg)
+             RS-Ratio = last RS / first RS of the window * 100
+             RS-Mom   = (mean of the last n//3 RS - mean of the n//3 before)
+                        / mean of the n//3 before * 1000 + 100
+  corrected  (calculate_rrg_corrected)
+             RS-Ratio = last RS / mean of the last 252 RS * 100
+             RS-Mom   = EMA12(ratio series) / EMA12(EMA12(ratio series)) * 100,
+                        ratio series = the last <= 252 daily RS-Ratios
+             legacy values below 252 aligned days
+
+where RS = close / benchmark on the dates where both are finite (benchmark != 0).
+
+Every (evaluation point, symbol) pair is one column of a work matrix. A stable
+sort of each column's validity mask squeezes out the dates the symbol has no
+bar, so every column ends with its own aligned RS series, as if the lists had
+been built per symbol. Window means come from cumulative sums and both EMAs run
+once down the rows for all columns, so a whole sector (and its tails, i.e. the
+same computation at earlier end dates) costs a few NumPy passes instead of one
+O(window^2) Python loop per symbol and date.
+
+Values match the list-based functions up to float summation order (~1e-12);
+`rounding.near_rounding_tie()` flags the values where that could change a rounded output.
+"""
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+LEGACY = "legacy"
+CORRECTED = "corrected"
+
+RS_WINDOW = 252
+EMA_PERIOD = 12
+MIN_MOMENTUM_POINTS = 2 * EMA_PERIOD
+
+# Upper bound on work-matrix cells (rows x columns) per pass, ~64MB of float64.
+MAX_CELLS = 8_000_000
+
+
+def quadrants(rs_ratio: np.ndarray, rs_momentum: np.ndarray) -> np.ndarray:
+    """Vectorized `determine_quadrant`."""
+    strong = np.asarray(rs_ratio) >= 100
+    rising = np.asarray(rs_momentum) >= 100
+    return np.where(
+        strong,
+        np.where(rising, "LEADING", "WEAKENING"),
+        np.where(rising, "IMPROVING", "LAGGING"),
+    ).astype(object)
+
+
+def window_starts(dates: np.ndarray, ends: np.ndarray, days: Optional[int]) -> np.ndarray:
+    """First row on or after dates[end] - days for each end row (0 without a window)."""
+    ends = np.asarray(ends, dtype=np.int64)
+    if days is None:
+        return np.zeros(len(ends), dtype=np.int64)
+    day_numbers = np.asarray(dates).astype("datetime64[D]").astype(np.int64)
+    return np.searchsorted(day_numbers, day_numbers[ends] - int(days), side="left").astype(np.int64)
+
+
+def _relative_strength(
+    closes: np.ndarray,
+    benchmark: np.ndarray,
+    ends: np.ndarray,
+    starts: np.ndarray,
+) -> np.ndarray:
+    """
+    [W, len(ends) * n_symbols] RS matrix, column k * n_symbols + j = symbol j at ends[k].
+
+    Rows outside [start, end] and dates without a valid pair are NaN, then each
+    column is compacted so its valid values are its last rows (order kept).
+    """
+    width = int((ends - starts).max()) + 1
+    rows = ends[:, None] - (width - 1) + np.arange(width)[None, :]        # [K, W]
+    in_window = rows >= starts[:, None]
+    rows = np.clip(rows, 0, None)
+
+    stock = closes[rows]                                                   # [K, W, N]
+    bench = benchmark[rows][:, :, None]                                    # [K, W, 1]
+    valid = in_window[:, :, None] & np.isfinite(stock) & np.isfinite(bench) & (bench != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = np.where(valid, stock / bench, np.nan)
+
+    rs = rs.transpose(1, 0, 2).reshape(width, -1)
+    order = np.argsort(np.isfinite(rs), axis=0, kind="stable")
+    return np.take_along_axis(rs, order, axis=0)
+
+
+def _ema(values: np.ndarray, first: np.ndarray, period: int) -> np.ndarray:
+    """
+    Column-wise `calculate_ema` of values[first[c]:, c] (SMA seed, then recursion).
+
+    Rows before each column's seed row are NaN, as are columns too short for a seed.
+    """
+    n_rows, n_cols = values.shape
+    seed_row = first + period - 1
+    take = np.clip(first[None, :] + np.arange(period)[:, None], 0, n_rows - 1)
+    seed = np.take_along_axis(values, take, axis=0).sum(axis=0) / period
+
+    out = np.full((n_rows, n_cols), np.nan)
+    seeded = seed_row <= n_rows - 1
+    if not seeded.any():
+        return out
+    multiplier = 2.0 / (period + 1)
+    prev = np.full(n_cols, np.nan)
+    for t in range(int(seed_row[seeded].min()), n_rows):
+        prev = np.where(seed_row == t, seed, (values[t] - prev) * multiplier + prev)
+        out[t] = prev
+    return out
+
+
+def _legacy(rs: np.ndarray, n: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    width, n_cols = rs.shape
+    cols = np.arange(n_cols)
+    # tail_sum[k - 1] = sum of the last k values of each column
+    tail_sum = np.cumsum(np.nan_to_num(rs[::-1], nan=0.0), axis=0)
+
+    baseline = rs[np.clip(width - n, 0, width - 1), cols]
+    period = np.maximum(1, n // 3)
+    recent_sum = tail_sum[np.clip(period - 1, 0, width - 1), cols]
+    older_sum = tail_sum[np.clip(2 * period - 1, 0, width - 1), cols] - recent_sum
+
+    ratio = np.full(n_cols, 100.0)
+    momentum = np.full(n_cols, 100.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        raw_ratio = rs[-1] / baseline * 100
+        older = older_sum / period
+        raw_momentum = ((recent_sum / period - older) / older) * 1000 + 100
+    ok = (n >= 2) & np.isfinite(baseline) & (baseline != 0)
+    ratio[ok] = raw_ratio[ok]
+    ok &= np.isfinite(older) & (older != 0) & np.isfinite(raw_momentum)
+    momentum[ok] = raw_momentum[ok]
+    return ratio, momentum
+
+
+def _corrected(rs: np.ndarray, n: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    ratio, momentum = _legacy(rs, n)
+    full = np.flatnonzero(n >= RS_WINDOW)
+    if not len(full):
+        return ratio, momentum
+
+    rs = rs[:, full]
+    n = n[full]
+    width = rs.shape[0]
+    csum = np.vstack([np.zeros((1, rs.shape[1])), np.cumsum(np.nan_to_num(rs, nan=0.0), axis=0)])
+
+    # Daily RS-Ratio for the last RS_WINDOW rows: RS / trailing 252-row mean.
+    rows = np.arange(width - RS_WINDOW, width)
+    # (Rows whose window would reach above row 0 are never used: see `first` below.)
+    window_mean = (csum[rows + 1] - csum[np.clip(rows + 1 - RS_WINDOW, 0, None)]) / RS_WINDOW
+    with np.errstate(divide="ignore", invalid="ignore"):
+        series = rs[rows] / window_mean * 100
+
+    # Columns use the last min(252, n - 251) rows of that series.
+    length = np.minimum(RS_WINDOW, n - (RS_WINDOW - 1))
+    first = RS_WINDOW - length
+    ema = _ema(series, first, EMA_PERIOD)
+    ema_of_ema = _ema(ema, first + EMA_PERIOD - 1, EMA_PERIOD)
+
+    full_ratio = np.full(len(full), 100.0)
+    full_momentum = np.full(len(full), 100.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        raw_momentum = ema[-1] / ema_of_ema[-1] * 100
+    ok = np.isfinite(window_mean[-1]) & (window_mean[-1] != 0)
+    full_ratio[ok] = series[-1][ok]
+    ok &= (length >= MIN_MOMENTUM_POINTS) & np.isfinite(ema_of_ema[-1]) & (ema_of_ema[-1] != 0)
+    ok &= np.isfinite(raw_momentum)
+    full_momentum[ok] = raw_momentum[ok]
+
+    ratio[full] = full_ratio
+    momentum[full] = full_momentum
+    return ratio, momentum
+
+
+def rrg_at(
+    closes: np.ndarray,
+    benchmark: np.ndarray,
+    ends: Optional[np.ndarray] = None,
+    starts: Optional[np.ndarray] = None,
+    method: str = LEGACY,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    RRG of every symbol at every end row.
+
+    Args:
+        closes: [T, N] closes on the benchmark's dates (NaN where missing).
+        benchmark: [T] benchmark closes.
+        ends: Evaluation rows (default: the last row).
+        starts: First row of each evaluation's window (default: 0).
+        method: LEGACY or CORRECTED.
+
+    Returns:
+        (rs_ratio, rs_momentum, points), each [len(ends), N]; `points` is the
+        number of aligned dates each value was computed from.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if closes.ndim == 1:
+        closes = closes[:, None]
+    benchmark = np.asarray(benchmark, dtype=np.float64)
+    n_rows, n_symbols = closes.shape
+    ends = np.asarray([n_rows - 1] if ends is None else ends, dtype=np.int64)
+    starts = np.zeros(len(ends), dtype=np.int64) if starts is None else np.asarray(starts, dtype=np.int64)
+    if method not in (LEGACY, CORRECTED):
+        raise ValueError(f"unknown RRG method {method!r}")
+
+    ratio = np.full((len(ends), n_symbols), 100.0)
+    momentum = np.full((len(ends), n_symbols), 100.0)
+    points = np.zeros((len(ends), n_symbols), dtype=np.int64)
+    if not len(ends) or not n_symbols or not n_rows:
+        return ratio, momentum, points
+
+    compute = _corrected if method == CORRECTED else _legacy
+    width = int((ends - starts).max()) + 1
+    step = max(1, MAX_CELLS // max(1, width * n_symbols))
+    for lo in range(0, len(ends), step):
+        hi = min(len(ends), lo + step)
+        rs = _relative_strength(closes, benchmark, ends[lo:hi], starts[lo:hi])
+        n = np.isfinite(rs).sum(axis=0)
+        r, m = compute(rs, n)
+        ratio[lo:hi] = r.reshape(hi - lo, n_symbols)
+        momentum[lo:hi] = m.reshape(hi - lo, n_symbols)
+        points[lo:hi] = n.reshape(hi - lo, n_symbols)
+    return ratio, momentum, points
+
+
+def rrg_snapshot(
+    closes: np.ndarray,
+    benchmark: np.ndarray,
+    method: str = LEGACY,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """RRG of every column over all rows -> (rs_ratio, rs_momentum, points), each [N]."""
+    ratio, momentum, points = rrg_at(closes, benchmark, method=method)
+    return ratio[0], momentum[0], points[0]
+
+
+def rrg_tails(
+    dates: np.ndarray,
+    closes: np.ndarray,
+    benchmark: np.ndarray,
+    length: int,
+    step: int = 5,
+    days: Optional[int] = None,
+    method: str = LEGACY,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    RRG trails: the last `length` evaluation points, `step` rows apart, ending at the last row.
+
+    Each point uses the rows of the `days` calendar days up to it (all earlier
+    rows when `days` is None), like a snapshot taken on that date.
+
+    Returns (end_rows, rs_ratio, rs_momentum, points), oldest point first.
+    """
+    n_rows = len(benchmark)
+    ends = (n_rows - 1) - max(1, int(step)) * np.arange(max(0, int(length)))[::-1]
+    ends = ends[ends >= 0]
+    ratio, momentum, points = rrg_at(closes, benchmark, ends, window_starts(dates, ends, days), method)
+    return ends, ratio, momentum, points
@@ -0,0 +1,122 @@
+"""
+Indexed, in-memory RRG history for /rrg/history and /rrg/predict.
+
+Each history file is parsed once into per-(symbol, lookback_days) series: a
+sorted array of "YYYY-MM-DD" strings plus the matching points, so a date range
+is two binary searches and a list slice, and the latest point is an index
+lookup. Request cost depends on the number of points returned, not on the size
+of the file.
+
+Two file layouts are accepted:
+
+  rrg_history_{N}d.json  {"metadata": {"benchmark", "symbols", ...}, "data": [...]}
+                         (scripts/recalculate_rrg_history.py)
+  rrg-history.json       {"benchmark", "interval", "symbols", "data": [...]}
+                         (scripts/generate_rrg_history.py, all lookbacks in one file)
+
+`load_rrg_history(path)` caches per path and reloads when the file changes
+(data_io.file_version). The new index is built completely before it replaces
+the old one, and a file that fails to parse (e.g. caught mid-write) keeps the
+previous index in service.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from data_io import VersionedLoader, file_version
+
+
+class _Series:
+    __slots__ = ("dates", "points")
+
+    def __init__(self, points: List[Dict[str, Any]]):
+        # Stable sort: points sharing a date keep their file order, as with list.sort().
+        order = sorted(range(len(points)), key=lambda i: points[i]["date"])
+        self.points = [points[i] for i in order]
+        self.dates = np.array([p["date"] for p in self.points], dtype=str)
+
+    def range(self, start: str, end: str) -> List[Dict[str, Any]]:
+        lo = int(np.searchsorted(self.dates, start, side="left"))
+        hi = int(np.searchsorted(self.dates, end, side="right"))
+        return self.points[lo:hi]
+
+    def latest(self) -> Dict[str, Any]:
+        # First point of the latest date (a later duplicate does not replace it).
+        return self.points[int(np.searchsorted(self.dates, self.dates[-1], side="left"))]
+
+
+class RrgHistory:
+    def __init__(
+        self,
+        points: Iterable[Dict[str, Any]],
+        benchmark: str = "SPY",
+        interval: str = "weekly",
+        symbols: Optional[Sequence[str]] = None,
+    ):
+        self.benchmark = benchmark
+        self.interval = interval
+        self.symbols = list(symbols or [])
+
+        grouped: Dict[Tuple[str, Any], List[Dict[str, Any]]] = {}
+        for point in points:
+            if not isinstance(point, dict) or not isinstance(point.get("date"), str):
+                continue
+            grouped.setdefault((point.get("symbol"), point.get("lookback_days")), []).append(point)
+        self._series: Dict[Tuple[str, Any], _Series] = {key: _Series(pts) for key, pts in grouped.items()}
+        self.total_points = sum(len(s.points) for s in self._series.values())
+
+    @classmethod
+    def from_file(cls, path: Path | str) -> "RrgHistory":
+        with Path(path).open("r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if not isinstance(raw, dict):
+            return cls([])
+        if "metadata" in raw:
+            meta = raw.get("metadata") or {}
+            return cls(raw.get("data") or [], meta.get("benchmark", "SPY"), "weekly", meta.get("symbols", []))
+        return cls(
+            raw.get("data") or [],
+            raw.get("benchmark", "SPY"),
+            raw.get("interval", "weekly"),
+            raw.get("symbols", []),
+        )
+
+    def query(self, symbols: Iterable[str], lookback_days: int, start: str, end: str) -> List[Dict[str, Any]]:
+        """Points of `symbols` with start <= date <= end, sorted by symbol then date."""
+        out: List[Dict[str, Any]] = []
+        for symbol in sorted(set(symbols)):
+            series = self._series.get((symbol, lookback_days))
+            if series is not None:
+                out.extend(series.range(start, end))
+        return out
+
+    def latest(self, symbol: str, lookback_days: int) -> Optional[Dict[str, Any]]:
+        series = self._series.get((symbol, lookback_days))
+        return series.latest() if series is not None else None
+
+
+_LOADER = VersionedLoader("rrg-history")
+
+
+def _load(path: Path) -> RrgHistory:
+    history = RrgHistory.from_file(path)
+    if os.getenv("RRG_DEBUG") in ("1", "true", "TRUE", "yes", "YES", "on", "ON"):
+        print(f"[rrg-history] Loaded {history.total_points} points from {path}", flush=True)
+    return history
+
+
+def load_rrg_history(path: Path | str) -> Optional[RrgHistory]:
+    """
+    Cached `RrgHistory.from_file(path)`; None if the file does not exist.
+
+    Raises the parse error only when there is no previously loaded index to serve.
+    """
+    path = Path(path)
+    if file_version(path) is None:
+        return None
+    return _LOADER.get(str(path), [path], lambda: _load(path))
@@ -6,19 +6,34 @@ Replaces ARIMA with probabilistic predictions using:
 2. Historical analogs (similar past RRG states)
 
 This provides honest uncertainty estimates instead of false precision.
+
+Each lookback's transition matrices and analog database are loaded once into a
+resident `RrgModels` (see `get_rrg_models`), swapped for a new instance when
+either file changes. The per-symbol analog KD-trees are also merged into one
+tree (symbols kept apart along a third axis), so a batch answers every
+symbol's analog search with a single `KDTree.query` call.
 """
 from __future__ import annotations
 
 import json
 import pickle
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import math
 
+import numpy as np
+
+from data_io import VersionedLoader
+
 
 DATA_DIR = Path(__file__).resolve().parent / "data"
 
 
+# Third-axis distance between symbols in the merged analog tree; RS values live
+# around 100, so any same-symbol neighbour is far closer than another symbol's.
+_SYMBOL_SPACING = 1.0e6
+
+
 def _transitions_file(lookback_days: int) -> Path:
     return DATA_DIR / f"rrg_transitions_{lookback_days}d.json"
 
@@ -27,6 +42,17 @@ def _analogs_file(lookback_days: int) -> Path:
     return DATA_DIR / f"rrg_analogs_{lookback_days}d.pkl"
 
 
+def _model_files(lookback_days: int) -> Tuple[Path, Path]:
+    """Transition and analog files actually read for a lookback (same fallbacks as the loaders)."""
+    transitions_file = _transitions_file(lookback_days)
+    if not transitions_file.exists() and (DATA_DIR / "rrg_transitions.json").exists():
+        transitions_file = DATA_DIR / "rrg_transitions.json"
+    analogs_file = _analogs_file(lookback_days)
+    if not analogs_file.exists() and (DATA_DIR / "rrg_analogs.pkl").exists():
+        analogs_file = DATA_DIR / "rrg_analogs.pkl"
+    return transitions_file, analogs_file
+
+
 def load_transition_probabilities(lookback_days: int) -> Dict:
     """Load pre-computed transition probability matrices."""
     transitions_file = _transitions_file(lookback_days)
@@ -63,10 +89,128 @@ def load_analog_database(lookback_days: int) -> Dict:
     return data.get("analog_db", {})
 
 
+def _build_analogs(db: Dict, distances, indices) -> List[Dict]:
+    analogs = []
+    for dist, idx in zip(distances, indices):
+        analog_state = db["states"][idx]
+        analog_outcome = db["outcomes"][idx]
+        
+        # Calculate similarity score (0-1, higher is more similar)
+        similarity = 1.0 / (1.0 + dist)
+        
+        analogs.append({
+            "date": analog_state["date"],
+            "similarity": round(similarity, 3),
+            "initial_state": {
+                "rsRatio": analog_state["rsRatio"],
+                "rsMomentum": analog_state["rsMomentum"],
+                "quadrant": analog_state["quadrant"]
+            },
+            "outcome_30d": {
+                "rsRatio": analog_outcome["rsRatio"],
+                "rsMomentum": analog_outcome["rsMomentum"],
+                "quadrant": analog_outcome["quadrant"]
+            }
+        })
+    return analogs
+
+
+class RrgModels:
+    """One lookback's transition matrices and analog database, resident in memory."""
+
+    def __init__(self, transitions: Dict, analog_db: Dict):
+        self.transitions = transitions
+        self.analog_db = analog_db
+        # symbol -> (position along the third axis, first row in the merged tree)
+        self._layout: Dict[str, Tuple[int, int]] = {}
+        self._owner: Optional[np.ndarray] = None
+        self._tree: Any = None
+
+        blocks = []
+        owners = []
+        offset = 0
+        for position, (symbol, db) in enumerate(analog_db.items()):
+            try:
+                coords = np.asarray(db["tree"].data, dtype=np.float64).reshape(-1, 2)
+            except Exception:
+                continue
+            if len(coords) != len(db["states"]):
+                continue
+            blocks.append(np.column_stack([coords, np.full(len(coords), position * _SYMBOL_SPACING)]))
+            owners.append(np.full(len(coords), position))
+            self._layout[symbol] = (position, offset)
+            offset += len(coords)
+        if blocks:
+            from scipy.spatial import KDTree
+
+            self._tree = KDTree(np.vstack(blocks))
+            self._owner = np.concatenate(owners)
+
+    def batch_analogs(self, current_states: Dict[str, Dict], n_analogs: int) -> Dict[str, List[Dict]]:
+        """
+        Analogs for every symbol the merged tree can answer, from one KD-tree query.
+
+        Symbols missing from the database, with unusable states, or whose
+        nearest rows are not all their own are left out; `find_historical_analogs`
+        handles those one at a time, exactly as before.
+        """
+        rows: List[Tuple[str, int, int]] = []
+        queries: List[List[float]] = []
+        for symbol, state in current_states.items():
+            layout = self._layout.get(symbol)
+            if layout is None:
+                continue
+            try:
+                point = [float(state["rsRatio"]), float(state["rsMomentum"])]
+                k = min(n_analogs, len(self.analog_db[symbol]["states"]))
+            except Exception:
+                continue
+            if k < 1 or not all(math.isfinite(v) for v in point):
+                continue
+            rows.append((symbol, layout[0], k))
+            queries.append(point + [layout[0] * _SYMBOL_SPACING])
+        if not rows:
+            return {}
+
+        k_max = max(k for _, _, k in rows)
+        distances, indices = self._tree.query(np.asarray(queries), k=k_max)
+        distances = np.asarray(distances).reshape(len(rows), k_max)
+        indices = np.asarray(indices).reshape(len(rows), k_max)
+
+        results: Dict[str, List[Dict]] = {}
+        for row, (symbol, position, k) in enumerate(rows):
+            idx = indices[row, :k]
+            if (idx >= len(self._owner)).any() or (self._owner[idx] != position).any():
+                continue
+            db = self.analog_db[symbol]
+            results[symbol] = _build_analogs(db, distances[row, :k], idx - self._layout[symbol][1])
+        return results
+
+
+_MODELS = VersionedLoader("rrg-models")
+
+
+def get_rrg_models(lookback_days: int) -> RrgModels:
+    """
+    Resident models for a lookback, reloaded when either model file changes.
+
+    A reload builds a new `RrgModels` and replaces the old one in a single
+    assignment, so a request keeps one consistent set for its whole batch.
+    If a changed file fails to load, the previous models stay in service.
+    """
+    return _MODELS.get(
+        lookback_days,
+        _model_files(lookback_days),
+        lambda: RrgModels(load_transition_probabilities(lookback_days), load_analog_database(lookback_days)),
+    )
+
+
+
 def calculate_transition_probabilities(
     symbol: str,
     current_quadrant: str,
-    lookback_days: int = 180
+    lookback_days: int = 180,
+    models: Optional[RrgModels] = None
 ) -> Dict[str, float]:
     """
     Get transition probabilities for a symbol from its current quadrant.
@@ -79,7 +223,7 @@ def calculate_transition_probabilities(
     Returns:
         Dict mapping quadrant -> probability
     """
-    transitions = load_transition_probabilities(lookback_days)
+    transitions = (models or get_rrg_models(lookback_days)).transitions
     
     # Try to find exact match
     key = f"{symbol}_{lookback_days}d"
@@ -100,6 +244,7 @@ def find_historical_analogs(
     current_state: Dict,
     n_analogs: int = 5,
     lookback_days: int = 180,
+    models: Optional[RrgModels] = None,
 ) -> List[Dict]:
     """
     Find historical RRG states similar to the current state.
@@ -112,7 +257,7 @@ def find_historical_analogs(
     Returns:
         List of historical analogs with similarity scores and outcomes
     """
-    analog_db = load_analog_database(lookback_days)
+    analog_db = (models or get_rrg_models(lookback_days)).analog_db
     
     if symbol not in analog_db:
         print(f"[WARN] No analog data for {symbol}")
@@ -128,38 +273,17 @@ def find_historical_analogs(
         print(f"[ERROR] Analog search failed for {symbol}: {e}")
         return []
     
-    # Build result list
-    analogs = []
-    for dist, idx in zip(distances[0], indices[0]):
-        analog_state = db["states"][idx]
-        analog_outcome = db["outcomes"][idx]
-        
-        # Calculate similarity score (0-1, higher is more similar)
-        similarity = 1.0 / (1.0 + dist)
-        
-        analogs.append({
-            "date": analog_state["date"],
-            "similarity": round(similarity, 3),
-            "initial_state": {
-                "rsRatio": analog_state["rsRatio"],
-                "rsMomentum": analog_state["rsMomentum"],
-                "quadrant": analog_state["quadrant"]
-            },
-            "outcome_30d": {
-                "rsRatio": analog_outcome["rsRatio"],
-                "rsMomentum": analog_outcome["rsMomentum"],
-                "quadrant": analog_outcome["quadrant"]
-            }
-        })
-    
-    return analogs
+    # A single-neighbour query returns 1-D arrays; flatten both shapes.
+    return _build_analogs(db, np.ravel(distances), np.ravel(indices))
 
 
 def generate_hybrid_prediction(
     symbol: str,
     current_state: Dict,
     lookback_days: int = 180,
-    n_analogs: int = 5
+    n_analogs: int = 5,
+    models: Optional[RrgModels] = None,
+    analogs: Optional[List[Dict]] = None
 ) -> Dict:
     """
     Generate hybrid prediction combining transition probabilities and historical analogs.
@@ -169,19 +293,25 @@ def generate_hybrid_prediction(
         current_state: Dict with rsRatio, rsMomentum, quadrant
         lookback_days: Lookback period used for RRG calculation
         n_analogs: Number of historical analogs to include
+        models: Models to use (default: the registry's current set)
+        analogs: Analogs already found by a batch query
     
     Returns:
         Dict with transition probabilities, historical analogs, and disclaimer
     """
+    models = models or get_rrg_models(lookback_days)
+
     # Get transition probabilities
     transition_probs = calculate_transition_probabilities(
         symbol,
         current_state["quadrant"],
-        lookback_days
+        lookback_days,
+        models
     )
     
     # Find historical analogs
-    analogs = find_historical_analogs(symbol, current_state, n_analogs, lookback_days)
+    if analogs is None:
+        analogs = find_historical_analogs(symbol, current_state, n_analogs, lookback_days, models)
     
     # Calculate average outcome from analogs (for context)
     if analogs:
@@ -246,6 +376,19 @@ def batch_generate_predictions(
     """
     predictions = []
     
+    try:
+        models = get_rrg_models(lookback_days)
+    except Exception as e:
+        print(f"[ERROR] Loading RRG models ({lookback_days}d) failed: {e}")
+        return predictions
+    
+    # One KD-tree query for all symbols; symbols it cannot answer fall back to
+    # the per-symbol search inside generate_hybrid_prediction.
+    batch_analogs = models.batch_analogs(
+        {symbol: current_states[symbol] for symbol in symbols if symbol in current_states},
+        n_analogs
+    )
+    
     for symbol in symbols:
         if symbol not in current_states:
             continue
@@ -255,7 +398,9 @@ def batch_generate_predictions(
                 symbol,
                 current_states[symbol],
                 lookback_days,
-                n_analogs
+                n_analogs,
+                models,
+                batch_analogs.get(symbol)
             )
             predictions.append(prediction)
         except Exception as e:
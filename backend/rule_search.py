@@ -0,0 +1,247 @@
+"""
+Batched evaluation of backtest rule combinations for scripts/search_backtest_rules.py.
+
+The rule search runs the sector backtest for every (cap, rule set) combination
+with the same sector, holding period and dates. Everything except the rules is
+shared between those runs, so it is computed once per sector and holding period:
+
+  RuleSearchPeriod   one rebalance period: ratio columns of its universe (as in
+                     main._evaluate_backtest_period), each symbol's forward total
+                     return and the benchmark return
+  evaluate_rule_sets per cap: peer stats, valuation scores and one mask per
+                     distinct (metric, operator) rule; each rule set's mask is the
+                     AND of its rule masks, computed for all rule sets at once as a
+                     (rule sets x periods x symbols) boolean tensor, and its top_n
+                     picks are the first rows of a single score ordering
+
+Scores do not depend on which rows pass the rules (peers are the cap universe),
+so the picks, returns and filtered sizes equal those of a full backtest run per
+combination, at a cost that grows with the number of distinct rules rather than
+the number of combinations. Only numpy is needed here, not the FastAPI app.
+
+For process workers, `publish_periods` copies a group's arrays into one
+multiprocessing.shared_memory block and returns a small picklable spec;
+`evaluate_shared` attaches to it read-only in the worker (no copy) and
+evaluates there.
+"""
+from __future__ import annotations
+
+import math
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from factor_engine import score_valuation
+from screen_masks import RATIO_METRICS, PeerStats, cap_mask, fundamental_rules_mask
+
+
+_COLUMNS = (*RATIO_METRICS, "market_cap")
+_ALIGN = 64
+
+
+class Rule(NamedTuple):
+    metric: str
+    operator: str
+
+
+class RuleSearchPeriod:
+    """
+    One rebalance period of a sector.
+
+    `columns` holds RATIO_METRICS plus "market_cap" as float arrays over `symbols`
+    (NaN = missing); `returns` is each symbol's total return over the holding window
+    (NaN where the backtest has none). A period with no symbols stands for a backtest
+    point without a universe (no filtered size, no returns).
+    """
+
+    def __init__(
+        self,
+        as_of: str,
+        end_date: str,
+        symbols: Sequence[str],
+        columns: Dict[str, np.ndarray],
+        returns: np.ndarray,
+        benchmark_return: Optional[float],
+    ):
+        self.as_of = as_of
+        self.end_date = end_date
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.columns = columns
+        self.returns = np.asarray(returns, dtype=np.float64)
+        self.benchmark_return = benchmark_return
+
+    @classmethod
+    def empty(cls, as_of: str, end_date: str) -> "RuleSearchPeriod":
+        columns = {name: np.empty(0, dtype=np.float64) for name in _COLUMNS}
+        return cls(as_of, end_date, [], columns, np.empty(0, dtype=np.float64), None)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+
+def _rule_set_masks(
+    period: RuleSearchPeriod,
+    universe: np.ndarray,
+    rule_sets: Sequence[Sequence[Rule]],
+) -> np.ndarray:
+    """[len(rule_sets), len(period)] rows passing every rule of each set (within `universe`)."""
+    stats = PeerStats(period.columns, universe)
+    atoms = sorted({rule for rules in rule_sets for rule in rules})
+    atom_index = {rule: i for i, rule in enumerate(atoms)}
+    failing = np.zeros((len(atoms), len(period)), dtype=np.int64)
+    for rule, i in atom_index.items():
+        failing[i] = ~fundamental_rules_mask(period.columns, [rule], stats)
+    membership = np.zeros((len(rule_sets), len(atoms)), dtype=np.int64)
+    for s, rules in enumerate(rule_sets):
+        for rule in rules:
+            membership[s, atom_index[rule]] = 1
+    # A row passes a rule set when none of the set's rules fails it.
+    return ((membership @ failing) == 0) & universe
+
+
+def evaluate_rule_sets(
+    periods: Sequence[RuleSearchPeriod],
+    cap: str,
+    rule_sets: Sequence[Sequence[Rule]],
+    top_n: int,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Backtest points of every rule set: result[s][p] for rule set s and period p.
+
+    Each point has the keys of a backtest_sector "data" entry that the rule search
+    reads: as_of, end_date, filtered_size (absent without a universe),
+    portfolio_total_return, benchmark_total_return and selected
+    ([{symbol, total_return}] in pick order).
+    """
+    points: List[List[Dict[str, Any]]] = [[] for _ in rule_sets]
+    for period in periods:
+        if not len(period):
+            for out in points:
+                out.append({"as_of": period.as_of, "end_date": period.end_date, "universe_size": 0, "selected": []})
+            continue
+
+        columns = period.columns
+        in_cap = cap_mask(columns["market_cap"], cap)
+        peers = {metric: columns[metric][in_cap & ~np.isnan(columns[metric])] for metric in RATIO_METRICS}
+        scores, _components = score_valuation(
+            {metric: columns[metric] for metric in RATIO_METRICS}, weights=weights, peers=peers
+        )
+        # Best score first, unscored last, ties in universe order (as in the backtest).
+        has_score = ~np.isnan(scores)
+        order = np.lexsort((np.arange(len(period)), -np.nan_to_num(scores, nan=0.0), ~has_score))
+
+        passes = _rule_set_masks(period, in_cap, rule_sets)
+        filtered_sizes = passes.sum(axis=1)
+        ranked = passes[:, order]
+        picked = ranked & (np.cumsum(ranked, axis=1) <= int(top_n))
+
+        for s, out in enumerate(points):
+            rows = order[picked[s]]
+            returns = period.returns[rows]
+            finite = returns[np.isfinite(returns)].tolist()
+            out.append(
+                {
+                    "as_of": period.as_of,
+                    "end_date": period.end_date,
+                    "universe_size": len(period),
+                    "filtered_size": int(filtered_sizes[s]),
+                    "selected": [
+                        {"symbol": str(sym), "total_return": None if math.isnan(tr) else tr}
+                        for sym, tr in zip(period.symbols[rows].tolist(), returns.tolist())
+                    ],
+                    # statistics.fmean arithmetic, like the backtest's portfolio return.
+                    "portfolio_total_return": math.fsum(finite) / len(finite) if finite else None,
+                    "benchmark_total_return": period.benchmark_return,
+                }
+            )
+    return points
+
+
+def parse_rule_sets(rule_sets: Sequence[Sequence[Dict[str, str]]]) -> List[Tuple[Rule, ...]]:
+    """[{"metric", "operator"}, ...] rule sets (as in build_rule_sets) as Rule tuples."""
+    return [tuple(Rule(r["metric"], r["operator"]) for r in rules) for rules in rule_sets]
+
+
+def publish_periods(periods: Sequence[RuleSearchPeriod]) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    """
+    Copy the periods' arrays into one new shared memory block.
+
+    Returns (block, spec). The caller owns the block: close() and unlink() it once no
+    worker needs it. `spec` (block name plus per-period offsets, dtypes and scalars)
+    is what workers receive.
+    """
+    entries: List[Dict[str, Any]] = []
+    arrays: List[Tuple[int, np.ndarray]] = []
+    offset = 0
+    for period in periods:
+        named = [
+            ("symbols", np.asarray([str(sym) for sym in period.symbols], dtype=str)),
+            ("returns", np.ascontiguousarray(period.returns, dtype=np.float64)),
+            *((f"column:{name}", np.ascontiguousarray(period.columns[name], dtype=np.float64)) for name in _COLUMNS),
+        ]
+        layout: Dict[str, Tuple[int, str, Tuple[int, ...]]] = {}
+        for key, arr in named:
+            layout[key] = (offset, arr.dtype.str, arr.shape)
+            arrays.append((offset, arr))
+            offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+        entries.append(
+            {
+                "as_of": period.as_of,
+                "end_date": period.end_date,
+                "benchmark_return": period.benchmark_return,
+                "arrays": layout,
+            }
+        )
+
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for start, arr in arrays:
+        target = np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf, offset=start)
+        target[...] = arr
+        del target
+    return block, {"name": block.name, "periods": entries}
+
+
+def attach_periods(spec: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, List[RuleSearchPeriod]]:
+    """
+    Read-only periods over a block made by `publish_periods` (in any process).
+
+    Drop the periods before closing the returned block. Spawned workers share the
+    publisher's resource tracker, so attaching does not take ownership of the block.
+    """
+    block = shared_memory.SharedMemory(name=spec["name"])
+    periods: List[RuleSearchPeriod] = []
+    for entry in spec["periods"]:
+        views: Dict[str, np.ndarray] = {}
+        for key, (start, dtype, shape) in entry["arrays"].items():
+            view = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=block.buf, offset=start)
+            view.flags.writeable = False
+            views[key] = view
+        periods.append(
+            RuleSearchPeriod(
+                entry["as_of"],
+                entry["end_date"],
+                views["symbols"].tolist(),
+                {name: views[f"column:{name}"] for name in _COLUMNS},
+                views["returns"],
+                entry["benchmark_return"],
+            )
+        )
+    return block, periods
+
+
+def evaluate_shared(
+    spec: Dict[str, Any],
+    cap: str,
+    rule_sets: Sequence[Sequence[Rule]],
+    top_n: int,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[List[Dict[str, Any]]]:
+    """`evaluate_rule_sets` over published periods; the result holds no shared memory."""
+    block, periods = attach_periods(spec)
+    try:
+        return evaluate_rule_sets(periods, cap, rule_sets, top_n, weights=weights)
+    finally:
+        del periods
+        block.close()
@@ -0,0 +1,186 @@
+"""
+Columnar screener filters and backtest rules.
+
+The per-record screens (cap bucket, custom screener rules, the backtest's
+fundamental rules) compile into boolean masks over float columns, one column
+per metric with NaN for a missing value:
+
+  cap_mask             large >= 10B, mid >= 2B, small >= 300M (below: no bucket)
+  rule_mask            one custom rule; "=" / "!=" use a 0.01 tolerance,
+                       "between" is inclusive, unknown operators only need a value
+  custom_rules_mask    enabled rules combined with AND / OR
+  filters_mask         ScreenerFiltersPayload: industry scope, cap, custom rules
+  fundamental_rules_mask
+                       gt_zero / lt_mean / lt_median against PeerStats computed
+                       once per period
+
+A missing or non-finite value fails every rule, as with the dict-based
+per-record helpers these replaced (tests/test_screen_masks.py keeps them as the
+parity reference). Peer means and medians
+use `statistics.fmean` / `statistics.median` arithmetic (fsum, middle-pair
+average), so thresholds are bit-identical to the list-based code.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+
+RATIO_METRICS = ("pe", "ps", "pb", "ev_ebit", "ev_ebitda", "ev_sales")
+
+LARGE_CAP = 10_000_000_000
+MID_CAP = 2_000_000_000
+SMALL_CAP = 300_000_000
+
+
+def float_column(values: Iterable[Any]) -> np.ndarray:
+    """Float64 array of `values`; None and non-numeric entries become NaN."""
+    out = []
+    for v in values:
+        try:
+            out.append(float(v))
+        except (TypeError, ValueError):
+            out.append(math.nan)
+    return np.asarray(out, dtype=np.float64)
+
+
+def cap_mask(market_cap: np.ndarray, cap: Optional[str]) -> np.ndarray:
+    if not cap or cap == "all":
+        return np.ones(len(market_cap), dtype=bool)
+    if cap == "large":
+        return market_cap >= LARGE_CAP
+    if cap == "mid":
+        return (market_cap >= MID_CAP) & (market_cap < LARGE_CAP)
+    if cap == "small":
+        return (market_cap >= SMALL_CAP) & (market_cap < MID_CAP)
+    return np.zeros(len(market_cap), dtype=bool)
+
+
+def rule_mask(values: np.ndarray, operator: str, target: Any) -> np.ndarray:
+    finite = np.isfinite(values)
+    if not finite.any():
+        return finite
+    if operator == "between":
+        try:
+            min_val, max_val = target
+            lo, hi = float(min_val), float(max_val)
+        except Exception:
+            return np.zeros(len(values), dtype=bool)
+        return finite & (values >= lo) & (values <= hi)
+    if operator not in ("<", "<=", ">", ">=", "=", "!="):
+        return finite
+    x = float(target)
+    with np.errstate(invalid="ignore"):
+        if operator == "<":
+            hit = values < x
+        elif operator == "<=":
+            hit = values <= x
+        elif operator == ">":
+            hit = values > x
+        elif operator == ">=":
+            hit = values >= x
+        elif operator == "=":
+            hit = np.abs(values - x) < 0.01
+        else:
+            hit = np.abs(values - x) >= 0.01
+    return finite & hit
+
+
+def custom_rules_mask(
+    rules: Sequence[Any],
+    column: Callable[[str], np.ndarray],
+    logic: Optional[str],
+    n: int,
+) -> np.ndarray:
+    """
+    Combined mask of the enabled `rules` (objects with metric/operator/value/enabled).
+
+    `column(metric)` returns the metric's float column; it is called once per metric.
+    """
+    enabled = [r for r in rules or [] if r.enabled]
+    if not enabled:
+        return np.ones(n, dtype=bool)
+    columns: Dict[str, np.ndarray] = {}
+    masks = []
+    for rule in enabled:
+        if rule.metric not in columns:
+            columns[rule.metric] = column(rule.metric)
+        masks.append(rule_mask(columns[rule.metric], rule.operator, rule.value))
+    if (logic or "AND") == "OR":
+        return np.logical_or.reduce(masks)
+    return np.logical_and.reduce(masks)
+
+
+def filters_mask(
+    filters: Any,
+    market_cap: np.ndarray,
+    column: Callable[[str], np.ndarray],
+    industries: Optional[np.ndarray] = None,
+    sectors: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Mask of a ScreenerFiltersPayload (industry scope, cap, custom rules) over one universe."""
+    n = len(market_cap)
+    mask = np.ones(n, dtype=bool)
+    if filters is None:
+        return mask
+    if filters.industry:
+        scope = np.zeros(n, dtype=bool)
+        if industries is not None:
+            scope |= industries == filters.industry
+        if sectors is not None:
+            scope |= sectors == filters.industry
+        mask &= scope
+    mask &= cap_mask(market_cap, filters.cap)
+    if filters.customRules:
+        mask &= custom_rules_mask(filters.customRules, column, filters.ruleLogic, n)
+    return mask
+
+
+def mean_or_none(values: np.ndarray) -> Optional[float]:
+    """`statistics.fmean` of a float array, None when empty."""
+    return math.fsum(values.tolist()) / len(values) if len(values) else None
+
+
+def median_or_none(values: np.ndarray) -> Optional[float]:
+    """`statistics.median` of a float array, None when empty."""
+    n = len(values)
+    if not n:
+        return None
+    ordered = np.sort(values)
+    if n % 2 == 1:
+        return float(ordered[n // 2])
+    return (float(ordered[n // 2 - 1]) + float(ordered[n // 2])) / 2
+
+
+class PeerStats:
+    """Mean and median of each metric's finite values within one peer universe."""
+
+    def __init__(self, columns: Mapping[str, np.ndarray], universe: np.ndarray, metrics: Sequence[str] = RATIO_METRICS):
+        self.mean: Dict[str, Optional[float]] = {}
+        self.median: Dict[str, Optional[float]] = {}
+        for metric in metrics:
+            values = columns[metric][universe]
+            values = values[np.isfinite(values)]
+            self.mean[metric] = mean_or_none(values)
+            self.median[metric] = median_or_none(values)
+
+
+def fundamental_rules_mask(columns: Mapping[str, np.ndarray], rules: Sequence[Any], stats: PeerStats) -> np.ndarray:
+    """All `rules` (objects with metric/operator) at once; a row needs a finite value for every rule."""
+    n = len(next(iter(columns.values()))) if columns else 0
+    mask = np.ones(n, dtype=bool)
+    for rule in rules or []:
+        values = columns[rule.metric]
+        mask &= np.isfinite(values)
+        with np.errstate(invalid="ignore"):
+            if rule.operator == "gt_zero":
+                mask &= values > 0
+            elif rule.operator in ("lt_mean", "lt_median"):
+                threshold = (stats.mean if rule.operator == "lt_mean" else stats.median).get(rule.metric)
+                if threshold is None:
+                    mask[:] = False
+                else:
+                    mask &= values < threshold
+    return mask
@@ -0,0 +1,122 @@
+"""
+Singleflight coalescing for identical in-flight computations.
+
+Concurrent callers with the same key share one execution: the first caller
+(leader) runs the function, the rest wait for its result (or exception).
+Keys are (function name, normalized args, dataset version), so a data refresh
+never hands out a result computed against the previous dataset. Nothing is
+retained after the call completes; pair with a cache for reuse over time.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from data_version import current_data_version
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, field: str) -> None:
+        counters = self._counters.setdefault(name, {"executions": 0, "coalesced": 0, "errors": 0})
+        counters[field] += 1
+
+    def do(self, name: str, key: Hashable, fn: Callable[[], Any]) -> Any:
+        full_key = (name, key)
+        with self._lock:
+            call = self._calls.get(full_key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[full_key] = call
+                self._count(name, "executions")
+            else:
+                call.waiters += 1
+                self._count(name, "coalesced")
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            with self._lock:
+                self._count(name, "errors")
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(full_key, None)
+            call.event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight: Dict[str, int] = {}
+            for (name, _key), call in self._calls.items():
+                in_flight[name] = in_flight.get(name, 0) + 1
+            return {
+                name: {**counters, "in_flight": in_flight.get(name, 0)}
+                for name, counters in sorted(self._counters.items())
+            }
+
+
+_GROUP = SingleFlight()
+
+
+def _default_key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Hashable:
+    key = (args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        return json.dumps([args, kwargs], sort_keys=True, default=str)
+
+
+def singleflight(name: Optional[str] = None, key: Optional[Callable[..., Hashable]] = None):
+    """
+    Decorator coalescing concurrent calls with equal (normalized args, data version).
+
+    `key(*args, **kwargs)` normalizes arguments (e.g. upper-cased symbols); by
+    default args/kwargs are used as-is.
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            normalized = key(*args, **kwargs) if key is not None else _default_key(args, kwargs)
+            return _GROUP.do(label, (normalized, current_data_version()), lambda: fn(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def coalesce(name: str, key: Hashable, fn: Callable[[], Any]) -> Any:
+    """Run `fn` once per concurrent (name, key, data version)."""
+    return _GROUP.do(name, (key, current_data_version()), fn)
+
+
+def get_singleflight_stats() -> Dict[str, Any]:
+    return _GROUP.stats()
@@ -0,0 +1,211 @@
+"""
+Enterprise value, EBIT and EBITDA straight from `stock_statement` item codes.
+
+One aggregated query per symbol set returns, per symbol, the latest value of
+each needed item in the snapshots below; the fallback chains are then resolved
+in Python. No formatted statements, no label matching.
+
+Snapshots:
+  balance sheet     latest annual report, like Ticker.annual_balance_sheet();
+                    a newer quarterly balance sheet is ignored so EV keeps
+                    its annual basis
+  income statement  TTM (quarterly rows with report_date = 'TTM'), else latest
+                    annual report
+
+Fallback chains (first item present wins; a tuple sums whichever of its items
+are present, and counts as missing only if none are):
+  debt    total_debt
+          -> current_debt_and_capital_lease_obligation + long_term_debt_and_capital_lease_obligation
+          -> current_debt + long_term_debt
+  cash    cash_and_cash_equivalents
+          -> cash_cash_equivalents_and_short_term_investments
+          -> cash_cash_equivalents_and_federal_funds_sold (banks)
+  ebit    operating_income -> ebit -> total_operating_income_as_reported
+  d&a     reconciled_depreciation -> depreciation_and_amortization
+          -> depreciation_amortization_depletion -> depreciation + amortization
+  ebitda  ebitda -> ebit (chain above) + d&a (chain above); None without d&a
+
+Debt and cash are taken from the same balance sheet snapshot; EBIT, D&A and
+EBITDA from the same income statement snapshot. Values are in the reporting
+currency, as stored.
+
+    EV = market cap + debt - cash      (market cap + debt if cash is missing,
+                                        None if debt is missing)
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from data_io import chunked, sql_quote_list
+
+
+Chain = Tuple[Union[str, Tuple[str, ...]], ...]
+
+DEBT_CHAIN: Chain = (
+    "total_debt",
+    ("current_debt_and_capital_lease_obligation", "long_term_debt_and_capital_lease_obligation"),
+    ("current_debt", "long_term_debt"),
+)
+CASH_CHAIN: Chain = (
+    "cash_and_cash_equivalents",
+    "cash_cash_equivalents_and_short_term_investments",
+    "cash_cash_equivalents_and_federal_funds_sold",
+)
+EBIT_CHAIN: Chain = (
+    "operating_income",
+    "ebit",
+    "total_operating_income_as_reported",
+)
+DA_CHAIN: Chain = (
+    "reconciled_depreciation",
+    "depreciation_and_amortization",
+    "depreciation_amortization_depletion",
+    ("depreciation", "amortization"),
+)
+EBITDA_CHAIN: Chain = ("ebitda",)
+
+BALANCE_ITEMS = (DEBT_CHAIN, CASH_CHAIN)
+INCOME_ITEMS = (EBIT_CHAIN, DA_CHAIN, EBITDA_CHAIN)
+
+_EMPTY_ROWS = pd.DataFrame(columns=["symbol", "finance_type", "snapshot", "report_date", "item_name", "item_value"])
+
+
+def _chain_items(chains: Iterable[Chain]) -> List[str]:
+    items: List[str] = []
+    for chain in chains:
+        for entry in chain:
+            for item in (entry if isinstance(entry, tuple) else (entry,)):
+                if item not in items:
+                    items.append(item)
+    return items
+
+
+def resolve_chain(values: Dict[str, float], chain: Chain) -> Optional[float]:
+    for entry in chain:
+        if isinstance(entry, tuple):
+            present = [values[item] for item in entry if item in values]
+            if present:
+                return float(sum(present))
+        elif entry in values:
+            return float(values[entry])
+    return None
+
+
+def ev_items_sql(statement_url: str, symbols: Sequence[str]) -> str:
+    """Latest value of every chain item per (symbol, snapshot) for `symbols`."""
+    balance_items = sql_quote_list(_chain_items(BALANCE_ITEMS))
+    income_items = sql_quote_list(_chain_items(INCOME_ITEMS))
+    return f"""
+    WITH base AS (
+      SELECT
+        symbol,
+        finance_type,
+        CASE WHEN report_date = 'TTM' THEN 'ttm' ELSE period_type END AS snapshot,
+        report_date,
+        item_name,
+        item_value
+      FROM '{statement_url}'
+      WHERE symbol IN ({sql_quote_list(symbols)})
+        AND item_value IS NOT NULL
+        AND (
+          (finance_type = 'balance_sheet' AND period_type = 'annual' AND report_date <> 'TTM'
+              AND item_name IN ({balance_items}))
+          OR (finance_type = 'income_statement' AND item_name IN ({income_items})
+              AND (report_date = 'TTM' OR period_type = 'annual'))
+        )
+    ),
+    ranked AS (
+      SELECT
+        *,
+        dense_rank() OVER (
+          PARTITION BY symbol, finance_type, snapshot
+          ORDER BY CASE WHEN report_date = 'TTM' THEN DATE '9999-12-31'
+                        ELSE CAST(report_date AS DATE) END DESC
+        ) AS rk
+      FROM base
+    )
+    SELECT symbol, finance_type, snapshot, report_date, item_name, item_value
+    FROM ranked
+    WHERE rk = 1
+    """
+
+
+def _resolve_symbol(rows: pd.DataFrame) -> Dict[str, Any]:
+    snapshots: Dict[Tuple[str, str], Tuple[str, Dict[str, float]]] = {}
+    for (finance_type, snapshot), group in rows.groupby(["finance_type", "snapshot"], sort=False):
+        values = dict(zip(group["item_name"], group["item_value"].astype(float)))
+        snapshots[(finance_type, snapshot)] = (str(group["report_date"].iloc[0]), values)
+
+    result: Dict[str, Any] = {
+        "total_debt": None,
+        "cash": None,
+        "balance_sheet_date": None,
+        "ebit": None,
+        "depreciation_amortization": None,
+        "ebitda": None,
+        "income_period": None,
+    }
+
+    found = snapshots.get(("balance_sheet", "annual"))
+    if found is not None:
+        report_date, values = found
+        debt = resolve_chain(values, DEBT_CHAIN)
+        if debt is not None:
+            result["total_debt"] = debt
+            result["cash"] = resolve_chain(values, CASH_CHAIN)
+            result["balance_sheet_date"] = report_date
+
+    for snapshot in ("ttm", "annual"):
+        found = snapshots.get(("income_statement", snapshot))
+        if found is None:
+            continue
+        report_date, values = found
+        ebit = resolve_chain(values, EBIT_CHAIN)
+        da = resolve_chain(values, DA_CHAIN)
+        ebitda = resolve_chain(values, EBITDA_CHAIN)
+        if ebitda is None and ebit is not None and da is not None:
+            ebitda = ebit + da
+        if ebit is None and ebitda is None:
+            continue
+        result.update(
+            ebit=ebit,
+            depreciation_amortization=da,
+            ebitda=ebitda,
+            income_period=report_date,
+        )
+        break
+
+    return result
+
+
+def fetch_ev_items(
+    query: Callable[[str], pd.DataFrame],
+    statement_url: str,
+    symbols: Sequence[str],
+    batch_size: int = 500,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Debt, cash, EBIT, D&A and EBITDA for many symbols, one query per `batch_size` symbols.
+
+    Every requested symbol gets an entry (all None when it has no matching items).
+    """
+    symbols = sorted({str(s).strip().upper() for s in symbols if str(s).strip()})
+    results: Dict[str, Dict[str, Any]] = {}
+    for batch in chunked(symbols, batch_size):
+        df = query(ev_items_sql(statement_url, batch))
+        grouped = dict(tuple(df.groupby("symbol", sort=False))) if df is not None and not df.empty else {}
+        for symbol in batch:
+            results[symbol] = _resolve_symbol(grouped.get(symbol, _EMPTY_ROWS))
+    return results
+
+
+def enterprise_value(market_cap: Optional[float], items: Dict[str, Any]) -> Optional[float]:
+    if market_cap is None:
+        return None
+    debt = items.get("total_debt")
+    if debt is None:
+        return None
+    cash = items.get("cash")
+    return market_cap + debt - (cash if cash is not None else 0.0)
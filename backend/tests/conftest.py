@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Backend modules are imported flat (`from screen_masks import ...`), as main.py does.
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
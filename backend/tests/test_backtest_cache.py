@@ -0,0 +1,53 @@
+import sqlite3
+import time
+
+from backtest_cache import BacktestCache
+
+
+def _put(cache, key, payload=None):
+    cache.put(key, "v1", "Tech", {"sector": "Tech"}, payload or {"key": key}, compute_ms=5)
+
+
+def _row(cache, key):
+    conn = sqlite3.connect(str(cache.path))
+    try:
+        return conn.execute(
+            "SELECT hits, last_hit_at FROM backtest_results WHERE cache_key = ?", (key,)
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def test_get_does_not_write_and_hits_are_flushed_later(tmp_path):
+    cache = BacktestCache(tmp_path / "bt.sqlite3")
+    _put(cache, "a")
+    assert cache.get("a") == {"key": "a"}
+    assert cache.get("a") == {"key": "a"}
+    assert cache.get("missing") is None
+    assert _row(cache, "a") == (0, None)
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    hits, last_hit_at = _row(cache, "a")
+    assert hits == 2 and last_hit_at is not None
+
+
+def test_put_prunes_old_entries(tmp_path):
+    cache = BacktestCache(tmp_path / "bt.sqlite3", max_age_days=1, max_entries=0)
+    _put(cache, "old")
+    with cache._connect() as conn:
+        conn.execute("UPDATE backtest_results SET created_at = ?", (time.time() - 2 * 86400,))
+    _put(cache, "new")
+    assert cache.get("old") is None
+    assert cache.get("new") == {"key": "new"}
+
+
+def test_put_keeps_most_recently_used_entries(tmp_path):
+    cache = BacktestCache(tmp_path / "bt.sqlite3", max_age_days=0, max_entries=2)
+    _put(cache, "a")
+    time.sleep(0.01)
+    _put(cache, "b")
+    time.sleep(0.01)
+    assert cache.get("a") is not None
+    _put(cache, "c")
+    assert {e["key"] for e in cache.entries()} == {"a", "c"}
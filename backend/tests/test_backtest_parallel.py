@@ -0,0 +1,161 @@
+"""
+Parallel period evaluation (BACKTEST_PARALLEL_PERIODS) must give the same response as the
+sequential path, down to the last bit.
+
+The sector's inputs (aligned fundamentals, price/shares panel, corporate actions, benchmark)
+are a seeded in-memory fixture, so only the period evaluation and its fan-out run for real.
+"""
+import json
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+import main
+import total_return
+from backtest_panel import BacktestPanel
+from etf_price_store import EtfPriceStore
+
+
+TODAY = date(2024, 6, 28)
+SYMBOLS = [f"S{i:02d}" for i in range(40)]
+
+
+def _fixture(periods, seed=11):
+    rng = np.random.default_rng(seed)
+    aligned, prices, shares = {}, {}, {}
+    for as_of, end_date, cutoff in periods:
+        by_symbol = {}
+        for sym in SYMBOLS:
+            if rng.random() < 0.1:
+                continue
+            income = {
+                "total_revenue": float(rng.uniform(-1e8, 5e9)),
+                "diluted_eps": float(rng.choice([rng.uniform(-2, 8), 0.0])),
+                "ebit": float(rng.uniform(-5e8, 1e9)),
+                "ebitda": float(rng.uniform(-2e8, 2e9)),
+                "net_income": float(rng.uniform(-5e8, 1e9)),
+            }
+            balance = {
+                "stockholders_equity": float(rng.uniform(-1e9, 8e9)),
+                "total_debt": float(rng.uniform(0, 3e9)),
+                "cash_and_cash_equivalents": float(rng.uniform(0, 2e9)),
+            }
+            if rng.random() < 0.15:
+                balance = {}
+            by_symbol[sym] = {"income_items": income, "balance_items": balance}
+        aligned[as_of] = by_symbol
+        for d in (as_of, end_date):
+            prices.setdefault(d, {})
+            for sym in SYMBOLS:
+                if rng.random() < 0.95:
+                    prices[d][sym] = {"close": float(rng.uniform(5, 400)), "price_date": d.isoformat()}
+        shares[cutoff] = {
+            sym: {"shares": float(rng.integers(10, 2000)) * 1e6, "shares_date": cutoff.isoformat()}
+            for sym in SYMBOLS
+            if rng.random() < 0.95
+        }
+
+    start, end = periods[0][0], periods[-1][1]
+    span = (end - start).days
+    splits = {
+        sym: [{"date": start + timedelta(days=int(rng.integers(1, span))), "factor": 2.0}]
+        for sym in SYMBOLS[::7]
+    }
+    dividends = {
+        sym: [
+            {"date": start + timedelta(days=int(d)), "amount": float(rng.uniform(0.1, 1.5))}
+            for d in rng.integers(1, span, 12)
+        ]
+        for sym in SYMBOLS[::2]
+    }
+    panel = BacktestPanel(prices, shares, lambda: (splits, dividends))
+
+    days = np.arange(np.datetime64(start - timedelta(days=10), "D"), np.datetime64(TODAY, "D")).astype(np.int64)
+    spy = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days))))
+    etf_store = EtfPriceStore(days, ["SPY"], spy.reshape(-1, 1))
+    return aligned, panel, etf_store
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def utcnow(cls):
+        return cls(TODAY.year, TODAY.month, TODAY.day)
+
+
+def patch_sector_inputs(monkeypatch, runs, lag_days=90):
+    """
+    Serve the seeded fixture in place of a sector's data for backtests run on TODAY with
+    each (years, holding_years) of `runs`, with main's clock frozen at TODAY. Returns the
+    union of their periods.
+    """
+    monkeypatch.setattr(main, "_min_annual_statement_date", lambda: None)
+    periods = sorted({p for years, hold in runs for p in main._backtest_periods(TODAY, years, hold, lag_days)})
+    aligned, panel, etf_store = _fixture(periods)
+    monkeypatch.setattr(main, "_backtest_sector_symbols", lambda sector: list(SYMBOLS))
+    monkeypatch.setattr(main, "_get_etf_price_store", lambda: etf_store)
+    monkeypatch.setattr(
+        main,
+        "_load_backtest_fundamentals",
+        lambda symbols, as_of_dates, lag_days: {d: aligned[d] for d in as_of_dates},
+    )
+    monkeypatch.setattr(main, "_load_backtest_prices", lambda symbols, periods, today: panel)
+    monkeypatch.setattr(total_return, "get_total_return_store", lambda: None)
+    monkeypatch.setattr(main, "datetime", FrozenDatetime)
+    return periods
+
+
+@pytest.fixture
+def sector_fixture(monkeypatch):
+    return patch_sector_inputs(monkeypatch, [(8, 1)])
+
+
+PAYLOADS = [
+    {"sector": "Tech", "years": 8, "top_n": 5},
+    {
+        "sector": "Tech",
+        "years": 8,
+        "top_n": 8,
+        "weights": {"pe": 2.0, "ev_sales": 0.5},
+        "rules": {
+            "pe_below_universe_mean": True,
+            "fundamental_rules": [
+                {"metric": "ps", "operator": "lt_median"},
+                {"metric": "ev_ebitda", "operator": "lt_mean"},
+            ],
+        },
+        "filters": {
+            "cap": "large",
+            "ruleLogic": "OR",
+            "customRules": [
+                {"metric": "peRatioTTM", "operator": "<", "value": 80},
+                {"metric": "notABacktestMetric", "operator": ">", "value": 1},
+            ],
+        },
+    },
+]
+
+
+def _run(monkeypatch, body, parallel):
+    monkeypatch.setenv("BACKTEST_PARALLEL_PERIODS", "1" if parallel else "0")
+    result = main._run_backtest_sector(main.BacktestSectorRequest(**body), today=TODAY)
+    result.pop("request_id")
+    result.pop("server_timing_ms")
+    for point in result["data"]:
+        point.pop("timing_ms", None)
+    return json.dumps(result, sort_keys=True)
+
+
+def _pool_completed():
+    return main.get_data_pool().stats()["endpoints"].get("backtest", {}).get("completed", 0)
+
+
+@pytest.mark.parametrize("body", PAYLOADS)
+def test_parallel_periods_match_sequential(monkeypatch, sector_fixture, body):
+    assert len(sector_fixture) > 1
+    sequential = _run(monkeypatch, body, parallel=False)
+    assert json.loads(sequential)["summary"]["points_with_returns"] > 0
+    before = _pool_completed()
+    for _ in range(3):
+        assert _run(monkeypatch, body, parallel=True) == sequential
+    assert _pool_completed() - before == 3 * len(sector_fixture)
@@ -0,0 +1,79 @@
+import json
+import os
+import random
+
+from backtest_rules import RULE_SORT_FIELDS, BacktestRulesIndex, get_backtest_rules_index
+
+
+def _rows(n=600, seed=3):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        row = {
+            "rule_id": f"{rng.choice('abc')}{rng.randint(0, 50)}",
+            "sector": rng.choice(["Tech", "Energy", "Utilities"]),
+            "cap": rng.choice(["all", "large", "mid", "small"]),
+            "holding_years": rng.choice([1, 2, 3, None]),
+        }
+        for field in RULE_SORT_FIELDS[4:]:
+            row[field] = None if rng.random() < 0.1 else round(rng.choice([rng.random(), 0.5, -0.2]), 2)
+        rows.append(row)
+    return rows
+
+
+def _reference(rows, sector, cap, holding_years, sort_by, descending, offset, limit):
+    """The endpoint's original filter / list.sort / slice, on a fresh copy."""
+    out = list(rows)
+    if sector:
+        out = [r for r in out if r.get("sector") == sector]
+    if cap:
+        out = [r for r in out if r.get("cap") == cap]
+    if holding_years:
+        out = [r for r in out if r.get("holding_years") == holding_years]
+
+    def key(r):
+        v = r.get(sort_by)
+        if v is None:
+            return float("-inf") if descending else float("inf")
+        return v
+
+    out.sort(key=key, reverse=descending)
+    return out[offset:offset + limit], len(out)
+
+
+def test_query_matches_original_sort_and_paging():
+    rows = _rows()
+    index = BacktestRulesIndex(rows)
+    for sort_by in RULE_SORT_FIELDS:
+        for descending in (False, True):
+            for sector, cap, holding_years in ((None, None, None), ("Tech", None, None), ("Tech", "large", 2), ("Nope", None, None)):
+                for offset, limit in ((0, 25), (25, 25), (590, 50), (0, 1000)):
+                    expected = _reference(rows, sector, cap, holding_years, sort_by, descending, offset, limit)
+                    assert index.query(sector, cap, holding_years, sort_by, descending, offset, limit) == expected
+
+
+def test_queries_do_not_reorder_rows():
+    rows = _rows(50)
+    index = BacktestRulesIndex(rows)
+    before = list(index.rows)
+    index.query(sort_by="test_win_rate", descending=False, limit=50)
+    index.query(sort_by="rule_id", descending=True, limit=50)
+    assert list(index.rows) == before
+
+
+def test_broken_file_keeps_previous_index(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(_rows(20)))
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    assert len(get_backtest_rules_index(path)) == 20
+
+    path.write_text("[{broken")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert len(get_backtest_rules_index(path)) == 20
+
+    path.write_text(json.dumps(_rows(5)))
+    os.utime(path, ns=(3_000_000_000, 3_000_000_000))
+    assert len(get_backtest_rules_index(path)) == 5
+
+    path.unlink()
+    assert len(get_backtest_rules_index(path)) == 0
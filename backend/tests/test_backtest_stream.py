@@ -0,0 +1,166 @@
+"""
+/api/backtest/sector/stream event sequences (NDJSON and SSE, computed and cached replays,
+errors, client disconnects) and cancellation of `_iter_backtest_sector`, on the seeded
+sector fixture of test_backtest_parallel.py.
+"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+from backtest_cache import BacktestCache
+from test_backtest_parallel import TODAY, patch_sector_inputs
+
+
+BODY = {"sector": "Tech", "years": 8, "top_n": 5}
+
+
+@pytest.fixture
+def periods(monkeypatch, tmp_path):
+    cache = BacktestCache(tmp_path / "bt.sqlite3")
+    monkeypatch.setattr(main, "get_backtest_cache", lambda: cache)
+    monkeypatch.setattr(main, "current_data_version", lambda: "test-version")
+    return patch_sector_inputs(monkeypatch, [(8, 1)])
+
+
+def _post(body=BODY, sse=False):
+    headers = {"Accept": "text/event-stream"} if sse else {}
+    response = TestClient(main.app).post("/api/backtest/sector/stream", json=body, headers=headers)
+    assert response.status_code == 200
+    if sse:
+        events = []
+        for block in response.text.split("\n\n"):
+            if block:
+                name, data = block.split("\n")
+                assert name.startswith("event: ") and data.startswith("data: ")
+                events.append({"event": name[len("event: "):], **json.loads(data[len("data: "):])})
+    else:
+        events = [json.loads(line) for line in response.text.splitlines()]
+    return response, events
+
+
+def _without(body, *keys):
+    return {k: v for k, v in body.items() if k not in keys}
+
+
+def _blocking():
+    body = json.loads(json.dumps(main._run_backtest_sector(main.BacktestSectorRequest(**BODY), today=TODAY), default=str))
+    for point in body["data"]:
+        point.pop("timing_ms", None)
+    return body
+
+
+def _check_sequence(events, periods):
+    assert [e["event"] for e in events] == ["start"] + ["period"] * len(periods) + ["summary"]
+    assert [p["index"] for p in events[0]["periods"]] == list(range(len(periods)))
+    assert sorted(e["index"] for e in events[1:-1]) == list(range(len(periods)))
+
+    expected = _blocking()
+    for e in events[1:-1]:
+        point = dict(e["point"])
+        point.pop("timing_ms", None)
+        assert point == expected["data"][e["index"]]
+    summary = _without(events[-1], "event", "request_id", "server_timing_ms")
+    assert summary == _without(expected, "data", "request_id", "server_timing_ms")
+    assert summary["summary"]["points_with_returns"] > 0
+
+
+@pytest.mark.parametrize("sse", [False, True])
+def test_stream_events_then_cached_replay(periods, sse):
+    response, events = _post(sse=sse)
+    assert response.headers["X-Backtest-Cache"] == "miss"
+    _check_sequence(events, periods)
+
+    response, replayed = _post(sse=sse)
+    assert response.headers["X-Backtest-Cache"] == "hit"
+    _check_sequence(replayed, periods)
+    assert [e.get("index") for e in replayed[1:-1]] == list(range(len(periods)))
+
+
+@pytest.mark.parametrize(
+    "exc,status,detail",
+    [
+        (HTTPException(status_code=503, detail="prices unavailable"), 503, "prices unavailable"),
+        (RuntimeError("panel is corrupt"), 500, "panel is corrupt"),
+    ],
+)
+def test_failure_after_start_is_an_error_event(periods, monkeypatch, exc, status, detail):
+    def fail(symbols, periods, today):
+        raise exc
+
+    monkeypatch.setattr(main, "_load_backtest_prices", fail)
+    response, events = _post()
+    assert response.headers["X-Backtest-Cache"] == "miss"
+    assert [e["event"] for e in events] == ["start", "error"]
+    assert _without(events[1], "event") == {"status": status, "detail": detail}
+
+
+def _count_evaluations(monkeypatch, on_call=None):
+    calls = []
+    evaluate = main._evaluate_backtest_period
+
+    def counted(*args, **kwargs):
+        calls.append(args[7])  # as_of
+        if on_call is not None:
+            on_call()
+        return evaluate(*args, **kwargs)
+
+    monkeypatch.setattr(main, "_evaluate_backtest_period", counted)
+    return calls
+
+
+def test_cancel_stops_scheduling_periods(periods, monkeypatch):
+    monkeypatch.setenv("BACKTEST_PARALLEL_PERIODS", "0")
+    cancel = threading.Event()
+    calls = _count_evaluations(monkeypatch, on_call=cancel.set)
+
+    events = list(main._iter_backtest_sector(main.BacktestSectorRequest(**BODY), today=TODAY, cancel=cancel))
+    assert len(periods) > 1
+    assert [event for event, _data in events] == ["start", "period"]
+    assert len(calls) == 1
+
+
+def test_cancel_before_evaluation_skips_every_period(periods, monkeypatch):
+    cancel = threading.Event()
+    calls = _count_evaluations(monkeypatch)
+    load = main._load_backtest_fundamentals
+
+    def load_then_cancel(symbols, as_of_dates, lag_days):
+        cancel.set()
+        return load(symbols, as_of_dates, lag_days)
+
+    monkeypatch.setattr(main, "_load_backtest_fundamentals", load_then_cancel)
+    events = list(main._iter_backtest_sector(main.BacktestSectorRequest(**BODY), today=TODAY, cancel=cancel))
+    assert [event for event, _data in events] == ["start"]
+    assert calls == []
+
+
+class _DisconnectedRequest:
+    async def is_disconnected(self):
+        return True
+
+
+def test_client_disconnect_cancels_the_run(periods, monkeypatch):
+    calls = _count_evaluations(monkeypatch)
+    load = main._load_backtest_fundamentals
+
+    def slow_load(symbols, as_of_dates, lag_days):
+        # Longer than the stream's disconnect poll, so the disconnect is seen mid-load.
+        time.sleep(1.0)
+        return load(symbols, as_of_dates, lag_days)
+
+    monkeypatch.setattr(main, "_load_backtest_fundamentals", slow_load)
+
+    async def run():
+        payload = main.BacktestSectorRequest(**BODY)
+        response = await main.backtest_sector_stream(payload, _DisconnectedRequest(), accept=None)
+        return [json.loads(chunk) async for chunk in response.body_iterator]
+
+    events = asyncio.run(run())
+    assert [e["event"] for e in events] == ["start"]
+    assert calls == []
@@ -0,0 +1,190 @@
+"""Parity of the set-based /metrics engine (bulk_metrics.py) with _compute_symbol_metrics."""
+import json
+import math
+import random
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from defeatbeta_api.client.duckdb_conf import Configuration
+
+
+TEMPLATES = {
+    "income_statement": "income_statement_default.json",
+    "balance_sheet": "balance_sheet_default.json",
+    "cash_flow": "cash_flow_default.json",
+}
+# BBB reports in EUR, DDD has no currency, CCC skips a quarter, EEE has a zero
+# revenue quarter and no shares, FFF has prices only, ZZZ is unknown.
+SYMBOLS = ["AAA", "BBB", "CCC", "DDD", "EEE", "FFF", "ZZZ"]
+CURRENCY = {"AAA": "USD", "BBB": "EUR", "CCC": "USD", "DDD": None, "EEE": "USD", "FFF": "USD"}
+
+
+def _template_items():
+    from importlib.resources import files
+
+    def titles(node, out):
+        if isinstance(node, dict):
+            if "title" in node:
+                out.add(node["title"].lower())
+            for value in node.values():
+                titles(value, out)
+        elif isinstance(node, list):
+            for value in node:
+                titles(value, out)
+
+    items = {}
+    for finance_type, name in TEMPLATES.items():
+        found = set()
+        titles(json.loads(files("defeatbeta_api.data.template").joinpath(name).read_text()), found)
+        items[finance_type] = sorted(found)
+    return items
+
+
+def _write_dataset(root):
+    rng = random.Random(7)
+    np_rng = np.random.default_rng(7)
+    items = _template_items()
+    days = pd.bdate_range("2022-07-01", "2024-06-28")
+    quarters = pd.date_range("2021-03-31", "2024-03-31", freq="QE")
+    prices, eps, shares, statements, dividends = [], [], [], [], []
+
+    for i, symbol in enumerate(SYMBOLS):
+        if symbol == "ZZZ":
+            continue
+        closes = 50 * np.exp(np.cumsum(np_rng.normal(0, 0.02, len(days))))
+        prices += [(symbol, d.date(), c * 0.99, c, c * 1.01, c * 0.98, 1_000_000) for d, c in zip(days, closes)]
+        if symbol == "FFF":
+            continue
+        for q in quarters:
+            eps.append((symbol, q.date(), round(rng.uniform(-1, 3), 2), round(rng.uniform(-2, 10), 2)))
+            if symbol != "EEE":
+                shares.append((symbol, q.date(), float(rng.randint(10, 1000)) * 1e6))
+        reported = [q for q in quarters if not (symbol == "CCC" and q == quarters[5])]
+        for finance_type, names in items.items():
+            for q in reported:
+                for name in names:
+                    if rng.random() < 0.1 and name not in ("total_revenue", "stockholders_equity"):
+                        continue
+                    value = float(round(rng.uniform(-5e8, 5e9)))
+                    if symbol == "EEE" and name == "total_revenue" and q == quarters[-1]:
+                        value = 0.0
+                    statements.append((symbol, str(q.date()), name, value, finance_type, "quarterly"))
+            for year in range(2021, 2024):
+                for name in names:
+                    statements.append((symbol, f"{year}-12-31", name, float(round(rng.uniform(-2e9, 2e10))), finance_type, "annual"))
+            for name in names:
+                statements.append((symbol, "TTM", name, float(round(rng.uniform(-2e9, 2e10))), finance_type, "quarterly"))
+        if i % 2 == 0:
+            dividends += [(symbol, q.date(), round(rng.uniform(0.1, 1), 2)) for q in quarters[-6:]]
+
+    # Source files are not clustered by symbol.
+    rng.shuffle(statements)
+    rng.shuffle(shares)
+    fx = [("EUR=X", d.date(), 0.9, 0.9 + 0.01 * math.sin(k / 10), 0.91, 0.89) for k, d in enumerate(pd.bdate_range("2021-01-01", "2024-06-28"))]
+
+    tables = {
+        "stock_prices": (prices, ["symbol", "report_date", "open", "close", "high", "low", "volume"]),
+        "stock_tailing_eps": (eps, ["symbol", "report_date", "eps", "tailing_eps"]),
+        "stock_shares_outstanding": (shares, ["symbol", "report_date", "shares_outstanding"]),
+        "stock_statement": (statements, ["symbol", "report_date", "item_name", "item_value", "finance_type", "period_type"]),
+        "stock_dividend_events": (dividends, ["symbol", "report_date", "amount"]),
+        "exchange_rate": (fx, ["symbol", "report_date", "open", "close", "high", "low"]),
+    }
+    con = duckdb.connect(":memory:")
+    try:
+        for name, (rows, columns) in tables.items():
+            con.register("t", pd.DataFrame(rows, columns=columns))
+            con.execute(f"COPY t TO '{root / (name + '.parquet')}' (FORMAT PARQUET)")
+            con.unregister("t")
+    finally:
+        con.close()
+
+    companies = {
+        str(k): {"cik_str": k, "ticker": symbol, "title": f"{symbol} Inc", "financial_currency": currency}
+        for k, (symbol, currency) in enumerate(CURRENCY.items())
+    }
+    (root / "company_tickers.json").write_text(json.dumps({"data": companies}))
+
+
+@pytest.fixture(scope="module")
+def backend(tmp_path_factory):
+    root = tmp_path_factory.mktemp("defeatbeta")
+    _write_dataset(root)
+    patch = pytest.MonkeyPatch()
+    patch.setenv("DEFEATBETA_LOCAL_DATA", str(root))
+    patch.setenv("DATA_VERSION", "test")
+    patch.setattr(Configuration, "get_duckdb_settings", lambda self: [])
+
+    import main
+
+    def clear():
+        for fn in (main._get_ev_items, main._get_market_cap, main._calculate_symbol_metrics):
+            fn.cache_clear()
+        main._get_shared_ticker.cache_clear()
+        main._get_defeatbeta_clients.cache_clear()
+
+    clear()
+    yield main
+    clear()
+    patch.undo()
+
+
+def _batch(main, symbols):
+    from bulk_metrics import MetricsBatch
+    from defeatbeta_api.data.company_meta import CompanyMeta
+
+    queries = []
+
+    def query(sql):
+        queries.append(sql)
+        return main._duckdb_query_with_retry(sql)
+
+    batch = MetricsBatch.load(query, main._get_defeatbeta_clients()[1], CompanyMeta(), symbols)
+    return batch, queries
+
+
+def _same(a, b):
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def test_bulk_metrics_match_per_symbol_path(backend):
+    main = backend
+    batch, queries = _batch(main, SYMBOLS)
+    # prices+EPS, shares, EPS, statements, dividends, exchange rates, EV items
+    assert len(queries) == 7
+    for symbol, items in batch.ev_items.items():
+        main._get_ev_items.cache.prime(main._symbol_key(symbol), items)
+    bulk = batch.metrics(main._compute_financial_health, main._compute_cash_flow_health)
+
+    assert list(bulk) == sorted(SYMBOLS)
+    for symbol in SYMBOLS:
+        expected = main._compute_symbol_metrics(symbol)
+        assert list(bulk[symbol]) == list(expected)
+        assert _same(bulk[symbol], expected), symbol
+    assert bulk["AAA"]["marketCap"] is not None
+    assert bulk["BBB"]["priceToSalesRatioTTM"] is not None
+    assert bulk["EEE"]["profitability"]["grossMargin"] is None
+    assert bulk["ZZZ"]["marketCap"] is None
+
+
+def test_metrics_endpoint_primes_cache_and_store(backend, tmp_path, monkeypatch):
+    from metrics_store import MetricsStore
+
+    main = backend
+    store = MetricsStore(tmp_path / "metrics.sqlite3")
+    monkeypatch.setattr(main, "get_metrics_store", lambda: store)
+    main._calculate_symbol_metrics.cache_clear()
+    computed = []
+    monkeypatch.setattr(main, "_compute_symbol_metrics", lambda symbol: computed.append(symbol) or {"symbol": symbol})
+
+    body = main.metrics(main.SymbolsPayload(symbols=SYMBOLS))
+    assert computed == []
+    assert [m["symbol"] for m in body["metrics"]] == SYMBOLS
+    assert store.get("AAA", "test") == body["metrics"][0]
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from data_io import VersionedLoader, chunked, file_version, sql_quote_list
+
+
+def _write(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_file_version_tracks_mtime_and_size(tmp_path):
+    path = tmp_path / "a.json"
+    assert file_version(path) is None
+    _write(path, "[1]", 1_000_000_000)
+    first = file_version(path)
+    _write(path, "[12]", 1_000_000_000)
+    assert file_version(path) != first
+
+
+def test_versioned_loader_reloads_and_keeps_previous_on_error(tmp_path):
+    path = tmp_path / "a.json"
+    loads = []
+
+    def load():
+        loads.append(1)
+        return int(path.read_text())
+
+    loader = VersionedLoader("test")
+    _write(path, "1", 1_000_000_000)
+    assert loader.get("a", [path], load) == 1
+    assert loader.get("a", [path], load) == 1
+    assert len(loads) == 1
+
+    _write(path, "2", 2_000_000_000)
+    assert loader.get("a", [path], load) == 2
+
+    # A broken file keeps the previous value and is not re-parsed until it changes again.
+    _write(path, "oops", 3_000_000_000)
+    assert loader.get("a", [path], load) == 2
+    assert loader.get("a", [path], load) == 2
+    assert len(loads) == 3
+
+    _write(path, "3", 4_000_000_000)
+    assert loader.get("a", [path], load) == 3
+
+
+def test_versioned_loader_raises_without_previous_value(tmp_path):
+    path = tmp_path / "a.json"
+    _write(path, "oops", 1_000_000_000)
+    with pytest.raises(ValueError):
+        VersionedLoader("test").get("a", [path], lambda: int(path.read_text()))
+
+
+def test_sql_helpers():
+    assert sql_quote_list(["A", "O'B"]) == "'A','O''B'"
+    assert sql_quote_list([]) == "''"
+    assert chunked(["a", "b", "c"], 2) == [["a", "b"], ["c"]]
+    assert chunked(["a"], 0) == [["a"]]
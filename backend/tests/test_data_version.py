@@ -0,0 +1,64 @@
+"""current_data_version serves the last known version while a refresh runs."""
+import threading
+import time
+
+import pytest
+
+import data_version
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    state = {"version": "v1", "calls": 0, "gate": threading.Event()}
+    state["gate"].set()
+
+    def fake_fetch():
+        state["calls"] += 1
+        assert state["gate"].wait(5)
+        return state["version"]
+
+    monkeypatch.delenv("DATA_VERSION", raising=False)
+    monkeypatch.setenv("DATA_VERSION_TTL_SECONDS", "60")
+    monkeypatch.setattr(data_version, "_fetch_version", fake_fetch)
+    monkeypatch.setattr(data_version, "_VERSION", None)
+    monkeypatch.setattr(data_version, "_CHECKED_AT", 0.0)
+    monkeypatch.setattr(data_version, "_REFRESHING", False)
+    return state
+
+
+def _wait_for(predicate):
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_expired_version_is_refreshed_in_the_background(fetches, monkeypatch):
+    assert data_version.current_data_version() == "v1"
+    assert data_version.current_data_version() == "v1"
+    assert fetches["calls"] == 1
+
+    # Expire the entry and hold the fetch open: callers keep getting v1 without waiting.
+    fetches["version"] = "v2"
+    fetches["gate"].clear()
+    monkeypatch.setattr(data_version, "_CHECKED_AT", time.monotonic() - 120)
+    started = time.monotonic()
+    for _ in range(5):
+        assert data_version.current_data_version() == "v1"
+    assert time.monotonic() - started < 1
+    _wait_for(lambda: fetches["calls"] == 2)
+
+    fetches["gate"].set()
+    _wait_for(lambda: not data_version._REFRESHING)
+    assert fetches["calls"] == 2
+    assert data_version.current_data_version() == "v2"
+
+
+def test_failed_refresh_keeps_the_last_version(fetches, monkeypatch):
+    assert data_version.current_data_version() == "v1"
+
+    def broken():
+        raise RuntimeError("HF down")
+
+    monkeypatch.setattr(data_version, "_fetch_version", broken)
+    assert data_version.current_data_version(force_refresh=True) == "v1"
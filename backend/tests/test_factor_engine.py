@@ -0,0 +1,150 @@
+"""Parity of the vectorized factor engine with the scalar calculate_*_factor functions."""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import factor_scoring as fs
+from factor_engine import (
+    GROWTH_METRICS,
+    MOMENTUM_METRICS,
+    QUALITY_METRICS,
+    RISK_COUNT_COLUMNS,
+    RISK_METRICS,
+    VALUATION_METRICS,
+    VALUATION_COMPONENTS,
+    compute_factor_scores,
+    group_percentile_ranks,
+    score_valuation,
+)
+
+
+METRIC_COLUMNS = [name for spec in (VALUATION_METRICS, QUALITY_METRICS, GROWTH_METRICS, MOMENTUM_METRICS, RISK_METRICS) for name, _, _ in spec]
+
+
+def _metrics_frame(seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for day in pd.date_range("2024-01-01", periods=3, freq="D"):
+        for sector in ("Tech", "Energy", ""):
+            for i in range(int(rng.integers(1, 25))):
+                row = {"date": day, "symbol": f"{sector[:1] or 'X'}{i}", "sector": sector}
+                for name in METRIC_COLUMNS:
+                    r = rng.random()
+                    if r < 0.15:
+                        row[name] = np.nan
+                    elif r < 0.25:
+                        row[name] = 0.0
+                    elif r < 0.4:
+                        # Few distinct values so ties are common.
+                        row[name] = float(rng.integers(-2, 4))
+                    else:
+                        row[name] = float(rng.normal(5, 10))
+                row["beta"] = np.nan if rng.random() < 0.2 else float(rng.uniform(-0.5, 3))
+                for col in RISK_COUNT_COLUMNS:
+                    row[col] = np.nan if rng.random() < 0.2 else float(rng.integers(0, 6))
+                row["sentiment"] = np.nan if rng.random() < 0.3 else float(rng.uniform(0, 100))
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _opt(value):
+    return None if value is None or (isinstance(value, float) and math.isnan(value)) else float(value)
+
+
+def _nan_to_none(value):
+    return None if math.isnan(value) else float(value)
+
+
+def _scalar_scores(frame: pd.DataFrame, valuation_weights, composite_weights):
+    """Expected (score, count) per factor for every row, via the scalar functions."""
+    peers = {}
+    for key, group in frame.groupby(["date", "sector"]):
+        peers[key] = {name: [float(v) for v in group[name] if not math.isnan(v)] for name in METRIC_COLUMNS}
+
+    expected = []
+    for row in frame.itertuples(index=False):
+        rec = row._asdict()
+        p = peers[(rec["date"], rec["sector"])]
+
+        def args(spec):
+            return [_opt(rec[name]) for name, _, _ in spec] + [p[name] for name, _, _ in spec]
+
+        valuation = fs.calculate_valuation_factor(*args(VALUATION_METRICS), weights=valuation_weights)
+        quality = fs.calculate_quality_factor(*args(QUALITY_METRICS))
+        growth = fs.calculate_growth_factor(*args(GROWTH_METRICS))
+        momentum = fs.calculate_momentum_factor(*args(MOMENTUM_METRICS))
+        counts = [0 if math.isnan(rec[c]) else int(rec[c]) for c in RISK_COUNT_COLUMNS]
+        risk = fs.calculate_risk_factor(
+            *[_opt(rec[name]) for name, _, _ in RISK_METRICS],
+            _opt(rec["beta"]),
+            *counts,
+            *[p[name] for name, _, _ in RISK_METRICS],
+        )
+        sentiment = _opt(rec["sentiment"])
+        composite = fs.calculate_composite_score(
+            valuation["score"], quality["score"], growth["score"], momentum["score"], sentiment, risk["score"],
+            weights=composite_weights,
+        )
+        expected.append(
+            {
+                "valuation": (valuation["score"], valuation["component_count"]),
+                "quality": (quality["score"], quality["component_count"]),
+                "growth": (growth["score"], growth["component_count"]),
+                "momentum": (momentum["score"], momentum["component_count"]),
+                "risk": (risk["score"], risk["component_count"]),
+                "composite": composite["composite_score"],
+            }
+        )
+    return expected
+
+
+def test_group_percentile_ranks_match_percentile_rank():
+    rng = np.random.default_rng(0)
+    values = rng.integers(-3, 4, 300).astype(float)
+    values[rng.random(300) < 0.2] = np.nan
+    groups = rng.integers(0, 7, 300)
+    for higher_is_better in (True, False):
+        ranks = group_percentile_ranks(values, groups, higher_is_better)
+        for i, (v, g) in enumerate(zip(values, groups)):
+            if math.isnan(v):
+                assert math.isnan(ranks[i])
+                continue
+            peers = [float(x) for x, gg in zip(values, groups) if gg == g and not math.isnan(x)]
+            assert ranks[i] == fs.percentile_rank(float(v), peers, higher_is_better=higher_is_better)
+
+
+@pytest.mark.parametrize(
+    "seed,valuation_weights,composite_weights",
+    [
+        (1, None, None),
+        (2, {"pe": 2.0, "ps": 0.0, "ev_sales": 3.5}, None),
+        (3, {name: 0.0 for name, _, _ in VALUATION_METRICS}, {"valuation": 0.5, "quality": 0.1, "growth": 0.1, "momentum": 0.1, "sentiment": 0.1, "risk": 0.1}),
+    ],
+)
+def test_compute_factor_scores_matches_scalar_functions(seed, valuation_weights, composite_weights):
+    frame = _metrics_frame(seed)
+    scores = compute_factor_scores(frame, valuation_weights, composite_weights)
+    expected = _scalar_scores(frame, valuation_weights, composite_weights)
+
+    assert len(scores) == len(expected)
+    for i, exp in enumerate(expected):
+        row = scores.iloc[i]
+        for factor in ("valuation", "quality", "growth", "momentum", "risk"):
+            assert (_nan_to_none(row[factor]), int(row[f"{factor}_count"])) == exp[factor], (i, factor)
+        assert _nan_to_none(row["composite"]) == exp["composite"], i
+
+
+@pytest.mark.parametrize("weights", [None, {"pe": 2.0, "ps": 0.0}])
+def test_score_valuation_group_and_external_peers_agree(weights):
+    # One group ranked in place scores the same as the group's values passed as external peers.
+    frame = _metrics_frame(4)
+    frame = frame[frame["date"] == frame["date"].min()]
+    ratios = {name: frame[name].to_numpy(dtype="float64") for name in VALUATION_COMPONENTS}
+    peers = {name: values[~np.isnan(values)] for name, values in ratios.items()}
+
+    grouped, grouped_components = score_valuation(ratios, weights, groups=np.zeros(len(frame), dtype=np.int64))
+    external, external_components = score_valuation(ratios, weights, peers=peers)
+    np.testing.assert_array_equal(grouped, external)
+    np.testing.assert_array_equal(grouped_components, external_components)
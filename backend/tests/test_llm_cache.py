@@ -0,0 +1,155 @@
+"""The shared LLM response cache, as used by transcript analysis and insight jobs."""
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from defeatbeta_api.client import llm_cache
+from defeatbeta_api.client.llm_cache import LLMCache
+from defeatbeta_api.data import transcripts as transcripts_module
+from defeatbeta_api.data.transcripts import Transcripts
+
+
+class FakeLLM:
+    """OpenAI-style client whose streamed tool call echoes one key sentence per paragraph."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        prompt = kwargs["messages"][-1]["content"]
+        numbers = [int(n) for n in re.findall(r'"paragraph_number": (\d+)', prompt)]
+        args = json.dumps({
+            "key_sentences": [
+                {
+                    "speaker": "CEO",
+                    "paragraph_number": n,
+                    "short_summary": f"p{n}",
+                    "sentence": f"sentence {n}",
+                    "attitude": "positive",
+                    "direction": "up",
+                    "is_factual": "Y",
+                    "reason": "fake",
+                }
+                for n in numbers
+            ]
+        })
+        delta = SimpleNamespace(
+            reasoning_content=None,
+            tool_calls=[SimpleNamespace(function=SimpleNamespace(arguments=args))],
+        )
+        return iter([SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason="stop")], usage=None)])
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    shared = LLMCache(str(tmp_path / "llm"), concurrency=3)
+    monkeypatch.setattr(llm_cache, "_LLM_CACHE", shared)
+    monkeypatch.setattr(transcripts_module, "nltk_sentences", lambda text: text.split(". "))
+    return shared
+
+
+def _transcripts(paragraphs=30):
+    body = [
+        {"paragraph_number": n, "speaker": "CEO", "content": f"Revenue grew {n}%. Margins held at {n} points."}
+        for n in range(1, paragraphs + 1)
+    ]
+    frame = pd.DataFrame([{
+        "symbol": "ACME",
+        "fiscal_year": 2024,
+        "fiscal_quarter": 2,
+        "report_date": "2024-07-30",
+        "transcripts": body,
+    }])
+    return Transcripts("ACME", frame, "WARNING")
+
+
+def test_transcript_analysis_is_chunked_concurrent_and_cached(cache):
+    llm = FakeLLM()
+    transcripts = _transcripts()
+
+    first = transcripts.analyze_financial_metrics_forecast_for_future_with_ai(2024, 2, llm, chunk_chars=600)
+    assert first["paragraph_number"].tolist() == list(range(1, 31))
+    chunks = llm.calls
+    assert chunks > 1
+    assert 1 < llm.max_in_flight <= cache.concurrency
+
+    second = transcripts.analyze_financial_metrics_forecast_for_future_with_ai(2024, 2, llm, chunk_chars=600)
+    pd.testing.assert_frame_equal(first, second)
+    assert llm.calls == chunks
+    assert cache.stats() == {"cache_hits": chunks, "cache_misses": chunks, "model_calls": chunks}
+
+    # A different prompt template is a different cache entry.
+    transcripts.analyze_financial_metrics_change_for_this_quarter_with_ai(2024, 2, llm, chunk_chars=600)
+    assert llm.calls == 2 * chunks
+
+
+def test_failed_calls_are_not_cached(cache):
+    def broken():
+        raise RuntimeError("upstream down")
+
+    key = LLMCache.key("template", "model", "prompt")
+    with pytest.raises(RuntimeError):
+        cache.complete(key, "model", broken)
+    assert cache.get(key) is None
+    assert cache.complete(key, "model", lambda: "ok") == "ok"
+    assert cache.complete(key, "model", broken) == "ok"
+
+
+def test_insight_jobs_share_the_cache(cache, monkeypatch):
+    import insight_jobs
+
+    posted = []
+    monkeypatch.setattr(insight_jobs, "_LLM_CACHE", cache)
+    monkeypatch.setattr(insight_jobs, "_post_chat_completion", lambda prompt, max_tokens: posted.append(prompt) or "{}")
+    for _ in range(3):
+        assert insight_jobs._call_llm("summarize this", max_tokens=50, template="T") == "{}"
+    assert posted == ["summarize this"]
+    assert insight_jobs.get_llm_stats()["cache_hits"] == 2
+
+
+def test_insight_json_is_parsed_before_it_is_cached(cache, monkeypatch):
+    import insight_jobs
+
+    replies = ['{"summary": "cut off', '{"summary": "ok"}']
+    posted = []
+    monkeypatch.setattr(insight_jobs, "_LLM_CACHE", cache)
+    monkeypatch.setattr(insight_jobs, "_post_chat_completion", lambda prompt, max_tokens: posted.append(prompt) or replies[len(posted) - 1])
+
+    with pytest.raises(ValueError):
+        insight_jobs._call_llm_json("filing", max_tokens=50, template="T")
+    assert insight_jobs._call_llm_json("filing", max_tokens=50, template="T") == {"summary": "ok"}
+    assert insight_jobs._call_llm_json("filing", max_tokens=50, template="T") == {"summary": "ok"}
+    assert len(posted) == 2
+
+    # An entry cached before the check that no longer parses is dropped, not replayed.
+    key = insight_jobs._llm_cache_key("T", insight_jobs.OPENAI_MODEL, "old", 50)
+    cache.put(key, insight_jobs.OPENAI_MODEL, '{"summary": "cut off')
+    with pytest.raises(ValueError):
+        insight_jobs._call_llm_json("old", max_tokens=50, template="T")
+    assert cache.get(key) is None
+
+
+def test_importing_insight_jobs_keeps_the_process_cache(cache):
+    import importlib
+
+    import insight_jobs
+
+    importlib.reload(insight_jobs)
+    assert llm_cache.get_llm_cache() is cache
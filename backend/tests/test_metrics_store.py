@@ -0,0 +1,85 @@
+"""Stored metrics read back with the same JSON-native types as a fresh result."""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics_store import MetricsStore, to_native
+
+
+def test_numpy_and_date_values_round_trip_as_native_types(tmp_path):
+    store = MetricsStore(tmp_path / "metrics.sqlite3")
+    payload = {
+        "pe": np.float64(12.5),
+        "shares": np.int64(1_000),
+        "profitable": np.bool_(True),
+        "missing": None,
+        "ratios": np.array([1.0, 2.5]),
+        "peers": ("AAA", "BBB"),
+        "as_of": date(2024, 6, 30),
+        "updated": pd.Timestamp("2024-07-01 09:30"),
+        "no_date": pd.NaT,
+        "nested": {"ev": np.float32(3.5), 7: np.int32(2)},
+    }
+    fresh = to_native(payload)
+    assert fresh == {
+        "pe": 12.5,
+        "shares": 1000,
+        "profitable": True,
+        "missing": None,
+        "ratios": [1.0, 2.5],
+        "peers": ["AAA", "BBB"],
+        "as_of": "2024-06-30",
+        "updated": "2024-07-01T09:30:00",
+        "no_date": None,
+        "nested": {"ev": 3.5, "7": 2},
+    }
+    assert type(fresh["shares"]) is int and type(fresh["pe"]) is float and type(fresh["profitable"]) is bool
+
+    store.put("aaa", "v1", payload)
+    stored = store.get("AAA", "v1")
+    assert stored == fresh
+    assert {k: type(v) for k, v in stored.items()} == {k: type(v) for k, v in fresh.items()}
+
+
+def test_unknown_types_are_rejected_instead_of_stringified(tmp_path):
+    store = MetricsStore(tmp_path / "metrics.sqlite3")
+    with pytest.raises(TypeError):
+        store.put("AAA", "v1", {"bad": object()})
+    assert store.get("AAA", "v1") is None
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    import main
+
+    store = MetricsStore(tmp_path / "metrics.sqlite3")
+    monkeypatch.setattr(main, "get_metrics_store", lambda: store)
+    main._calculate_symbol_metrics.cache_clear()
+    yield main, store
+    main._calculate_symbol_metrics.cache_clear()
+
+
+def test_store_is_bypassed_while_the_data_version_is_unknown(backend, monkeypatch):
+    main, store = backend
+    store.put("AAA", "unknown", {"symbol": "AAA", "pe": 1.0})
+    monkeypatch.setattr(main, "current_data_version", lambda: "unknown")
+    monkeypatch.setattr(main, "_compute_symbol_metrics", lambda symbol: {"symbol": symbol, "pe": np.float64(2.0)})
+
+    assert main._calculate_symbol_metrics("BBB") == {"symbol": "BBB", "pe": 2.0}
+    assert main._calculate_symbol_metrics("AAA") == {"symbol": "AAA", "pe": 2.0}
+    assert store.load_version("unknown") == {"AAA": {"symbol": "AAA", "pe": 1.0}}
+    main._calculate_symbol_metrics.cache_clear()
+    main._preload_metrics_store()
+    assert not main._calculate_symbol_metrics.cache.contains(main._symbol_key("AAA"))
+
+
+def test_unstorable_metrics_are_returned_without_storing(backend, monkeypatch):
+    main, store = backend
+    monkeypatch.setattr(main, "current_data_version", lambda: "v1")
+    odd = object()
+    monkeypatch.setattr(main, "_compute_symbol_metrics", lambda symbol: {"symbol": symbol, "odd": odd})
+
+    assert main._calculate_symbol_metrics("AAA") == {"symbol": "AAA", "odd": odd}
+    assert store.get("AAA", "v1") is None
@@ -0,0 +1,32 @@
+"""_get_pit_fundamentals is cached per dataset version."""
+import pandas as pd
+
+import main
+from pit_fundamentals import PitFundamentals
+from ttl_cache import estimate_size
+
+
+def test_pit_fundamentals_rebuild_after_a_data_version_change(monkeypatch):
+    builds = []
+
+    def fake_build(query, url, symbols, items, lag_days, period_type, align):
+        builds.append(tuple(symbols))
+        return PitFundamentals(pd.DataFrame({"symbol": symbols}), lag_days=lag_days)
+
+    version = {"value": "v1"}
+    monkeypatch.setattr(PitFundamentals, "build", fake_build)
+    monkeypatch.setattr(main, "_get_defeatbeta_clients", lambda: (None, type("HF", (), {"get_url_path": staticmethod(str)})))
+    monkeypatch.setattr("ttl_cache.current_data_version", lambda: version["value"])
+    main._get_pit_fundamentals.cache_clear()
+
+    args = (("AAA", "BBB"), ("total_revenue",), ("total_debt",), 90)
+    first = main._get_pit_fundamentals(*args)
+    assert main._get_pit_fundamentals(*args) is first
+    assert len(builds) == 1
+
+    version["value"] = "v2"
+    assert main._get_pit_fundamentals(*args) is not first
+    assert len(builds) == 2
+    main._get_pit_fundamentals.cache_clear()
+
+    assert estimate_size(first) > first.frame.memory_usage(deep=True).sum()
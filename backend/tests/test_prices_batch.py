@@ -0,0 +1,52 @@
+"""/prices/batch: per-chunk queries, one retry, and 502 instead of empty series."""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+import main
+import price_batch
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    calls = []
+    failing = set()
+
+    def fake_query(query, url, batch, days, start, end):
+        calls.append(tuple(batch))
+        if failing.intersection(batch):
+            raise RuntimeError("HTTP 500")
+        return pd.DataFrame({"symbol": list(batch), "date": [pd.Timestamp("2024-01-02")] * len(batch), "close": [1.0] * len(batch)})
+
+    hf = SimpleNamespace(get_url_path=lambda table: f"/data/{table}.parquet")
+    monkeypatch.setattr(main, "_get_defeatbeta_clients", lambda: (None, hf))
+    monkeypatch.setattr(price_batch, "query_price_history", fake_query)
+    monkeypatch.setattr(main, "PRICES_BATCH_CHUNK", 2)
+    return calls, failing
+
+
+def _call(symbols):
+    return main.prices_batch(
+        main.SymbolsPayload(symbols=symbols), days=5, start=None, end=None,
+        response_format="list", max_points=None, accept=None,
+    )
+
+
+def test_symbols_are_queried_per_chunk(queries):
+    calls, _failing = queries
+    body = _call(["c", "a", "b", "a"])
+    assert sorted(calls) == [("A", "B"), ("C",)]
+    assert [entry["closes"] for entry in body["prices"]] == [[1.0], [1.0], [1.0], [1.0]]
+
+
+def test_failed_chunk_is_retried_then_reported(queries):
+    calls, failing = queries
+    failing.add("C")
+    with pytest.raises(HTTPException) as excinfo:
+        _call(["A", "B", "C"])
+    assert excinfo.value.status_code == 502
+    assert "1 of 3" in excinfo.value.detail
+    assert calls.count(("C",)) == 2
+    assert calls.count(("A", "B")) == 1
@@ -0,0 +1,134 @@
+from datetime import date, timedelta
+
+import duckdb
+import pandas as pd
+import pytest
+
+from ratio_panel import _read_parquet, update_ratio_panel
+
+
+TABLES = ("stock_prices", "stock_shares_outstanding", "stock_tailing_eps", "stock_statement")
+
+
+class Dataset:
+    """Tiny DefeatBeta-shaped parquet tables under a temp dir."""
+
+    def __init__(self, root):
+        self.root = root
+        self.urls = {name: str(root / f"{name}.parquet") for name in TABLES}
+        self.prices = []
+        self.shares = []
+        self.eps = []
+        self.statements = []
+
+    def add_prices(self, symbol, start, days, close=10.0):
+        for i in range(days):
+            self.prices.append((symbol, start + timedelta(days=i), close + i))
+
+    def add_quarters(self, symbol, quarter_ends, revenue=100.0):
+        for q in quarter_ends:
+            self.shares.append((symbol, q, 1_000.0))
+            self.eps.append((symbol, q, 2.0))
+            for item, value in (
+                ("total_revenue", revenue),
+                ("ebitda", revenue / 4),
+                ("stockholders_equity", 500.0),
+                ("total_debt", 50.0),
+                ("cash_and_cash_equivalents", 20.0),
+            ):
+                self.statements.append((symbol, q.isoformat(), item, value, "income_statement", "quarterly"))
+
+    def restate(self, symbol, quarter_end, item, value):
+        self.statements = [
+            (s, d, i, value if (s, d, i) == (symbol, quarter_end.isoformat(), item) else v, f, p)
+            for s, d, i, v, f, p in self.statements
+        ]
+
+    def write(self):
+        frames = {
+            "stock_prices": pd.DataFrame(self.prices, columns=["symbol", "report_date", "close"]),
+            "stock_shares_outstanding": pd.DataFrame(self.shares, columns=["symbol", "report_date", "shares_outstanding"]),
+            "stock_tailing_eps": pd.DataFrame(self.eps, columns=["symbol", "report_date", "tailing_eps"]),
+            "stock_statement": pd.DataFrame(
+                self.statements,
+                columns=["symbol", "report_date", "item_name", "item_value", "finance_type", "period_type"],
+            ),
+        }
+        con = duckdb.connect(":memory:")
+        try:
+            for name, frame in frames.items():
+                con.register("t", frame)
+                con.execute(f"COPY t TO '{self.urls[name]}' (FORMAT PARQUET)")
+                con.unregister("t")
+        finally:
+            con.close()
+
+
+def _query(sql):
+    con = duckdb.connect(":memory:")
+    try:
+        return con.execute(sql).df()
+    finally:
+        con.close()
+
+
+QUARTERS = [date(2023, 3, 31), date(2023, 6, 30), date(2023, 9, 30), date(2023, 12, 31)]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    data = Dataset(tmp_path)
+    data.add_quarters("AAA", QUARTERS)
+    data.add_quarters("BBB", QUARTERS)
+    data.add_prices("AAA", date(2024, 1, 1), 60)
+    # BBB's prices lag AAA's by a month.
+    data.add_prices("BBB", date(2024, 1, 1), 30)
+    data.write()
+    return data
+
+
+def _rows(path):
+    frame = _read_parquet(path)
+    frame["date"] = pd.to_datetime(frame["date"])
+    return frame.sort_values(["symbol", "date"]).reset_index(drop=True)
+
+
+def test_update_fills_lagging_symbols_and_restatements(dataset, tmp_path):
+    panel = tmp_path / "panel.parquet"
+    update_ratio_panel(_query, dataset.urls, ["AAA", "BBB"], path=panel)
+    assert _rows(panel).groupby("symbol")["date"].max().dt.date.to_dict() == {
+        "AAA": date(2024, 2, 29),
+        "BBB": date(2024, 1, 30),
+    }
+
+    # BBB catches up, AAA gets new days, and both restate their last quarter.
+    dataset.prices = [p for p in dataset.prices if p[0] != "BBB"]
+    dataset.add_prices("BBB", date(2024, 1, 1), 70)
+    dataset.add_prices("AAA", date(2024, 3, 1), 5, close=80.0)
+    dataset.restate("AAA", QUARTERS[-1], "total_revenue", 300.0)
+    dataset.restate("BBB", QUARTERS[-1], "total_revenue", 300.0)
+    dataset.write()
+
+    stats = update_ratio_panel(_query, dataset.urls, ["AAA", "BBB"], path=panel, recompute_days=45)
+    incremental = _rows(panel)
+
+    full = tmp_path / "full.parquet"
+    update_ratio_panel(_query, dataset.urls, ["AAA", "BBB"], path=full, full=True)
+    rebuilt = _rows(full)
+
+    assert stats["rows_total"] == len(rebuilt) == 65 + 70
+    assert stats["rows_added"] == 5 + 40
+
+    # Each symbol is recomputed from its own last date minus the window:
+    # AAA from 2024-01-15, BBB (last date 2024-01-30) from 2023-12-16.
+    def recomputed(frame):
+        aaa = (frame["symbol"] == "AAA") & (frame["date"] > pd.Timestamp("2024-01-15"))
+        bbb = (frame["symbol"] == "BBB") & (frame["date"] > pd.Timestamp("2023-12-16"))
+        return frame.loc[aaa | bbb].reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(recomputed(incremental), recomputed(rebuilt), check_dtype=False)
+    by_key = incremental.set_index(["symbol", "date"])["ttm_revenue"]
+    assert by_key[("BBB", pd.Timestamp("2024-01-10"))] == 600.0
+    assert by_key[("AAA", pd.Timestamp("2024-03-01"))] == 600.0
+    # AAA rows before its window keep the stored values.
+    assert by_key[("AAA", pd.Timestamp("2024-01-10"))] == 400.0
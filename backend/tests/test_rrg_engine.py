@@ -0,0 +1,63 @@
+"""Parity of the vectorized RRG engine with the list-based rrg_history functions."""
+import numpy as np
+import pytest
+
+from rrg_engine import CORRECTED, LEGACY, quadrants, rrg_at, rrg_snapshot
+from rrg_history import calculate_rrg, calculate_rrg_corrected, determine_quadrant
+
+
+REFERENCE = {
+    LEGACY: lambda stock, bench: calculate_rrg(stock, bench),
+    CORRECTED: lambda stock, bench: calculate_rrg_corrected(stock, bench),
+}
+
+
+def _market(seed=0, rows=700, symbols=40):
+    rng = np.random.default_rng(seed)
+    bench = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    closes = 50 * np.exp(np.cumsum(rng.normal(0, 0.012, (rows, symbols)), axis=0))
+    # Missing bars, late listings, an empty column and a single-bar column.
+    closes[rng.random((rows, symbols)) < 0.05] = np.nan
+    for j in range(8):
+        closes[: rng.integers(100, rows - 10), j] = np.nan
+    closes[:, 10] = np.nan
+    closes[:-1, 11] = np.nan
+    bench[rng.random(rows) < 0.02] = np.nan
+    return closes, bench, rng
+
+
+def _expected(closes, bench, start, end, j, method):
+    window = slice(start, end + 1)
+    aligned = np.isfinite(closes[window, j]) & np.isfinite(bench[window])
+    stock = closes[window, j][aligned].tolist()
+    benchmark = bench[window][aligned].tolist()
+    return REFERENCE[method](stock, benchmark), int(aligned.sum())
+
+
+@pytest.mark.parametrize("method", [LEGACY, CORRECTED])
+def test_rrg_at_matches_list_based_functions(method):
+    closes, bench, rng = _market()
+    rows, symbols = closes.shape
+    ends = np.arange(rows - 1, rows - 300, -7)
+    starts = np.maximum(0, ends - rng.integers(5, 600, len(ends)))
+
+    ratio, momentum, points = rrg_at(closes, bench, ends, starts, method)
+    q = quadrants(ratio, momentum)
+    for k, (end, start) in enumerate(zip(ends, starts)):
+        for j in range(symbols):
+            (exp_ratio, exp_momentum), exp_points = _expected(closes, bench, start, end, j, method)
+            assert points[k, j] == exp_points
+            assert ratio[k, j] == pytest.approx(exp_ratio, rel=1e-10)
+            assert momentum[k, j] == pytest.approx(exp_momentum, rel=1e-10)
+            assert q[k, j] == determine_quadrant(exp_ratio, exp_momentum)
+
+
+@pytest.mark.parametrize("method", [LEGACY, CORRECTED])
+def test_rrg_snapshot_uses_the_whole_matrix(method):
+    closes, bench, _rng = _market(seed=1, rows=320, symbols=12)
+    ratio, momentum, points = rrg_snapshot(closes, bench, method)
+    for j in range(closes.shape[1]):
+        (exp_ratio, exp_momentum), exp_points = _expected(closes, bench, 0, closes.shape[0] - 1, j, method)
+        assert points[j] == exp_points
+        assert ratio[j] == pytest.approx(exp_ratio, rel=1e-10)
+        assert momentum[j] == pytest.approx(exp_momentum, rel=1e-10)
@@ -0,0 +1,76 @@
+"""
+The batched rule-search engine (--engine batched, rule_search.py) must produce the same
+backtest_rule_search.json rows as running the full backtest per combo (--engine full),
+both in-process and through the shared-memory path the process workers use.
+
+Runs on the seeded sector fixture of test_backtest_parallel.py, with the clock frozen at
+its TODAY so both engines see the same rebalance periods.
+"""
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import main
+import rule_search
+from test_backtest_parallel import FrozenDatetime, patch_sector_inputs
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import search_backtest_rules as sbr  # noqa: E402
+
+
+LAG_DAYS = 90
+HOLDS = (1, 2)
+TOP_N = 5
+
+
+@pytest.fixture
+def search(monkeypatch):
+    patch_sector_inputs(monkeypatch, [(hold, hold) for hold in HOLDS], LAG_DAYS)
+    monkeypatch.setattr(sbr, "dt", SimpleNamespace(datetime=FrozenDatetime))
+
+    # The script's context on this process's (patched) main module; without query caching,
+    # so the script never wraps main's functions.
+    monkeypatch.setattr(sbr, "_BACKTEST_CONTEXT", {})
+    monkeypatch.setattr(sbr, "load_fastapi_backtest", lambda: main)
+    sbr._ensure_backtest_context(cache_queries=False)
+    return sbr
+
+
+def _combos():
+    rule_sets = sbr.build_rule_sets(sbr.FUNDAMENTAL_METRICS, sbr.DEFAULT_OPERATORS, 2, max_rule_sets=40)
+    return [(cap, rule_id, rules) for cap in ("large", "mid", "small") for rule_id, rules in rule_sets]
+
+
+def _rows(rows):
+    return json.dumps(rows, sort_keys=True)
+
+
+@pytest.mark.parametrize("hold", HOLDS)
+def test_batched_engine_matches_full_backtest(search, hold):
+    combos = _combos()
+    task = ("Tech", hold, combos, TOP_N, LAG_DAYS, 0.7)
+
+    full = [search._run_combo(("Tech", cap, hold, rule_id, rules, TOP_N, LAG_DAYS, 0.7)) for cap, rule_id, rules in combos]
+    assert not [row for row in full if "error" in row]
+    assert any(row["selected_by_point"] for row in full)
+
+    assert _rows(search._run_group(task)) == _rows(full)
+
+    # What _run_groups_shared does, minus the process pool: publish once, evaluate chunks.
+    periods, error_rows = search._load_group(task)
+    assert error_rows is None
+    block, spec = rule_search.publish_periods(periods)
+    try:
+        shared = []
+        for cap, cap_combos in search._cap_chunks(task, 3):
+            shared.extend(search._evaluate_shared_chunk((spec, task, cap, cap_combos)))
+    finally:
+        block.close()
+        block.unlink()
+    assert _rows(search._ordered_rows(task, shared)) == _rows(full)
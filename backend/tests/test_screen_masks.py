@@ -0,0 +1,175 @@
+"""
+Randomized parity of the columnar screens against the per-record helpers they replaced.
+
+The reference functions below are the dict-based versions that lived in main.py
+(`_matches_custom_rule`, the cap bucket of `_filter_records_by_cap`, the backtest's
+fundamental rule loop) and the scalar `calculate_valuation_factor`.
+"""
+import math
+import random
+import statistics
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import screen_masks as sm
+from factor_engine import VALUATION_COMPONENTS, score_valuation
+from factor_scoring import calculate_valuation_factor
+
+
+OPERATORS = ("<", ">", "=", "!=", "between", ">=", "<=")
+
+
+def _ref_rule(value, operator, target):
+    if value is None or not math.isfinite(value):
+        return False
+    if operator == "<":
+        return value < float(target)
+    if operator == "<=":
+        return value <= float(target)
+    if operator == ">":
+        return value > float(target)
+    if operator == ">=":
+        return value >= float(target)
+    if operator == "=":
+        return abs(value - float(target)) < 0.01
+    if operator == "!=":
+        return abs(value - float(target)) >= 0.01
+    if operator == "between":
+        try:
+            min_val, max_val = target
+            return value >= float(min_val) and value <= float(max_val)
+        except Exception:
+            return False
+    return True
+
+
+def _ref_bucket(market_cap):
+    if market_cap is None:
+        return None
+    if market_cap >= 10_000_000_000:
+        return "large"
+    if market_cap >= 2_000_000_000:
+        return "mid"
+    if market_cap >= 300_000_000:
+        return "small"
+    return None
+
+
+def _random_value(rng):
+    r = rng.random()
+    if r < 0.1:
+        return None
+    if r < 0.13:
+        return float("nan")
+    if r < 0.15:
+        return rng.choice([float("inf"), float("-inf")])
+    if r < 0.25:
+        return rng.choice([0.0, 10.0, 10.005, 9.995, 15.0])
+    return rng.uniform(-20, 60)
+
+
+def _random_target(rng, operator):
+    if operator == "between":
+        if rng.random() < 0.2:
+            return 5
+        return [rng.uniform(-5, 20), rng.uniform(10, 50)]
+    return rng.choice([10.0, 15, rng.uniform(-5, 40)])
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_rule_mask_matches_scalar_rule(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        values = [_random_value(rng) for _ in range(rng.randint(0, 40))]
+        operator = rng.choice(OPERATORS)
+        target = _random_target(rng, operator)
+        got = sm.rule_mask(sm.float_column(values), operator, target)
+        assert got.tolist() == [_ref_rule(v, operator, target) for v in values]
+
+
+def test_cap_mask_matches_buckets():
+    rng = random.Random(7)
+    caps = [None, float("nan"), 3e8, 2e9, 1e10, 299_999_999.0, 0.0]
+    caps += [rng.uniform(0, 5e10) for _ in range(200)]
+    column = sm.float_column(caps)
+    for cap in (None, "all", "large", "mid", "small"):
+        expected = [True] * len(caps) if cap in (None, "all") else [_ref_bucket(c) == cap for c in caps]
+        assert sm.cap_mask(column, cap).tolist() == expected
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_peer_stats_and_fundamental_rules_match_list_based(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        n = rng.randint(0, 30)
+        records = [
+            {m: rng.choice([None, float("nan"), 1.0, 2.0, rng.uniform(-10, 10)]) for m in sm.RATIO_METRICS}
+            for _ in range(n)
+        ]
+        columns = {m: sm.float_column([r[m] for r in records]) for m in sm.RATIO_METRICS}
+        universe = np.array([rng.random() < 0.8 for _ in range(n)], dtype=bool)
+        stats = sm.PeerStats(columns, universe)
+
+        means, medians = {}, {}
+        for m in sm.RATIO_METRICS:
+            values = [
+                r[m] for r, keep in zip(records, universe)
+                if keep and isinstance(r[m], float) and math.isfinite(r[m])
+            ]
+            means[m] = statistics.fmean(values) if values else None
+            medians[m] = statistics.median(values) if values else None
+        assert stats.mean == means
+        assert stats.median == medians
+
+        rules = [
+            SimpleNamespace(metric=rng.choice(sm.RATIO_METRICS), operator=rng.choice(["gt_zero", "lt_mean", "lt_median"]))
+            for _ in range(rng.randint(0, 3))
+        ]
+
+        def passes(rec):
+            for rule in rules:
+                val = rec[rule.metric]
+                if val is None or not math.isfinite(val):
+                    return False
+                if rule.operator == "gt_zero" and val <= 0:
+                    return False
+                threshold = {"lt_mean": means, "lt_median": medians}.get(rule.operator, {}).get(rule.metric, 0.0)
+                if rule.operator != "gt_zero" and (threshold is None or val >= threshold):
+                    return False
+            return True
+
+        if n:
+            assert sm.fundamental_rules_mask(columns, rules, stats).tolist() == [passes(r) for r in records]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_score_valuation_with_external_peers_matches_scalar(seed):
+    rng = random.Random(seed)
+    for _ in range(60):
+        n = rng.randint(1, 60)
+        rows = [
+            {k: rng.choice([None, 0.0, 10.0, rng.uniform(0.5, 80), round(rng.uniform(-5, 40), 1)]) for k in VALUATION_COMPONENTS}
+            for _ in range(n)
+        ]
+        peers = {k: [r[k] for r in rows if r[k] is not None and rng.random() < 0.9] for k in VALUATION_COMPONENTS}
+        if rng.random() < 0.2:
+            peers["ps"] = []
+        weights = rng.choice([None, {"pe": 2.0, "ps": 0.0}, {k: 0.0 for k in VALUATION_COMPONENTS}, {"pb": -1, "ev_sales": 3.3}])
+        ratios = {k: sm.float_column([r[k] for r in rows]) for k in VALUATION_COMPONENTS}
+
+        score, components = score_valuation(ratios, weights, peers={k: np.asarray(v) for k, v in peers.items()})
+        for i, row in enumerate(rows):
+            ref = calculate_valuation_factor(
+                *[row[k] for k in VALUATION_COMPONENTS],
+                *[peers[k] for k in VALUATION_COMPONENTS],
+                weights=weights,
+            )
+            got = None if math.isnan(score[i]) else float(score[i])
+            got_components = {
+                k: (None if math.isnan(components[i, j]) else float(components[i, j]))
+                for j, k in enumerate(VALUATION_COMPONENTS)
+            }
+            assert got == ref["score"]
+            assert got_components == ref["components"]
@@ -0,0 +1,66 @@
+"""EV items come from the latest annual balance sheet and the TTM income statement."""
+import duckdb
+import pandas as pd
+import pytest
+
+from statement_items import enterprise_value, fetch_ev_items
+
+
+ROWS = [
+    # symbol, report_date, item_name, item_value, finance_type, period_type
+    ("AAA", "2023-12-31", "total_debt", 100.0, "balance_sheet", "annual"),
+    ("AAA", "2023-12-31", "cash_and_cash_equivalents", 30.0, "balance_sheet", "annual"),
+    ("AAA", "2022-12-31", "total_debt", 90.0, "balance_sheet", "annual"),
+    ("AAA", "2024-06-30", "total_debt", 500.0, "balance_sheet", "quarterly"),
+    ("AAA", "2024-06-30", "cash_and_cash_equivalents", 5.0, "balance_sheet", "quarterly"),
+    ("AAA", "TTM", "operating_income", 40.0, "income_statement", "quarterly"),
+    ("AAA", "TTM", "reconciled_depreciation", 10.0, "income_statement", "quarterly"),
+    ("AAA", "2023-12-31", "operating_income", 35.0, "income_statement", "annual"),
+    # The newer quarterly total_debt is ignored; the annual debt chain falls back to current_debt.
+    ("BBB", "2024-06-30", "total_debt", 50.0, "balance_sheet", "quarterly"),
+    ("BBB", "2023-12-31", "current_debt", 7.0, "balance_sheet", "annual"),
+    ("BBB", "2023-12-31", "ebit", 12.0, "income_statement", "annual"),
+]
+
+
+@pytest.fixture
+def statement_url(tmp_path):
+    frame = pd.DataFrame(ROWS, columns=["symbol", "report_date", "item_name", "item_value", "finance_type", "period_type"])
+    path = tmp_path / "stock_statement.parquet"
+    con = duckdb.connect(":memory:")
+    try:
+        con.register("t", frame)
+        con.execute(f"COPY t TO '{path}' (FORMAT PARQUET)")
+    finally:
+        con.close()
+    return str(path)
+
+
+def _query(sql):
+    con = duckdb.connect(":memory:")
+    try:
+        return con.execute(sql).df()
+    finally:
+        con.close()
+
+
+def test_balance_sheet_items_use_the_latest_annual_report(statement_url):
+    items = fetch_ev_items(_query, statement_url, ["aaa", "BBB", "ZZZ"])
+
+    assert items["AAA"] == {
+        "total_debt": 100.0,
+        "cash": 30.0,
+        "balance_sheet_date": "2023-12-31",
+        "ebit": 40.0,
+        "depreciation_amortization": 10.0,
+        "ebitda": 50.0,
+        "income_period": "TTM",
+    }
+    assert enterprise_value(1_000.0, items["AAA"]) == 1_070.0
+
+    assert items["BBB"]["total_debt"] == 7.0
+    assert items["BBB"]["balance_sheet_date"] == "2023-12-31"
+    assert items["BBB"]["ebit"] == 12.0 and items["BBB"]["ebitda"] is None
+    assert enterprise_value(1_000.0, items["BBB"]) == 1_007.0
+
+    assert all(value is None for value in items["ZZZ"].values())
@@ -0,0 +1,55 @@
+"""The process-wide total-return store follows both its index and its events file."""
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+import total_return
+from total_return import _write_parquet, events_path_for, get_total_return_store
+
+
+def _index():
+    dates = pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"])
+    return pd.DataFrame({
+        "symbol": "AAA",
+        "date": dates,
+        "close": [10.0, 10.0, 10.0],
+        "split_index": 1.0,
+        "cum_dividends": [0.0, 0.0, 0.5],
+        "tr_index": [1.0, 1.0, 1.05],
+    })
+
+
+def _events(cum_dividends):
+    return pd.DataFrame({
+        "symbol": ["AAA"],
+        "date": pd.to_datetime(["2024-01-04"]),
+        "split_index": [1.0],
+        "cum_dividends": [cum_dividends],
+    })
+
+
+def test_store_reloads_when_only_the_events_file_changes(tmp_path):
+    path = tmp_path / "tr.parquet"
+    _write_parquet(_index(), path)
+    _write_parquet(_events(0.5), events_path_for(path))
+
+    def window():
+        return get_total_return_store(path).window(["AAA"], date(2024, 1, 2), date(2024, 1, 4))["AAA"]
+
+    assert window()["dividends"] == 0.5
+
+    _write_parquet(_events(0.75), events_path_for(path))
+    assert window()["dividends"] == 0.75
+
+
+def test_update_writes_events_before_the_index(tmp_path, monkeypatch):
+    written = []
+    monkeypatch.setattr(total_return, "_write_parquet", lambda frame, path: written.append(Path(path)))
+    monkeypatch.setattr(total_return, "build_prices_sql", lambda urls, batch, start_from=None: "prices")
+    monkeypatch.setattr(total_return, "build_events_sql", lambda urls, batch: "events")
+    frames = {"prices": _index().drop(columns=["tr_index"]), "events": _events(0.5)}
+
+    path = tmp_path / "tr.parquet"
+    total_return.update_total_return_index(frames.get, {}, ["AAA"], path=path)
+    assert written == [events_path_for(path), path]
@@ -0,0 +1,52 @@
+"""TTL caches never keep values loaded under a dataset version that has since been replaced."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ttl_cache
+from ttl_cache import TTLCache
+
+
+@pytest.fixture
+def version(monkeypatch):
+    current = {"value": "v1"}
+    monkeypatch.setattr(ttl_cache, "current_data_version", lambda: current["value"])
+    return current
+
+
+def test_load_spanning_a_version_switch_is_not_stored(version):
+    cache = TTLCache("test-switch", ttl=60, max_bytes=1 << 20)
+    loads = []
+
+    def old_load():
+        loads.append("old")
+        version["value"] = "v2"
+        # Another request sees the new version (and clears the cache) before this load returns.
+        assert cache.get_or_load("other", lambda: "other") == "other"
+        return "old data"
+
+    assert cache.get_or_load("k", old_load) == "old data"
+    assert not cache.contains("k")
+    assert cache.get_or_load("k", lambda: loads.append("new") or "new data") == "new data"
+    assert cache.get_or_load("k", lambda: loads.append("again") or "again") == "new data"
+    assert loads == ["old", "new"]
+
+
+def test_background_refresh_spanning_a_version_switch_is_not_stored(version, monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(ttl_cache, "_REFRESH_EXECUTOR", executor)
+    cache = TTLCache("test-refresh", ttl=0.01, stale_ttl=60, max_bytes=1 << 20)
+    assert cache.get_or_load("k", lambda: "v1 data") == "v1 data"
+    time.sleep(0.02)
+
+    def refresh():
+        version["value"] = "v2"
+        assert cache.get_or_load("other", lambda: "other") == "other"
+        return "refreshed under v1"
+
+    # Stale hit: served as is while the refresh runs in the background.
+    assert cache.get_or_load("k", refresh) == "v1 data"
+    executor.shutdown(wait=True)
+    assert cache.stats()["refreshes"] == 0
+    assert cache.get_or_load("k", lambda: "v2 data") == "v2 data"
@@ -0,0 +1,49 @@
+import threading
+import time
+
+import pytest
+
+from work_pool import DataWorkPool, PoolSaturated
+
+
+def _pool(max_queue: int) -> DataWorkPool:
+    return DataWorkPool(max_workers=2, max_queue=max_queue, queue_timeout=5, retry_after=1, budgets={"test": 2})
+
+
+def test_map_rejects_request_larger_than_queue():
+    pool = _pool(max_queue=10)
+    with pytest.raises(PoolSaturated):
+        pool.map("test", lambda x: x, range(11))
+    assert pool.stats()["queued"] == 0
+    assert pool.map("test", lambda x: x * 2, range(10)) == [x * 2 for x in range(10)]
+
+
+def test_imap_unordered_rejects_request_larger_than_queue():
+    pool = _pool(max_queue=10)
+    with pytest.raises(PoolSaturated):
+        list(pool.imap_unordered("test", lambda x: x, range(11)))
+    assert sorted(r for _i, r in pool.imap_unordered("test", lambda x: x, range(10))) == list(range(10))
+
+
+def test_waiting_tasks_count_against_limit():
+    pool = _pool(max_queue=10)
+    release = threading.Event()
+
+    def block(_x):
+        release.wait()
+        return 0
+
+    runner = threading.Thread(target=pool.map, args=("test", block, range(6)))
+    runner.start()
+    try:
+        # Two tasks run (the endpoint budget), four wait; seven more would exceed the limit.
+        deadline = time.monotonic() + 5
+        while pool.stats()["queued"] != 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.stats()["queued"] == 4
+        with pytest.raises(PoolSaturated):
+            pool.map("other", lambda x: x, range(7))
+    finally:
+        release.set()
+        runner.join()
+    assert pool.stats()["queued"] == 0
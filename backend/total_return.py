@@ -0,0 +1,411 @@
+"""
+Precomputed split/dividend-adjusted total-return indexes.
+
+For every symbol we materialize, in one DuckDB pass over prices, splits and dividends:
+
+  split_index(t)    product of split factors with ex-date <= t (shares per original share)
+  cum_dividends(t)  sum of amount_i * split_index(d_i) for dividends with d_i <= t
+                    (cash per original share)
+  tr_index(t)       dividend-reinvested total-return index (1.0 at the first close)
+
+Any window (start, end] then reduces to two lookups per symbol:
+
+  split_factor = S(end) / S(start)
+  dividends    = (D(end) - D(start)) / S(start)        # per share held at start
+  total_return = (close(end) * split_factor + dividends) / close(start) - 1
+
+which is exactly the per-window `_split_factor_between` / `_split_adjusted_dividends`
+arithmetic used by backtest_sector, without the corporate-action queries.
+`reinvest=True` uses tr_index instead (dividends reinvested at the ex-date close).
+"""
+from __future__ import annotations
+
+import os
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from data_io import VersionedLoader, chunked, file_version, sql_path, sql_quote_list
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_INDEX_PATH = Path(os.getenv("TOTAL_RETURN_INDEX_PATH", str(REPO_ROOT / "data" / "total_return_index.parquet")))
+
+INDEX_COLUMNS = ["symbol", "date", "close", "split_index", "cum_dividends", "tr_index"]
+EVENT_COLUMNS = ["symbol", "date", "split_index", "cum_dividends"]
+
+
+def events_path_for(index_path: Path | str) -> Path:
+    index_path = Path(index_path)
+    return index_path.with_name(index_path.stem + "_events" + index_path.suffix)
+
+
+def _events_cte(urls: Dict[str, str], sym_in: str) -> str:
+    # split_factor is "2:1" / "1398:1000" (or a bare number); same parsing as _parse_split_factor.
+    return f"""
+    splits AS (
+      SELECT symbol, d, factor FROM (
+        SELECT
+          upper(symbol) AS symbol,
+          CAST(report_date AS DATE) AS d,
+          CASE
+            WHEN contains(CAST(split_factor AS VARCHAR), ':') THEN
+              TRY_CAST(split_part(CAST(split_factor AS VARCHAR), ':', 1) AS DOUBLE)
+              / NULLIF(TRY_CAST(split_part(CAST(split_factor AS VARCHAR), ':', 2) AS DOUBLE), 0)
+            ELSE TRY_CAST(CAST(split_factor AS VARCHAR) AS DOUBLE)
+          END AS factor
+        FROM '{urls["stock_split_events"]}'
+        WHERE upper(symbol) IN ({sym_in})
+      )
+      WHERE factor IS NOT NULL AND isfinite(factor) AND factor > 0
+    ),
+    split_days AS (
+      SELECT symbol, d, exp(sum(ln(factor))) AS day_factor
+      FROM splits
+      GROUP BY symbol, d
+    ),
+    divs AS (
+      SELECT upper(symbol) AS symbol, CAST(report_date AS DATE) AS d, sum(CAST(amount AS DOUBLE)) AS amount
+      FROM '{urls["stock_dividend_events"]}'
+      WHERE upper(symbol) IN ({sym_in}) AND amount IS NOT NULL AND isfinite(CAST(amount AS DOUBLE)) AND amount <> 0
+      GROUP BY 1, 2
+    ),
+    event_days AS (
+      SELECT symbol, d FROM split_days
+      UNION
+      SELECT symbol, d FROM divs
+    ),
+    events AS (
+      SELECT
+        e.symbol,
+        e.d,
+        exp(sum(ln(coalesce(s.day_factor, 1.0))) OVER w) AS split_index,
+        coalesce(v.amount, 0.0) AS amount
+      FROM event_days e
+      LEFT JOIN split_days s ON s.symbol = e.symbol AND s.d = e.d
+      LEFT JOIN divs v ON v.symbol = e.symbol AND v.d = e.d
+      WINDOW w AS (PARTITION BY e.symbol ORDER BY e.d ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+    ),
+    event_index AS (
+      SELECT
+        symbol,
+        d,
+        split_index,
+        sum(amount * split_index) OVER (
+          PARTITION BY symbol ORDER BY d ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+        ) AS cum_dividends
+      FROM events
+    )
+    """
+
+
+def build_events_sql(urls: Dict[str, str], symbols: Sequence[str]) -> str:
+    sym_in = sql_quote_list(symbols)
+    return f"""
+    WITH {_events_cte(urls, sym_in)}
+    SELECT symbol, d AS date, split_index, cum_dividends
+    FROM event_index
+    ORDER BY symbol, date
+    """
+
+
+def build_prices_sql(urls: Dict[str, str], symbols: Sequence[str], start_from: Optional[date] = None) -> str:
+    """
+    Daily close with split_index / cum_dividends as-of each trading day.
+    `start_from` is inclusive so the caller gets a seed row for incremental chaining.
+    """
+    sym_in = sql_quote_list(symbols)
+    price_filter = f"AND CAST(report_date AS DATE) >= DATE '{start_from.isoformat()}'" if start_from else ""
+    return f"""
+    WITH {_events_cte(urls, sym_in)},
+    px AS (
+      SELECT upper(symbol) AS symbol, CAST(report_date AS DATE) AS date, CAST(close AS DOUBLE) AS close
+      FROM '{urls["stock_prices"]}'
+      WHERE upper(symbol) IN ({sym_in}) AND close IS NOT NULL AND close > 0 {price_filter}
+    )
+    SELECT
+      px.symbol,
+      px.date,
+      px.close,
+      coalesce(ei.split_index, 1.0) AS split_index,
+      coalesce(ei.cum_dividends, 0.0) AS cum_dividends
+    FROM px
+    ASOF LEFT JOIN event_index ei ON px.symbol = ei.symbol AND px.date >= ei.d
+    ORDER BY px.symbol, px.date
+    """
+
+
+def _chain_tr_index(rows: pd.DataFrame, seeds: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """
+    Vectorized tr_index per symbol. Daily gross return of one share held from the
+    previous close:  (S_t * P_t + D_t - D_prev) / (S_prev * P_prev).
+
+    When `seeds` has a symbol, its first row is treated as an already-stored seed:
+    the chain starts from that tr value and the seed row is dropped.
+    """
+    if rows.empty:
+        return rows.reindex(columns=INDEX_COLUMNS)
+    rows = rows.sort_values(["symbol", "date"]).reset_index(drop=True)
+    g = rows.groupby("symbol", sort=False)
+    prev_value = (g["split_index"].shift(1) * g["close"].shift(1)).to_numpy()
+    prev_div = g["cum_dividends"].shift(1).to_numpy()
+    value = (rows["split_index"] * rows["close"]).to_numpy() + rows["cum_dividends"].to_numpy() - prev_div
+    gross = np.where(np.isnan(prev_value) | (prev_value <= 0), 1.0, value / prev_value)
+    gross = np.where(np.isfinite(gross) & (gross > 0), gross, 1.0)
+    rows["tr_index"] = pd.Series(gross).groupby(rows["symbol"].to_numpy(), sort=False).cumprod().to_numpy()
+
+    if seeds:
+        first = ~rows["symbol"].duplicated()
+        seed_vals = rows["symbol"].map(seeds)
+        has_seed = seed_vals.notna()
+        rows.loc[has_seed, "tr_index"] = rows.loc[has_seed, "tr_index"] * seed_vals[has_seed]
+        rows = rows[~(first & has_seed)]
+    return rows.reindex(columns=INDEX_COLUMNS).reset_index(drop=True)
+
+
+def _read_parquet(path: Path | str) -> pd.DataFrame:
+    con = duckdb.connect(":memory:")
+    try:
+        return con.execute(f"SELECT * FROM read_parquet('{sql_path(path)}')").df()
+    finally:
+        con.close()
+
+
+def _write_parquet(frame: pd.DataFrame, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    con = duckdb.connect(":memory:")
+    try:
+        con.register("frame", frame)
+        con.execute(f"COPY frame TO '{sql_path(tmp_path)}' (FORMAT PARQUET)")
+    finally:
+        con.close()
+    os.replace(tmp_path, path)
+
+
+def update_total_return_index(
+    query: Callable[[str], pd.DataFrame],
+    urls: Dict[str, str],
+    symbols: Sequence[str],
+    path: Path | str = DEFAULT_INDEX_PATH,
+    full: bool = False,
+    batch_size: int = 400,
+) -> Dict[str, int]:
+    """
+    Build or incrementally extend the index parquet at `path` (plus the small
+    corporate-action event table next to it).
+
+    Existing symbols only get trading days after their last stored date, chained
+    from the stored tr_index. Event tables are rebuilt (they are tiny).
+    """
+    path = Path(path)
+    symbols = sorted({str(s).strip().upper() for s in symbols if str(s).strip()})
+    existing = None if full or not path.exists() else _read_parquet(path)
+
+    last_rows: Dict[str, Tuple[pd.Timestamp, float]] = {}
+    if existing is not None and not existing.empty:
+        tail = existing.sort_values(["symbol", "date"]).groupby("symbol").tail(1)
+        last_rows = {
+            str(sym): (pd.Timestamp(d), float(tr))
+            for sym, d, tr in zip(tail["symbol"], tail["date"], tail["tr_index"])
+        }
+
+    new_parts: List[pd.DataFrame] = []
+    event_parts: List[pd.DataFrame] = []
+    known = [s for s in symbols if s in last_rows]
+    fresh = [s for s in symbols if s not in last_rows]
+
+    for batch in chunked(fresh, batch_size):
+        new_parts.append(_chain_tr_index(query(build_prices_sql(urls, batch))))
+        event_parts.append(query(build_events_sql(urls, batch)))
+
+    if known:
+        # Group known symbols by their last stored date so each batch shares one seed date.
+        by_start: Dict[pd.Timestamp, List[str]] = {}
+        for sym in known:
+            by_start.setdefault(last_rows[sym][0], []).append(sym)
+        for start, group in by_start.items():
+            for batch in chunked(group, batch_size):
+                rows = query(build_prices_sql(urls, batch, start_from=start.date()))
+                seeds = {sym: last_rows[sym][1] for sym in batch}
+                new_parts.append(_chain_tr_index(rows, seeds))
+                event_parts.append(query(build_events_sql(urls, batch)))
+
+    new_rows = pd.concat([p for p in new_parts if p is not None and not p.empty], ignore_index=True) if any(
+        p is not None and not p.empty for p in new_parts
+    ) else pd.DataFrame(columns=INDEX_COLUMNS)
+    frames = [new_rows]
+    if existing is not None and not existing.empty:
+        frames.insert(0, existing.reindex(columns=INDEX_COLUMNS))
+    combined = pd.concat([f for f in frames if not f.empty], ignore_index=True) if any(
+        not f.empty for f in frames
+    ) else pd.DataFrame(columns=INDEX_COLUMNS)
+    combined = combined.sort_values(["symbol", "date"]).reset_index(drop=True)
+
+    events = pd.concat([e for e in event_parts if e is not None and not e.empty], ignore_index=True) if any(
+        e is not None and not e.empty for e in event_parts
+    ) else pd.DataFrame(columns=EVENT_COLUMNS)
+    ev_path = events_path_for(path)
+    if existing is not None and ev_path.exists():
+        old_events = _read_parquet(ev_path)
+        old_events = old_events[~old_events["symbol"].isin(set(symbols))]
+        events = pd.concat([old_events.reindex(columns=EVENT_COLUMNS), events.reindex(columns=EVENT_COLUMNS)], ignore_index=True)
+    events = events.reindex(columns=EVENT_COLUMNS).sort_values(["symbol", "date"]).reset_index(drop=True)
+
+    # Events first: get_total_return_store watches both files, and the index write
+    # that follows triggers a reload which pairs the new index with the new events.
+    _write_parquet(events, ev_path)
+    _write_parquet(combined, path)
+    return {"rows_added": int(len(new_rows)), "rows_total": int(len(combined)), "events": int(len(events))}
+
+
+class _SymbolSeries:
+    __slots__ = ("dates", "close", "tr", "ev_dates", "ev_split", "ev_div")
+
+    def __init__(self, dates, close, tr, ev_dates, ev_split, ev_div):
+        self.dates = dates
+        self.close = close
+        self.tr = tr
+        self.ev_dates = ev_dates
+        self.ev_split = ev_split
+        self.ev_div = ev_div
+
+    def _price_pos(self, d: np.datetime64) -> int:
+        return int(np.searchsorted(self.dates, d, side="right")) - 1
+
+    def _event_state(self, d: np.datetime64) -> Tuple[float, float]:
+        pos = int(np.searchsorted(self.ev_dates, d, side="right")) - 1
+        if pos < 0:
+            return 1.0, 0.0
+        return float(self.ev_split[pos]), float(self.ev_div[pos])
+
+
+class TotalReturnStore:
+    """In-memory total-return index with O(log n) window lookups per symbol."""
+
+    def __init__(self, index_frame: pd.DataFrame, events_frame: Optional[pd.DataFrame] = None):
+        index_frame = index_frame.reindex(columns=INDEX_COLUMNS).copy()
+        index_frame["symbol"] = index_frame["symbol"].astype(str).str.upper()
+        index_frame["date"] = pd.to_datetime(index_frame["date"])
+        index_frame = index_frame.sort_values(["symbol", "date"])
+
+        events_frame = (events_frame if events_frame is not None else pd.DataFrame(columns=EVENT_COLUMNS))
+        events_frame = events_frame.reindex(columns=EVENT_COLUMNS).copy()
+        events_frame["symbol"] = events_frame["symbol"].astype(str).str.upper()
+        events_frame["date"] = pd.to_datetime(events_frame["date"])
+        events_frame = events_frame.sort_values(["symbol", "date"])
+        ev_groups = {sym: grp for sym, grp in events_frame.groupby("symbol", sort=False)}
+
+        empty_dates = np.array([], dtype="datetime64[ns]")
+        empty_vals = np.array([], dtype=float)
+        self._series: Dict[str, _SymbolSeries] = {}
+        for sym, grp in index_frame.groupby("symbol", sort=False):
+            ev = ev_groups.get(sym)
+            self._series[sym] = _SymbolSeries(
+                grp["date"].to_numpy(dtype="datetime64[ns]"),
+                grp["close"].to_numpy(dtype=float),
+                grp["tr_index"].to_numpy(dtype=float),
+                ev["date"].to_numpy(dtype="datetime64[ns]") if ev is not None else empty_dates,
+                ev["split_index"].to_numpy(dtype=float) if ev is not None else empty_vals,
+                ev["cum_dividends"].to_numpy(dtype=float) if ev is not None else empty_vals,
+            )
+        self.max_date: Optional[date] = (
+            pd.Timestamp(index_frame["date"].max()).date() if not index_frame.empty else None
+        )
+
+    @classmethod
+    def from_parquet(cls, path: Path | str) -> "TotalReturnStore":
+        ev_path = events_path_for(path)
+        events = _read_parquet(ev_path) if ev_path.exists() else None
+        return cls(_read_parquet(path), events)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._series
+
+    def window(self, symbols: Sequence[str], start: date, end: date) -> Dict[str, Dict[str, Any]]:
+        """
+        Corporate-action-adjusted window (start, end] per symbol:
+          start_close / end_close  last close on or before start / end
+          split_factor             shares at end per share held at start
+          dividends                cash per share held at start (split-adjusted)
+          total_return             price + cash dividends (no reinvestment)
+          total_return_reinvested  from the dividend-reinvested tr_index
+        Symbols missing from the store are omitted.
+        """
+        s64 = np.datetime64(pd.Timestamp(start))
+        e64 = np.datetime64(pd.Timestamp(end))
+        out: Dict[str, Dict[str, Any]] = {}
+        for raw in symbols:
+            sym = raw.upper()
+            series = self._series.get(sym)
+            if series is None:
+                continue
+            i0 = series._price_pos(s64)
+            i1 = series._price_pos(e64)
+            split0, div0 = series._event_state(s64)
+            split1, div1 = series._event_state(e64)
+            split_factor = split1 / split0 if split0 > 0 else 1.0
+            dividends = (div1 - div0) / split0 if split0 > 0 else 0.0
+            sp = float(series.close[i0]) if i0 >= 0 else None
+            ep = float(series.close[i1]) if i1 >= 0 else None
+            tr = None
+            if sp is not None and ep is not None and sp > 0:
+                tr = (ep * split_factor + dividends) / sp - 1.0
+            tr_reinvested = None
+            if i0 >= 0 and i1 >= 0 and series.tr[i0] > 0:
+                tr_reinvested = float(series.tr[i1] / series.tr[i0] - 1.0)
+            out[sym] = {
+                "start_close": sp,
+                "end_close": ep,
+                "end_close_date": pd.Timestamp(series.dates[i1]).date() if i1 >= 0 else None,
+                "split_factor": split_factor,
+                "dividends": dividends,
+                "total_return": tr,
+                "total_return_reinvested": tr_reinvested,
+            }
+        return out
+
+    def total_return(
+        self,
+        symbols: Sequence[str],
+        start: date,
+        end: date,
+        reinvest: bool = False,
+    ) -> Dict[str, Optional[float]]:
+        """Total return over (start, end] per symbol (None when prices are missing)."""
+        key = "total_return_reinvested" if reinvest else "total_return"
+        return {sym: row.get(key) for sym, row in self.window(symbols, start, end).items()}
+
+
+_STORE_LOADER = VersionedLoader("total-return")
+
+
+def get_total_return_store(path: Path | str = DEFAULT_INDEX_PATH) -> Optional[TotalReturnStore]:
+    """
+    Process-wide store loader. Returns None when the index has not been built;
+    reloads when the index or its events file changes.
+    """
+    path = Path(path)
+    if file_version(path) is None:
+        return None
+    return _STORE_LOADER.get(
+        str(path.resolve()), [path, events_path_for(path)], lambda: TotalReturnStore.from_parquet(path)
+    )
+
+
+def total_return(
+    symbols: Sequence[str],
+    start: date,
+    end: date,
+    reinvest: bool = False,
+    path: Path | str = DEFAULT_INDEX_PATH,
+) -> Dict[str, Optional[float]]:
+    """Convenience wrapper over the process-wide store (empty dict if not built)."""
+    store = get_total_return_store(path)
+    if store is None:
+        return {}
+    return store.total_return(symbols, start, end, reinvest=reinvest)
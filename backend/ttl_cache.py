@@ -0,0 +1,231 @@
+"""
+Data-version-aware TTL caches for backend helpers.
+
+Replacement for `functools.lru_cache` on helpers whose results come from the
+DefeatBeta dataset:
+
+  - per-cache TTL; expired entries are served for up to `stale_ttl` more
+    seconds while one background refresh reloads them (stale-while-revalidate)
+  - a memory budget per cache (approximate deep size), LRU eviction beyond it
+  - all entries dropped when the dataset version (spec.json `update_time`,
+    see data_version.py) changes
+  - misses are coalesced per key (singleflight), so a cold cache costs one
+    load per key
+  - hit/miss/stale/eviction counters via `get_cache_stats()`
+"""
+from __future__ import annotations
+
+import functools
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import pandas as pd
+
+from data_version import current_data_version
+from singleflight import coalesce
+
+
+_REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+_REGISTRY: Dict[str, "TTLCache"] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Approximate deep size in bytes (DataFrames via memory_usage, containers recursively)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for v in value:
+            size += estimate_size(v, _depth + 1)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "size", "refreshing")
+
+    def __init__(self, value: Any, size: int):
+        self.value = value
+        self.stored_at = time.monotonic()
+        self.size = size
+        self.refreshing = False
+
+
+class TTLCache:
+    def __init__(self, name: str, ttl: float, max_bytes: int, stale_ttl: Optional[float] = None):
+        self.name = name
+        self.ttl = float(ttl)
+        self.stale_ttl = float(ttl if stale_ttl is None else stale_ttl)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[str] = None
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def _check_version(self) -> str:
+        """Drop every entry if the dataset version changed; returns the current version."""
+        version = current_data_version()
+        if version == self._version:
+            return version
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    self._counters["invalidations"] += len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+        return version
+
+    def _store(self, key: Hashable, value: Any, version: str) -> bool:
+        """
+        Cache `value`, loaded under dataset `version`. Values from a version that has
+        since been replaced are dropped (False), so old data never outlives the switch.
+        """
+        entry = _Entry(value, estimate_size(value))
+        with self._lock:
+            if version != self._version:
+                return False
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            if entry.size > self.max_bytes:
+                return False
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes and self._entries:
+                _k, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._counters["evictions"] += 1
+        return True
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any], version: str) -> None:
+        try:
+            value = loader()
+        except Exception as exc:
+            print(f"[cache:{self.name}] refresh failed for {key!r}: {exc}", flush=True)
+            with self._lock:
+                self._counters["refresh_errors"] += 1
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+            return
+        if self._store(key, value, version):
+            with self._lock:
+                self._counters["refreshes"] += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        version = self._check_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.stored_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return entry.value
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._counters["stale_hits"] += 1
+                    if not entry.refreshing:
+                        entry.refreshing = True
+                        _REFRESH_EXECUTOR.submit(self._refresh, key, loader, version)
+                    return entry.value
+            self._counters["misses"] += 1
+
+        value = coalesce(f"cache:{self.name}", (key, version), loader)
+        self._store(key, value, version)
+        return value
+
+    def contains(self, key: Hashable) -> bool:
+        """True if `key` would be served without a load (fresh or stale), without touching counters."""
+        self._check_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() - entry.stored_at < self.ttl + self.stale_ttl
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Insert a value loaded elsewhere (e.g. a persistent store) for the current version."""
+        self._store(key, value, self._check_version())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "data_version": self._version,
+                **self._counters,
+            }
+
+
+def ttl_cache(
+    name: str,
+    ttl: float,
+    max_bytes: int,
+    stale_ttl: Optional[float] = None,
+    key: Optional[Callable[..., Hashable]] = None,
+):
+    """
+    Decorator caching a function's results in a registered TTLCache.
+
+    `key(*args, **kwargs)` normalizes arguments (default: the positional args).
+    The wrapper keeps `cache_clear()` / `cache_info()` like functools.lru_cache.
+    """
+    cache = TTLCache(name, ttl, max_bytes, stale_ttl)
+    with _REGISTRY_LOCK:
+        _REGISTRY[name] = cache
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key is not None else (args, tuple(sorted(kwargs.items())))
+            return cache.get_or_load(cache_key, lambda: fn(*args, **kwargs))
+
+        wrapper.cache = cache  # type: ignore[attr-defined]
+        wrapper.cache_clear = cache.clear  # type: ignore[attr-defined]
+        wrapper.cache_info = cache.stats  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    with _REGISTRY_LOCK:
+        caches: List[TTLCache] = list(_REGISTRY.values())
+    return {c.name: c.stats() for c in sorted(caches, key=lambda c: c.name)}
+
+
+def clear_caches(names: Optional[List[str]] = None) -> List[str]:
+    with _REGISTRY_LOCK:
+        targets = [c for n, c in _REGISTRY.items() if names is None or n in names]
+    for c in targets:
+        c.clear()
+    return sorted(c.name for c in targets)
@@ -0,0 +1,315 @@
+"""
+Shared, bounded worker pool for blocking data work (DuckDB / pandas).
+
+Endpoints that fan out per-symbol work submit it here instead of creating their
+own ThreadPoolExecutor per request, so the number of threads touching DuckDB is
+fixed no matter how many requests are in flight.
+
+  - One executor with DATA_POOL_WORKERS threads for the whole process.
+  - Per-endpoint concurrency budgets (tasks of one endpoint in flight at once),
+    so a large /prices/batch cannot starve /metrics.
+  - Admission control: a request whose tasks would push the queue past
+    DATA_POOL_MAX_QUEUE is rejected with `PoolSaturated` (mapped to 503 +
+    Retry-After), including a single request larger than the limit.
+  - Queue-wait metrics per endpoint (time from request to task start).
+  - `imap_unordered` yields results as tasks finish and stops early when the
+    caller cancels (e.g. a streaming client disconnected).
+
+Env:
+  DATA_POOL_WORKERS        worker threads (default 8)
+  DATA_POOL_MAX_QUEUE      queued tasks before rejecting requests (default 512)
+  DATA_POOL_QUEUE_TIMEOUT  seconds without a free endpoint slot before rejecting (default 30)
+  DATA_POOL_RETRY_AFTER    Retry-After seconds on rejection (default 2)
+  DATA_POOL_BUDGETS        per-endpoint budgets, e.g. "metrics=4,prices_batch=6"
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+DEFAULT_BUDGETS: Dict[str, int] = {
+    "metrics": 6,
+    "metadata": 8,
+    "prices_batch": 8,
+    "backtest": 4,
+}
+
+_WAIT_SAMPLES = 1000
+# How often imap_unordered re-checks its cancel event and the endpoint budget.
+_POLL_SECONDS = 0.05
+
+
+class PoolSaturated(Exception):
+    """Raised when the pool cannot accept more work; callers should answer 503."""
+
+    def __init__(self, endpoint: str, retry_after: int, reason: str):
+        super().__init__(f"{endpoint}: {reason}")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _parse_budgets(raw: str) -> Dict[str, int]:
+    budgets: Dict[str, int] = {}
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        name, value = part.split("=", 1)
+        try:
+            budgets[name.strip()] = max(1, int(value))
+        except ValueError:
+            continue
+    return budgets
+
+
+class _EndpointStats:
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.semaphore = threading.BoundedSemaphore(budget)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queued = 0
+        self.running = 0
+        self.waits: Deque[float] = deque(maxlen=_WAIT_SAMPLES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        if waits:
+            p50 = waits[len(waits) // 2]
+            p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))]
+            mean = sum(waits) / len(waits)
+        else:
+            p50 = p95 = mean = 0.0
+        return {
+            "budget": self.budget,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "queued": self.queued,
+            "running": self.running,
+            "queue_wait_ms": {
+                "mean": round(mean * 1000, 2),
+                "p50": round(p50 * 1000, 2),
+                "p95": round(p95 * 1000, 2),
+                "max": round((waits[-1] if waits else 0.0) * 1000, 2),
+                "samples": len(waits),
+            },
+        }
+
+
+class DataWorkPool:
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int,
+        budgets: Optional[Dict[str, int]] = None,
+    ):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(1, int(max_queue))
+        self.queue_timeout = float(queue_timeout)
+        self.retry_after = max(1, int(retry_after))
+        self._budgets = dict(budgets or {})
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="data-pool")
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, _EndpointStats] = {}
+        self._queued = 0
+        self._local = threading.local()
+
+    def _endpoint(self, name: str) -> _EndpointStats:
+        stats = self._endpoints.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self._endpoints.get(name)
+                if stats is None:
+                    budget = self._budgets.get(name, self.max_workers)
+                    stats = _EndpointStats(max(1, min(int(budget), self.max_workers)))
+                    self._endpoints[name] = stats
+        return stats
+
+    def _run(self, stats: _EndpointStats, fn: Callable[[Any], Any], item: Any, enqueued_at: float) -> Any:
+        wait = time.perf_counter() - enqueued_at
+        with self._lock:
+            stats.waits.append(wait)
+            stats.queued -= 1
+            stats.running += 1
+            self._queued -= 1
+        self._local.in_pool = True
+        ok = False
+        try:
+            result = fn(item)
+            ok = True
+            return result
+        finally:
+            self._local.in_pool = False
+            stats.semaphore.release()
+            with self._lock:
+                stats.running -= 1
+                if ok:
+                    stats.completed += 1
+                else:
+                    stats.failed += 1
+
+    def _admit(self, endpoint: str, stats: _EndpointStats, count: int) -> None:
+        """Count `count` new tasks as queued, or raise PoolSaturated if that would exceed max_queue."""
+        with self._lock:
+            if self._queued + count > self.max_queue:
+                stats.rejected += 1
+                raise PoolSaturated(
+                    endpoint,
+                    self.retry_after,
+                    f"queue full ({self._queued} tasks waiting, {count} requested, limit {self.max_queue})",
+                )
+            self._queued += count
+            stats.queued += count
+            stats.submitted += count
+
+    def map(self, endpoint: str, fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """
+        Run `fn` over `items` on the shared pool and return results in order.
+
+        Raises PoolSaturated if the request's items do not fit in the pool queue or
+        no endpoint slot frees up within `queue_timeout` seconds.
+        Calls made from inside a pool worker run inline to avoid deadlock.
+        """
+        items = list(items)
+        if not items:
+            return []
+        if getattr(self._local, "in_pool", False):
+            return [fn(item) for item in items]
+
+        stats = self._endpoint(endpoint)
+        self._admit(endpoint, stats, len(items))
+
+        futures: List[Future] = []
+        enqueued_at = time.perf_counter()
+        for pos, item in enumerate(items):
+            if not stats.semaphore.acquire(timeout=self.queue_timeout):
+                unsubmitted = len(items) - pos
+                with self._lock:
+                    self._queued -= unsubmitted
+                    stats.queued -= unsubmitted
+                    stats.rejected += 1
+                for fut in futures:
+                    if fut.cancel():
+                        stats.semaphore.release()
+                        with self._lock:
+                            self._queued -= 1
+                            stats.queued -= 1
+                raise PoolSaturated(endpoint, self.retry_after, f"budget wait exceeded {self.queue_timeout:.0f}s")
+            futures.append(self._executor.submit(self._run, stats, fn, item, enqueued_at))
+        return [fut.result() for fut in futures]
+
+    def imap_unordered(
+        self,
+        endpoint: str,
+        fn: Callable[[Any], Any],
+        items: Iterable[Any],
+        cancel: Optional[threading.Event] = None,
+    ) -> Iterator[Tuple[int, Any]]:
+        """
+        Like `map`, but yields (index, result) as soon as each task finishes.
+
+        Tasks are submitted as endpoint slots free up, so early results arrive
+        while later items are still waiting. Setting `cancel` (or closing the
+        generator) stops submitting and drops tasks that have not started;
+        running tasks finish in the background. A task's exception is raised
+        when its result is reached.
+        """
+        items = list(items)
+        if not items:
+            return
+        if getattr(self._local, "in_pool", False):
+            for index, item in enumerate(items):
+                if cancel is not None and cancel.is_set():
+                    return
+                yield index, fn(item)
+            return
+
+        stats = self._endpoint(endpoint)
+        self._admit(endpoint, stats, len(items))
+
+        pending: Dict[Future, int] = {}
+        submitted = 0
+        enqueued_at = time.perf_counter()
+        slot_wait_start = enqueued_at
+        try:
+            while submitted < len(items) or pending:
+                if cancel is not None and cancel.is_set():
+                    return
+                if submitted < len(items):
+                    if pending:
+                        acquired = stats.semaphore.acquire(blocking=False)
+                    else:
+                        acquired = stats.semaphore.acquire(timeout=_POLL_SECONDS)
+                    if acquired:
+                        fut = self._executor.submit(self._run, stats, fn, items[submitted], enqueued_at)
+                        pending[fut] = submitted
+                        submitted += 1
+                        slot_wait_start = time.perf_counter()
+                        continue
+                    if time.perf_counter() - slot_wait_start > self.queue_timeout:
+                        with self._lock:
+                            stats.rejected += 1
+                        raise PoolSaturated(endpoint, self.retry_after, f"budget wait exceeded {self.queue_timeout:.0f}s")
+                if pending:
+                    done, _not_done = wait(list(pending), timeout=_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        yield pending.pop(fut), fut.result()
+        finally:
+            dropped = len(items) - submitted
+            for fut in pending:
+                if fut.cancel():
+                    stats.semaphore.release()
+                    dropped += 1
+            if dropped:
+                with self._lock:
+                    self._queued -= dropped
+                    stats.queued -= dropped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "endpoints": {name: s.snapshot() for name, s in sorted(self._endpoints.items())},
+            }
+
+
+_POOL: Optional[DataWorkPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_data_pool() -> DataWorkPool:
+    """Process-wide pool, configured from env on first use."""
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                budgets = dict(DEFAULT_BUDGETS)
+                budgets.update(_parse_budgets(os.getenv("DATA_POOL_BUDGETS", "")))
+                _POOL = DataWorkPool(
+                    max_workers=_env_int("DATA_POOL_WORKERS", 8),
+                    max_queue=_env_int("DATA_POOL_MAX_QUEUE", 512),
+                    queue_timeout=float(_env_int("DATA_POOL_QUEUE_TIMEOUT", 30)),
+                    retry_after=_env_int("DATA_POOL_RETRY_AFTER", 2),
+                    budgets=budgets,
+                )
+    return _POOL
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from defeatbeta_api.utils.util import validate_llm_cache_directory
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class LLMCache:
+    """
+    Cached, bounded LLM calls shared by every caller in the process.
+
+    Responses are stored on disk (one JSON file per key) keyed by a sha256 over the
+    parts the caller passes: prompt template, model, call parameters and input text.
+    Repeating a call over unchanged input therefore makes no model call. Model calls
+    run while holding one of `concurrency` slots, and `map` fans work out on at most
+    that many threads.
+    """
+
+    def __init__(self, directory: str, concurrency: int = 4, enabled: bool = True):
+        self.directory = Path(directory)
+        self.concurrency = max(1, int(concurrency))
+        self.enabled = enabled
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, int] = {"cache_hits": 0, "cache_misses": 0, "model_calls": 0}
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        hasher = hashlib.sha256()
+        for part in parts:
+            hasher.update(part.encode("utf-8"))
+            hasher.update(b"\x00")
+        return hasher.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _bump(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] = self._stats.get(name, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        """Cache hits/misses and real model calls made through this cache."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                content = json.load(f).get("content")
+            return content if isinstance(content, str) else None
+        except Exception:
+            return None
+
+    def put(self, key: str, model: str, content: str) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump({"model": model, "created_at": time.time(), "content": content}, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            pass
+
+    def delete(self, key: str) -> None:
+        """Drop the stored response for `key` (e.g. one that no longer parses)."""
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def complete(self, key: str, model: str, call: Callable[[], str]) -> str:
+        """
+        Cached text for `key`, or the text `call()` returns (then stored under `key`).
+
+        `call` runs while holding a concurrency slot; failures are not cached.
+        """
+        if self.enabled:
+            cached = self.get(key)
+            if cached is not None:
+                self._bump("cache_hits")
+                return cached
+            self._bump("cache_misses")
+        with self._slots:
+            self._bump("model_calls")
+            content = call()
+        if self.enabled:
+            self.put(key, model, content)
+        return content
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """`fn` over `items` in order, on at most `concurrency` threads."""
+        items = list(items)
+        workers = min(self.concurrency, len(items))
+        if workers <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(fn, items))
+
+
+_LLM_CACHE: Optional[LLMCache] = None
+_LLM_CACHE_LOCK = threading.Lock()
+
+
+def _env_enabled(name: str) -> bool:
+    return os.getenv(name, "1") not in ("0", "false", "FALSE", "no", "NO", "off", "OFF")
+
+
+def get_llm_cache() -> LLMCache:
+    """
+    The process-wide LLMCache.
+
+    Configured from env on first use unless an application installed its own with
+    `set_llm_cache`: LLM_CACHE (0 disables the disk cache), LLM_CACHE_DIR
+    (default /tmp/defeatbeta/llm_cache) and LLM_CONCURRENCY (default 4).
+    """
+    global _LLM_CACHE
+    if _LLM_CACHE is None:
+        with _LLM_CACHE_LOCK:
+            if _LLM_CACHE is None:
+                _LLM_CACHE = LLMCache(
+                    os.getenv("LLM_CACHE_DIR") or validate_llm_cache_directory(),
+                    concurrency=int(os.getenv("LLM_CONCURRENCY", "4")),
+                    enabled=_env_enabled("LLM_CACHE"),
+                )
+    return _LLM_CACHE
+
+
+def set_llm_cache(cache: LLMCache) -> LLMCache:
+    """Install `cache` as the process-wide LLMCache (e.g. with app-specific settings)."""
+    global _LLM_CACHE
+    with _LLM_CACHE_LOCK:
+        _LLM_CACHE = cache
+    return cache
+
+
+def json_key_part(value: Any) -> str:
+    """Stable text form of a JSON-serializable cache key part (tool schemas, params)."""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
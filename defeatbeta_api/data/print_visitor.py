@@ -15,11 +15,10 @@ class PrintVisitor(StatementVisitor):
         self.table_data = []
         self.headers = []
         self.parent_index = []
-        self.data = pd.DataFrame()
+        self.rows = []
 
     def visit_title(self, fields: List[str]) -> None:
         self.headers = fields
-        self.data = pd.DataFrame(columns=fields)
 
     def visit_row(self,
                   parent_item: Optional[FinanceItem],
@@ -55,10 +54,12 @@ class PrintVisitor(StatementVisitor):
         if has_children:
             self.parent_index.append(item)
         self.table_data.append(row_data)
-        self.data.loc[len(self.data)] = frame
+        self.rows.append(frame)
 
     def get_statement(self) -> Statement:
-        statement = Statement(self.data, self._get_table_string())
+        # One DataFrame for all rows; appending row by row copies the frame each time.
+        data = pd.DataFrame(self.rows, columns=self.headers, dtype=object) if self.rows else pd.DataFrame(columns=self.headers)
+        statement = Statement(data, self._get_table_string())
         return statement
 
     def _get_table_string(self) -> str:
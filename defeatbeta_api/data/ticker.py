@@ -2772,11 +2772,15 @@ class Ticker:
                        finance_type=finance_type,
                        period_type=period_type)
         df = self.duckdb_client.query(sql)
-        stock_statements = self._dataframe_to_stock_statements(df=df)
+        return self.statement_from_rows(df, finance_type)
+
+    @staticmethod
+    def statement_from_rows(df: pd.DataFrame, finance_type: str) -> Statement:
+        stock_statements = Ticker._dataframe_to_stock_statements(df=df)
         if finance_type == income_statement:
             template_type = income_statement_template_type(df)
             template = load_finance_template(income_statement, template_type)
-            finance_values_map = self._get_finance_values_map(statements=stock_statements, finance_template=template)
+            finance_values_map = Ticker._get_finance_values_map(statements=stock_statements, finance_template=template)
             stmt = IncomeStatement(finance_template=template, income_finance_values=finance_values_map)
             printer = PrintVisitor()
             stmt.accept(printer)
@@ -2784,7 +2788,7 @@ class Ticker:
         elif finance_type == balance_sheet:
             template_type = balance_sheet_template_type(df)
             template = load_finance_template(balance_sheet, template_type)
-            finance_values_map = self._get_finance_values_map(statements=stock_statements, finance_template=template)
+            finance_values_map = Ticker._get_finance_values_map(statements=stock_statements, finance_template=template)
             stmt = BalanceSheet(finance_template=template, income_finance_values=finance_values_map)
             printer = PrintVisitor()
             stmt.accept(printer)
@@ -2792,7 +2796,7 @@ class Ticker:
         elif finance_type == cash_flow:
             template_type = cash_flow_template_type(df)
             template = load_finance_template(cash_flow, template_type)
-            finance_values_map = self._get_finance_values_map(statements=stock_statements, finance_template=template)
+            finance_values_map = Ticker._get_finance_values_map(statements=stock_statements, finance_template=template)
             stmt = BalanceSheet(finance_template=template, income_finance_values=finance_values_map)
             printer = PrintVisitor()
             stmt.accept(printer)
@@ -2804,16 +2808,18 @@ class Ticker:
     def _dataframe_to_stock_statements(df: pd.DataFrame) -> List[StockStatement]:
         statements = []
 
-        for _, row in df.iterrows():
+        columns = ['symbol', 'report_date', 'item_name', 'item_value', 'finance_type', 'period_type']
+        for row in zip(*(df[column].tolist() for column in columns)):
+            symbol, report_date, item_name, raw_value, finance_type, period_type = row
             try:
-                item_value = Decimal(str(row['item_value'])) if not pd.isna(row['item_value']) else None
+                item_value = Decimal(str(raw_value)) if not pd.isna(raw_value) else None
                 statement = StockStatement(
-                    symbol=str(row['symbol']),
-                    report_date=str(row['report_date']),
-                    item_name=str(row['item_name']),
+                    symbol=str(symbol),
+                    report_date=str(report_date),
+                    item_name=str(item_name),
                     item_value=item_value,
-                    finance_type=str(row['finance_type']),
-                    period_type=str(row['period_type'])
+                    finance_type=str(finance_type),
+                    period_type=str(period_type)
                 )
                 statements.append(statement)
             except Exception as e:
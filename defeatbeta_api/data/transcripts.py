@@ -1,16 +1,14 @@
+import hashlib
 import json
 import logging
 import re
 import sys
 import time
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 import pandas as pd
 from openai import OpenAI
-from rich.console import Console
-from rich.live import Live
-from rich.panel import Panel
 from tabulate import tabulate
 try:
     from IPython.core.display import display, HTML
@@ -18,12 +16,52 @@ except ImportError:
     from IPython.display import display
     from IPython.core.display import HTML
 
+from defeatbeta_api.client.llm_cache import LLMCache, get_llm_cache, json_key_part
 from defeatbeta_api.client.openai_conf import OpenAIConfiguration
 from defeatbeta_api.utils.util import load_transcripts_summary_prompt_temp, load_transcripts_summary_tools_def, \
     unit_map, load_transcripts_analyze_change_prompt, load_transcripts_analyze_change_tools, \
     load_transcripts_analyze_forecast_prompt, load_transcripts_analyze_forecast_tools, nltk_sentences, in_notebook
 
 
+# Paragraph characters per analysis prompt; longer transcripts are split into several prompts.
+TRANSCRIPT_CHUNK_CHARS = 24000
+
+ANALYZE_SYSTEM_PROMPT = "You are a precise financial analyst. Your task is to analyze every single sentence in the `sentences` array of the provided `earnings_call_transcripts`."
+
+
+def _chunk_paragraphs(paragraphs: List[Dict[str, Any]], max_chars: int) -> List[List[Dict[str, Any]]]:
+    """Consecutive paragraphs grouped so each group's JSON stays within `max_chars` (0 = one group)."""
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    size = 0
+    for paragraph in paragraphs:
+        length = len(json.dumps(paragraph, ensure_ascii=False))
+        if current and max_chars > 0 and size + length > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(paragraph)
+        size += length
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _parse_tool_arguments(raw_args: str) -> Dict[str, Any]:
+    try:
+        clean_args = raw_args.split("</tool_call>")[0].strip()
+        open_braces = clean_args.count('{')
+        close_braces = clean_args.count('}')
+        if open_braces > close_braces:
+            clean_args += '}' * (open_braces - close_braces)
+        elif close_braces > open_braces:
+            clean_args = clean_args.rstrip('}' * (close_braces - open_braces))
+        return json.loads(clean_args)
+    except Exception as e:
+        raise ValueError(
+            f"Failed to parse tool_call arguments: {raw_args}, error: {e}"
+        )
+
+
 def _unnest(record: pd.DataFrame) -> pd.DataFrame:
     transcripts_data = record["transcripts"].iloc[0]
     df_paragraphs = pd.json_normalize(transcripts_data)
@@ -52,117 +90,14 @@ class Transcripts:
         df_paragraphs = _unnest(record)
         return df_paragraphs
 
-    def analyze_financial_metrics_forecast_for_future_with_ai(self, fiscal_year: int, fiscal_quarter: int, llm: OpenAI, config: Optional[OpenAIConfiguration] = None) -> pd.DataFrame:
+    def analyze_financial_metrics_forecast_for_future_with_ai(self, fiscal_year: int, fiscal_quarter: int, llm: OpenAI, config: Optional[OpenAIConfiguration] = None, chunk_chars: int = TRANSCRIPT_CHUNK_CHARS) -> pd.DataFrame:
         conf = config if config is not None else OpenAIConfiguration()
-        template = load_transcripts_analyze_forecast_prompt()
-        pattern_transcripts = r"\{earnings_call_transcripts\}"
-        transcript = self.get_transcript(fiscal_year, fiscal_quarter)
-        transcript_json = transcript.to_dict(orient="records")
-        for paragraph in transcript_json:
-            content = paragraph.pop("content")
-            sentences = nltk_sentences(content)
-            paragraph["sentences"] = sentences
-        transcript_str = json.dumps(transcript_json, ensure_ascii=False, indent=2)
-        prompt = re.sub(pattern_transcripts, transcript_str, template)
-
-        messages = [{
-            "role": "system",
-            "content": "You are a precise financial analyst. Your task is to analyze every single sentence in the `sentences` array of the provided `earnings_call_transcripts`."
-            },
-            {
-                'role': 'user',
-                'content': prompt
-            }]
-        tools = load_transcripts_analyze_forecast_tools()
-
-        start = time.perf_counter()
-        response = llm.chat.completions.create(
-            model=conf.get_model(),
-            messages=messages,
-            temperature=conf.get_temperature(),
-            top_p=conf.get_top_p(),
-            stream=True,
-            tools=tools,
-            tool_choice=conf.get_tool_choice()
-        )
-
-        if not response:
-            raise ValueError(f"Invalid response from LLM: {response}")
-
-        raw_args = ""
-        prompt_tokens = 0
-        reasoning_tokens = 0
-        completion_tokens = 0
-        cursor_char = "▌"
-        panel_title = "[bold green]🧠 Thinking Step by Step[/]"
-        max_lines = 8
-        reasoning_text = ""
-        console = Console()
-        is_tty = sys.stdout.isatty()
-        with Live(console=console, refresh_per_second=20) as live:
-            for chunk in response:
-                delta = chunk.choices[0].delta
-
-                if hasattr(chunk, "usage") and chunk.usage and chunk.choices[0].finish_reason:
-                    prompt_tokens = getattr(chunk.usage, "prompt_tokens", 0)
-                    completion_tokens = getattr(chunk.usage, "completion_tokens", 0)
-                    details = getattr(chunk.usage, "completion_tokens_details", None)
-                    if details and hasattr(details, "reasoning_tokens"):
-                        reasoning_tokens = details.reasoning_tokens
-
-                if delta.reasoning_content:
-                    if is_tty:
-                        reasoning_text += delta.reasoning_content
-                        lines = reasoning_text.splitlines()
-                        visible_text = "\n".join(lines[-max_lines:])
-                        live.update(Panel(visible_text + " " + cursor_char, title=panel_title, border_style="green",
-                                          padding=(1, 2)))
-                    else:
-                        print(delta.reasoning_content, end="", flush=True)
-
-                if delta.tool_calls:
-                    raw_args += f"{delta.tool_calls[0].function.arguments}"
-            if is_tty:
-                live.update(Panel(reasoning_text, title="[bold white]🧠 Finish Think[/]", border_style="white",
-                                  padding=(1, 2)))
-
-        end = time.perf_counter()
-        elapsed = (end - start)
-
-        if raw_args == "":
-            raise ValueError(f"No tool call was made by the model. Raw message: {raw_args}")
-
-        try:
-            clean_args = raw_args.split("</tool_call>")[0].strip()
-            if isinstance(clean_args, str):
-                open_braces = clean_args.count('{')
-                close_braces = clean_args.count('}')
-                if open_braces > close_braces:
-                    clean_args += '}' * (open_braces - close_braces)
-                elif close_braces > open_braces:
-                    clean_args = clean_args.rstrip('}' * (close_braces - open_braces))
-                func_args = json.loads(clean_args)
-            else:
-                func_args = raw_args
-        except Exception as e:
-            raise ValueError(
-                f"Failed to parse tool_call arguments: {raw_args}, error: {e}"
-            )
-
-        final_metrics = func_args.get("key_sentences")
-
-        self.logger.debug(
-            f"metrics data: {func_args}, "
-            f"prompt tokens: {prompt_tokens}, "
-            f"reasoning tokens: {reasoning_tokens}, "
-            f"completion tokens: {completion_tokens}, "
-            f"infer elapsed(s): {round(elapsed, 2)}"
-        )
-
-        df = pd.DataFrame(final_metrics)
+        key_sentences = self._analyze_sentences_with_ai(
+            fiscal_year, fiscal_quarter, llm, conf,
+            load_transcripts_analyze_forecast_prompt(), load_transcripts_analyze_forecast_tools(), chunk_chars)
 
         records = []
-        for index, row in df.iterrows():
+        for row in key_sentences:
             records.append({
                 "symbol": self.ticker,
                 "fiscal_year": fiscal_year,
@@ -176,29 +111,79 @@ class Transcripts:
             })
         return pd.DataFrame(records)
 
-    def analyze_financial_metrics_change_for_this_quarter_with_ai(self, fiscal_year: int, fiscal_quarter: int, llm: OpenAI, config: Optional[OpenAIConfiguration] = None) -> pd.DataFrame:
+    def analyze_financial_metrics_change_for_this_quarter_with_ai(self, fiscal_year: int, fiscal_quarter: int, llm: OpenAI, config: Optional[OpenAIConfiguration] = None, chunk_chars: int = TRANSCRIPT_CHUNK_CHARS) -> pd.DataFrame:
         conf = config if config is not None else OpenAIConfiguration()
-        template = load_transcripts_analyze_change_prompt()
-        pattern_transcripts = r"\{earnings_call_transcripts\}"
+        key_sentences = self._analyze_sentences_with_ai(
+            fiscal_year, fiscal_quarter, llm, conf,
+            load_transcripts_analyze_change_prompt(), load_transcripts_analyze_change_tools(), chunk_chars)
+
+        records = []
+        for row in key_sentences:
+            if row['is_factual'] == 'N':
+                continue
+
+            records.append({
+                "symbol": self.ticker,
+                "fiscal_year": fiscal_year,
+                "fiscal_quarter": fiscal_quarter,
+                "speaker": row['speaker'],
+                "paragraph_number": row['paragraph_number'],
+                "summary": row['short_summary'],
+                "sentence": row['sentence'],
+                "direction": row['direction'],
+                "reason": row['reason']
+            })
+        return pd.DataFrame(records)
+
+    def _analyze_sentences_with_ai(self, fiscal_year: int, fiscal_quarter: int, llm: OpenAI, conf: OpenAIConfiguration,
+                                   template: str, tools: List[Dict[str, Any]], chunk_chars: int) -> List[Dict[str, Any]]:
+        """
+        `key_sentences` of the transcript, analyzed in chunks of at most `chunk_chars`
+        characters of paragraphs (0 = one chunk).
+
+        Chunks go through the shared LLMCache: unchanged chunks are answered from the
+        response cache, the rest run concurrently up to its concurrency limit.
+        Results keep transcript order.
+        """
         transcript = self.get_transcript(fiscal_year, fiscal_quarter)
-        transcript_json = transcript.to_dict(orient="records")
-        for paragraph in transcript_json:
+        paragraphs = transcript.to_dict(orient="records")
+        for paragraph in paragraphs:
             content = paragraph.pop("content")
-            sentences = nltk_sentences(content)
-            paragraph["sentences"] = sentences
-        transcript_str = json.dumps(transcript_json, ensure_ascii=False, indent=2)
-        prompt = re.sub(pattern_transcripts, transcript_str, template)
+            paragraph["sentences"] = nltk_sentences(content)
+
+        cache = get_llm_cache()
+        model = conf.get_model()
+        fixed_key_parts = (
+            hashlib.sha256(template.encode("utf-8")).hexdigest(),
+            model,
+            ANALYZE_SYSTEM_PROMPT,
+            json_key_part({
+                "temperature": conf.get_temperature(),
+                "top_p": conf.get_top_p(),
+                "tool_choice": conf.get_tool_choice(),
+                "tools": tools,
+            }),
+        )
 
-        messages = [{
-                        "role": "system",
-                        "content": "You are a precise financial analyst. Your task is to analyze every single sentence in the `sentences` array of the provided `earnings_call_transcripts`."
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }]
-        tools = load_transcripts_analyze_change_tools()
+        def analyze(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            transcript_str = json.dumps(chunk, ensure_ascii=False, indent=2)
+            prompt = re.sub(r"\{earnings_call_transcripts\}", transcript_str, template)
+            messages = [
+                {"role": "system", "content": ANALYZE_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ]
+            content = cache.complete(
+                LLMCache.key(*fixed_key_parts, prompt),
+                model,
+                lambda: json.dumps(self._stream_tool_arguments(llm, conf, messages, tools), ensure_ascii=False),
+            )
+            return json.loads(content).get("key_sentences") or []
+
+        results = cache.map(analyze, _chunk_paragraphs(paragraphs, chunk_chars))
+        return [sentence for chunk in results for sentence in chunk]
 
+    def _stream_tool_arguments(self, llm: OpenAI, conf: OpenAIConfiguration, messages: List[Dict[str, Any]],
+                               tools: List[Dict[str, Any]]) -> Dict[str, Any]:
         start = time.perf_counter()
         response = llm.chat.completions.create(
             model=conf.get_model(),
@@ -217,63 +202,28 @@ class Transcripts:
         prompt_tokens = 0
         reasoning_tokens = 0
         completion_tokens = 0
-        cursor_char = "▌"
-        panel_title = "[bold green]🧠 Thinking Step by Step[/]"
-        max_lines = 8
-        reasoning_text = ""
-        console = Console()
-        is_tty = sys.stdout.isatty()
-        with Live(console=console, refresh_per_second=20) as live:
-            for chunk in response:
-                delta = chunk.choices[0].delta
-
-                if hasattr(chunk, "usage") and chunk.usage and chunk.choices[0].finish_reason:
-                    prompt_tokens = getattr(chunk.usage, "prompt_tokens", 0)
-                    completion_tokens = getattr(chunk.usage, "completion_tokens", 0)
-                    details = getattr(chunk.usage, "completion_tokens_details", None)
-                    if details and hasattr(details, "reasoning_tokens"):
-                        reasoning_tokens = details.reasoning_tokens
-
-                if delta.reasoning_content:
-                    if is_tty:
-                        reasoning_text += delta.reasoning_content
-                        lines = reasoning_text.splitlines()
-                        visible_text = "\n".join(lines[-max_lines:])
-                        live.update(Panel(visible_text + " " + cursor_char, title=panel_title, border_style="green",
-                                          padding=(1, 2)))
-                    else:
-                        print(delta.reasoning_content, end="", flush=True)
-                if delta.tool_calls:
-                    raw_args += f"{delta.tool_calls[0].function.arguments}"
-
-            if is_tty:
-                live.update(Panel(reasoning_text, title="[bold white]🧠 Finish Think[/]", border_style="white",
-                                  padding=(1, 2)))
+        for chunk in response:
+            delta = chunk.choices[0].delta
 
-        end = time.perf_counter()
-        elapsed = (end - start)
+            if hasattr(chunk, "usage") and chunk.usage and chunk.choices[0].finish_reason:
+                prompt_tokens = getattr(chunk.usage, "prompt_tokens", 0)
+                completion_tokens = getattr(chunk.usage, "completion_tokens", 0)
+                details = getattr(chunk.usage, "completion_tokens_details", None)
+                if details and hasattr(details, "reasoning_tokens"):
+                    reasoning_tokens = details.reasoning_tokens
+
+            if getattr(delta, "reasoning_content", None):
+                self.logger.debug(delta.reasoning_content)
+
+            if delta.tool_calls:
+                raw_args += f"{delta.tool_calls[0].function.arguments}"
+
+        elapsed = time.perf_counter() - start
 
         if raw_args == "":
             raise ValueError(f"No tool call was made by the model. Raw message: {raw_args}")
 
-        try:
-            clean_args = raw_args.split("</tool_call>")[0].strip()
-            if isinstance(clean_args, str):
-                open_braces = clean_args.count('{')
-                close_braces = clean_args.count('}')
-                if open_braces > close_braces:
-                    clean_args += '}' * (open_braces - close_braces)
-                elif close_braces > open_braces:
-                    clean_args = clean_args.rstrip('}' * (close_braces - open_braces))
-                func_args = json.loads(clean_args)
-            else:
-                func_args = raw_args
-        except Exception as e:
-            raise ValueError(
-                f"Failed to parse tool_call arguments: {raw_args}, error: {e}"
-            )
-
-        final_metrics = func_args.get("key_sentences")
+        func_args = _parse_tool_arguments(raw_args)
 
         self.logger.debug(
             f"metrics data: {func_args}, "
@@ -282,26 +232,7 @@ class Transcripts:
             f"completion tokens: {completion_tokens}, "
             f"infer elapsed(s): {round(elapsed, 2)}"
         )
-
-        df = pd.DataFrame(final_metrics)
-
-        records = []
-        for index, row in df.iterrows():
-            if row['is_factual'] == 'N':
-                continue
-
-            records.append({
-                "symbol": self.ticker,
-                "fiscal_year": fiscal_year,
-                "fiscal_quarter": fiscal_quarter,
-                "speaker": row['speaker'],
-                "paragraph_number": row['paragraph_number'],
-                "summary": row['short_summary'],
-                "sentence": row['sentence'],
-                "direction": row['direction'],
-                "reason": row['reason']
-            })
-        return pd.DataFrame(records)
+        return func_args
 
     def summarize_key_financial_data_with_ai(self, fiscal_year: int, fiscal_quarter: int, llm: OpenAI, config: Optional[OpenAIConfiguration] = None) -> pd.DataFrame:
         conf = config if config is not None else OpenAIConfiguration()
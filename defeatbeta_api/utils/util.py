@@ -4,8 +4,9 @@ import os
 import platform
 import re
 import tempfile
+from functools import lru_cache
 from importlib.resources import files
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 import nltk
 import numpy as np
@@ -56,8 +57,13 @@ def validate_memory_limit(memory_limit: str) -> str:
         f"Valid units: {', '.join(valid_units)}"
     )
 
+@lru_cache(maxsize=8192)
+def _nltk_sentences_cached(content: str) -> Tuple[str, ...]:
+    return tuple(nltk.sent_tokenize(content))
+
 def nltk_sentences(content: str) -> List[str]:
-    return nltk.sent_tokenize(content)
+    # Transcript paragraphs are re-tokenized by every analyze_* call; memoize per paragraph.
+    return list(_nltk_sentences_cached(content))
 
 def _get_base_temp_dir() -> str:
     """Get the base temporary directory based on platform."""
@@ -78,6 +84,12 @@ def validate_nltk_directory() -> str:
     os.makedirs(cache_dir, exist_ok=True)
     return cache_dir
 
+def validate_llm_cache_directory() -> str:
+    """Get LLM response cache directory: /tmp/defeatbeta/llm_cache"""
+    cache_dir = os.path.join(_get_defeatbeta_root_dir(), "llm_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
 def validate_httpfs_cache_directory() -> str:
     """Get HTTPFS cache directory: /tmp/defeatbeta/cache/<version>"""
     cache_dir = os.path.join(_get_defeatbeta_root_dir(), "cache", __version__)
@@ -11,6 +11,7 @@ Usage:
     python scripts/build_analog_database.py [--lookback 180]
     python scripts/build_analog_database.py --all
 """
+import os
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
@@ -217,8 +218,11 @@ def _run_for_lookback(lookback_days: int, horizon_days: int) -> bool:
     }
     
     output_file = _output_file_for_lookback(lookback_days)
-    with open(output_file, "wb") as f:
+    # Write-then-rename: the API reloads this file while running.
+    tmp_file = output_file.with_suffix(".pkl.tmp")
+    with open(tmp_file, "wb") as f:
         pickle.dump(output_data, f)
+    os.replace(tmp_file, output_file)
     
     print(f"[OK] Saved analog database to {output_file}")
     print(f"     File size: {output_file.stat().st_size / 1024:.1f} KB")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Build the memory-mapped ETF price store (data/etf-prices-store/) from
+data/etf-prices.json.
+
+The backend rebuilds the store on its own when etf-prices.json is newer than
+it; run this after scripts/fetch_etf_prices_from_yahoo.py to do it ahead of
+the first /rrg request (or when the data directory is read-only for the API).
+
+Usage:
+    python scripts/build_etf_price_store.py
+    python scripts/build_etf_price_store.py --input data/etf-prices.json --output /srv/etf-prices-store
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from etf_price_store import DEFAULT_ETF_PRICES_PATH, DEFAULT_STORE_DIR, EtfPriceStore  # type: ignore  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=str(DEFAULT_ETF_PRICES_PATH), help="etf-prices.json path")
+    parser.add_argument("--output", default=str(DEFAULT_STORE_DIR), help="store directory")
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        print(f"ETF prices not found: {input_path} (run scripts/fetch_etf_prices_from_yahoo.py first)", file=sys.stderr)
+        return 1
+
+    t0 = time.perf_counter()
+    store = EtfPriceStore.from_json(input_path)
+    store.save(args.output)
+    print(
+        f"Wrote {len(store)} ETFs x {len(store.dates)} dates to {args.output} "
+        f"in {time.perf_counter() - t0:.2f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Build the daily cross-sectional factor panel (data/factor_panel.parquet).
+
+Reads the valuation ratio panel (see scripts/build_ratio_panel.py), attaches
+sectors from data/sector-stocks.json, derives 1/3/6-month price momentum from the
+panel's closes and scores every (date, symbol) against its sector peers with
+backend/factor_engine.py. Factors without inputs in the ratio panel (quality,
+growth, balance-sheet risk) stay empty unless --metrics supplies them.
+
+Usage:
+    python scripts/build_factor_panel.py
+    python scripts/build_factor_panel.py --start 2020-01-01 --metrics extra_metrics.parquet
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+import duckdb  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from data_io import sql_path  # type: ignore  # noqa: E402
+from factor_engine import DEFAULT_FACTOR_PANEL_PATH, compute_factor_scores, write_factor_panel  # type: ignore  # noqa: E402
+from ratio_panel import DEFAULT_PANEL_PATH, RatioPanel  # type: ignore  # noqa: E402
+
+SECTOR_STOCKS_PATH = ROOT / "data" / "sector-stocks.json"
+MOMENTUM_WINDOWS = {"return_1m": 21, "return_3m": 63, "return_6m": 126}
+
+
+def load_sector_map(path: Path) -> Dict[str, str]:
+    with path.open("r", encoding="utf-8") as f:
+        payload = json.load(f)
+    sectors: Dict[str, str] = {}
+    for sector, sector_entry in payload.items():
+        if not isinstance(sector_entry, dict):
+            continue
+        for stocks in sector_entry.values():
+            if not isinstance(stocks, list):
+                continue
+            for stock in stocks:
+                sym = stock.get("symbol") if isinstance(stock, dict) else None
+                if sym:
+                    sectors[str(sym).upper()] = str(sector)
+    return sectors
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the daily sector-relative factor panel.")
+    parser.add_argument("--ratio-panel", default=str(DEFAULT_PANEL_PATH), help="Input ratio panel parquet.")
+    parser.add_argument("--metrics", default="", help="Optional parquet/csv with extra (date, symbol, metric...) columns.")
+    parser.add_argument("--start", default="", help="First date to score (momentum still uses earlier closes).")
+    parser.add_argument("--out", default=str(DEFAULT_FACTOR_PANEL_PATH), help="Output parquet path.")
+    args = parser.parse_args()
+
+    ratio_path = Path(args.ratio_panel)
+    if not ratio_path.exists():
+        print(f"Ratio panel not found: {ratio_path} (run scripts/build_ratio_panel.py first)", file=sys.stderr)
+        return 1
+
+    t0 = time.perf_counter()
+    sectors = load_sector_map(SECTOR_STOCKS_PATH)
+    frame = RatioPanel.from_parquet(ratio_path).slice(symbols=sorted(sectors), columns=["close", "pe", "ps", "pb", "ev_ebitda"])
+    frame["sector"] = frame["symbol"].map(sectors)
+
+    closes = frame.groupby("symbol", sort=False)["close"]
+    for column, periods in MOMENTUM_WINDOWS.items():
+        frame[column] = closes.pct_change(periods=periods, fill_method=None)
+
+    if args.metrics:
+        extra = duckdb.sql(f"SELECT * FROM '{sql_path(args.metrics)}'").df()
+        extra["date"] = pd.to_datetime(extra["date"])
+        extra["symbol"] = extra["symbol"].astype(str).str.upper()
+        frame = frame.merge(extra, on=["date", "symbol"], how="left", suffixes=("", "_extra"))
+
+    if args.start:
+        frame = frame[frame["date"] >= pd.Timestamp(args.start)]
+
+    scores = compute_factor_scores(frame)
+    write_factor_panel(scores, args.out)
+    print(
+        f"[factor-panel] rows={len(scores)} symbols={scores['symbol'].nunique()} "
+        f"dates={scores['date'].nunique()} in {time.perf_counter() - t0:.1f}s -> {args.out}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
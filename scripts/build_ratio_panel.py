@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Build or incrementally update the daily valuation ratio panel (data/ratio_panel.parquet).
+
+One vectorized DuckDB pass per symbol batch computes close, shares, market cap,
+TTM EPS/revenue/EBITDA, book value and P/E, P/S, P/B, EV/EBITDA for every
+trading day. Re-running recomputes each symbol from --recompute-days (default 180)
+before that symbol's own last date, so restated quarters and symbols that lagged
+the rest of the panel are brought up to date; those rows replace the stored ones.
+Symbols that are new to the universe get their full history.
+
+Usage:
+    python scripts/build_ratio_panel.py                 # universe from data/sector-stocks.json
+    python scripts/build_ratio_panel.py --symbols AAPL,MSFT --full
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "backend"))
+
+os.environ.setdefault("DEFEATBETA_NO_WELCOME", "1")
+os.environ.setdefault("DEFEATBETA_NO_NLTK_DOWNLOAD", "1")
+
+from ratio_panel import DEFAULT_PANEL_PATH, DEFAULT_RECOMPUTE_DAYS, update_ratio_panel  # type: ignore  # noqa: E402
+
+SECTOR_STOCKS_PATH = ROOT / "data" / "sector-stocks.json"
+
+
+def load_universe(path: Path) -> List[str]:
+    with path.open("r", encoding="utf-8") as f:
+        payload = json.load(f)
+    symbols = set()
+    for sector_entry in payload.values():
+        if not isinstance(sector_entry, dict):
+            continue
+        for stocks in sector_entry.values():
+            if not isinstance(stocks, list):
+                continue
+            for stock in stocks:
+                sym = stock.get("symbol") if isinstance(stock, dict) else None
+                if sym:
+                    symbols.add(str(sym).upper())
+    return sorted(symbols)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build/update the daily valuation ratio panel.")
+    parser.add_argument("--symbols", default="", help="Comma list of symbols (default: data/sector-stocks.json universe).")
+    parser.add_argument("--out", default=str(DEFAULT_PANEL_PATH), help="Output parquet path.")
+    parser.add_argument("--lag-days", type=int, default=0, help="Days after period end before fundamentals are used.")
+    parser.add_argument("--full", action="store_true", help="Rebuild from scratch instead of updating incrementally.")
+    parser.add_argument(
+        "--recompute-days",
+        type=int,
+        default=DEFAULT_RECOMPUTE_DAYS,
+        help="Days before each symbol's last panel date to recompute (picks up restatements).",
+    )
+    args = parser.parse_args()
+
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()] or load_universe(SECTOR_STOCKS_PATH)
+    if not symbols:
+        print("No symbols to process.", file=sys.stderr)
+        return 1
+
+    from defeatbeta_api.client.duckdb_client import get_duckdb_client
+    from defeatbeta_api.client.hugging_face_client import HuggingFaceClient
+    from defeatbeta_api.utils.const import (
+        stock_prices,
+        stock_shares_outstanding,
+        stock_statement,
+        stock_tailing_eps,
+    )
+
+    hf = HuggingFaceClient()
+    urls = {name: hf.get_url_path(name) for name in (stock_prices, stock_shares_outstanding, stock_tailing_eps, stock_statement)}
+    duckdb_client = get_duckdb_client()
+
+    t0 = time.perf_counter()
+    stats = update_ratio_panel(
+        duckdb_client.query,
+        urls,
+        symbols,
+        path=args.out,
+        lag_days=args.lag_days,
+        full=args.full,
+        recompute_days=args.recompute_days,
+    )
+    print(
+        f"[ratio-panel] symbols={len(symbols)} rows_added={stats['rows_added']} rows_recomputed={stats['rows_recomputed']} "
+        f"rows_total={stats['rows_total']} in {time.perf_counter() - t0:.1f}s -> {args.out}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
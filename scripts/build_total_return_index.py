@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Build or incrementally update the split/dividend-adjusted total-return index
+(data/total_return_index.parquet + data/total_return_index_events.parquet).
+
+Backtests read end prices, split factors and dividends for any window from this
+index (two lookups per symbol) instead of querying corporate actions per window.
+Re-running appends only trading days after each symbol's last stored date.
+
+Usage:
+    python scripts/build_total_return_index.py                 # universe from data/sector-stocks.json
+    python scripts/build_total_return_index.py --symbols AAPL,MSFT --full
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "backend"))
+
+os.environ.setdefault("DEFEATBETA_NO_WELCOME", "1")
+os.environ.setdefault("DEFEATBETA_NO_NLTK_DOWNLOAD", "1")
+
+from total_return import DEFAULT_INDEX_PATH, update_total_return_index  # type: ignore  # noqa: E402
+
+SECTOR_STOCKS_PATH = ROOT / "data" / "sector-stocks.json"
+
+
+def load_universe(path: Path) -> List[str]:
+    with path.open("r", encoding="utf-8") as f:
+        payload = json.load(f)
+    symbols = set()
+    for sector_entry in payload.values():
+        if not isinstance(sector_entry, dict):
+            continue
+        for stocks in sector_entry.values():
+            if not isinstance(stocks, list):
+                continue
+            for stock in stocks:
+                sym = stock.get("symbol") if isinstance(stock, dict) else None
+                if sym:
+                    symbols.add(str(sym).upper())
+    return sorted(symbols)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build/update the total-return index.")
+    parser.add_argument("--symbols", default="", help="Comma list of symbols (default: data/sector-stocks.json universe).")
+    parser.add_argument("--out", default=str(DEFAULT_INDEX_PATH), help="Output parquet path.")
+    parser.add_argument("--full", action="store_true", help="Rebuild from scratch instead of appending new days.")
+    args = parser.parse_args()
+
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()] or load_universe(SECTOR_STOCKS_PATH)
+    if not symbols:
+        print("No symbols to process.", file=sys.stderr)
+        return 1
+
+    from defeatbeta_api.client.duckdb_client import get_duckdb_client
+    from defeatbeta_api.client.hugging_face_client import HuggingFaceClient
+    from defeatbeta_api.utils.const import stock_dividend_events, stock_prices, stock_split_events
+
+    hf = HuggingFaceClient()
+    urls = {name: hf.get_url_path(name) for name in (stock_prices, stock_split_events, stock_dividend_events)}
+    duckdb_client = get_duckdb_client()
+
+    t0 = time.perf_counter()
+    stats = update_total_return_index(
+        duckdb_client.query,
+        urls,
+        symbols,
+        path=args.out,
+        full=args.full,
+    )
+    print(
+        f"[total-return] symbols={len(symbols)} rows_added={stats['rows_added']} events={stats['events']} "
+        f"rows_total={stats['rows_total']} in {time.perf_counter() - t0:.1f}s -> {args.out}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
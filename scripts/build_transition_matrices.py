@@ -11,6 +11,7 @@ Usage:
     python scripts/build_transition_matrices.py [--lookback 180] [--horizon 30]
     python scripts/build_transition_matrices.py --all [--horizon 30]
 """
+import os
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
@@ -181,8 +182,11 @@ def _run_for_lookback(lookback_days: int, horizon_days: int) -> bool:
     }
     
     output_file = _output_file_for_lookback(lookback_days)
-    with open(output_file, "w") as f:
+    # Write-then-rename: the API reloads this file while running.
+    tmp_file = output_file.with_suffix(".json.tmp")
+    with open(tmp_file, "w") as f:
         json.dump(output_data, f, indent=2)
+    os.replace(tmp_file, output_file)
     
     print(f"[OK] Saved transition matrices to {output_file}")
     
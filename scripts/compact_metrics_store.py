@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Compact the persistent metrics store (data/metrics_cache.sqlite3).
+
+Deletes rows for all but the most recently written dataset versions and VACUUMs
+the file. Safe to run while the backend is up (SQLite WAL mode).
+
+Usage:
+    python scripts/compact_metrics_store.py                 # keep the latest version
+    python scripts/compact_metrics_store.py --keep-versions 2
+    python scripts/compact_metrics_store.py --list
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from metrics_store import DEFAULT_METRICS_STORE_PATH, MetricsStore  # type: ignore  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compact the persistent metrics store.")
+    parser.add_argument("--path", default=str(DEFAULT_METRICS_STORE_PATH), help="SQLite store path.")
+    parser.add_argument("--keep-versions", type=int, default=1, help="Number of most recent dataset versions to keep.")
+    parser.add_argument("--list", action="store_true", help="Only list stored versions.")
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"Metrics store not found: {path}", file=sys.stderr)
+        return 1
+
+    store = MetricsStore(path)
+    for v in store.versions():
+        print(f"[metrics-store] version={v['data_version']} symbols={v['symbols']}")
+    if args.list:
+        return 0
+
+    size_before = path.stat().st_size
+    stats = store.compact(keep_versions=args.keep_versions)
+    print(
+        f"[metrics-store] deleted={stats['deleted']} remaining={stats['remaining']} "
+        f"versions_kept={stats['versions_kept']} size {size_before} -> {path.stat().st_size} bytes"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -11,21 +11,24 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 
-from backend.insight_jobs import generate_transcript_insights_for_symbol  # type: ignore
+from backend.insight_jobs import generate_transcript_insights_for_symbols, get_llm_stats  # type: ignore
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Generate TranscriptInsights via Gemini.")
-    parser.add_argument("--symbol", required=True, help="Ticker symbol (e.g., AMD)")
+    parser.add_argument("--symbol", required=True, help="Ticker symbol or comma list (e.g., AMD,NVDA)")
     parser.add_argument("--limit", type=int, default=2, help="Max quarters to process")
     args = parser.parse_args()
 
-    generated = generate_transcript_insights_for_symbol(args.symbol, limit=args.limit)
-    if generated:
-        for path in generated:
-            print(f"[transcripts] Saved insights -> {path}")
-    else:
-        print(f"[transcripts] No transcripts processed for {args.symbol}")
+    symbols = [s.strip() for s in args.symbol.split(",") if s.strip()]
+    results = generate_transcript_insights_for_symbols(symbols, limit=args.limit)
+    for symbol, generated in results.items():
+        if generated:
+            for path in generated:
+                print(f"[transcripts] Saved insights -> {path}")
+        else:
+            print(f"[transcripts] No transcripts processed for {symbol}")
+    print(f"[transcripts] LLM stats: {get_llm_stats()}")
 
 
 if __name__ == "__main__":
@@ -14,6 +14,7 @@ This script:
 from __future__ import annotations
 
 import json
+import os
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -205,10 +206,13 @@ def main():
         "data": all_results,
     }
     
-    RRG_HISTORY_PATH.write_text(
+    # Write-then-rename so a running API never reads a half-written file.
+    tmp_path = RRG_HISTORY_PATH.with_suffix(".json.tmp")
+    tmp_path.write_text(
         json.dumps(output_data, indent=2, sort_keys=True),
         encoding="utf-8"
     )
+    os.replace(tmp_path, RRG_HISTORY_PATH)
     
     # Keep output ASCII-only for Windows consoles with legacy encodings.
     print(f"\n[rrg-history] OK Generated {len(all_results)} RRG data points")
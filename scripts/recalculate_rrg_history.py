@@ -36,11 +36,14 @@ import argparse
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
 # Import corrected RRG calculation functions
 from rrg_history import calculate_rrg_corrected, determine_quadrant
+from rounding import near_rounding_tie
+from rrg_engine import CORRECTED, rrg_at
 
 
 def _build_duckdb_config():
@@ -264,54 +267,61 @@ def recalculate_rrg_for_symbol(
         print(f"[WARN] No price data for {symbol}, skipping")
         return []
     
-    # Calculate RRG for each date in range
-    results = []
+    # Weekly evaluation dates, each with the calendar window before it. All of
+    # them are computed in one pass by rrg_engine on benchmark-aligned arrays.
+    eval_dates = []
     current_date = start_date
-    
     while current_date <= end_date:
-        date_str = current_date.strftime("%Y-%m-%d")
-        
-        # Get lookback window
-        lookback_start = current_date - timedelta(days=window_days)
-        
-        # Collect aligned prices
-        stock_prices = []
-        bench_prices = []
-        dates = []
-        
-        check_date = lookback_start
-        while check_date <= current_date:
-            check_str = check_date.strftime("%Y-%m-%d")
-            if check_str in symbol_prices and check_str in benchmark_prices:
-                stock_prices.append(symbol_prices[check_str])
-                bench_prices.append(benchmark_prices[check_str])
-                dates.append(check_str)
-            check_date += timedelta(days=1)
-        
+        eval_dates.append(current_date)
+        current_date += timedelta(days=7)
+    if not eval_dates:
+        return []
+    
+    bench_dates = sorted(benchmark_prices)
+    days = np.array(bench_dates, dtype="datetime64[D]")
+    bench = np.array([benchmark_prices[d] for d in bench_dates], dtype=np.float64)
+    closes = np.array([symbol_prices.get(d, np.nan) for d in bench_dates], dtype=np.float64)
+    
+    targets = np.array([d.strftime("%Y-%m-%d") for d in eval_dates], dtype="datetime64[D]")
+    ends = np.searchsorted(days, targets, side="right") - 1
+    starts = np.searchsorted(days, targets - np.timedelta64(window_days, "D"), side="left")
+    usable = np.flatnonzero(ends >= starts)
+    if not len(usable):
+        return []
+    
+    rs_ratio, rs_momentum, points = rrg_at(closes, bench, ends[usable], starts[usable], CORRECTED)
+    rs_ratio, rs_momentum, points = rs_ratio[:, 0], rs_momentum[:, 0], points[:, 0]
+    
+    # Values where summation-order noise could change the rounded output or the
+    # quadrant are recomputed with the list-based reference implementation.
+    recheck = (
+        near_rounding_tie(rs_ratio, 2) | near_rounding_tie(rs_momentum, 2)
+        | (np.abs(rs_ratio - 100) < 1e-9) | (np.abs(rs_momentum - 100) < 1e-9)
+    )
+    
+    results = []
+    for k, i in enumerate(usable):
         # Need at least 252 trading days for 52-week average
-        if len(stock_prices) >= 252:
-            try:
-                rs_ratio, rs_momentum = calculate_rrg_corrected(
-                    stock_prices,
-                    bench_prices,
-                    lookback_days
-                )
-                
-                quadrant = determine_quadrant(rs_ratio, rs_momentum)
-                
-                results.append({
-                    "symbol": symbol,
-                    "date": date_str,
-                    "lookback_days": lookback_days,
-                    "rsRatio": round(rs_ratio, 2),
-                    "rsMomentum": round(rs_momentum, 2),
-                    "quadrant": quadrant
-                })
-            except Exception as e:
-                print(f"[ERROR] Failed to calculate RRG for {symbol} on {date_str}: {e}")
+        if points[k] < 252:
+            continue
+        ratio, momentum = float(rs_ratio[k]), float(rs_momentum[k])
+        if recheck[k]:
+            rows = slice(starts[i], ends[i] + 1)
+            mask = np.isfinite(closes[rows]) & np.isfinite(bench[rows])
+            ratio, momentum = calculate_rrg_corrected(
+                closes[rows][mask].tolist(),
+                bench[rows][mask].tolist(),
+                lookback_days
+            )
         
-        # Move to next week (weekly data points)
-        current_date += timedelta(days=7)
+        results.append({
+            "symbol": symbol,
+            "date": eval_dates[i].strftime("%Y-%m-%d"),
+            "lookback_days": lookback_days,
+            "rsRatio": round(ratio, 2),
+            "rsMomentum": round(momentum, 2),
+            "quadrant": determine_quadrant(ratio, momentum)
+        })
     
     return results
 
@@ -359,8 +369,10 @@ def _run_recalculation(lookback_days: int, start_date: datetime, end_date: datet
     # Save results
     print(f"[3/3] Saving results...")
     output_file = OUTPUT_DIR / f"rrg_history_{lookback_days}d.json"
+    # Write-then-rename so a running API never reads a half-written file.
+    tmp_file = output_file.with_suffix(".json.tmp")
     
-    with open(output_file, "w") as f:
+    with open(tmp_file, "w") as f:
         json.dump({
             "metadata": {
                 "lookback_days": lookback_days,
@@ -373,6 +385,7 @@ def _run_recalculation(lookback_days: int, start_date: datetime, end_date: datet
             },
             "data": all_results
         }, f, indent=2)
+    os.replace(tmp_file, output_file)
     
     print(f"[OK] Saved to {output_file}")
     print(f"\n{'='*60}")
@@ -5,6 +5,13 @@ Grid search backtest rules across sector/cap/holding-year combinations.
 This uses the existing FastAPI backtest logic (imported directly),
 and only varies the rule sets. To avoid rebalances, each run uses
 years == holding_years so there is a single as_of point per combo.
+
+By default (--engine batched) each sector/holding-period pair loads its
+point-in-time panel once and scores every cap/rule-set combination with
+backend/rule_search.py. --engine full runs the whole backtest per combo;
+both produce the same results. With --workers > 1 the batched engine loads
+panels in this process and shares them with spawned workers through shared
+memory; the workers import only numpy and rule_search.py, not the app.
 """
 
 import argparse
@@ -33,16 +40,20 @@ DEFAULT_OPERATORS = ["gt_zero", "lt_mean", "lt_median"]
 _BACKTEST_CONTEXT: Dict[str, Any] = {}
 
 
-def load_fastapi_backtest():
+def _backend_dir() -> str:
+    """backend/ on sys.path, so its modules (main.py, rule_search.py) import by name."""
     repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    fastapi_path = os.path.join(repo_root, "backend", "main.py")
+    backend_dir = os.path.join(repo_root, "backend")
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    return backend_dir
+
+
+def load_fastapi_backtest():
+    fastapi_path = os.path.join(_backend_dir(), "main.py")
     if not os.path.exists(fastapi_path):
         raise FileNotFoundError(f"backend/main.py not found at {fastapi_path}")
 
-    fastapi_dir = os.path.join(repo_root, "backend")
-    if fastapi_dir not in sys.path:
-        sys.path.insert(0, fastapi_dir)
-
     import importlib.util
 
     spec = importlib.util.spec_from_file_location("fastapi_main", fastapi_path)
@@ -85,10 +96,27 @@ def normalize_sector_labels(requested: List[str], available: List[str]) -> List[
     return normalized
 
 
-def _ensure_backtest_context():
+def _ensure_backtest_context(cache_queries: bool = True):
     if _BACKTEST_CONTEXT:
         return
     fastapi_main = load_fastapi_backtest()
+    import rule_search
+    from screen_masks import float_column
+
+    _BACKTEST_CONTEXT.update(
+        {
+            "main": fastapi_main,
+            "RuleSearchPeriod": rule_search.RuleSearchPeriod,
+            "evaluate_rule_sets": rule_search.evaluate_rule_sets,
+            "parse_rule_sets": rule_search.parse_rule_sets,
+            "publish_periods": rule_search.publish_periods,
+            "float_column": float_column,
+        }
+    )
+    if not cache_queries:
+        # The batched engine loads each panel once; memoizing the queries would only hold memory.
+        _register_backtest_models(fastapi_main)
+        return
 
     def _cache_wrapper(func, key_fn):
         cache: Dict[Any, Any] = {}
@@ -126,6 +154,17 @@ def _ensure_backtest_context():
             fastapi_main._query_latest_shares,
             lambda symbols, as_of, **_kwargs: (_symbols_key(symbols), _date_key(as_of)),
         )
+    if getattr(fastapi_main, "_load_backtest_panel", None):
+        fastapi_main._load_backtest_panel = _cache_wrapper(
+            fastapi_main._load_backtest_panel,
+            lambda symbols, price_dates, share_dates, event_start, event_end, **_kwargs: (
+                _symbols_key(symbols),
+                tuple(sorted(_date_key(d) for d in set(price_dates))),
+                tuple(sorted(_date_key(d) for d in set(share_dates))),
+                _date_key(event_start),
+                _date_key(event_end),
+            ),
+        )
     if getattr(fastapi_main, "_query_split_events", None):
         fastapi_main._query_split_events = _cache_wrapper(
             fastapi_main._query_split_events,
@@ -154,13 +193,17 @@ def _ensure_backtest_context():
             _key_aligned,
         )
 
+    _register_backtest_models(fastapi_main)
+
+
+def _register_backtest_models(fastapi_main) -> None:
     _BACKTEST_CONTEXT.update(
         {
             "BacktestSectorRequest": fastapi_main.BacktestSectorRequest,
             "BacktestRulesPayload": fastapi_main.BacktestRulesPayload,
             "ScreenerFiltersPayload": fastapi_main.ScreenerFiltersPayload,
             "FundamentalRulePayload": fastapi_main.FundamentalRulePayload,
-            "backtest_sector": fastapi_main.backtest_sector,
+            "backtest_sector": fastapi_main._run_backtest_sector,
             "HTTPException": fastapi_main.HTTPException,
         }
     )
@@ -217,7 +260,19 @@ def _run_combo(task: Tuple[str, str, int, str, List[Dict[str, str]], int, int, f
             "error": str(exc),
         }
 
-    points = result.get("data") or []
+    return _combo_result(sector, cap, hold, rule_id, rules, result.get("data") or [], train_ratio)
+
+
+def _combo_result(
+    sector: str,
+    cap: str,
+    hold: int,
+    rule_id: str,
+    rules: List[Dict[str, str]],
+    points: List[Dict[str, Any]],
+    train_ratio: float,
+) -> Dict[str, Any]:
+    years_for_run = hold
     train_points, test_points = split_train_test(points, train_ratio)
     train_stats = compute_stats(train_points)
     test_stats = compute_stats(test_points)
@@ -277,6 +332,232 @@ def _run_combo(task: Tuple[str, str, int, str, List[Dict[str, str]], int, int, f
     }
 
 
+def _load_search_periods(sector: str, hold: int, lag_days: int, benchmark: str = "SPY") -> List[Any]:
+    """
+    RuleSearchPeriod per rebalance of a single-point backtest (years == holding_years).
+
+    Same universe, ratios and forward returns as backtest_sector computes per period,
+    from one point-in-time panel load for the sector.
+    """
+    fastapi_main = _BACKTEST_CONTEXT["main"]
+    RuleSearchPeriod = _BACKTEST_CONTEXT["RuleSearchPeriod"]
+    float_column = _BACKTEST_CONTEXT["float_column"]
+
+    sector = (sector or "").strip()
+    sector_symbols = fastapi_main._backtest_sector_symbols(sector)
+    etf_store = fastapi_main._get_etf_price_store()
+    if etf_store is None or benchmark not in etf_store:
+        raise fastapi_main.HTTPException(status_code=400, detail=f"Benchmark {benchmark} not found in ETF price file")
+
+    today = dt.datetime.utcnow().date()
+    periods = fastapi_main._backtest_periods(today, hold, hold, lag_days)
+    aligned_by_date = fastapi_main._load_backtest_fundamentals(sector_symbols, [p[0] for p in periods], lag_days)
+    panel = fastapi_main._load_backtest_prices(sector_symbols, periods, today)
+
+    search_periods: List[Any] = []
+    for as_of, end_date, cutoff in periods:
+        records, price_map, _note = fastapi_main._backtest_period_records(
+            sector, sector_symbols, aligned_by_date.get(as_of) or {}, panel, as_of, cutoff
+        )
+        if not records:
+            search_periods.append(RuleSearchPeriod.empty(as_of.isoformat(), end_date.isoformat()))
+            continue
+        symbols = [r["symbol"] for r in records]
+        window = fastapi_main._corporate_action_window(symbols, as_of, end_date, panel)
+        returns = [
+            fastapi_main._window_total_return((price_map.get(sym) or {}).get("close"), window.get(sym))[0]
+            for sym in symbols
+        ]
+        b_start = etf_store.asof(benchmark, as_of)
+        b_end = etf_store.asof(benchmark, end_date)
+        benchmark_return = None
+        if b_start is not None and b_end is not None and b_start > 0:
+            benchmark_return = b_end / b_start - 1.0
+        search_periods.append(
+            RuleSearchPeriod(
+                as_of.isoformat(),
+                end_date.isoformat(),
+                symbols,
+                {field: float_column([r.get(field) for r in records]) for field in (*FUNDAMENTAL_METRICS, "market_cap")},
+                float_column(returns),
+                benchmark_return,
+            )
+        )
+    return search_periods
+
+
+GroupTask = Tuple[str, int, List[Tuple[str, str, List[Dict[str, str]]]], int, int, float]
+
+
+def _load_group(task: GroupTask) -> Tuple[Optional[List[Any]], Optional[List[Dict[str, Any]]]]:
+    """(periods, None) for one sector and holding period, or (None, error rows for all its combos)."""
+    _ensure_backtest_context(cache_queries=False)
+    sector, hold, combos, top_n, lag_days, _train_ratio = task
+
+    BacktestSectorRequest = _BACKTEST_CONTEXT["BacktestSectorRequest"]
+    ScreenerFiltersPayload = _BACKTEST_CONTEXT["ScreenerFiltersPayload"]
+    FundamentalRulePayload = _BACKTEST_CONTEXT["FundamentalRulePayload"]
+    HTTPException = _BACKTEST_CONTEXT["HTTPException"]
+
+    # Same validation as the per-combo path (invalid caps/rules are usage errors there too).
+    for cap, _rule_id, rules in combos:
+        ScreenerFiltersPayload(cap=cap)
+        for r in rules:
+            FundamentalRulePayload(**r)
+
+    error: Optional[str] = None
+    try:
+        BacktestSectorRequest(
+            sector=sector,
+            years=hold,
+            holding_years=hold,
+            top_n=top_n,
+            benchmark="SPY",
+            fundamentals_lag_days=lag_days,
+        )
+        return _load_search_periods(sector, hold, lag_days), None
+    except HTTPException as exc:
+        error = str(exc.detail)
+    except Exception as exc:
+        error = str(exc)
+    return None, [
+        {"sector": sector, "cap": cap, "holding_years": hold, "years": hold, "rule_id": rule_id, "error": error}
+        for cap, rule_id, _rules in combos
+    ]
+
+
+def _cap_chunks(task: GroupTask, parts: int) -> List[Tuple[str, List[Tuple[str, List[Dict[str, str]]]]]]:
+    """(cap, [(rule_id, rules), ...]) work units of a group, each cap split into about `parts` chunks."""
+    _sector, _hold, combos, _top_n, _lag_days, _train_ratio = task
+    chunks: List[Tuple[str, List[Tuple[str, List[Dict[str, str]]]]]] = []
+    for cap in sorted({cap for cap, _rule_id, _rules in combos}):
+        cap_combos = [(rule_id, rules) for c, rule_id, rules in combos if c == cap]
+        size = max(1, math.ceil(len(cap_combos) / max(1, parts)))
+        chunks.extend((cap, cap_combos[i:i + size]) for i in range(0, len(cap_combos), size))
+    return chunks
+
+
+def _chunk_rows(
+    points: List[List[Dict[str, Any]]],
+    task: GroupTask,
+    cap: str,
+    cap_combos: List[Tuple[str, List[Dict[str, str]]]],
+) -> List[Dict[str, Any]]:
+    sector, hold, _combos, _top_n, _lag_days, train_ratio = task
+    return [
+        _combo_result(sector, cap, hold, rule_id, rules, rule_points, train_ratio)
+        for (rule_id, rules), rule_points in zip(cap_combos, points)
+    ]
+
+
+def _ordered_rows(task: GroupTask, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    by_combo = {(row["cap"], row["rule_id"]): row for row in rows}
+    return [by_combo[(cap, rule_id)] for cap, rule_id, _rules in task[2]]
+
+
+def _run_group(task: GroupTask) -> List[Dict[str, Any]]:
+    """Results of every (cap, rule set) combo of one sector and holding period, in `combos` order."""
+    periods, error_rows = _load_group(task)
+    if error_rows is not None:
+        return error_rows
+    evaluate_rule_sets = _BACKTEST_CONTEXT["evaluate_rule_sets"]
+    parse_rule_sets = _BACKTEST_CONTEXT["parse_rule_sets"]
+    top_n = task[3]
+    rows: List[Dict[str, Any]] = []
+    for cap, cap_combos in _cap_chunks(task, 1):
+        points = evaluate_rule_sets(periods, cap, parse_rule_sets([rules for _id, rules in cap_combos]), top_n)
+        rows.extend(_chunk_rows(points, task, cap, cap_combos))
+    return _ordered_rows(task, rows)
+
+
+def _evaluate_shared_chunk(
+    work: Tuple[Dict[str, Any], GroupTask, str, List[Tuple[str, List[Dict[str, str]]]]],
+) -> List[Dict[str, Any]]:
+    """
+    Process-worker entry point: rows of one cap/rule-set chunk over a published panel.
+
+    Imports only backend/rule_search.py (numpy); never main.py, DuckDB or FastAPI.
+    """
+    spec, task, cap, cap_combos = work
+    _backend_dir()
+    import rule_search
+
+    rule_sets = rule_search.parse_rule_sets([rules for _id, rules in cap_combos])
+    points = rule_search.evaluate_shared(spec, cap, rule_sets, task[3])
+    return _chunk_rows(points, task, cap, cap_combos)
+
+
+def _run_groups_shared(groups: List[GroupTask], workers: int, collect) -> None:
+    """
+    Batched engine with process workers.
+
+    This process loads each group's panel (DuckDB via main.py) and publishes it once
+    to shared memory; spawned workers attach to it read-only and evaluate cap/rule-set
+    chunks. Workers never import main.py, so each extra worker adds CPU, not another
+    copy of the data, DuckDB client or caches. The next group loads while workers
+    evaluate the previous one; `collect(group_idx, rows)` is called in group order.
+    """
+    import multiprocessing
+    from collections import deque
+
+    _ensure_backtest_context(cache_queries=False)
+    publish_periods = _BACKTEST_CONTEXT["publish_periods"]
+
+    inflight: deque = deque()
+
+    def finish() -> None:
+        group_idx, task, block, futures, rows = inflight.popleft()
+        try:
+            for fut in futures:
+                rows.extend(fut.result())
+        finally:
+            if block is not None:
+                block.close()
+                block.unlink()
+        collect(group_idx, _ordered_rows(task, rows))
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+        try:
+            for group_idx, task in enumerate(groups, start=1):
+                periods, error_rows = _load_group(task)
+                if error_rows is not None:
+                    inflight.append((group_idx, task, None, [], error_rows))
+                else:
+                    block, spec = publish_periods(periods)
+                    del periods
+                    # Workers get the group's scalars; its combo list stays here.
+                    header = (task[0], task[1], [], task[3], task[4], task[5])
+                    futures = [
+                        executor.submit(_evaluate_shared_chunk, (spec, header, cap, cap_combos))
+                        for cap, cap_combos in _cap_chunks(task, workers)
+                    ]
+                    inflight.append((group_idx, task, block, futures, []))
+                while len(inflight) > 1:
+                    finish()
+            while inflight:
+                finish()
+        finally:
+            for _idx, _task, block, futures, _rows in inflight:
+                for fut in futures:
+                    fut.cancel()
+                if block is not None:
+                    block.close()
+                    block.unlink()
+
+
+def _group_tasks(
+    tasks: List[Tuple[str, str, int, str, List[Dict[str, str]], int, int, float]],
+) -> List[Tuple[str, int, List[Tuple[str, str, List[Dict[str, str]]]], int, int, float]]:
+    """Per-combo tasks (sorted by sector, hold) as one task per sector and holding period."""
+    groups: List[Tuple[str, int, List[Tuple[str, str, List[Dict[str, str]]]], int, int, float]] = []
+    for (sector, hold), items in itertools.groupby(tasks, key=lambda t: (t[0], t[2])):
+        items = list(items)
+        _s, _c, _h, _r, _rules, top_n, lag_days, train_ratio = items[0]
+        groups.append((sector, hold, [(t[1], t[3], t[4]) for t in items], top_n, lag_days, train_ratio))
+    return groups
+
+
 def clamp_int(value: int, min_val: int, max_val: int) -> int:
     return max(min_val, min(max_val, int(value)))
 
@@ -426,6 +707,13 @@ def main() -> int:
     parser.add_argument("--operators", default=",".join(DEFAULT_OPERATORS), help="Rule operators CSV.")
     parser.add_argument("--max-rule-sets", type=int, default=0, help="Limit total rule sets (0 = no limit).")
     parser.add_argument("--train-ratio", type=float, default=0.67, help="Train ratio for split (default: 0.67).")
+    parser.add_argument(
+        "--engine",
+        choices=["batched", "full"],
+        default="batched",
+        help="batched: one panel per sector/holding period, all rule sets at once (default); "
+        "full: one complete backtest per combo.",
+    )
     parser.add_argument("--workers", type=int, default=0, help="Parallel workers (0 = auto, 1 = disabled).")
     parser.add_argument("--chunksize", type=int, default=1, help="Task chunk size per worker (default: 1).")
     parser.add_argument("--checkpoint-every", type=int, default=100, help="Save results every N runs.")
@@ -513,7 +801,30 @@ def main() -> int:
         cpu_count = os.cpu_count() or 1
         workers = max(1, cpu_count - 1)
 
-    if workers <= 1:
+    if args.engine == "batched":
+        groups = _group_tasks(tasks)
+        run_idx = 0
+        last_checkpoint = 0
+
+        def _collect(group_idx: int, rows: List[Dict[str, Any]]) -> None:
+            nonlocal run_idx, last_checkpoint
+            run_idx += len(rows)
+            head = rows[0] if rows else {}
+            print(
+                f"[{group_idx}/{len(groups)}] sector={head.get('sector')} hold={head.get('holding_years')} "
+                f"combos={len(rows)} ({run_idx}/{total_runs} runs)"
+            )
+            results.extend(rows)
+            if args.checkpoint_every and run_idx - last_checkpoint >= args.checkpoint_every:
+                _write_outputs(csv_path, json_path, results, fieldnames)
+                last_checkpoint = run_idx
+
+        if workers <= 1:
+            for group_idx, group in enumerate(groups, start=1):
+                _collect(group_idx, _run_group(group))
+        else:
+            _run_groups_shared(groups, workers, _collect)
+    elif workers <= 1:
         _ensure_backtest_context()
         for run_idx, task in enumerate(tasks, start=1):
             sector, cap, hold, rule_id, _rules, _top_n, _lag_days, _ratio = task